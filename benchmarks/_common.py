@@ -0,0 +1,82 @@
+"""Shared helpers for the benchmark scripts: sys.path setup, program generator, timer.
+
+Run any benchmark from the repository root, e.g. ``python benchmarks/bench_lexer.py``.
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Tuple
+
+# Same convention as tests/conftest.py: compiler modules import relative to src/.
+SRC = str(Path(__file__).resolve().parent.parent / "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+
+_FUNC_TEMPLATE = """\
+// generated function {i}
+int f{i}(int a, int b) {{
+    int x;
+    int y;
+    int total = 0;
+    int buf[8];
+    x = a * 4 + b - {i};
+    y = (x + 3) * (a - 1) / 2;
+    for (x = 0; x < 8; x = x + 1) {{
+        buf[x] = x * y + {i};
+        if (buf[x] >= 100 && y != 0) {{
+            total = total + buf[x] % 7;
+        }} else {{
+            total = total - 1;
+        }}
+    }}
+    while (total > 1000) {{
+        total = total / 2;
+    }}
+    return total + y;
+}}
+
+"""
+
+_MAIN_TEMPLATE = """\
+int main() {{
+    int acc = 0;
+{calls}    print(acc);
+    return 0;
+}}
+"""
+
+
+def generate_program(n_funcs: int) -> str:
+    """A well-typed `.prog` source with `n_funcs` loop-heavy functions plus `main`."""
+    funcs = "".join(_FUNC_TEMPLATE.format(i=i) for i in range(n_funcs))
+    calls = "".join(f"    acc = acc + f{i}({i}, 3);\n" for i in range(n_funcs))
+    return funcs + _MAIN_TEMPLATE.format(calls=calls)
+
+
+def best_of(fn: Callable[[], object], repeat: int = 5) -> Tuple[float, object]:
+    """Run `fn` `repeat` times; return (best wall time in seconds, last result)."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def retained(build: Callable[[], object]) -> Tuple[int, object]:
+    """(bytes still allocated after `build()` returns, result), via tracemalloc."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - before, result
+    finally:
+        tracemalloc.stop()
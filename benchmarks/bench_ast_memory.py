@@ -0,0 +1,29 @@
+"""Retained bytes per AST node: `__slots__` node objects vs. an `ASTArena`."""
+
+from __future__ import annotations
+
+import argparse
+
+from _common import generate_program, retained
+
+from lexer.lexer import Lexer
+from parser.arena import ASTArena
+from parser.parser import Parser
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--funcs", type=int, default=1000, help="generated functions (default: 1000)")
+    args = ap.parse_args()
+
+    toks = Lexer(generate_program(args.funcs)).tokenize_buffer()
+    tree_bytes, tree = retained(lambda: Parser(toks).parse())
+    arena_bytes, arena = retained(lambda: ASTArena.from_tree(tree))
+    n = len(arena)
+    print(f"{n:,} AST nodes")
+    for label, nbytes in (("node objects", tree_bytes), ("ASTArena", arena_bytes)):
+        print(f"  {label:<13} {nbytes / 1e6:8.2f} MB  {nbytes / n:7.1f} B/node")
+
+
+if __name__ == "__main__":
+    main()
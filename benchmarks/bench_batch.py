@@ -0,0 +1,47 @@
+"""Batch compile throughput: `main.py -j N --out-dir DIR` over many generated files."""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import os
+import tempfile
+from pathlib import Path
+
+from _common import best_of, generate_program
+
+import main as driver
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--files", type=int, default=32, help="generated sources (default: 32)")
+    ap.add_argument("--funcs", type=int, default=40, help="functions per source (default: 40)")
+    ap.add_argument("--jobs", type=int, nargs="+",
+                    default=sorted({1, 2, 4, os.cpu_count() or 1}),
+                    help="worker counts to compare (default: 1 2 4 and the CPU count)")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = generate_program(args.funcs)
+        sources = []
+        for i in range(args.files):
+            path = Path(tmp) / f"f{i}.prog"
+            path.write_text(src, encoding="utf-8")
+            sources.append(str(path))
+        out_dir = str(Path(tmp) / "out")
+        print(f"{args.files} files x {args.funcs} functions, {os.cpu_count()} CPU(s)")
+        base = None
+        for jobs in args.jobs:
+            argv = ["-j", str(jobs), "--out-dir", out_dir, "--emit-asm", *sources]
+            with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+                secs, status = best_of(lambda: driver.main(argv), args.repeat)
+            assert status == 0
+            base = base or secs
+            print(f"  -j {jobs:<3} {secs * 1e3:9.1f} ms  {args.files / secs:7.1f} files/s"
+                  f"  ({base / secs:4.2f}x -j {args.jobs[0]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Dead code elimination on long dead chains: time per instruction as the chain grows.
+
+Each function is `CONST %0; ADD %1 %0 %0; ADD %2 %1 %1; ...` with only the
+last temp unread, the case a rescan-until-nothing-changes DCE handles in
+time quadratic in the chain length. A flat time per instruction means the
+pass is linear.
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from _common import best_of
+
+from ir.ir import ADD, CONST, RET, IRFunction, IRProgram
+from optimizer import PassManager
+
+
+def dead_chain(n: int) -> IRProgram:
+    body = [CONST("%0", "int", 1)]
+    body += [ADD(f"%{i}", f"%{i - 1}", f"%{i - 1}") for i in range(1, n)]
+    body.append(RET(None))
+    return IRProgram([IRFunction("chain", "void", [], [], body)])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000, 16000],
+                    help="chain lengths (default: 1000 4000 16000)")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    for n in args.sizes:
+        program = dead_chain(n)
+        secs, result = best_of(lambda: PassManager(["dce"]).run(program), args.repeat)
+        assert result.stats_per_pass["dce"]["chain"] == n
+        print(f"  {n:>7} instructions  {secs * 1e3:8.1f} ms  {secs / n * 1e6:6.2f} us/instruction")
+
+
+if __name__ == "__main__":
+    main()
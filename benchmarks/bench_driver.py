@@ -0,0 +1,46 @@
+"""End-to-end driver time (`main.main`) with logging off, at -v and at -vv.
+
+The default run compiles a ~50k-line generated program; stdout is discarded
+so the numbers measure building the log text, not the terminal.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import os
+import tempfile
+
+from _common import best_of, generate_program
+
+import main as driver
+
+
+def compile_time(path: str, flags: list, repeat: int) -> float:
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        secs, _ = best_of(lambda: driver.main([*flags, path]), repeat)
+    return secs
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--funcs", type=int, default=2200,
+                    help="generated functions (default: 2200, ~50k lines)")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    src = generate_program(args.funcs)
+    with tempfile.NamedTemporaryFile("w", suffix=".prog", delete=False) as f:
+        f.write(src)
+    try:
+        print(f"{args.funcs} functions, {src.count(chr(10))} lines")
+        quiet = compile_time(f.name, [], args.repeat)
+        for label, flags in (("quiet", []), ("-v", ["-v"]), ("-vv", ["-vv"])):
+            secs = quiet if not flags else compile_time(f.name, flags, args.repeat)
+            print(f"  {label:<6} {secs * 1e3:9.1f} ms  ({secs / quiet:4.2f}x quiet)")
+    finally:
+        os.unlink(f.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Semantic front end: type check + a separate unused-variable walk vs. finding them while checking."""
+
+from __future__ import annotations
+
+import argparse
+
+from _common import best_of, generate_program
+
+from lexer.lexer import Lexer
+from parser.parser import Parser
+from type_checker import TypeChecker
+from unused_warnings import check_and_find_unused, unused_variable_warnings
+
+
+def separate(ast):
+    TypeChecker().analyze(ast)
+    return unused_variable_warnings(ast)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--funcs", type=int, default=1000, help="generated functions (default: 1000)")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    ast = Parser(Lexer(generate_program(args.funcs)).tokenize()).parse()
+    base, w1 = best_of(lambda: separate(ast), args.repeat)
+    one, w2 = best_of(lambda: check_and_find_unused(ast), args.repeat)
+    assert w1 == w2, "warnings diverged"
+    for label, secs in (("two walks", base), ("one walk", one)):
+        print(f"  {label:<10} {secs * 1e3:9.1f} ms  {base / secs:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Edit-compile latency in the compile daemon: one edited function vs. a cold compile.
+
+Compiles a generated program through `compile_server.handle_request` with a
+warm cache, then again after changing a constant in one function, and
+compares that with compiling the same edit from scratch.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from _common import generate_program
+
+import compile_server
+from incremental import LRUCache
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--funcs", type=int, default=500, help="generated functions (default: 500)")
+    ap.add_argument("--edits", type=int, default=5, help="single-function edits to time")
+    args = ap.parse_args()
+
+    src = generate_program(args.funcs)
+    argv = ["gen.prog", "--emit-asm", "-"]
+    cache = LRUCache(compile_server.DEFAULT_CACHE_ENTRIES)
+    t0 = time.perf_counter()
+    compile_server.handle_request({"argv": argv, "source": src}, cache)
+    cold = time.perf_counter() - t0
+    print(f"{args.funcs} functions, {src.count(chr(10))} lines")
+    print(f"  cold compile            {cold * 1e3:9.1f} ms")
+
+    warm, scratch = [], []
+    for i in range(args.edits):
+        fn = (i * 37) % args.funcs
+        edited = src.replace(f"b - {fn};", f"b - {fn + 1000};", 1)
+        t0 = time.perf_counter()
+        a = compile_server.handle_request({"argv": argv, "source": edited}, cache)
+        warm.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        b = compile_server.handle_request({"argv": argv, "source": edited})
+        scratch.append(time.perf_counter() - t0)
+        assert a == b, "incremental output differs from a full compile"
+    print(f"  one function edited     {min(warm) * 1e3:9.1f} ms  (incremental)")
+    print(f"  same edit from scratch  {min(scratch) * 1e3:9.1f} ms  ({min(scratch) / min(warm):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
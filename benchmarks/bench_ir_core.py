@@ -0,0 +1,44 @@
+"""IR footprint and pass speed: retained bytes per instruction, time per pass.
+
+Lowers a generated program and reports the memory its IR keeps alive, then
+times each optimization pass on its own over the lowered program and the
+whole pipeline of one `-O` preset.
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from _common import best_of, generate_program, retained
+
+from ir import ast_to_ir
+from lexer.lexer import Lexer
+from optimizer import PASSES, PassManager, pipeline_for
+from parser.parser import Parser
+from type_checker import TypeChecker
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--funcs", type=int, default=500, help="generated functions (default: 500)")
+    ap.add_argument("-O", dest="level", type=int, default=2, help="pipeline preset (default: 2)")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    ast = Parser(Lexer(generate_program(args.funcs)).tokenize()).parse()
+    TypeChecker().analyze(ast)
+    nbytes, program = retained(lambda: ast_to_ir(ast))
+    n = sum(len(f.instructions) for f in program.functions)
+    print(f"{args.funcs} functions, {n:,} instructions")
+    print(f"  IR memory      {nbytes / 1e6:8.2f} MB  {nbytes / n:7.1f} B/instruction")
+
+    for name in PASSES:
+        secs, _ = best_of(lambda: PassManager([name]).run(program), args.repeat)
+        print(f"  {name:<14} {secs * 1e3:8.1f} ms")
+    pipeline = pipeline_for(args.level)
+    secs, _ = best_of(lambda: PassManager(pipeline).run(program), args.repeat)
+    print(f"  {'-O' + str(args.level) + ' pipeline':<14} {secs * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
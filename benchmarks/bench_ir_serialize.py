@@ -0,0 +1,51 @@
+"""Resuming from saved IR (--from-ir) vs. re-running the front end and optimizer.
+
+Times getting the optimized IR of a generated program three ways: from
+source (lex, parse, check, lower, -O2), decoding the binary IR and parsing
+the text IR, with pickle for reference, and prints each encoding's size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import pickle
+
+from _common import best_of, generate_program
+
+from ir import ast_to_ir, decode_ir, encode_ir, ir_to_text
+from lexer.lexer import Lexer
+from optimizer import PassManager, pipeline_for
+from parser.parser import Parser
+from type_checker import TypeChecker
+
+
+def from_source(src: str):
+    ast = Parser(Lexer(src).tokenize()).parse()
+    TypeChecker().analyze(ast)
+    return PassManager(pipeline_for(2)).run(ast_to_ir(ast)).program
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--funcs", type=int, default=1000, help="generated functions (default: 1000)")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    src = generate_program(args.funcs)
+    base, program = best_of(lambda: from_source(src), max(1, args.repeat // 2))
+    binary, text = encode_ir(program), ir_to_text(program)
+    pickled = pickle.dumps(program, protocol=pickle.HIGHEST_PROTOCOL)
+    print(f"{args.funcs} functions, {sum(len(f.instructions) for f in program.functions)} instructions")
+    print(f"  {'from source':<14} {base * 1e3:9.1f} ms  {len(src):>10} bytes")
+    for label, data, load in (
+        ("binary IR", binary, decode_ir),
+        ("text IR", text, decode_ir),
+        ("pickle", pickled, pickle.loads),
+    ):
+        secs, loaded = best_of(lambda: load(data), args.repeat)
+        assert repr(loaded) == repr(program), f"{label} did not round-trip"
+        print(f"  {label:<14} {secs * 1e3:9.1f} ms  {len(data):>10} bytes  ({base / secs:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Lexer throughput: character-scanning engine vs. the regex master-pattern engine."""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+
+from _common import best_of, generate_program
+
+from lexer.lexer import ENGINES, Lexer, map_source
+
+
+def _key(tokens):
+    return [(t.type, t.value, t.line, t.column) for t in tokens]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--funcs", type=int, default=2000, help="generated functions (default: 2000)")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    src = generate_program(args.funcs)
+    size_mb = len(src) / 1e6
+    print(f"source: {len(src):,} chars ({size_mb:.2f} MB)")
+
+    results = {}
+    for engine in ENGINES:
+        secs, toks = best_of(lambda: Lexer(src, engine=engine).tokenize(), args.repeat)
+        results[engine] = toks
+        print(
+            f"  {engine:<6} {secs * 1e3:9.1f} ms  {len(toks) / secs / 1e6:6.2f} Mtok/s"
+            f"  {size_mb / secs:6.2f} MB/s"
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "gen.prog")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(src)
+        buf = map_source(path)
+        try:
+            secs, toks = best_of(lambda: Lexer(buf, engine="regex").tokenize(), args.repeat)
+            print(
+                f"  {'mmap':<6} {secs * 1e3:9.1f} ms  {len(toks) / secs / 1e6:6.2f} Mtok/s"
+                f"  {size_mb / secs:6.2f} MB/s"
+            )
+            results["mmap"] = _key(toks)
+        finally:
+            buf.close()
+
+    ref = _key(results["scan"])
+    for engine in list(ENGINES[1:]) + ["mmap"]:
+        got = results[engine] if engine == "mmap" else _key(results[engine])
+        if got != ref:
+            raise SystemExit(f"token mismatch: {engine} differs from scan")
+    idents = [t.value for t in results["regex"] if t.type == "IDENTIFIER"]
+    print(f"identical token streams ({len(ref):,} tokens)")
+    print(f"identifier objects: {len({id(v) for v in idents}):,} for {len(idents):,} occurrences")
+
+
+if __name__ == "__main__":
+    main()
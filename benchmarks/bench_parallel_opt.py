@@ -0,0 +1,46 @@
+"""Optimizer time for one large program: serial vs. `PassManager(jobs=N)`."""
+
+from __future__ import annotations
+
+import argparse
+import os
+
+from _common import best_of, generate_program
+
+from ir import ast_to_ir
+from lexer.lexer import Lexer
+from optimizer import PassManager, pipeline_for
+from parser.parser import Parser
+from type_checker import TypeChecker
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--funcs", type=int, default=2000, help="generated functions (default: 2000)")
+    ap.add_argument("-O", dest="level", type=int, default=2, help="pipeline preset (default: 2)")
+    ap.add_argument("--jobs", type=int, nargs="+",
+                    default=sorted({1, 2, 4, os.cpu_count() or 1}),
+                    help="worker counts to compare (default: 1 2 4 and the CPU count)")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    ast = Parser(Lexer(generate_program(args.funcs)).tokenize()).parse()
+    TypeChecker().analyze(ast)
+    program = ast_to_ir(ast)
+    pipeline = pipeline_for(args.level)
+    size = sum(len(f.instructions) for f in program.functions)
+    print(f"{args.funcs} functions, {size} instructions, -O{args.level}, {os.cpu_count()} CPU(s)")
+    base = expected = None
+    for jobs in args.jobs:
+        secs, result = best_of(
+            lambda: PassManager(pipeline, jobs=jobs, min_parallel_size=0).run(program),
+            args.repeat,
+        )
+        expected = expected or repr(result.program)
+        assert repr(result.program) == expected, f"-j {jobs} changed the optimized program"
+        base = base or secs
+        print(f"  jobs {jobs:<3} {secs * 1e3:9.1f} ms  ({base / secs:4.2f}x jobs {args.jobs[0]})")
+
+
+if __name__ == "__main__":
+    main()
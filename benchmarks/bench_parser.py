@@ -0,0 +1,45 @@
+"""Parser throughput on expression-heavy code (tokens are lexed once, outside the timing)."""
+
+from __future__ import annotations
+
+import argparse
+
+from _common import best_of, generate_program
+
+from lexer.lexer import Lexer
+from parser.parser import Parser
+
+_EXPR_FUNC = """\
+int e{i}(int a, int b, int c) {{
+    int r;
+    r = a + b * c - (a - b) / (c + 1) % 7;
+    r = r * 2 + a * 3 - b * 4 + c * 5 - 6;
+    if (a < b && b <= c || !(a == c) && r != 0) {{ r = -r; }}
+    r = (a + 1) * (b + 2) * (c + 3) + e{i}(a, b, c - 1) - r;
+    return r + 1 + 2 + 3 + 4 + 5 + 6 + 7 + 8 + 9 + 10;
+}}
+
+"""
+
+
+def expression_program(n_funcs: int) -> str:
+    return "".join(_EXPR_FUNC.format(i=i) for i in range(n_funcs)) + "int main() { return 0; }\n"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--funcs", type=int, default=1000, help="generated functions (default: 1000)")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    for label, src in (
+        ("expression-heavy", expression_program(args.funcs)),
+        ("mixed statements", generate_program(args.funcs)),
+    ):
+        toks = Lexer(src).tokenize()
+        secs, _ = best_of(lambda: Parser(toks).parse(), args.repeat)
+        print(f"  {label:<17} {len(toks):>9,} tokens  {secs * 1e3:9.1f} ms  {len(toks) / secs / 1e6:6.2f} Mtok/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Name lookup in deeply nested blocks: chained `SymbolTable`s vs. the flat `ScopeStack`."""
+
+from __future__ import annotations
+
+import argparse
+
+from _common import best_of
+
+from lexer.lexer import Lexer
+from parser.parser import Parser
+from symbol_table import ScopeStack, SymbolTable, VarSymbol
+from type_checker import TypeChecker
+
+
+def nested_program(depth: int, reads: int) -> str:
+    """`main` with `depth` nested blocks; the innermost reads the outermost local."""
+    opens = "".join(f"{{ int v{d} = {d}; " for d in range(depth))
+    body = "".join("x = x + v0; " for _ in range(reads))
+    return f"int main() {{ int x = 0; {opens}{body}{'} ' * depth}return x; }}\n"
+
+
+def lookups(depth: int, n: int) -> None:
+    chain = SymbolTable()
+    chain.define(VarSymbol("v0", "int"))
+    flat = ScopeStack()
+    flat.push()
+    flat.define(VarSymbol("v0", "int"))
+    for d in range(1, depth):
+        chain = SymbolTable(chain)
+        chain.define(VarSymbol(f"v{d}", "int"))
+        flat.push()
+        flat.define(VarSymbol(f"v{d}", "int"))
+    for label, table in (("SymbolTable chain", chain), ("ScopeStack", flat)):
+        secs, _ = best_of(lambda: [table.lookup("v0") for _ in range(n)])
+        print(f"  {label:<17} depth {depth:>4}  {secs / n * 1e9:8.1f} ns/lookup")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--depth", type=int, default=200, help="nesting depth (default: 200)")
+    ap.add_argument("--reads", type=int, default=5000, help="reads in the innermost block")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    lookups(args.depth, 100_000)
+    ast = Parser(Lexer(nested_program(args.depth, args.reads)).tokenize()).parse()
+    secs, _ = best_of(lambda: TypeChecker().analyze(ast), args.repeat)
+    print(f"  TypeChecker       depth {args.depth:>4}  {secs * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""SSA construction and destruction on one long function: time per instruction.
+
+The function is a run of `if (x) x = x + k;` statements on one variable, so
+every statement ends at a join that needs a PHI, and the dominator tree is
+as deep as the function is long. A flat time per instruction means both
+passes scale to large functions.
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from _common import best_of
+
+from ir.ir import ADD, CONST, FUNC_ENTRY, JMP_IF_NOT, LABEL, LOAD, RET, STORE, IRFunction, IRProgram
+from optimizer import PassManager
+
+
+def diamonds(n: int) -> IRProgram:
+    body = [FUNC_ENTRY("chain", "int", ["a"]), LOAD("%0", "a"), STORE("x", "%0")]
+    t = 1
+    for i in range(n):
+        body += [
+            LOAD(f"%{t}", "x"), JMP_IF_NOT(f"%{t}", f"L{i}"),
+            CONST(f"%{t + 1}", "int", i), ADD(f"%{t + 2}", f"%{t}", f"%{t + 1}"),
+            STORE("x", f"%{t + 2}"), LABEL(f"L{i}"),
+        ]
+        t += 3
+    body += [LOAD(f"%{t}", "x"), RET(f"%{t}")]
+    return IRProgram([IRFunction("chain", "int", ["a"], ["int"], body)])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000, 16000],
+                    help="statements (default: 1000 4000 16000)")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    for n in args.sizes:
+        program = diamonds(n)
+        size = len(program.functions[0].instructions)
+        secs, result = best_of(lambda: PassManager(["ssa", "unssa"]).run(program), args.repeat)
+        assert result.stats_per_pass["ssa"]["chain"]["phis"] == n
+        print(f"  {size:>7} instructions  {secs * 1e3:8.1f} ms  "
+              f"{secs / size * 1e6:6.2f} us/instruction")
+
+
+if __name__ == "__main__":
+    main()
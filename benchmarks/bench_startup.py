@@ -0,0 +1,76 @@
+"""Cold start of one compile: `python -X importtime main.py ... --optim none --emit-asm`.
+
+Runs the driver in fresh interpreters and reports the best wall time and
+the import time it spends beyond a bare `python -c pass`, with the most
+expensive top-level imports. With `--budget-ms` it exits with status 1 when
+the import time is over budget, as a regression check.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import SRC, generate_program
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def _imports(argv):
+    """(wall seconds, {top-level module: cumulative us}) of one interpreter run."""
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        cwd=SRC, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - t0
+    top = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m and not m.group(3):  # not indented: imported by the script itself
+            top[m.group(4)] = top.get(m.group(4), 0) + int(m.group(2))
+    return wall, top
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--funcs", type=int, default=5, help="generated functions (default: 5)")
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--top", type=int, default=8, help="expensive imports to list")
+    ap.add_argument("--budget-ms", type=float, help="fail when import time exceeds this")
+    ap.add_argument("extra", nargs="*", help="more driver options (e.g. -O2)")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "gen.prog")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(generate_program(args.funcs))
+        argv = ["main.py", source, "--optim", "none", "--emit-asm", os.devnull, *args.extra]
+        best = None
+        for _ in range(args.repeat):
+            _, base = _imports(["-c", "pass"])
+            wall, top = _imports(argv)
+            own = {m: us for m, us in top.items() if m not in base}
+            total = sum(own.values()) / 1e3
+            if best is None or total < best[1]:
+                best = (wall, total, own)
+            best = (min(best[0], wall),) + best[1:]
+
+    wall, total, own = best
+    print(f"main.py {' '.join(argv[1:])}")
+    print(f"  wall time    {wall * 1e3:8.1f} ms  (best of {args.repeat})")
+    print(f"  import time  {total:8.1f} ms  ({len(own)} top-level imports)")
+    for module, us in sorted(own.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"    {module:<24} {us / 1e3:7.1f} ms")
+    if args.budget_ms is not None and total > args.budget_ms:
+        print(f"over the {args.budget_ms:.1f} ms import budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Peak memory of eager tokenization vs. streaming `Lexer.iter_tokens()` as input grows."""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import os
+import tempfile
+import tracemalloc
+
+from _common import generate_program
+
+from lexer.lexer import Lexer
+from parser.parser import Parser
+
+
+def _peak(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _eager_tokens(path: str) -> None:
+    with open(path, encoding="utf-8") as f:
+        toks = Lexer(f.read()).tokenize()
+    collections.deque(toks, maxlen=0)
+
+
+def _stream_tokens(path: str) -> None:
+    with open(path, encoding="utf-8") as f:
+        collections.deque(Lexer().iter_tokens(f), maxlen=0)
+
+
+def _eager_parse(path: str) -> None:
+    with open(path, encoding="utf-8") as f:
+        Parser(Lexer(f.read()).tokenize()).parse()
+
+
+def _stream_parse(path: str) -> None:
+    with open(path, encoding="utf-8") as f:
+        Parser(Lexer().iter_tokens(f)).parse()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--funcs", type=int, nargs="+", default=[250, 500, 1000])
+    args = ap.parse_args()
+
+    print(f"{'funcs':>6} {'MB src':>7} | {'lex eager':>10} {'lex stream':>11} | {'parse eager':>12} {'parse stream':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.funcs:
+            path = os.path.join(tmp, f"gen_{n}.prog")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(generate_program(n))
+            size = os.path.getsize(path) / 1e6
+            row = [_peak(lambda fn=fn: fn(path)) / 1e6 for fn in (_eager_tokens, _stream_tokens, _eager_parse, _stream_parse)]
+            print(
+                f"{n:>6} {size:>7.2f} | {row[0]:>8.1f}MB {row[1]:>9.1f}MB | {row[2]:>10.1f}MB {row[3]:>11.1f}MB"
+            )
+    print("(streaming lex peak stays flat; streaming parse peak is the AST alone)")
+
+
+if __name__ == "__main__":
+    main()
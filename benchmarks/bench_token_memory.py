@@ -0,0 +1,33 @@
+"""Retained bytes per token: a list of `Token` objects vs. a `TokenBuffer`."""
+
+from __future__ import annotations
+
+import argparse
+
+from _common import generate_program, retained
+
+from lexer.lexer import Lexer
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--funcs", type=int, default=1000, help="generated functions (default: 1000)")
+    args = ap.parse_args()
+
+    src = generate_program(args.funcs)
+    lexer = Lexer(src)
+
+    rows = [
+        ("Token objects (scan)", lambda: Lexer(src, engine="scan").tokenize()),
+        ("Token objects (regex)", lambda: Lexer(src, engine="regex").tokenize()),
+        ("TokenBuffer", lexer.tokenize_buffer),
+    ]
+    print(f"source: {len(src):,} chars")
+    for label, build in rows:
+        nbytes, toks = retained(build)
+        print(f"  {label:<22} {len(toks):>9,} tokens  {nbytes / 1e6:8.2f} MB  {nbytes / len(toks):7.1f} B/token")
+        del toks
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,14 @@ from __future__ import annotations
 
 from typing import Callable, Dict, List, Set, Tuple
 
-from ir.ir import IRFunction, IRProgram, Instruction, is_temp
+from ir.ir import IRFunction, IRProgram, Instruction, Temp, is_temp
+from ir.opcodes import (
+    FUNC_ENTRY, CONST, LOAD, STORE, LOAD_ARR, STORE_ARR, ALLOC_ARRAY,
+    ADD, SUB, MUL, DIV, MOD, NEG, INC, DEC,
+    LT, LE, GT, GE, EQ, NE, AND, OR, NOT,
+    LABEL, JMP, JMP_IF, JMP_IF_NOT, PARAM, CALL, RET, PRINT, READ_INT, EXIT,
+)
+from ir.ssa import lower_phis
 
 _kw = frozenset(
     "alignas alignof and and_eq asm auto bitand bitor bool break case catch "
@@ -17,8 +24,8 @@ _kw = frozenset(
     "template this thread_local throw true try typedef typeid typename union "
     "unsigned using virtual void volatile wchar_t while xor xor_eq".split()
 )
-_SYM = {"ADD": "+", "SUB": "-", "MUL": "*", "DIV": "/", "MOD": "%"}
-_CMP = {"LT": "<", "LE": "<=", "GT": ">", "GE": ">=", "EQ": "==", "NE": "!="}
+_SYM = {ADD: "+", SUB: "-", MUL: "*", DIV: "/", MOD: "%"}
+_CMP = {LT: "<", LE: "<=", GT: ">", GE: ">=", EQ: "==", NE: "!="}
 _PRINT = {
     "string": lambda v: f'std::printf("%s\\n", reinterpret_cast<const char*>(static_cast<uintptr_t>({v})));',
     "char": lambda v: f'std::printf("%c\\n", static_cast<int>(static_cast<char>({v})));',
@@ -29,7 +36,7 @@ _PRINT = {
 
 class CppTranspileBackend:
     def __init__(self, prog: IRProgram) -> None:
-        self.prog = prog
+        self.prog = lower_phis(prog)  # SSA form: see ir.ssa
         self.lines: List[str] = []
         self.strs: List[Tuple[str, str]] = []
 
@@ -37,7 +44,7 @@ class CppTranspileBackend:
         if not name:
             return ""
         if is_temp(name):
-            return "_t" + name[1:]
+            return f"_t{int(name)}"
         return "_" + name if name in _kw else name
 
     def _intern_str(self, val: str) -> str:
@@ -65,29 +72,29 @@ class CppTranspileBackend:
                 parts.append(ch)
         return '"' + "".join(parts) + '"'
 
-    def _scan_function(self, func: IRFunction) -> Tuple[Set[str], Set[str], Dict[str, int]]:
-        temps: Set[str] = set()
+    def _scan_function(self, func: IRFunction) -> Tuple[Set[Temp], Set[str], Dict[str, int]]:
+        temps: Set[Temp] = set()
         arrays: Dict[str, int] = {}
         scalars: Set[str] = set(func.param_names)
 
         def note(x) -> None:
-            if isinstance(x, str) and is_temp(x):
+            if is_temp(x):
                 temps.add(x)
 
         for ins in func.instructions:
             op, a = ins.op, ins.args
             for x in a:
                 note(x)
-            if op == "ALLOC_ARRAY":
+            if op is ALLOC_ARRAY:
                 arrays[a[0]] = int(a[1])
-            elif op == "STORE" and not is_temp(a[0]):
+            elif op is STORE and not is_temp(a[0]):
                 scalars.add(a[0])
-            elif op == "LOAD" and not is_temp(a[1]):
+            elif op is LOAD and not is_temp(a[1]):
                 scalars.add(a[1])
-            elif op == "LOAD_ARR":
+            elif op is LOAD_ARR:
                 arrays.setdefault(a[1], 0)
                 note(a[2])
-            elif op == "STORE_ARR":
+            elif op is STORE_ARR:
                 arrays.setdefault(a[0], 0)
                 note(a[1])
                 note(a[2])
@@ -109,7 +116,7 @@ class CppTranspileBackend:
         self.strs = []
         for fn in self.prog.functions:
             for ins in fn.instructions:
-                if ins.op == "CONST" and isinstance(ins.args[1], tuple) and ins.args[1][0] == "string":
+                if ins.op is CONST and isinstance(ins.args[1], tuple) and ins.args[1][0] == "string":
                     self._intern_str(ins.args[1][1])
 
         for h in ("<cstdint>", "<cstdio>", "<cstdlib>", "<vector>"):
@@ -142,9 +149,9 @@ class CppTranspileBackend:
             ins = instructions[i]
             out.append(ins)
             if (
-                ins.op == "RET"
+                ins.op is RET
                 and i + 1 < n
-                and instructions[i + 1].op == "JMP"
+                and instructions[i + 1].op is JMP
             ):
                 i += 2
             else:
@@ -163,8 +170,7 @@ class CppTranspileBackend:
         pn = set(func.param_names)
         for s in sorted(scalars - pn):
             self._ln(f"    int {self._cid(s)} = 0;")
-        key = lambda x: int(x[1:]) if x[1:].isdigit() else x
-        for t in sorted(temps, key=key):
+        for t in sorted(temps):
             self._ln(f"    int {self._cid(t)} = 0;")
 
         kinds: Dict[str, str] = {p: "int" for p in func.param_names}
@@ -178,22 +184,22 @@ class CppTranspileBackend:
         I: Callable[[str], None] = lambda s: self._ln(f"    {s}")
         c = self._cid
 
-        if op == "FUNC_ENTRY":
+        if op is FUNC_ENTRY:
             return
-        if op == "LABEL":
+        if op is LABEL:
             self._ln(f"  {c(a[0])}:")
             return
-        if op == "JMP":
+        if op is JMP:
             I(f"goto {c(a[0])};")
             return
-        if op == "JMP_IF":
+        if op is JMP_IF:
             I(f"if ({c(a[0])}) goto {c(a[1])};")
             return
-        if op == "JMP_IF_NOT":
+        if op is JMP_IF_NOT:
             I(f"if (!{c(a[0])}) goto {c(a[1])};")
             return
 
-        if op == "CONST":
+        if op is CONST:
             d, (kind, val) = a[0], a[1]
             kinds[d] = kind
             if kind in ("int", "uint32", "bool"):
@@ -206,38 +212,38 @@ class CppTranspileBackend:
             else:
                 I(f"{c(d)} = static_cast<int>(reinterpret_cast<uintptr_t>(static_cast<const void*>({self._intern_str(val)})));")
             return
-        if op == "LOAD":
+        if op is LOAD:
             kinds[a[0]] = kinds.get(a[1], "int")
             I(f"{c(a[0])} = {c(a[1])};")
             return
-        if op == "STORE":
+        if op is STORE:
             kinds[a[0]] = kinds.get(a[1], "int")
             I(f"{c(a[0])} = {c(a[1])};")
             return
-        if op == "ALLOC_ARRAY":
+        if op is ALLOC_ARRAY:
             I(f"{c(a[0])}.resize(static_cast<size_t>({int(a[1])}));")
             return
-        if op == "LOAD_ARR":
+        if op is LOAD_ARR:
             I(f"{c(a[0])} = {c(a[1])}[static_cast<size_t>({c(a[2])})];")
             return
-        if op == "STORE_ARR":
+        if op is STORE_ARR:
             I(f"{c(a[0])}[static_cast<size_t>({c(a[1])})] = {c(a[2])};")
             return
 
         if op in _SYM:
             d, l, r = a
-            kinds[d] = "int" if op == "MOD" else kinds.get(l, "int")
+            kinds[d] = "int" if op is MOD else kinds.get(l, "int")
             I(f"{c(d)} = {c(l)} {_SYM[op]} {c(r)};")
             return
-        if op == "NEG":
+        if op is NEG:
             kinds[a[0]] = kinds.get(a[1], "int")
             I(f"{c(a[0])} = -{c(a[1])};")
             return
-        if op == "INC":
+        if op is INC:
             kinds[a[0]] = kinds.get(a[1], "int")
             I(f"{c(a[0])} = {c(a[1])} + 1;")
             return
-        if op == "DEC":
+        if op is DEC:
             kinds[a[0]] = kinds.get(a[1], "int")
             I(f"{c(a[0])} = {c(a[1])} - 1;")
             return
@@ -246,35 +252,35 @@ class CppTranspileBackend:
             kinds[a[0]] = "bool"
             I(f"{c(a[0])} = ({c(a[1])} {_CMP[op]} {c(a[2])}) ? 1 : 0;")
             return
-        if op == "AND":
+        if op is AND:
             kinds[a[0]] = "bool"
             I(f"{c(a[0])} = ({c(a[1])} != 0 && {c(a[2])} != 0) ? 1 : 0;")
             return
-        if op == "OR":
+        if op is OR:
             kinds[a[0]] = "bool"
             I(f"{c(a[0])} = ({c(a[1])} != 0 || {c(a[2])} != 0) ? 1 : 0;")
             return
-        if op == "NOT":
+        if op is NOT:
             kinds[a[0]] = "bool"
             I(f"{c(a[0])} = (!{c(a[1])}) ? 1 : 0;")
             return
 
-        if op == "PRINT":
+        if op is PRINT:
             for arg in a:
                 k = kinds.get(arg, "int")
                 I(_PRINT.get(k, _PRINT["int"])(c(arg)))
             return
-        if op == "READ_INT":
+        if op is READ_INT:
             kinds[a[0]] = "int"
             I(f'std::scanf("%d", static_cast<void*>(&{c(a[0])}));')
             return
-        if op == "EXIT":
+        if op is EXIT:
             I(f"std::exit(static_cast<int>({c(a[0])}));")
             return
-        if op == "PARAM":
+        if op is PARAM:
             pend.append(c(a[0]))
             return
-        if op == "CALL":
+        if op is CALL:
             dest, name, n = a[0], a[1], int(a[2])
             args, callee = pend[:n], c(name)
             del pend[:n]
@@ -284,7 +290,7 @@ class CppTranspileBackend:
             else:
                 I(f"{callee}({', '.join(args)});")
             return
-        if op == "RET":
+        if op is RET:
             if func.name == "main":
                 I(f"return static_cast<int>({c(a[0])});" if a[0] else "return 0;")
             elif func.return_type == "void":
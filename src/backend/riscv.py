@@ -6,9 +6,16 @@ a7=93 exit with status. Entry is ``_start`` → ``call main`` → ``ecall`` exit
 """
 
 from __future__ import annotations
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from ir.ir import IRFunction, IRProgram
+from ir.opcodes import (
+    FUNC_ENTRY, CONST, LOAD, STORE, LOAD_ARR, STORE_ARR, ALLOC_ARRAY,
+    ADD, SUB, MUL, DIV, MOD, NEG, INC, DEC,
+    LT, LE, GT, GE, EQ, NE, AND, OR, NOT,
+    LABEL, JMP, JMP_IF, JMP_IF_NOT, PARAM, CALL, RET, PRINT, READ_INT, EXIT,
+)
+from ir.ssa import lower_phis
 
 # RV32 word size and load/store mnemonics (fixed for Ripes).
 W = 4
@@ -17,24 +24,31 @@ SD = "sw"
 SHIFT = 2  # log2(W) for array indexing
 
 _AREG = ("a0", "a1", "a2", "a3", "a4", "a5", "a6", "a7")
-_BINOP = {"ADD": "add", "SUB": "sub", "MUL": "mul", "DIV": "div", "MOD": "rem"}
+_BINOP = {ADD: "add", SUB: "sub", MUL: "mul", DIV: "div", MOD: "rem"}
 _CMP = {
-    "LT": ["slt   t0, t0, t1"],
-    "GT": ["slt   t0, t1, t0"],
-    "LE": ["slt   t0, t1, t0", "xori  t0, t0, 1"],
-    "GE": ["slt   t0, t0, t1", "xori  t0, t0, 1"],
-    "EQ": ["xor   t0, t0, t1", "sltiu t0, t0, 1"],
-    "NE": ["xor   t0, t0, t1", "sltu  t0, zero, t0"],
+    LT: ["slt   t0, t0, t1"],
+    GT: ["slt   t0, t1, t0"],
+    LE: ["slt   t0, t1, t0", "xori  t0, t0, 1"],
+    GE: ["slt   t0, t0, t1", "xori  t0, t0, 1"],
+    EQ: ["xor   t0, t0, t1", "sltiu t0, t0, 1"],
+    NE: ["xor   t0, t0, t1", "sltu  t0, zero, t0"],
 }
 _DEF = frozenset({
-    "CONST", "LOAD", "LOAD_ARR", "READ_INT", "ADD", "SUB", "MUL", "DIV", "MOD",
-    "NEG", "INC", "DEC", "LT", "LE", "GT", "GE", "EQ", "NE", "AND", "OR", "NOT",
+    CONST, LOAD, LOAD_ARR, READ_INT, ADD, SUB, MUL, DIV, MOD,
+    NEG, INC, DEC, LT, LE, GT, GE, EQ, NE, AND, OR, NOT,
 })
 
 
 class RiscVBackend:
-    def __init__(self, prog: IRProgram):
-        self.prog = prog
+    """`function_keys` (function name -> stable key) and `function_cache` (a
+    mapping) let repeated compiles reuse a function's text: it depends only
+    on the function and the labels of the strings it uses."""
+
+    def __init__(self, prog: IRProgram, function_keys: Optional[Dict[str, str]] = None,
+                 function_cache=None):
+        self.prog = lower_phis(prog)  # SSA form: see ir.ssa
+        self.function_keys = function_keys
+        self.function_cache = function_cache
         self.out: List[str] = []
         self.strs: Dict[str, str] = {}
         self.scnt = 0
@@ -97,14 +111,14 @@ class RiscVBackend:
             alloc(p)
         for ins in func.instructions:
             op, a = ins.op, ins.args
-            if op == "ALLOC_ARRAY":
+            if op is ALLOC_ARRAY:
                 arrs[a[0]] = cur + W
                 alloc(a[0], int(a[1]))
             elif op in _DEF:
                 alloc(a[0])
-            elif op == "STORE":
+            elif op is STORE:
                 alloc(a[0])
-            elif op == "CALL" and a[0]:
+            elif op is CALL and a[0]:
                 alloc(a[0])
         fsize = (cur + 2 * W + 15) & ~15
         return slots, arrs, fsize
@@ -147,10 +161,13 @@ class RiscVBackend:
         self.i("ecall")
 
     def generate(self) -> str:
+        fn_strings: Dict[str, List[str]] = {}
         for fn in self.prog.functions:
+            used = fn_strings[fn.name] = []
             for ins in fn.instructions:
-                if ins.op == "CONST" and isinstance(ins.args[1], tuple) and ins.args[1][0] == "string":
+                if ins.op is CONST and isinstance(ins.args[1], tuple) and ins.args[1][0] == "string":
                     self._intern(ins.args[1][1])
+                    used.append(ins.args[1][1])
 
         self.e()
         self.e("    .data")
@@ -171,7 +188,18 @@ class RiscVBackend:
             self.e()
 
         for fn in self.prog.functions:
+            key = None
+            if self.function_keys is not None and fn.name in self.function_keys:
+                strings = tuple((v, self.strs[v]) for v in fn_strings[fn.name])
+                key = ("riscv", self.function_keys[fn.name], strings)
+                cached = self.function_cache.get(key)
+                if cached is not None:
+                    self.out.extend(cached)
+                    continue
+            start = len(self.out)
             self._gen_func(fn)
+            if key is not None:
+                self.function_cache[key] = self.out[start:]
         return "\n".join(self.out)
 
     def _gen_func(self, func: IRFunction) -> None:
@@ -200,21 +228,21 @@ class RiscVBackend:
         for ins in func.instructions:
             op, a = ins.op, ins.args
 
-            if op == "FUNC_ENTRY":
+            if op is FUNC_ENTRY:
                 pass
-            elif op == "LABEL":
+            elif op is LABEL:
                 self.e(f"{self.lbl(a[0])}:")
                 self._kill_tmps()
-            elif op == "JMP":
+            elif op is JMP:
                 self.i(f"j     {self.lbl(a[0])}")
-            elif op == "JMP_IF":
+            elif op is JMP_IF:
                 self._ld_t0(r(a[0]))
                 self.i(f"bnez  t0, {self.lbl(a[1])}")
-            elif op == "JMP_IF_NOT":
+            elif op is JMP_IF_NOT:
                 self._ld_t0(r(a[0]))
                 self.i(f"beqz  t0, {self.lbl(a[1])}")
 
-            elif op == "CONST":
+            elif op is CONST:
                 dest, (kind, val) = a[0], a[1]
                 kinds[dest] = kind
                 if kind in ("int", "uint32", "bool"):
@@ -233,17 +261,17 @@ class RiscVBackend:
                     self._kill_t0()
                     self._sd_t0(r(dest))
 
-            elif op == "LOAD":
+            elif op is LOAD:
                 kinds[a[0]] = kinds.get(a[1], "int")
                 self._ld_t0(r(a[1]))
                 self._sd_t0(r(a[0]))
-            elif op == "STORE":
+            elif op is STORE:
                 kinds[a[0]] = kinds.get(a[1], "int")
                 self._ld_t0(r(a[1]))
                 self._sd_t0(r(a[0]))
-            elif op == "ALLOC_ARRAY":
+            elif op is ALLOC_ARRAY:
                 pass
-            elif op == "LOAD_ARR":
+            elif op is LOAD_ARR:
                 dest, arr, idx = a
                 self._ld_t1(r(idx))
                 self.i(f"slli  t1, t1, {SHIFT}")
@@ -253,7 +281,7 @@ class RiscVBackend:
                 self.i("sub   t0, t0, t1")
                 self.i(f"{LD}    t0, 0(t0)")
                 self._sd_t0(r(dest))
-            elif op == "STORE_ARR":
+            elif op is STORE_ARR:
                 arr, idx, src = a
                 self._ld_t1(r(idx))
                 self.i(f"slli  t1, t1, {SHIFT}")
@@ -273,19 +301,19 @@ class RiscVBackend:
                 self._kill_t0()
                 self._kill_t1()
                 self._sd_t0(r(dest))
-            elif op == "NEG":
+            elif op is NEG:
                 kinds[a[0]] = kinds.get(a[1], "int")
                 self._ld_t0(r(a[1]))
                 self.i("neg   t0, t0")
                 self._kill_t0()
                 self._sd_t0(r(a[0]))
-            elif op == "INC":
+            elif op is INC:
                 kinds[a[0]] = kinds.get(a[1], "int")
                 self._ld_t0(r(a[1]))
                 self.i("addi  t0, t0, 1")
                 self._kill_t0()
                 self._sd_t0(r(a[0]))
-            elif op == "DEC":
+            elif op is DEC:
                 kinds[a[0]] = kinds.get(a[1], "int")
                 self._ld_t0(r(a[1]))
                 self.i("addi  t0, t0, -1")
@@ -302,7 +330,7 @@ class RiscVBackend:
                 self._kill_t0()
                 self._kill_t1()
                 self._sd_t0(r(dest))
-            elif op == "AND":
+            elif op is AND:
                 dest, l, rv = a
                 kinds[dest] = "bool"
                 self._ld_t0(r(l))
@@ -314,7 +342,7 @@ class RiscVBackend:
                 self.i("and   t0, t0, t1")
                 self._kill_t0()
                 self._sd_t0(r(dest))
-            elif op == "OR":
+            elif op is OR:
                 dest, l, rv = a
                 kinds[dest] = "bool"
                 self._ld_t0(r(l))
@@ -326,14 +354,14 @@ class RiscVBackend:
                 self.i("or    t0, t0, t1")
                 self._kill_t0()
                 self._sd_t0(r(dest))
-            elif op == "NOT":
+            elif op is NOT:
                 kinds[a[0]] = "bool"
                 self._ld_t0(r(a[1]))
                 self.i("sltiu t0, t0, 1")
                 self._kill_t0()
                 self._sd_t0(r(a[0]))
 
-            elif op == "PRINT":
+            elif op is PRINT:
                 for arg in a:
                     k = kinds.get(arg, "int")
                     addr = r(arg)
@@ -346,16 +374,16 @@ class RiscVBackend:
                     else:
                         self._print_int(addr)
                 self._kill_tmps()
-            elif op == "READ_INT":
+            elif op is READ_INT:
                 kinds[a[0]] = "int"
                 self._read_int(slots, a[0])
                 self._kill_tmps()
-            elif op == "EXIT":
+            elif op is EXIT:
                 self._exit(r(a[0]))
                 self._kill_tmps()
-            elif op == "PARAM":
+            elif op is PARAM:
                 pend.append(a[0])
-            elif op == "CALL":
+            elif op is CALL:
                 dest_r = a[0] if a[0] else None
                 extra = max(0, len(pend) - 8)
                 eb = ((extra * W + 15) & ~15) if extra else 0
@@ -374,7 +402,7 @@ class RiscVBackend:
                     self.i(f"{SD}    a0, {r(dest_r)}")
                 self._kill_tmps()
                 pend.clear()
-            elif op == "RET":
+            elif op is RET:
                 if a[0]:
                     self.i(f"{LD}    a0, {r(a[0])}")
                 else:
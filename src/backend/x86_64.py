@@ -10,15 +10,22 @@ helpers that IR actually uses (``_print_int``, ``_print_str``, ``_print_char``,
 from __future__ import annotations
 
 import io
-from typing import Callable, Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 from ir.ir import Instruction, IRFunction, IRProgram
+from ir.opcodes import (
+    FUNC_ENTRY, CONST, LOAD, STORE, LOAD_ARR, STORE_ARR, ALLOC_ARRAY,
+    ADD, SUB, MUL, DIV, MOD, NEG, INC, DEC,
+    LT, LE, GT, GE, EQ, NE, AND, OR, NOT,
+    LABEL, JMP, JMP_IF, JMP_IF_NOT, PARAM, CALL, RET, PRINT, READ_INT, EXIT,
+)
+from ir.ssa import lower_phis
 
 _REGS = ("rdi", "rsi", "rdx", "rcx", "r8", "r9")
-_SETCC = {"LT": "setl", "LE": "setle", "GT": "setg", "GE": "setge", "EQ": "sete", "NE": "setne"}
+_SETCC = {LT: "setl", LE: "setle", GT: "setg", GE: "setge", EQ: "sete", NE: "setne"}
 _DEF = frozenset({
-    "CONST", "LOAD", "LOAD_ARR", "READ_INT", "ADD", "SUB", "MUL", "DIV", "MOD",
-    "NEG", "INC", "DEC", "LT", "LE", "GT", "GE", "EQ", "NE", "AND", "OR", "NOT",
+    CONST, LOAD, LOAD_ARR, READ_INT, ADD, SUB, MUL, DIV, MOD,
+    NEG, INC, DEC, LT, LE, GT, GE, EQ, NE, AND, OR, NOT,
 })
 
 
@@ -189,8 +196,14 @@ _read_int:
 
 
 class X86_64Backend:
-    def __init__(self, program: IRProgram) -> None:
-        self._prog = program
+    """`function_keys` / `function_cache`: reuse per-function text across
+    compiles, as in `RiscVBackend`."""
+
+    def __init__(self, program: IRProgram, function_keys: Optional[Dict[str, str]] = None,
+                 function_cache=None) -> None:
+        self._prog = lower_phis(program)  # SSA form: see ir.ssa
+        self.function_keys = function_keys
+        self.function_cache = function_cache
         self._pool: Dict[str, str] = {}
         self._sc = 0
         self._buf = io.StringIO()
@@ -224,14 +237,14 @@ class X86_64Backend:
             alloc(p)
         for ins in func.instructions:
             op, a = ins.op, ins.args
-            if op == "ALLOC_ARRAY":
+            if op is ALLOC_ARRAY:
                 abase[a[0]] = cur + 8
                 alloc(a[0], int(a[1]))
             elif op in _DEF:
                 alloc(a[0])
-            elif op == "STORE":
+            elif op is STORE:
                 alloc(a[0])
-            elif op == "CALL" and a[0]:
+            elif op is CALL and a[0]:
                 alloc(a[0])
         return slot, abase, (cur + 15) & ~15
 
@@ -239,10 +252,13 @@ class X86_64Backend:
         return f"qword [rbp - {slot[name]}]"
 
     def generate(self) -> str:
+        fn_strings: Dict[str, List[str]] = {}
         for fn in self._prog.functions:
+            used = fn_strings[fn.name] = []
             for ins in fn.instructions:
-                if ins.op == "CONST" and isinstance(ins.args[1], tuple) and ins.args[1][0] == "string":
+                if ins.op is CONST and isinstance(ins.args[1], tuple) and ins.args[1][0] == "string":
                     self._lbl(ins.args[1][1])
+                    used.append(ins.args[1][1])
 
         # Generate function bodies first into a side buffer so we know which
         # runtime helpers were touched and can omit unused ones.
@@ -250,7 +266,21 @@ class X86_64Backend:
         main_buf = self._buf
         self._buf = body_buf
         for fn in self._prog.functions:
-            self._gen_fn(fn, *self._build_frame(fn))
+            if self.function_keys is None or fn.name not in self.function_keys:
+                self._gen_fn(fn, *self._build_frame(fn))
+                continue
+            strings = tuple((v, self._lbl(v)) for v in fn_strings[fn.name])
+            key = ("x86_64", self.function_keys[fn.name], strings)
+            cached = self.function_cache.get(key)
+            if cached is None:
+                # Generate alone, to capture this function's text and helpers.
+                used, self._used = self._used, set()
+                self._buf = io.StringIO()
+                self._gen_fn(fn, *self._build_frame(fn))
+                cached = self.function_cache[key] = (self._buf.getvalue(), frozenset(self._used))
+                self._used, self._buf = used, body_buf
+            body_buf.write(cached[0])
+            self._used |= cached[1]
         self._buf = main_buf
 
         # ---- header / data / bss ----
@@ -327,26 +357,26 @@ class X86_64Backend:
     ) -> None:
         op, a = ins.op, ins.args
 
-        if op == "FUNC_ENTRY":
+        if op is FUNC_ENTRY:
             return
-        if op == "LABEL":
+        if op is LABEL:
             self._ln(f"  .{a[0]}:")
             return
-        if op == "JMP":
+        if op is JMP:
             self._i(f"jmp .{a[0]}")
             return
-        if op == "JMP_IF":
+        if op is JMP_IF:
             self._i(f"mov rax, {r(a[0])}")
             self._i("test rax, rax")
             self._i(f"jnz .{a[1]}")
             return
-        if op == "JMP_IF_NOT":
+        if op is JMP_IF_NOT:
             self._i(f"mov rax, {r(a[0])}")
             self._i("test rax, rax")
             self._i(f"jz .{a[1]}")
             return
 
-        if op == "CONST":
+        if op is CONST:
             dest, (kind, val) = a[0], a[1]
             kinds[dest] = kind
             if kind in ("int", "uint32", "bool"):
@@ -364,21 +394,21 @@ class X86_64Backend:
                 self._i(f"mov {r(dest)}, rax")
             return
 
-        if op == "LOAD":
+        if op is LOAD:
             if a[1] in kinds:
                 kinds[a[0]] = kinds[a[1]]
             self._i(f"mov rax, {r(a[1])}")
             self._i(f"mov {r(a[0])}, rax")
             return
-        if op == "STORE":
+        if op is STORE:
             if a[1] in kinds:
                 kinds[a[0]] = kinds[a[1]]
             self._i(f"mov rax, {r(a[1])}")
             self._i(f"mov {r(a[0])}, rax")
             return
-        if op == "ALLOC_ARRAY":
+        if op is ALLOC_ARRAY:
             return
-        if op == "LOAD_ARR":
+        if op is LOAD_ARR:
             dest, arr, idx = a[0], a[1], a[2]
             b = ab[arr]
             self._i(f"mov rcx, {r(idx)}")
@@ -388,7 +418,7 @@ class X86_64Backend:
             self._i("mov rax, [rdx]")
             self._i(f"mov {r(dest)}, rax")
             return
-        if op == "STORE_ARR":
+        if op is STORE_ARR:
             arr, idx, src = a[0], a[1], a[2]
             b = ab[arr]
             self._i(f"mov rcx, {r(idx)}")
@@ -399,7 +429,7 @@ class X86_64Backend:
             self._i("mov [rdx], rax")
             return
 
-        if op == "ADD":
+        if op is ADD:
             dest, l, rv = a
             kinds[dest] = kinds.get(l, "int")
             self._i(f"mov rax, {r(l)}")
@@ -407,7 +437,7 @@ class X86_64Backend:
             self._i("add rax, rcx")
             self._i(f"mov {r(dest)}, rax")
             return
-        if op == "SUB":
+        if op is SUB:
             dest, l, rv = a
             kinds[dest] = kinds.get(l, "int")
             self._i(f"mov rax, {r(l)}")
@@ -415,14 +445,14 @@ class X86_64Backend:
             self._i("sub rax, rcx")
             self._i(f"mov {r(dest)}, rax")
             return
-        if op == "MUL":
+        if op is MUL:
             dest, l, rv = a
             kinds[dest] = kinds.get(l, "int")
             self._i(f"mov rax, {r(l)}")
             self._i(f"imul rax, {r(rv)}")
             self._i(f"mov {r(dest)}, rax")
             return
-        if op == "DIV":
+        if op is DIV:
             dest, l, rv = a
             kinds[dest] = kinds.get(l, "int")
             self._i(f"mov rax, {r(l)}")
@@ -430,7 +460,7 @@ class X86_64Backend:
             self._i(f"idiv {r(rv)}")
             self._i(f"mov {r(dest)}, rax")
             return
-        if op == "MOD":
+        if op is MOD:
             dest, l, rv = a
             kinds[dest] = "int"
             self._i(f"mov rax, {r(l)}")
@@ -438,19 +468,19 @@ class X86_64Backend:
             self._i(f"idiv {r(rv)}")
             self._i(f"mov {r(dest)}, rdx")
             return
-        if op == "NEG":
+        if op is NEG:
             kinds[a[0]] = kinds.get(a[1], "int")
             self._i(f"mov rax, {r(a[1])}")
             self._i("neg rax")
             self._i(f"mov {r(a[0])}, rax")
             return
-        if op == "INC":
+        if op is INC:
             kinds[a[0]] = kinds.get(a[1], "int")
             self._i(f"mov rax, {r(a[1])}")
             self._i("inc rax")
             self._i(f"mov {r(a[0])}, rax")
             return
-        if op == "DEC":
+        if op is DEC:
             kinds[a[0]] = kinds.get(a[1], "int")
             self._i(f"mov rax, {r(a[1])}")
             self._i("dec rax")
@@ -466,7 +496,7 @@ class X86_64Backend:
             self._i("movzx rax, al")
             self._i(f"mov {r(dest)}, rax")
             return
-        if op == "AND":
+        if op is AND:
             dest, l, rv = a
             kinds[dest] = "bool"
             self._i(f"mov rax, {r(l)}")
@@ -480,7 +510,7 @@ class X86_64Backend:
             self._i("and rax, rcx")
             self._i(f"mov {r(dest)}, rax")
             return
-        if op == "OR":
+        if op is OR:
             dest, l, rv = a
             kinds[dest] = "bool"
             self._i(f"mov rax, {r(l)}")
@@ -494,7 +524,7 @@ class X86_64Backend:
             self._i("or rax, rcx")
             self._i(f"mov {r(dest)}, rax")
             return
-        if op == "NOT":
+        if op is NOT:
             kinds[a[0]] = "bool"
             self._i(f"mov rax, {r(a[1])}")
             self._i("test rax, rax")
@@ -503,7 +533,7 @@ class X86_64Backend:
             self._i(f"mov {r(a[0])}, rax")
             return
 
-        if op == "PRINT":
+        if op is PRINT:
             for arg in a:
                 k = kinds.get(arg, "int")
                 if k == "string":
@@ -519,21 +549,21 @@ class X86_64Backend:
                     self._i(f"mov rdi, {r(arg)}")
                     self._i("call _print_int")
             return
-        if op == "READ_INT":
+        if op is READ_INT:
             kinds[a[0]] = "int"
             self._used.add("_read_int")
             self._i("call _read_int")
             self._i(f"mov {r(a[0])}, rax")
             return
-        if op == "EXIT":
+        if op is EXIT:
             self._i(f"mov rdi, {r(a[0])}")
             self._i("mov rax, 60")
             self._i("syscall")
             return
-        if op == "PARAM":
+        if op is PARAM:
             pend.append(a[0])
             return
-        if op == "CALL":
+        if op is CALL:
             dest, callee = (a[0] or None), a[1]
             nreg = len(_REGS)
             extra = max(0, len(pend) - nreg)
@@ -554,7 +584,7 @@ class X86_64Backend:
                 self._i(f"mov {r(dest)}, rax")
             pend.clear()
             return
-        if op == "RET":
+        if op is RET:
             if a[0]:
                 self._i(f"mov rax, {r(a[0])}")
             else:
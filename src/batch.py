@@ -0,0 +1,125 @@
+"""Batch compilation: `main.py [-j N] --out-dir DIR a.prog b.prog ...`.
+
+Each source is compiled on its own, with the same options. Its requested
+outputs go to DIR/<name><suffix> (see `OUTPUT_SUFFIXES`), so `--emit-asm`
+and friends only say *which* outputs to produce. With `-j N` the sources are
+spread over N worker processes; each file's printed output is collected in
+its worker and shown in input order. A summary of the failed files follows,
+and the exit status is 1 if any file failed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import main as driver
+from optimizer import PASSES
+
+# Output option (argparse dest) -> file name suffix under --out-dir.
+OUTPUT_SUFFIXES = {
+    "emit_asm": ".s",
+    "emit_cpp": ".cpp",
+    "dump_ast_dot": ".ast.dot",
+    "dump_ir_dot": ".ir.dot",
+    "dump_ir_before": ".ir-before.dot",
+    **{f"dump_ir_after_{name}": f".ir-after-{name}.dot" for name in PASSES},
+    "dump_ir_after": ".ir-after.dot",
+    "dump_cfg_dot": ".cfg.dot",
+    "emit_ir": ".ir",
+    "time_report_json": ".time.json",
+}
+
+# Options whose FILE is not optional; under --out-dir it is replaced all the same.
+_FILE_REQUIRED = {"emit_ir", "time_report_json"}
+
+
+def _job_args(args: argparse.Namespace, source: str) -> argparse.Namespace:
+    """`args` for compiling `source` alone, outputs redirected into --out-dir."""
+    job = argparse.Namespace(**vars(args))
+    job.source = source
+    job.sources = [source]
+    job.jobs = 1  # -j spreads the sources; each one is optimized serially
+    if args.out_dir is not None:
+        stem = Path(source).stem
+        for dest, suffix in OUTPUT_SUFFIXES.items():
+            if getattr(args, dest) is not None:
+                setattr(job, dest, str(Path(args.out_dir) / f"{stem}{suffix}"))
+    return job
+
+
+def _compile_one(job: argparse.Namespace, selected: Optional[set],
+                 capture: bool) -> Tuple[List[str], str]:
+    """Compile one source; returns (errors, printed output if `capture`)."""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out) if capture else contextlib.nullcontext():
+        driver._configure_logging(job.verbose)
+        try:
+            errors = driver._run(job, selected)
+        except Exception as e:
+            traceback.print_exc(file=sys.stdout)
+            errors = [f"internal error: {e!r}"]
+    return errors, out.getvalue()
+
+
+def _usage_error(msg: str) -> int:
+    print(f"main.py: error: {msg}", file=sys.stderr)
+    return 2
+
+
+def compile_batch(args: argparse.Namespace, selected: Optional[set]) -> int:
+    """Compile every source in `args.sources`; returns the exit status."""
+    sources = args.sources
+    if args.out_dir is None:
+        if any(getattr(args, dest) not in (None, "-") for dest in OUTPUT_SUFFIXES):
+            return _usage_error("output files for several sources need --out-dir")
+    else:
+        for dest in OUTPUT_SUFFIXES:
+            value = getattr(args, dest)
+            if value not in (None, "-") and dest not in _FILE_REQUIRED:
+                # Most likely a source swallowed by the option's optional FILE.
+                flag = "--" + dest.replace("_", "-")
+                return _usage_error(
+                    f"with --out-dir, {flag} takes no FILE (got {value!r}); "
+                    "list the sources before the output options"
+                )
+        stems = [Path(s).stem for s in sources]
+        clashes = sorted({s for s in stems if stems.count(s) > 1})
+        if clashes:
+            return _usage_error(
+                "sources would share output names in --out-dir: " + ", ".join(clashes)
+            )
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    jobs = [_job_args(args, source) for source in sources]
+    workers = min(args.jobs or os.cpu_count() or 1, len(jobs))
+    failed = []
+    if workers <= 1:
+        results = (_compile_one(job, selected, capture=len(jobs) > 1) for job in jobs)
+        pool = contextlib.nullcontext()
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(
+            _compile_one, jobs, [selected] * len(jobs), [True] * len(jobs)
+        )
+    with pool:
+        for source, (errors, output) in zip(sources, results):
+            if output:
+                print(f"==> {source} <==")
+                print(output, end="")
+            if errors:
+                failed.append((source, errors))
+
+    print(f"\n{len(sources)} source(s) compiled, {len(failed)} failed")
+    for source, errors in failed:
+        print(f"  {source}:")
+        for msg in errors:
+            print(f"    {msg}")
+    return 1 if failed else 0
@@ -0,0 +1,65 @@
+"""Thin client for the compile daemon (`main.py --serve SOCKET`).
+
+    python compile_client.py --socket /tmp/cc.sock [main.py arguments...]
+
+(or set COMPILE_SERVER_SOCKET instead of passing --socket).
+
+Sends the arguments to the daemon, prints what the compile printed, writes
+the returned output files and exits with the compile's status. It imports
+nothing from the compiler, so it starts as fast as Python does.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sys
+from typing import List, Optional
+
+
+def request(socket_path: str, argv: List[str], cwd: Optional[str] = None) -> dict:
+    """Send one compile request and return the daemon's response."""
+    payload = {"argv": argv, "cwd": cwd or os.getcwd()}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as reply:
+            return json.loads(reply.readline())
+
+
+def _split_socket(argv: List[str]):
+    """Take `--socket PATH` / `--socket=PATH` out of `argv`; the rest is for main.py.
+
+    Parsed by hand: importing argparse would cost more than the compile itself.
+    """
+    socket_path, rest = os.environ.get("COMPILE_SERVER_SOCKET"), []
+    it = iter(argv)
+    for arg in it:
+        if arg == "--socket":
+            socket_path = next(it, None)
+        elif arg.startswith("--socket="):
+            socket_path = arg.partition("=")[2]
+        else:
+            rest.append(arg)
+    return socket_path, rest
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    socket_path, rest = _split_socket(sys.argv[1:] if argv is None else argv)
+    if not socket_path:
+        print("compile_client: no daemon socket: pass --socket PATH or set "
+              "COMPILE_SERVER_SOCKET", file=sys.stderr)
+        return 2
+
+    response = request(socket_path, rest)
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    for target, contents in response["files"].items():
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(contents)
+    return response["exit"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Compile daemon: `main.py --serve SOCKET`.
+
+Keeps the compiler imported and serves compile requests over a Unix domain
+socket, one JSON object per line in each direction:
+
+    request:  {"argv": [...main.py arguments...], "cwd": "/dir", "source": "..."}
+    response: {"exit": 0, "stdout": "...", "stderr": "...", "files": {"out.s": "..."}}
+
+`argv` is exactly what `main.py` would be given. The source file is read
+relative to `cwd` unless `source` carries the text itself. Nothing is written
+on the server side: every output that would have gone to a file comes back in
+`files` (keyed by the path as given) and everything printed, including
+`-` outputs and the log, in `stdout`. `exit` is 0 for a clean compile, 1 for
+compile errors and 2 for a bad command line or an internal error.
+Binary IR files (`--from-ir`, `--emit-ir` without `--ir-format text`)
+cannot be carried over JSON and are refused, and so are `--cache-dir` (with
+`--cache-stats`), which would write under the daemon's own directory, and
+`--serve`.
+
+Front-end results, optimized programs and backend text are kept in an LRU
+keyed by the source text, so recompiling an unchanged file costs little
+more than formatting the outputs. Requests are handled one at a time.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import signal
+import socketserver
+import sys
+import traceback
+import main as driver
+from incremental import LRUCache
+
+DEFAULT_CACHE_ENTRIES = 256
+
+
+def handle_request(request: dict, cache=None) -> dict:
+    """Run one compile request (see the module docstring) and build its response."""
+    files: dict = {}
+
+    def write(target, contents: str) -> None:
+        if not target or target == "-":
+            print(contents)
+        else:
+            files[target] = contents
+
+    out, err = io.StringIO(), io.StringIO()
+    status = 2
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        try:
+            args, selected = driver._parse_args(list(request.get("argv", [])))
+            if len(args.sources) > 1 or args.out_dir is not None:
+                print("error: the daemon compiles one source per request (no --out-dir)",
+                      file=sys.stderr)
+                raise SystemExit(2)
+            if args.from_ir is not None or (args.emit_ir is not None and args.emit_ir != "-"
+                                            and args.ir_format != "text"):
+                print("error: the daemon neither loads nor returns binary IR "
+                      "(--from-ir, --emit-ir FILE without --ir-format text)", file=sys.stderr)
+                raise SystemExit(2)
+            if args.cache_dir is not None or args.serve is not None:
+                print("error: the daemon keeps its own cache in memory and serves no "
+                      "sockets itself (no --cache-dir, --cache-stats or --serve)", file=sys.stderr)
+                raise SystemExit(2)
+            source = request.get("source")
+            if source is None:
+                path = os.path.join(request.get("cwd", "."), args.source)
+                with open(path, encoding="utf-8") as f:
+                    source = f.read()
+            driver._configure_logging(args.verbose)
+            errors = driver._run(args, selected, source=source, write=write, cache=cache)
+            status = 1 if errors else 0
+        except SystemExit as e:  # argparse errors and --help
+            status = e.code if isinstance(e.code, int) else 2
+        except OSError as e:
+            print(f"error: {e}", file=sys.stderr)
+        except Exception:
+            traceback.print_exc()
+    return {"exit": status, "stdout": out.getvalue(), "stderr": err.getvalue(), "files": files}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {"exit": 2, "stdout": "", "stderr": f"bad request: {e}\n", "files": {}}
+            else:
+                response = handle_request(request, self.server.cache)
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class CompileServer(socketserver.UnixStreamServer):
+    def __init__(self, socket_path: str, cache_entries: int = DEFAULT_CACHE_ENTRIES) -> None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # a stale socket left by an earlier daemon
+        super().__init__(socket_path, _Handler)
+        self.cache = LRUCache(cache_entries)
+
+    def server_close(self) -> None:
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.server_address)
+
+
+def serve(socket_path: str) -> None:
+    """Serve compile requests on `socket_path` until interrupted or terminated."""
+    # Turn SIGTERM into a normal exit so the socket file is removed.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    with CompileServer(socket_path) as server:
+        print(f"Compile server listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,237 @@
+"""Content-addressed on-disk compilation cache (the driver's --cache-dir).
+
+An entry is keyed by a SHA-256 over the compiler's own sources and the
+parts the caller passes to `DiskCache.key` (for the driver: the source
+text, its path, the optimization pipeline and the target architecture). It
+holds a `CacheEntry`: the warnings to replay, the optimized `IRProgram` and
+whichever backend texts have been generated for it so far.
+
+Several processes may share one directory: entries are written to a
+temporary file and renamed into place, so readers see either nothing or a
+whole entry. The hit, miss and eviction counters and a running total of the
+entries' size are four fixed-size fields of one small file, updated in
+place under a lock. When that total passes `max_bytes` the directory is
+scanned, the least recently used entries (by mtime, which a hit refreshes)
+are removed and the total is reset from the scan, which also corrects any
+drift from writers that raced or died.
+
+The driver imports this module on every run for `CacheEntry`; `fcntl`,
+`hashlib`, `pickle` and `tempfile` are imported only once a cache is
+actually used.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import struct
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+_STATS_FILE = "stats"
+_STATS = struct.Struct("<4q")  # hits, misses, evictions, bytes
+_TMP_PREFIX = ".tmp-"
+_STALE_TMP_SECONDS = 3600  # a writer that died mid-store leaves its temp file behind
+
+
+@functools.lru_cache(maxsize=None)
+def compiler_version() -> str:
+    """A digest of every compiler source file, so any code change invalidates the cache."""
+    import hashlib
+
+    h = hashlib.sha256()
+    src = Path(__file__).resolve().parent
+    for path in sorted(src.rglob("*.py")):
+        h.update(str(path.relative_to(src)).encode("utf-8"))
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+class CacheEntry:
+    """What a cache hit replays: warnings, the optimized program, backend text."""
+
+    def __init__(self, warnings: List[str], program, asm: Optional[str] = None,
+                 cpp: Optional[str] = None) -> None:
+        self.warnings = warnings
+        self.program = program
+        self.asm = asm
+        self.cpp = cpp
+
+
+class DiskCache:
+    def __init__(self, root: Union[str, Path], max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def key(self, *parts: Union[str, bytes]) -> str:
+        import hashlib
+
+        h = hashlib.sha256(compiler_version().encode("ascii"))
+        for part in parts:
+            data = part.encode("utf-8") if isinstance(part, str) else part
+            h.update(len(data).to_bytes(8, "little"))
+            h.update(data)
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:]
+
+    def load(self, key: str) -> Optional[CacheEntry]:
+        import pickle
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+            if not isinstance(entry, CacheEntry):
+                raise TypeError(f"not a cache entry: {type(entry).__name__}")
+            os.utime(path)  # most recently used
+        except FileNotFoundError:
+            self._count(misses=1)
+            return None
+        except Exception:
+            # Unreadable, truncated or written by an incompatible compiler:
+            # unpickling can fail in almost any way, so drop it whatever it was.
+            self._count(misses=1, size=-self._remove(path))
+            return None
+        self._count(hits=1)
+        return entry
+
+    def store(self, key: str, entry: CacheEntry) -> None:
+        import pickle
+        import tempfile
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=_TMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            try:
+                size -= path.stat().st_size  # replacing an older entry
+            except FileNotFoundError:
+                pass
+            os.replace(tmp, path)
+        except BaseException:
+            self._unlink(Path(tmp))
+            raise
+        if self._count(size=size) > self.max_bytes:
+            self._evict()
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        """(mtime, size, path) of every entry; also sweeps stale temp files."""
+        out = []
+        now = time.time()
+        if not self.root.is_dir():
+            return out
+        for sub in os.scandir(self.root):
+            if not sub.is_dir():
+                continue
+            for e in os.scandir(sub.path):
+                try:
+                    st = e.stat()
+                except FileNotFoundError:  # evicted by another process
+                    continue
+                if e.name.startswith(_TMP_PREFIX):
+                    if now - st.st_mtime > _STALE_TMP_SECONDS:
+                        self._unlink(Path(e.path))
+                    continue
+                out.append((st.st_mtime, st.st_size, Path(e.path)))
+        return out
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        if total > self.max_bytes:
+            # Evict down to 90% so that the next few stores do not rescan right away.
+            target = self.max_bytes * 9 // 10
+            entries.sort()
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                self._unlink(path)
+                total -= size
+                evicted += 1
+        self._count(evictions=evicted, total=total)
+
+    def _count(self, hits: int = 0, misses: int = 0, evictions: int = 0, size: int = 0,
+               total: Optional[int] = None) -> int:
+        """Add to the counters in the stats file; returns the running size.
+
+        `size` is added to the running size, `total` replaces it. A missing
+        or malformed stats file starts from zero counts and a fresh scan.
+        """
+        import fcntl
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.root / _STATS_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX)  # released by the close
+            data = os.pread(fd, _STATS.size + 1, 0)
+            if len(data) == _STATS.size:
+                h, m, e, b = _STATS.unpack(data)
+                b += size
+            else:  # the scan already reflects `size`
+                h = m = e = 0
+                b = sum(sz for _, sz, _ in self._entries()) if total is None else 0
+                os.ftruncate(fd, 0)
+            b = max(b, 0) if total is None else total
+            os.pwrite(fd, _STATS.pack(h + hits, m + misses, e + evictions, b), 0)
+        finally:
+            os.close(fd)
+        return b
+
+    def _counters(self) -> Tuple[int, int, int, int]:
+        try:
+            data = (self.root / _STATS_FILE).read_bytes()
+        except FileNotFoundError:
+            data = b""
+        return _STATS.unpack(data) if len(data) == _STATS.size else (0, 0, 0, 0)
+
+    @staticmethod
+    def _remove(path: Path) -> int:
+        """Unlink an entry; returns the bytes freed (0 if it was already gone)."""
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return 0
+        return size
+
+    @staticmethod
+    def _unlink(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        hits, misses, evictions, _ = self._counters()
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "evictions": evictions,
+        }
+
+    def stats_report(self) -> str:
+        s = self.stats()
+        lookups = s["hits"] + s["misses"]
+        rate = f"{s['hits'] / lookups * 100:.1f}%" if lookups else "n/a"
+        return "\n".join([
+            f"Cache directory: {self.root}",
+            f"  Entries:   {s['entries']}",
+            f"  Size:      {s['bytes'] / 2**20:.2f} MiB of {s['max_bytes'] / 2**20:.0f} MiB",
+            f"  Hits:      {s['hits']}",
+            f"  Misses:    {s['misses']}",
+            f"  Hit rate:  {rate}",
+            f"  Evictions: {s['evictions']}",
+        ])
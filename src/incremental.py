@@ -0,0 +1,192 @@
+"""Per-function incremental recompilation.
+
+Type checking, lowering, every optimizer pass and both assembly backends
+work one function at a time; the only thing a function sees of the others
+is their signatures. So a function whose own AST and the signatures it
+refers to are unchanged compiles to the same optimized `IRFunction` and the
+same assembly, and `FunctionCache` hands those back instead of rebuilding.
+
+A function's fingerprint covers its `FunctionDecl` (source lines relative
+to the function's first line, so that edits above it do not dirty it) and,
+for every name it references, the signature of the function by that name,
+or the absence of one. Unused-variable warnings are kept with relative lines
+too and re-rendered at the function's current position.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+
+from ir import IRBuilder, validate_function
+from ir.ir import IRFunction, IRProgram
+from ir.ir_validator import BUILTINS
+from optimizer import PassManager
+from parser.ast import ASTNode, FunctionDecl, Program, Variable
+from type_checker import TypeChecker
+from unused_warnings import _UnusedInFunction, _warning_text
+
+DEFAULT_MAX_FUNCTIONS = 4096
+
+
+class LRUCache:
+    """A bounded mapping that forgets its least recently used entries."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def __setitem__(self, key, value) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def function_fingerprint(func: FunctionDecl, signatures: Dict[str, tuple]) -> Tuple[str, int]:
+    """(fingerprint, first source line) of `func`; see the module docstring.
+
+    `signatures` maps each function name of the program to its
+    (return type, parameter types).
+    """
+    parts: List[Any] = []
+    lines: List[int] = []
+    names = set()
+    stack: List[Any] = [func]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, ASTNode):
+            parts.append(value.node_type)
+            line = getattr(value, "line", None)
+            if line is not None:
+                lines.append(line)
+                parts.append(("line", len(lines) - 1))  # patched to a relative line below
+            if isinstance(value, Variable):
+                names.add(value.name)
+            # Reversed so fields come off the stack in declaration order.
+            for key, field in reversed(value.fields()):
+                stack.append(field)
+                stack.append(("field", key))
+        elif isinstance(value, list):
+            parts.append(("list", len(value)))
+            stack.extend(reversed(value))
+        else:
+            parts.append(value)
+    base = min(lines, default=0)
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, tuple) and part[0] == "line":
+            part = ("line", lines[part[1]] - base)
+        h.update(repr(part).encode("utf-8"))
+        h.update(b"\0")
+    for name in sorted(names):
+        h.update(repr((name, signatures.get(name))).encode("utf-8"))
+    return h.hexdigest(), base
+
+
+class _WarningRecorder(_UnusedInFunction):
+    """Keeps (name, line, kind) of each unused variable instead of the message."""
+
+    def _report(self, decls, kind: str) -> None:
+        for d in decls:
+            if d.symbol not in self.read:
+                self.warnings.append((d.name, getattr(d, "line", None), kind))
+
+
+class _Compiled:
+    __slots__ = ("function", "warnings")
+
+    def __init__(self, function: IRFunction, warnings: List[tuple]) -> None:
+        self.function = function
+        self.warnings = warnings  # (name, line relative to the function, kind)
+
+
+class IncrementalResult:
+    def __init__(self, program: IRProgram, warnings: List[str],
+                 function_keys: Dict[str, str], rebuilt: List[str]) -> None:
+        self.program = program            # optimized and validated
+        self.warnings = warnings
+        self.function_keys = function_keys  # function name -> cache key, for the backends
+        self.rebuilt = rebuilt            # names of the functions compiled this time
+
+
+class FunctionCache:
+    """Optimized functions and their backend text, by fingerprint and pipeline.
+
+    `backend_text` is the per-function assembly cache to give a backend along
+    with `IncrementalResult.function_keys`.
+    """
+
+    def __init__(self, max_functions: int = DEFAULT_MAX_FUNCTIONS) -> None:
+        self._compiled = LRUCache(max_functions)
+        self.backend_text = LRUCache(2 * max_functions)
+
+    def compile(self, program: Program, pipeline: List[Any], source_path: Optional[str] = None,
+                report=None) -> IncrementalResult:
+        """Check, lower, optimize and validate `program`, rebuilding only changed functions.
+
+        Raises `SemanticError` or `IRValidationError` like the full pipeline would.
+        """
+        checker = TypeChecker()
+        checker.declare_functions(program)
+        signatures = {
+            f.name: (f.return_type, tuple(p.param_type for p in f.params))
+            for f in program.functions
+        }
+        known = set(signatures) | BUILTINS
+        pipeline_key = repr(pipeline)
+
+        functions, warnings, keys, rebuilt = [], [], {}, []
+        for func in program.functions:
+            fingerprint, base = function_fingerprint(func, signatures)
+            key = hashlib.sha256(f"{fingerprint}:{pipeline_key}".encode("utf-8")).hexdigest()
+            compiled = self._compiled.get(key)
+            if compiled is None:
+                compiled = self._build(checker, func, pipeline, base, known, report)
+                self._compiled[key] = compiled
+                rebuilt.append(func.name)
+            functions.append(compiled.function)
+            keys[func.name] = key
+            warnings.extend(
+                _warning_text(source_path, func.name, name,
+                              None if line is None else base + line, kind)
+                for name, line, kind in compiled.warnings
+            )
+        return IncrementalResult(IRProgram(functions), warnings, keys, rebuilt)
+
+    @staticmethod
+    def _build(checker: TypeChecker, func: FunctionDecl, pipeline: List[Any], base: int,
+               known: set, report) -> _Compiled:
+        def phase(name):
+            return nullcontext() if report is None else report.phase(name)
+
+        with phase("type check"):
+            checker.check_function(func)
+        with phase("unused warnings"):
+            recorder = _WarningRecorder(func.name, None)
+            recorder.run(func)
+        with phase("IR lowering"):
+            lowered = IRBuilder().build(Program([func])).functions[0]
+        with phase("IR validation"):
+            validate_function(lowered, known)
+        optimized = PassManager(pipeline, report=report).run(IRProgram([lowered])).program.functions[0]
+        if optimized is not lowered:
+            with phase("IR validation (optimized)"):
+                validate_function(optimized, known)
+        warnings = [
+            (name, None if line is None else line - base, kind)
+            for name, line, kind in recorder.warnings
+        ]
+        return _Compiled(optimized, warnings)
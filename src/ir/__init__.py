@@ -1,33 +1,51 @@
-"""IR: linear format, AST→IR, validation."""
+"""IR: linear format, AST→IR, validation, serialization.
 
-from .ir import Instruction, IRProgram, IRFunction, Operand
+The serialization functions, `DefUse`, `CFG` and the optimizer passes
+re-exported here are imported on first use (see `__getattr__`).
+"""
+
+import importlib
+
+from .ir import Instruction, IRProgram, IRFunction, Operand, Temp, temp
+from .opcodes import Opcode
 from .ast_to_ir import ast_to_ir, IRBuilder
-from .ir_validator import validate, IRValidationError
+from .ir_validator import validate, validate_function, IRValidationError
+
+# Public name -> the module that defines it.
+_LAZY = {
+    **dict.fromkeys(
+        ["encode_ir", "decode_ir", "ir_to_text", "ir_from_text", "IRFormatError"],
+        "ir.serialize",
+    ),
+    "DefUse": "ir.def_use",
+    "CFG": "ir.cfg",
+    **dict.fromkeys(
+        [
+            "constant_folding", "ConstantFoldingResult",
+            "constant_propagation", "ConstantPropagationResult",
+            "dead_code_elimination", "DeadCodeEliminationResult",
+            "strength_reduction", "StrengthReductionResult",
+            "cse", "CSEResult",
+            "copy_propagation", "CopyPropagationResult",
+            "peephole", "PeepholeResult",
+            "basic_block_opt", "BasicBlockOptResult",
+            "to_ssa", "SSAResult",
+            "out_of_ssa", "OutOfSSAResult",
+        ],
+        "optimizer",
+    ),
+}
 
 __all__ = [
-    "Instruction", "IRProgram", "IRFunction", "Operand",
-    "ast_to_ir", "IRBuilder", "validate", "IRValidationError",
-]
+    "Instruction", "IRProgram", "IRFunction", "Operand", "Temp", "temp", "Opcode",
+    "ast_to_ir", "IRBuilder", "validate", "validate_function", "IRValidationError",
+] + list(_LAZY)
 
-from optimizer.constant_folding import constant_folding, ConstantFoldingResult  # noqa: E402
-from optimizer.dead_code_elimination import dead_code_elimination, DeadCodeEliminationResult  # noqa: E402
-from optimizer.strength_reduction import strength_reduction, StrengthReductionResult  # noqa: E402
-from optimizer.cse import cse, CSEResult  # noqa: E402
-from optimizer.copy_propagation import copy_propagation, CopyPropagationResult  # noqa: E402
-from optimizer.peephole import peephole, PeepholeResult  # noqa: E402
-from optimizer.basic_block import basic_block_opt, BasicBlockOptResult  # noqa: E402
-from optimizer.constant_propagation import (  # noqa: E402
-    constant_propagation,
-    ConstantPropagationResult,
-)
 
-__all__ += [
-    "constant_folding", "ConstantFoldingResult",
-    "constant_propagation", "ConstantPropagationResult",
-    "dead_code_elimination", "DeadCodeEliminationResult",
-    "strength_reduction", "StrengthReductionResult",
-    "cse", "CSEResult",
-    "copy_propagation", "CopyPropagationResult",
-    "peephole", "PeepholeResult",
-    "basic_block_opt", "BasicBlockOptResult",
-]
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
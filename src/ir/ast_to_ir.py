@@ -1,15 +1,19 @@
-"""AST → linear IR (three-address). Requires semantic analysis to have run first."""
+"""AST → linear IR (three-address). Requires semantic analysis to have run first:
+variable and call references are lowered from the symbols the type checker
+bound to them (`node.symbol`), never looked up by name here."""
 
 from __future__ import annotations
 from typing import Any, List, Optional
 
+from lexer.names import NAMES
 from parser.ast import (
     Program, FunctionDecl, Block, VarDecl, IfStmt, WhileStmt, ForStmt,
     BreakStmt, ContinueStmt, ReturnStmt, ExprStmt, Assign, BinaryOp, UnaryOp,
     Literal, Variable, ArrayAccess, Call, SwitchStmt,
 )
+from parser.visitor import ASTVisitor
 from .ir import (
-    Instruction, IRProgram, IRFunction,
+    Instruction, IRProgram, IRFunction, Temp, temp,
     CONST, LOAD, STORE, LOAD_ARR, STORE_ARR, ALLOC_ARRAY,
     ADD, SUB, MUL, DIV, MOD, NEG, INC, DEC,
     LT, LE, GT, GE, EQ, NE, AND, OR, NOT,
@@ -23,20 +27,19 @@ _BIN = {
 }
 
 
-class IRBuilder:
+class IRBuilder(ASTVisitor):
     def __init__(self) -> None:
         self._t = self._l = 0
         self._ins: List[Instruction] = []
         self._loops: List[tuple] = []
-        self._rets: dict[str, str] = {}
 
-    def _tmp(self) -> str:
-        t = f"%{self._t}"
+    def _tmp(self) -> Temp:
+        t = temp(self._t)
         self._t += 1
         return t
 
     def _lbl(self) -> str:
-        L = f"L{self._l}"
+        L = NAMES.intern(f"L{self._l}")
         self._l += 1
         return L
 
@@ -44,7 +47,6 @@ class IRBuilder:
         self._ins.append(i)
 
     def build(self, program: Program) -> IRProgram:
-        self._rets = {f.name: f.return_type for f in program.functions}
         return IRProgram([self._func(f) for f in program.functions])
 
     def _func(self, func: FunctionDecl) -> IRFunction:
@@ -155,88 +157,108 @@ class IRBuilder:
         self._e(LABEL(end_lbl))
 
     def _expr(self, expr: Any) -> str:
-        if isinstance(expr, Literal):
-            d = self._tmp()
-            k, v = expr.kind, expr.value
-            if k == "bool" and isinstance(v, bool):
-                v = 1 if v else 0
-            if k == "char" and isinstance(v, str):
-                v = ord(v) if len(v) == 1 else 0
-            self._e(CONST(d, k, v))
-            return d
-        if isinstance(expr, Variable):
-            d = self._tmp()
-            self._e(LOAD(d, expr.name))
-            return d
-        if isinstance(expr, Assign):
-            vt = self._expr(expr.value)
-            tgt = expr.target
-            if isinstance(tgt, Variable):
-                self._e(STORE(tgt.name, vt))
-            elif isinstance(tgt, ArrayAccess):
-                self._e(STORE_ARR(tgt.array.name, self._expr(tgt.index), vt))
-            else:
-                raise TypeError("Invalid assignment target")
-            return vt
-        if isinstance(expr, BinaryOp):
-            L, R = self._expr(expr.left), self._expr(expr.right)
-            d = self._tmp()
-            fn = _BIN.get(expr.op)
-            if fn is None:
-                raise ValueError(f"Unknown binary op: {expr.op}")
-            self._e(fn(d, L, R))
-            return d
-        if isinstance(expr, UnaryOp):
-            src = self._expr(expr.operand)
-            d = self._tmp()
-            op = expr.op
-            if op == "!":
-                self._e(NOT(d, src))
-            elif op == "-":
-                self._e(NEG(d, src))
-            elif op == "++":
-                self._e(INC(d, src))
-                self._post_store(expr.operand, d)
-                if expr.postfix:
-                    d = src
-            elif op == "--":
-                self._e(DEC(d, src))
-                self._post_store(expr.operand, d)
-                if expr.postfix:
-                    d = src
-            else:
-                raise ValueError(f"Unknown unary op: {op}")
-            return d
-        if isinstance(expr, ArrayAccess):
+        """Lower `expr`; returns the temp holding its value."""
+        return self.visit(expr)
+
+    # Expression visitors (see parser.visitor): `yield child` lowers a
+    # subexpression and evaluates to its temp.
+
+    def visit_Literal(self, expr: Literal) -> str:
+        d = self._tmp()
+        k, v = expr.kind, expr.value
+        if k == "bool" and isinstance(v, bool):
+            v = 1 if v else 0
+        if k == "char" and isinstance(v, str):
+            v = ord(v) if len(v) == 1 else 0
+        self._e(CONST(d, k, v))
+        return d
+
+    def visit_Variable(self, expr: Variable) -> str:
+        d = self._tmp()
+        self._e(LOAD(d, expr.symbol.name))
+        return d
+
+    def visit_Assign(self, expr: Assign):
+        vt = yield expr.value
+        tgt = expr.target
+        if isinstance(tgt, Variable):
+            self._e(STORE(tgt.symbol.name, vt))
+        elif isinstance(tgt, ArrayAccess):
+            self._e(STORE_ARR(tgt.symbol.name, (yield tgt.index), vt))
+        else:
+            raise TypeError("Invalid assignment target")
+        return vt
+
+    def visit_BinaryOp(self, expr: BinaryOp):
+        L = yield expr.left
+        R = yield expr.right
+        d = self._tmp()
+        fn = _BIN.get(expr.op)
+        if fn is None:
+            raise ValueError(f"Unknown binary op: {expr.op}")
+        self._e(fn(d, L, R))
+        return d
+
+    def visit_UnaryOp(self, expr: UnaryOp):
+        src = yield expr.operand
+        d = self._tmp()
+        op = expr.op
+        if op == "!":
+            self._e(NOT(d, src))
+        elif op == "-":
+            self._e(NEG(d, src))
+        elif op == "++":
+            self._e(INC(d, src))
+            yield from self._post_store(expr.operand, d)
+            if expr.postfix:
+                d = src
+        elif op == "--":
+            self._e(DEC(d, src))
+            yield from self._post_store(expr.operand, d)
+            if expr.postfix:
+                d = src
+        else:
+            raise ValueError(f"Unknown unary op: {op}")
+        return d
+
+    def visit_ArrayAccess(self, expr: ArrayAccess):
+        d = self._tmp()
+        self._e(LOAD_ARR(d, expr.symbol.name, (yield expr.index)))
+        return d
+
+    def visit_Call(self, expr: Call):
+        fn = expr.callee.symbol
+        name = fn.name
+        if name == "print":
+            args = []
+            for a in expr.args:
+                args.append((yield a))
+            self._e(PRINT(args))
+            return self._tmp()
+        if name == "readInt":
             d = self._tmp()
-            self._e(LOAD_ARR(d, expr.array.name, self._expr(expr.index)))
+            self._e(READ_INT(d))
             return d
-        if isinstance(expr, Call):
-            name = expr.callee.name
-            if name == "print":
-                self._e(PRINT([self._expr(a) for a in expr.args]))
-                return self._tmp()
-            if name == "readInt":
-                d = self._tmp()
-                self._e(READ_INT(d))
-                return d
-            if name == "exit":
-                self._e(EXIT(self._expr(expr.args[0])))
-                return self._tmp()
-            args = [self._expr(a) for a in expr.args]
-            for a in args:
-                self._e(PARAM(a))
-            rt = self._rets.get(name, "int")
-            dest: Optional[str] = None if rt == "void" else self._tmp()
-            self._e(IR_CALL(dest, name, len(args)))
-            return dest if dest else self._tmp()
+        if name == "exit":
+            self._e(EXIT((yield expr.args[0])))
+            return self._tmp()
+        args = []
+        for a in expr.args:
+            args.append((yield a))
+        for a in args:
+            self._e(PARAM(a))
+        dest: Optional[str] = None if fn.type_name == "void" else self._tmp()
+        self._e(IR_CALL(dest, name, len(args)))
+        return dest if dest else self._tmp()
+
+    def generic_visit(self, expr: Any) -> str:
         raise TypeError(f"Unknown expression: {type(expr)}")
 
-    def _post_store(self, operand: Any, d: str) -> None:
+    def _post_store(self, operand: Any, d: str):
         if isinstance(operand, Variable):
-            self._e(STORE(operand.name, d))
+            self._e(STORE(operand.symbol.name, d))
         elif isinstance(operand, ArrayAccess):
-            self._e(STORE_ARR(operand.array.name, self._expr(operand.index), d))
+            self._e(STORE_ARR(operand.symbol.name, (yield operand.index), d))
 
 
 def ast_to_ir(program: Program) -> IRProgram:
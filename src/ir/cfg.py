@@ -0,0 +1,210 @@
+"""Control-flow graph of one function: basic blocks, edges, reverse postorder.
+
+`IRFunction.cfg()` builds a `CFG` on first request and keeps it until the
+function's `epoch` moves, i.e. until the next edit; the request after that
+builds a fresh one. A block is a run of the function's instructions that
+starts at the entry, at a LABEL or right after a JMP*, RET or EXIT, and
+its edges follow the block's last instruction: a JMP goes to its target, a
+JMP_IF / JMP_IF_NOT to its target and then the next block, RET and EXIT
+nowhere, anything else falls through to the next block. Jumps to labels
+the function lacks get no edge.
+
+Dominance (`idoms`, `dominates`, `dom_children`, `frontiers`) covers the
+blocks reachable from the entry and is computed on first request, like the
+reverse postorder.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from .ir import Instruction, IRFunction
+from .opcodes import EXIT, JMP, JMP_IF, JMP_IF_NOT, LABEL, RET
+
+_BRANCHES = frozenset({JMP, JMP_IF, JMP_IF_NOT})
+_ENDS = frozenset({JMP, JMP_IF, JMP_IF_NOT, RET, EXIT})
+_NO_FALL_THROUGH = frozenset({JMP, RET, EXIT})
+
+
+class Block:
+    """`instructions` is `func.instructions[start:end]`; `index` is the layout position."""
+
+    __slots__ = ("index", "label", "start", "end", "instructions", "succs", "preds")
+
+    def __init__(self, index: int, start: int, end: int, instructions: List[Instruction]) -> None:
+        self.index = index
+        self.start = start
+        self.end = end
+        self.instructions = instructions
+        first = instructions[0]
+        self.label: Optional[str] = first.args[0] if first.op is LABEL else None
+        self.succs: List[Block] = []
+        self.preds: List[Block] = []
+
+    def __repr__(self) -> str:
+        return f"Block({self.index}, {self.label or '-'}, [{self.start}:{self.end}])"
+
+
+class CFG:
+    """The blocks of a function in layout order, `blocks[0]` being the entry."""
+
+    __slots__ = ("epoch", "blocks", "_by_label", "_rpo", "_idom", "_children", "_span", "_df")
+
+    def __init__(self, func: IRFunction) -> None:
+        self.epoch = func.epoch
+        insns = func.instructions
+        starts = [0] if insns else []
+        for i, ins in enumerate(insns):
+            op = ins.op
+            if op is LABEL:
+                if i != starts[-1]:
+                    starts.append(i)
+            elif op in _ENDS and i + 1 < len(insns):
+                starts.append(i + 1)
+        starts.append(len(insns))
+
+        blocks = self.blocks = [
+            Block(k, s, e, insns[s:e]) for k, (s, e) in enumerate(zip(starts, starts[1:]))
+        ]
+        by_label: Dict[str, Block] = {b.label: b for b in blocks if b.label is not None}
+        self._by_label = by_label
+        self._rpo: Optional[List[Block]] = None
+        self._idom: Optional[Dict[Block, Block]] = None
+        self._children: Optional[Dict[Block, List[Block]]] = None
+        self._span: Optional[Dict[Block, Tuple[int, int]]] = None
+        self._df: Optional[Dict[Block, List[Block]]] = None
+
+        for k, b in enumerate(blocks):
+            last = b.instructions[-1]
+            op = last.op
+            if op in _BRANCHES:
+                target = by_label.get(last.args[-1])
+                if target is not None:
+                    b.succs.append(target)
+            if op not in _NO_FALL_THROUGH and k + 1 < len(blocks):
+                b.succs.append(blocks[k + 1])
+            for s in b.succs:
+                s.preds.append(b)
+
+    @property
+    def entry(self) -> Optional[Block]:
+        return self.blocks[0] if self.blocks else None
+
+    def block_at(self, label: str) -> Optional[Block]:
+        """The block that `label` starts."""
+        return self._by_label.get(label)
+
+    def rpo(self) -> List[Block]:
+        """The blocks reachable from the entry, in reverse postorder."""
+        if self._rpo is None:
+            order: List[Block] = []
+            if self.blocks:
+                seen = {self.blocks[0]}
+                stack = [(self.blocks[0], iter(self.blocks[0].succs))]
+                while stack:
+                    b, succs = stack[-1]
+                    for s in succs:
+                        if s not in seen:
+                            seen.add(s)
+                            stack.append((s, iter(s.succs)))
+                            break
+                    else:
+                        stack.pop()
+                        order.append(b)
+            order.reverse()
+            self._rpo = order
+        return self._rpo
+
+    def idoms(self) -> Dict[Block, Block]:
+        """The immediate dominator of each reachable block; the entry's is itself.
+
+        Cooper, Harvey and Kennedy's iteration over the reverse postorder.
+        """
+        if self._idom is None:
+            rpo = self.rpo()
+            order = {b: k for k, b in enumerate(rpo)}
+            idom: Dict[Block, Block] = {rpo[0]: rpo[0]} if rpo else {}
+            changed = True
+            while changed:
+                changed = False
+                for b in rpo[1:]:
+                    new: Optional[Block] = None
+                    for p in b.preds:
+                        if p not in idom:
+                            continue
+                        if new is None:
+                            new = p
+                            continue
+                        x = p
+                        while x is not new:
+                            while order[x] > order[new]:
+                                x = idom[x]
+                            while order[new] > order[x]:
+                                new = idom[new]
+                    if idom.get(b) is not new:
+                        idom[b] = new
+                        changed = True
+            self._idom = idom
+        return self._idom
+
+    def dom_children(self) -> Dict[Block, List[Block]]:
+        """The dominator tree: each reachable block's immediately dominated blocks."""
+        if self._children is None:
+            idom = self.idoms()
+            children: Dict[Block, List[Block]] = {b: [] for b in idom}
+            for b in self.rpo()[1:]:
+                children[idom[b]].append(b)
+            self._children = children
+        return self._children
+
+    def dominates(self, a: Block, b: Block) -> bool:
+        """Whether every path from the entry to `b` passes through `a` (`a` may be `b`)."""
+        if self._span is None:
+            # Pre/post numbers of a walk over the dominator tree: `a` dominates
+            # `b` exactly when `a`'s interval contains `b`'s.
+            children = self.dom_children()
+            span: Dict[Block, Tuple[int, int]] = {}
+            rpo = self.rpo()
+            if rpo:
+                clock = 0
+                pre: Dict[Block, int] = {}
+                stack = [(rpo[0], iter(children[rpo[0]]))]
+                pre[rpo[0]] = clock
+                while stack:
+                    node, it = stack[-1]
+                    for c in it:
+                        clock += 1
+                        pre[c] = clock
+                        stack.append((c, iter(children[c])))
+                        break
+                    else:
+                        stack.pop()
+                        clock += 1
+                        span[node] = (pre[node], clock)
+            self._span = span
+        sa = self._span.get(a)
+        sb = self._span.get(b)
+        return sa is not None and sb is not None and sa[0] <= sb[0] and sb[1] <= sa[1]
+
+    def frontiers(self) -> Dict[Block, List[Block]]:
+        """The dominance frontier of each reachable block: where its dominance ends.
+
+        Block F is in the frontier of B when B dominates a predecessor of F
+        but does not strictly dominate F, i.e. where a value defined in B
+        meets values from paths that avoid B.
+        """
+        if self._df is None:
+            idom = self.idoms()
+            df: Dict[Block, List[Block]] = {b: [] for b in idom}
+            for b in self.rpo():
+                if len(b.preds) < 2:
+                    continue
+                for p in b.preds:
+                    runner = p
+                    while runner in idom and runner is not idom[b]:
+                        seen = df[runner]
+                        if not seen or seen[-1] is not b:
+                            seen.append(b)
+                        runner = idom[runner]
+            self._df = df
+        return self._df
@@ -0,0 +1,111 @@
+"""Def-use and use-def chains of one function's temps.
+
+`IRFunction.def_use()` builds a `DefUse` the first time it is asked for
+one; the function's editing methods keep it current from then on, so a
+pass can ask which instructions read a temp, or which one defines it,
+without a scan. Chains hold the instructions themselves rather than their
+positions, which shift as instructions are inserted and erased. A temp is
+defined once (lowering never reuses one), and an instruction object sits
+at one place in a function.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .ir import Instruction, Temp
+from .opcodes import DEFINES
+
+
+class DefUse:
+    __slots__ = ("_defs", "_uses")
+
+    def __init__(self, instructions: Iterable[Instruction] = ()) -> None:
+        defs: Dict[Temp, Instruction] = {}
+        uses: Dict[Temp, List[Instruction]] = {}
+        self._defs, self._uses = defs, uses
+        for ins in instructions:  # `add`, inlined: this runs once per instruction
+            args = ins.args
+            if ins.op in DEFINES:
+                if args[0].__class__ is Temp:
+                    defs[args[0]] = ins
+                args = args[1:]
+            for a in args:
+                if a.__class__ is Temp:
+                    u = uses.get(a)
+                    if u is None:
+                        uses[a] = [ins]
+                    elif u[-1] is not ins:
+                        u.append(ins)
+
+    def definition(self, t: Temp) -> Optional[Instruction]:
+        """The instruction that defines `t` (None for a temp nothing defines)."""
+        return self._defs.get(t)
+
+    def users(self, t: Temp) -> Tuple[Instruction, ...]:
+        """The instructions that read `t`."""
+        return tuple(self._uses.get(t, ()))
+
+    def num_uses(self, t: Temp) -> int:
+        """How many instructions read `t`."""
+        uses = self._uses.get(t)
+        return 0 if uses is None else len(uses)
+
+    def unused_definitions(self) -> List[Instruction]:
+        """The instructions that define a temp nobody reads."""
+        uses = self._uses
+        return [ins for t, ins in self._defs.items() if t not in uses]
+
+    def add(self, ins: Instruction) -> None:
+        """Record an instruction put into the function."""
+        args = ins.args
+        if ins.op in DEFINES:
+            if args[0].__class__ is Temp:
+                self._defs[args[0]] = ins
+            args = args[1:]
+        for a in args:
+            if a.__class__ is Temp:
+                uses = self._uses.get(a)
+                if uses is None:
+                    self._uses[a] = [ins]
+                elif uses[-1] is not ins:  # `ADD %2 %1 %1` reads %1 once
+                    uses.append(ins)
+
+    def remove(self, ins: Instruction) -> None:
+        """Forget an instruction taken out of the function."""
+        args = ins.args
+        if ins.op in DEFINES:
+            if self._defs.get(args[0]) is ins:
+                del self._defs[args[0]]
+            args = args[1:]
+        for a in args:
+            if a.__class__ is Temp:
+                uses = self._uses.get(a)
+                if uses is None:
+                    continue
+                for k, u in enumerate(uses):
+                    if u is ins:
+                        del uses[k]
+                        break
+                if not uses:
+                    del self._uses[a]
+
+    def remove_all(self, instructions: Iterable[Instruction]) -> None:
+        """`remove` for many instructions, filtering each chain they touch once."""
+        gone: Dict[Temp, Set[int]] = {}
+        for ins in instructions:
+            args = ins.args
+            if ins.op in DEFINES:
+                if self._defs.get(args[0]) is ins:
+                    del self._defs[args[0]]
+                args = args[1:]
+            for a in args:
+                if a.__class__ is Temp:
+                    gone.setdefault(a, set()).add(id(ins))
+        for a, ids in gone.items():
+            uses = self._uses.get(a)
+            if uses is None:
+                continue
+            uses[:] = [u for u in uses if id(u) not in ids]
+            if not uses:
+                del self._uses[a]
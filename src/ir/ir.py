@@ -1,27 +1,97 @@
-"""Linear IR: instructions, helpers, and program containers."""
+"""Linear IR: instructions, helpers, and program containers.
+
+An instruction's op is an `Opcode` and each temp a `Temp`, a small integer
+id printed as `%id`. Variables, labels and function names stay strings:
+they are interned (`lexer.names.NAMES`), so each name is already one shared
+object with a cached hash. The constructors below (`ADD`, `LOAD`, ...) also take ops by name
+and temps as `"%3"`, and `repr` prints the same text as ever.
+
+The containers are plain classes rather than dataclasses: `dataclasses`
+pulls in `inspect` and friends, which would be most of the driver's startup.
+"""
 
 from __future__ import annotations
-from dataclasses import dataclass, field
-from typing import Any, List, Optional, Union
+from typing import TYPE_CHECKING, Any, List, Optional, Union
+
+from . import opcodes as _op
+from .opcodes import Opcode
+
+if TYPE_CHECKING:
+    from .cfg import CFG
+    from .def_use import DefUse
+
+Operand = Union[str, "Temp", int, tuple]
+
+
+class Temp(int):
+    """A temporary: its id, printed as `%id`. Get instances from `temp`."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return _TEMP_TEXT[self]
+
+    __str__ = __repr__
+
+    def __bool__(self) -> bool:
+        # `%0` is a real operand; only the "" placeholder of RET/CALL is false.
+        return True
+
+    def __reduce__(self) -> tuple:
+        return temp, (int(self),)
+
 
-Operand = Union[str, tuple]
+_TEMPS: List[Temp] = []
+_TEMP_TEXT: List[str] = []
 
 
-def is_temp(s: str) -> bool:
-    return isinstance(s, str) and s.startswith("%")
+def temp(n: int) -> Temp:
+    """The shared `Temp` with id `n`."""
+    if n >= len(_TEMPS):
+        for i in range(len(_TEMPS), n + 1):
+            _TEMPS.append(Temp(i))
+            _TEMP_TEXT.append(f"%{i}")
+    return _TEMPS[n]
+
+
+def is_temp(s: Any) -> bool:
+    return s.__class__ is Temp
 
 
 def is_label(s: str) -> bool:
     return isinstance(s, str) and s.startswith("L") and len(s) > 1 and s[1:].isdigit()
 
 
-@dataclass
+def _opcode(name: str) -> Opcode:
+    try:
+        return Opcode[name]
+    except KeyError:
+        raise ValueError(f"unknown IR op {name!r}") from None
+
+
+def _operand(a: Any) -> Any:
+    """`"%3"` -> `temp(3)`; anything else unchanged."""
+    if a.__class__ is str and a[:1] == "%" and a[1:].isdigit():
+        return temp(int(a[1:]))
+    return a
+
+
 class Instruction:
-    op: str
-    args: List[Any] = field(default_factory=list)
+    __slots__ = ("op", "args")
+
+    def __init__(self, op: Union[Opcode, str], args: Optional[List[Any]] = None) -> None:
+        self.op = op if op.__class__ is Opcode else _opcode(op)
+        self.args = [] if args is None else args
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.op == other.op and self.args == other.args
 
     def __repr__(self) -> str:
-        parts = [self.op] + [self._fmt(a) for a in self.args]
+        parts = [self.op._name_]
+        for a in self.args:
+            parts.append(_TEMP_TEXT[a] if a.__class__ is Temp else self._fmt(a))
         return " ".join(parts)
 
     @staticmethod
@@ -32,162 +102,315 @@ class Instruction:
         return str(a)
 
 
-def I(op: str, *args: Any) -> Instruction:
-    return Instruction(op, list(args))
+def I(op: Union[Opcode, str], *args: Any) -> Instruction:
+    return Instruction(op, [_operand(a) for a in args])
 
 
 def CONST(d: str, k: str, v: Any) -> Instruction:
-    return I("CONST", d, (k, v))
+    return I(_op.CONST, d, (k, v))
 
 
 def LOAD(d: str, s: str) -> Instruction:
-    return I("LOAD", d, s)
+    return I(_op.LOAD, d, s)
 
 
 def STORE(v: str, s: str) -> Instruction:
-    return I("STORE", v, s)
+    return I(_op.STORE, v, s)
 
 
 def LOAD_ARR(d: str, arr: str, idx: str) -> Instruction:
-    return I("LOAD_ARR", d, arr, idx)
+    return I(_op.LOAD_ARR, d, arr, idx)
 
 
 def STORE_ARR(arr: str, idx: str, s: str) -> Instruction:
-    return I("STORE_ARR", arr, idx, s)
+    return I(_op.STORE_ARR, arr, idx, s)
 
 
 def ALLOC_ARRAY(name: str, size: int) -> Instruction:
-    return I("ALLOC_ARRAY", name, size)
+    return I(_op.ALLOC_ARRAY, name, size)
 
 
 def ADD(d: str, l: str, r: str) -> Instruction:
-    return I("ADD", d, l, r)
+    return I(_op.ADD, d, l, r)
 
 
 def SUB(d: str, l: str, r: str) -> Instruction:
-    return I("SUB", d, l, r)
+    return I(_op.SUB, d, l, r)
 
 
 def MUL(d: str, l: str, r: str) -> Instruction:
-    return I("MUL", d, l, r)
+    return I(_op.MUL, d, l, r)
 
 
 def DIV(d: str, l: str, r: str) -> Instruction:
-    return I("DIV", d, l, r)
+    return I(_op.DIV, d, l, r)
 
 
 def MOD(d: str, l: str, r: str) -> Instruction:
-    return I("MOD", d, l, r)
+    return I(_op.MOD, d, l, r)
 
 
 def NEG(d: str, s: str) -> Instruction:
-    return I("NEG", d, s)
+    return I(_op.NEG, d, s)
 
 
 def INC(d: str, s: str) -> Instruction:
-    return I("INC", d, s)
+    return I(_op.INC, d, s)
 
 
 def DEC(d: str, s: str) -> Instruction:
-    return I("DEC", d, s)
+    return I(_op.DEC, d, s)
 
 
 def LT(d: str, l: str, r: str) -> Instruction:
-    return I("LT", d, l, r)
+    return I(_op.LT, d, l, r)
 
 
 def LE(d: str, l: str, r: str) -> Instruction:
-    return I("LE", d, l, r)
+    return I(_op.LE, d, l, r)
 
 
 def GT(d: str, l: str, r: str) -> Instruction:
-    return I("GT", d, l, r)
+    return I(_op.GT, d, l, r)
 
 
 def GE(d: str, l: str, r: str) -> Instruction:
-    return I("GE", d, l, r)
+    return I(_op.GE, d, l, r)
 
 
 def EQ(d: str, l: str, r: str) -> Instruction:
-    return I("EQ", d, l, r)
+    return I(_op.EQ, d, l, r)
 
 
 def NE(d: str, l: str, r: str) -> Instruction:
-    return I("NE", d, l, r)
+    return I(_op.NE, d, l, r)
 
 
 def AND(d: str, l: str, r: str) -> Instruction:
-    return I("AND", d, l, r)
+    return I(_op.AND, d, l, r)
 
 
 def OR(d: str, l: str, r: str) -> Instruction:
-    return I("OR", d, l, r)
+    return I(_op.OR, d, l, r)
 
 
 def NOT(d: str, s: str) -> Instruction:
-    return I("NOT", d, s)
+    return I(_op.NOT, d, s)
 
 
 def LABEL(name: str) -> Instruction:
-    return I("LABEL", name)
+    return I(_op.LABEL, name)
 
 
 def JMP(lbl: str) -> Instruction:
-    return I("JMP", lbl)
+    return I(_op.JMP, lbl)
 
 
 def JMP_IF(c: str, lbl: str) -> Instruction:
-    return I("JMP_IF", c, lbl)
+    return I(_op.JMP_IF, c, lbl)
 
 
 def JMP_IF_NOT(c: str, lbl: str) -> Instruction:
-    return I("JMP_IF_NOT", c, lbl)
+    return I(_op.JMP_IF_NOT, c, lbl)
 
 
 def PARAM(s: str) -> Instruction:
-    return I("PARAM", s)
+    return I(_op.PARAM, s)
 
 
 def CALL(d: Optional[str], name: str, n: int = 0) -> Instruction:
-    return I("CALL", d if d is not None else "", name, n)
+    return I(_op.CALL, d if d is not None else "", name, n)
 
 
 def RET(v: Optional[str]) -> Instruction:
-    return I("RET", v if v is not None else "")
+    return I(_op.RET, v if v is not None else "")
 
 
 def PRINT(xs: List[str]) -> Instruction:
-    return I("PRINT", *xs)
+    return I(_op.PRINT, *xs)
 
 
 def READ_INT(d: str) -> Instruction:
-    return I("READ_INT", d)
+    return I(_op.READ_INT, d)
 
 
 def EXIT(code: str) -> Instruction:
-    return I("EXIT", code)
+    return I(_op.EXIT, code)
 
 
 def FUNC_ENTRY(name: str, rt: str, params: List[str]) -> Instruction:
-    return I("FUNC_ENTRY", name, rt, *params)
+    return I(_op.FUNC_ENTRY, name, rt, *params)
+
+
+def PHI(d: str, var: str, incoming: List[tuple]) -> Instruction:
+    """`incoming` is (predecessor label, value) pairs; see `ir.ssa`."""
+    return I(_op.PHI, d, var, *[x for pair in incoming for x in pair])
+
+
+def _reads(ins: Instruction, t: Temp) -> bool:
+    args = ins.args
+    for j in range(1 if ins.op in _op.DEFINES else 0, len(args)):
+        a = args[j]
+        if a.__class__ is Temp and a == t:
+            return True
+    return False
 
 
-@dataclass
 class IRFunction:
-    name: str
-    return_type: str
-    param_names: List[str]
-    param_types: List[str]
-    instructions: List[Instruction] = field(default_factory=list)
+    """One function's IR, which the optimizer edits in place.
+
+    The editing methods (`insert`, `replace`, `erase`, `replace_all_uses`,
+    `set_instructions`) bump `epoch`, so anyone who noted it can tell
+    whether the body changed since. They put new `Instruction`s in the
+    list and never modify one already there, which makes `copy`, a copy of
+    the list alone, a snapshot that later edits leave alone. They also keep
+    the `def_use` chains current once those are built, while the `cfg` is
+    rebuilt on the first request after an edit. An edit made to
+    `instructions` directly leaves the epoch and both analyses stale.
+    """
+
+    def __init__(self, name: str, return_type: str, param_names: List[str],
+                 param_types: List[str], instructions: Optional[List[Instruction]] = None) -> None:
+        self.name = name
+        self.return_type = return_type
+        self.param_names = param_names
+        self.param_types = param_types
+        self.instructions = [] if instructions is None else instructions
+        self.epoch = 0
+        self._def_use: Optional[DefUse] = None
+        self._index: Optional[dict] = None  # id(instruction) -> position, for replace_all_uses
+        self._cfg: Optional[CFG] = None
+
+    def copy(self) -> IRFunction:
+        return IRFunction(self.name, self.return_type, self.param_names, self.param_types,
+                          list(self.instructions))
+
+    def def_use(self) -> DefUse:
+        """The def-use / use-def chains of the function's temps (see `ir.def_use`)."""
+        if self._def_use is None:
+            from .def_use import DefUse
+
+            self._def_use = DefUse(self.instructions)
+        return self._def_use
+
+    def cfg(self) -> CFG:
+        """The control-flow graph of the current body (see `ir.cfg`)."""
+        if self._cfg is None or self._cfg.epoch != self.epoch:
+            from .cfg import CFG
+
+            self._cfg = CFG(self)
+        return self._cfg
+
+    def insert(self, index: int, *instructions: Instruction) -> None:
+        """Insert `instructions` before position `index`."""
+        self.instructions[index:index] = instructions
+        if self._def_use is not None:
+            for ins in instructions:
+                self._def_use.add(ins)
+        self._index = None
+        self.epoch += 1
+
+    def replace(self, index: int, *instructions: Instruction) -> None:
+        """Put `instructions` (one, several or none) in place of the one at `index`."""
+        if len(instructions) == 1:
+            self._put(index, instructions[0])
+        else:
+            du = self._def_use
+            if du is not None:
+                du.remove(self.instructions[index])
+                for ins in instructions:
+                    du.add(ins)
+            self.instructions[index:index + 1] = instructions
+            self._index = None
+        self.epoch += 1
+
+    def erase(self, *indices: int) -> None:
+        """Remove the instructions at `indices` (positions before any removal)."""
+        if not indices:
+            return
+        insns = self.instructions
+        if self._def_use is not None:
+            if len(indices) == 1:
+                self._def_use.remove(insns[indices[0]])
+            else:
+                self._def_use.remove_all(insns[i] for i in indices)
+        if len(indices) == 1:
+            del insns[indices[0]]
+        else:
+            dead = set(indices)
+            insns[:] = [ins for i, ins in enumerate(insns) if i not in dead]
+        self._index = None
+        self.epoch += 1
+
+    def replace_all_uses(self, old: Temp, new: Operand) -> int:
+        """Read `new` wherever temp `old` is read; returns the instructions changed.
+
+        With `def_use` built this visits only the readers of `old`.
+        """
+        insns = self.instructions
+        if self._def_use is None:
+            where = [i for i, ins in enumerate(insns) if _reads(ins, old)]
+        else:
+            if self._index is None:
+                self._index = {id(ins): i for i, ins in enumerate(insns)}
+            where = [self._index[id(ins)] for ins in self._def_use.users(old)]
+        for i in where:
+            ins = insns[i]
+            first = 1 if ins.op in _op.DEFINES else 0
+            args = ins.args
+            self._put(i, Instruction(ins.op, args[:first] + [
+                new if a.__class__ is Temp and a == old else a for a in args[first:]
+            ]))
+        if where:
+            self.epoch += 1
+        return len(where)
+
+    def set_instructions(self, instructions: List[Instruction]) -> None:
+        """Replace the whole body."""
+        self.instructions = instructions
+        self._def_use = self._index = None
+        self.epoch += 1
+
+    def _put(self, index: int, ins: Instruction) -> None:
+        old = self.instructions[index]
+        self.instructions[index] = ins
+        if self._def_use is not None:
+            self._def_use.remove(old)
+            self._def_use.add(ins)
+        if self._index is not None:
+            del self._index[id(old)]
+            self._index[id(ins)] = index
+
+    def __getstate__(self) -> dict:
+        # The analyses key instructions by id(), which means nothing once unpickled.
+        state = dict(self.__dict__)
+        state["_def_use"] = state["_index"] = state["_cfg"] = None
+        return state
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (
+            self.name == other.name
+            and self.return_type == other.return_type
+            and self.param_names == other.param_names
+            and self.param_types == other.param_types
+            and self.instructions == other.instructions
+        )
 
     def __repr__(self) -> str:
         h = f"FUNC {self.name}({', '.join(self.param_names)}) -> {self.return_type}"
         return "\n".join([h] + ["  " + repr(i) for i in self.instructions])
 
 
-@dataclass
 class IRProgram:
-    functions: List[IRFunction] = field(default_factory=list)
+    def __init__(self, functions: Optional[List[IRFunction]] = None) -> None:
+        self.functions = [] if functions is None else functions
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.functions == other.functions
 
     def __repr__(self) -> str:
         return "\n\n".join(repr(f) for f in self.functions)
@@ -1,16 +1,32 @@
-"""IR validation: labels, use-before-def, PARAM/CALL match, RET rules."""
+"""IR validation: labels, use-before-def, PARAM/CALL match, RET rules.
+
+Use-before-def is checked in layout order, except for the temps of a
+function in SSA form (one with PHIs, see `ir.ssa`): there a loop's PHI
+reads a value defined further down, so each temp must instead be defined
+once, in a block that dominates its uses (for a PHI operand, the end of the
+predecessor it comes from).
+"""
 
 from __future__ import annotations
-from typing import List, Set
+from typing import Dict, List, Set, Tuple
 
-from .ir import IRProgram, IRFunction, Instruction
+from .ir import IRProgram, IRFunction, Instruction, Temp
+from .opcodes import (
+    CONST, LOAD, STORE, LOAD_ARR, STORE_ARR, ALLOC_ARRAY,
+    ADD, SUB, MUL, DIV, MOD, NEG, INC, DEC,
+    LT, LE, GT, GE, EQ, NE, AND, OR, NOT,
+    LABEL, JMP, JMP_IF, JMP_IF_NOT, PARAM, CALL, RET, PRINT, READ_INT, EXIT, PHI,
+)
 
 BUILTINS = {"print", "readInt", "exit"}
 
 _BIN = {
-    "ADD", "SUB", "MUL", "DIV", "MOD", "LT", "LE", "GT", "GE", "EQ", "NE", "AND", "OR",
+    ADD, SUB, MUL, DIV, MOD, LT, LE, GT, GE, EQ, NE, AND, OR,
 }
-_UNARY = {"NEG", "NOT", "INC", "DEC"}
+_UNARY = {NEG, NOT, INC, DEC}
+_COND_JUMPS = {JMP_IF, JMP_IF_NOT}
+_READS = {LOAD, LOAD_ARR, READ_INT}
+_BLOCK_HEAD = {LABEL, PHI}
 
 
 class IRValidationError(Exception):
@@ -22,44 +38,48 @@ class IRValidationError(Exception):
 
 def _used(ins: Instruction) -> List[str]:
     o, a = ins.op, ins.args
-    if o == "LOAD":
+    if o is LOAD:
         return [a[1]]
-    if o == "STORE":
+    if o is STORE:
         return [a[1]]
-    if o == "LOAD_ARR":
+    if o is LOAD_ARR:
         return [a[1], a[2]]
-    if o == "STORE_ARR":
+    if o is STORE_ARR:
         return [a[0], a[1], a[2]]
     if o in _BIN:
         return [a[1], a[2]]
     if o in _UNARY:
         return [a[1]]
-    if o in ("JMP_IF", "JMP_IF_NOT"):
+    if o in _COND_JUMPS:
         return [a[0]]
-    if o == "PARAM":
+    if o is PARAM:
         return [a[0]]
-    if o == "RET" and a[0]:
+    if o is RET and a[0]:
         return [a[0]]
-    if o == "PRINT":
+    if o is PRINT:
         return list(a)
-    if o == "EXIT":
+    if o is EXIT:
         return [a[0]]
+    if o is PHI:
+        return list(a[3::2])
     return []
 
 
 def _defined(ins: Instruction) -> List[str]:
     o, a = ins.op, ins.args or []
-    if o == "CONST":
+    if o is CONST:
         return [a[0]]
-    if o in ("LOAD", "LOAD_ARR", "READ_INT"):
+    if o in _READS:
         return [a[0]]
-    if o == "STORE":
+    if o is STORE:
         return [a[0]]
-    if o == "ALLOC_ARRAY":
+    if o is ALLOC_ARRAY:
         return [a[0]]
     if o in _BIN or o in _UNARY:
         return [a[0]]
-    if o == "CALL" and a[0]:
+    if o is CALL and a[0]:
+        return [a[0]]
+    if o is PHI:
         return [a[0]]
     return []
 
@@ -68,34 +88,46 @@ def _validate_function(func: IRFunction, known: Set[str]) -> None:
     insns = func.instructions
     labels: Set[str] = set()
     for i, ins in enumerate(insns):
-        if ins.op == "LABEL":
+        if ins.op is LABEL:
             n = ins.args[0]
             if n in labels:
                 raise IRValidationError(f"Duplicate label: {n}", func.name, i)
             labels.add(n)
 
     defined: Set[str] = set(func.param_names)
+    ssa = any(ins.op is PHI for ins in insns)
+    if ssa:  # temps are checked by `_validate_ssa`
+        defined.update(d for ins in insns for d in _defined(ins) if d.__class__ is Temp)
     pc = 0
 
     for i, ins in enumerate(insns):
         o, a = ins.op, ins.args
-        if o == "LABEL":
+        if o is LABEL:
             continue
-        if o == "JMP" and a[0] not in labels:
+        if o is PHI:
+            if i == 0 or insns[i - 1].op not in _BLOCK_HEAD:
+                raise IRValidationError("PHI must open its block, after the LABEL", func.name, i)
+            if len(a) % 2:
+                raise IRValidationError("PHI operands must come in (label, value) pairs",
+                                        func.name, i)
+            for lbl in a[2::2]:
+                if lbl not in labels:
+                    raise IRValidationError(f"PHI names undefined label: {lbl}", func.name, i)
+        if o is JMP and a[0] not in labels:
             raise IRValidationError(f"Jump to undefined label: {a[0]}", func.name, i)
-        if o in ("JMP_IF", "JMP_IF_NOT"):
+        if o in _COND_JUMPS:
             if a[1] not in labels:
                 raise IRValidationError(f"Branch to undefined label: {a[1]}", func.name, i)
             if a[0] not in defined:
                 raise IRValidationError(f"Branch condition '{a[0]}' used before definition", func.name, i)
 
-        if o == "PARAM":
+        if o is PARAM:
             pc += 1
             if a[0] not in defined:
                 raise IRValidationError(f"PARAM source '{a[0]}' used before definition", func.name, i)
             continue
 
-        if o == "CALL":
+        if o is CALL:
             dest, callee, n = a[0], a[1], a[2]
             if pc != n:
                 raise IRValidationError(
@@ -111,7 +143,7 @@ def _validate_function(func: IRFunction, known: Set[str]) -> None:
                 defined.add(d)
             continue
 
-        if o == "RET":
+        if o is RET:
             rv = a[0]
             if func.return_type == "void" and rv:
                 raise IRValidationError("void function must not return a value", func.name, i)
@@ -132,6 +164,66 @@ def _validate_function(func: IRFunction, known: Set[str]) -> None:
         for d in _defined(ins):
             defined.add(d)
 
+    if ssa:
+        _validate_ssa(func)
+
+
+def _validate_ssa(func: IRFunction) -> None:
+    g = func.cfg()
+    where: Dict[Temp, Tuple[object, int]] = {}  # temp -> (defining block, position in it)
+    for b in g.blocks:
+        for k, ins in enumerate(b.instructions):
+            for d in _defined(ins):
+                if d.__class__ is Temp:
+                    if d in where:
+                        raise IRValidationError(
+                            f"Temp '{d}' defined more than once in SSA form", func.name, b.start + k
+                        )
+                    where[d] = (b, k)
+
+    def dominated(v: Temp, b, k: int) -> bool:
+        d = where.get(v)
+        if d is None:
+            return False
+        return d[1] < k if d[0] is b else g.dominates(d[0], b)
+
+    reachable = set(g.rpo())  # code nothing reaches never reads anything
+    for b in g.rpo():
+        seen: Set[str] = set()
+        for k, ins in enumerate(b.instructions):
+            i = b.start + k
+            if ins.op is PHI:
+                a = ins.args
+                if a[1] in seen:
+                    raise IRValidationError(f"Two PHIs for '{a[1]}' in one block", func.name, i)
+                seen.add(a[1])
+                incoming = dict(zip(a[2::2], a[3::2]))
+                for p in b.preds:
+                    if p not in reachable:
+                        continue
+                    v = incoming.get(p.label)
+                    if v is None:
+                        raise IRValidationError(
+                            f"PHI for '{a[1]}' has no value for predecessor "
+                            f"{p.label or 'block ' + str(p.index)}", func.name, i,
+                        )
+                    if v.__class__ is Temp and not dominated(v, p, len(p.instructions)):
+                        raise IRValidationError(
+                            f"PHI operand '{v}' does not reach the end of {p.label}",
+                            func.name, i,
+                        )
+                continue
+            for u in _used(ins):
+                if u.__class__ is Temp and not dominated(u, b, k):
+                    raise IRValidationError(
+                        f"Operand '{u}' used where its definition does not dominate", func.name, i
+                    )
+
+
+def validate_function(func: IRFunction, known: Set[str]) -> None:
+    """Validate one function on its own; `known` names the functions it may call."""
+    _validate_function(func, known)
+
 
 def validate(program: IRProgram) -> None:
     known = {f.name for f in program.functions} | BUILTINS
@@ -0,0 +1,94 @@
+"""IR opcodes.
+
+`Opcode` is an `IntEnum`; a member's value is also its byte in the binary
+IR (`ir.serialize`), so members are only ever appended. Every member is
+also bound at module level (`from ir.opcodes import ADD, JMP`): looking up
+`Opcode.ADD` goes through `EnumType.__getattr__` and costs several times a
+global lookup, which matters in the per-instruction loops of the passes and
+backends. A module that also needs the `ir.ir` constructor of the same name
+imports that under another name (`CONST as IR_CONST`).
+
+`Instruction.op` used to be the op's name as a `str`. Code written for
+that (`ins.op == "STORE"`) would now quietly compare unequal, so comparing
+an `Opcode` with any `str` raises `TypeError` instead; use the member
+(`ins.op is STORE`) or convert once (`Opcode[name]`). Members are
+singletons, and the compiler's own per-instruction tests use `is` and
+frozenset membership, which skip the Python-level `__eq__`.
+"""
+
+from __future__ import annotations
+
+from enum import IntEnum
+
+
+class Opcode(IntEnum):
+    FUNC_ENTRY = 0
+    CONST = 1
+    LOAD = 2
+    STORE = 3
+    LOAD_ARR = 4
+    STORE_ARR = 5
+    ALLOC_ARRAY = 6
+    ADD = 7
+    SUB = 8
+    MUL = 9
+    DIV = 10
+    MOD = 11
+    NEG = 12
+    INC = 13
+    DEC = 14
+    LT = 15
+    LE = 16
+    GT = 17
+    GE = 18
+    EQ = 19
+    NE = 20
+    AND = 21
+    OR = 22
+    NOT = 23
+    LABEL = 24
+    JMP = 25
+    JMP_IF = 26
+    JMP_IF_NOT = 27
+    PARAM = 28
+    CALL = 29
+    RET = 30
+    PRINT = 31
+    READ_INT = 32
+    EXIT = 33
+    PHI = 34
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, str):
+            raise TypeError(
+                f"Opcode compared with the string {other!r}; "
+                f"compare with Opcode.{other} or the module-level constant"
+            )
+        return int.__eq__(self, other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    __hash__ = IntEnum.__hash__
+
+    def __str__(self) -> str:
+        return self._name_
+
+    def __format__(self, spec: str) -> str:
+        return format(self._name_, spec)
+
+
+(
+    FUNC_ENTRY, CONST, LOAD, STORE, LOAD_ARR, STORE_ARR, ALLOC_ARRAY,
+    ADD, SUB, MUL, DIV, MOD, NEG, INC, DEC,
+    LT, LE, GT, GE, EQ, NE, AND, OR, NOT,
+    LABEL, JMP, JMP_IF, JMP_IF_NOT, PARAM, CALL, RET,
+    PRINT, READ_INT, EXIT, PHI,
+) = Opcode
+
+# Ops whose first argument is the temp they define (CALL's is "" when its
+# result is unused); every other temp operand is a use.
+DEFINES = frozenset({
+    CONST, LOAD, LOAD_ARR, READ_INT, ADD, SUB, MUL, DIV, MOD,
+    NEG, INC, DEC, LT, LE, GT, GE, EQ, NE, AND, OR, NOT, CALL, PHI,
+})
@@ -0,0 +1,339 @@
+"""Saving and loading IR: a compact binary encoding and a text form.
+
+Binary (`encode_ir`)::
+
+    magic  b"\\x7fIRB", then varint FORMAT_VERSION
+    string table: varint count, then per string varint byte length + UTF-8
+    varint function count, then per function:
+        name, return type: string ids
+        varint parameter count, then (name, type) string ids per parameter
+        varint instruction count, then per instruction:
+            opcode byte (the `Opcode` value)
+            varint argument count, then one operand per argument
+
+An operand is a varint whose low two bits say what it is: 0 a string id,
+1 a zigzag-encoded int, 2 a constant (kind operand and value operand
+follow), 3 a scalar (`_SCALARS` index; a float's 8 little-endian bytes follow).
+A temp is stored as the string id of its name (`%3`).
+
+Text (`ir_to_text`) is one `repr(instruction)` per line under a
+`FUNC name(param: type, ...) -> type` header, so a `-vv` IR dump reads
+almost the same; `ir_from_text` parses it back. String constants print
+unescaped, so one containing a line break only fits the binary form.
+
+`decode_ir` accepts either form. Every name comes back interned and every
+temp shared, as from `IRBuilder`.
+"""
+
+from __future__ import annotations
+
+import gc
+import struct
+from itertools import islice
+from typing import Any, Dict, List, Union
+
+from lexer.names import NAMES
+from .ir import Instruction, IRFunction, IRProgram, Temp, temp
+from .opcodes import Opcode
+
+FORMAT_VERSION = 1
+
+MAGIC = b"\x7fIRB"
+TEXT_HEADER = "; IR text"
+
+_OPCODES = tuple(Opcode)  # opcode byte -> op
+
+_STR, _INT, _CONST, _SCALAR = range(4)
+_SCALARS = (False, True, None)
+_FLOAT = len(_SCALARS)
+_DOUBLE = struct.Struct("<d")
+
+
+class IRFormatError(Exception):
+    """Raised for data that is not serialized IR of a version this compiler reads."""
+
+
+# ---------------------------------------------------------------------------
+# Binary
+# ---------------------------------------------------------------------------
+
+def _varint(out: bytearray, n: int) -> None:
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def encode_ir(program: IRProgram) -> bytes:
+    """The binary encoding of `program` (see the module docstring)."""
+    strings: Dict[str, int] = {}
+    temps: Dict[Temp, int] = {}
+    body = bytearray()
+
+    def sid(s: str) -> int:
+        i = strings.get(s)
+        if i is None:
+            i = strings[s] = len(strings)
+        return i
+
+    def operand(a: Any) -> None:
+        if type(a) is str:
+            _varint(body, sid(a) << 2 | _STR)
+        elif type(a) is int:
+            _varint(body, ((a << 1) if a >= 0 else (~a << 1 | 1)) << 2 | _INT)
+        elif type(a) is tuple and len(a) == 2:
+            body.append(_CONST)
+            operand(a[0])
+            operand(a[1])
+        elif type(a) is float:
+            body.append(_FLOAT << 2 | _SCALAR)
+            body.extend(_DOUBLE.pack(a))
+        else:
+            for i, s in enumerate(_SCALARS):
+                if a is s:
+                    body.append(i << 2 | _SCALAR)
+                    return
+            raise IRFormatError(f"cannot serialize operand {a!r}")
+
+    _varint(body, len(program.functions))
+    for func in program.functions:
+        _varint(body, sid(func.name))
+        _varint(body, sid(func.return_type))
+        _varint(body, len(func.param_names))
+        for name, ptype in zip(func.param_names, func.param_types):
+            _varint(body, sid(name))
+            _varint(body, sid(ptype))
+        _varint(body, len(func.instructions))
+        for ins in func.instructions:
+            body.append(ins.op)
+            _varint(body, len(ins.args))
+            for a in ins.args:
+                if type(a) is Temp:  # most operands: inline the common cases
+                    i = temps.get(a)
+                    if i is None:
+                        i = temps[a] = sid(repr(a))
+                    if i < 0x20:
+                        body.append(i << 2)
+                    else:
+                        _varint(body, i << 2)
+                elif type(a) is str:
+                    i = strings.get(a)
+                    if i is None:
+                        i = strings[a] = len(strings)
+                    if i < 0x20:
+                        body.append(i << 2)
+                    else:
+                        _varint(body, i << 2)
+                else:
+                    operand(a)
+
+    out = bytearray(MAGIC)
+    _varint(out, FORMAT_VERSION)
+    _varint(out, len(strings))
+    for s in strings:
+        data = s.encode("utf-8")
+        _varint(out, len(data))
+        out += data
+    return bytes(out + body)
+
+
+def _decode_binary(data: bytes) -> IRProgram:
+    it = iter(data)
+    nxt = it.__next__
+    bytes(islice(it, len(MAGIC)))  # skip the magic
+
+    def varint(b: int) -> int:
+        """The rest of a varint whose first byte `b` has the continuation bit set."""
+        n, shift = b & 0x7F, 7
+        while True:
+            b = nxt()
+            n |= (b & 0x7F) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def read() -> int:
+        b = nxt()
+        return b if b < 0x80 else varint(b)
+
+    def operand(v: int) -> Any:
+        # `v` is the operand's first byte; the tag is in its low bits.
+        if v >= 0x80:
+            v = varint(v)
+        tag = v & 3
+        v >>= 2
+        if tag == _STR:
+            return strings[v]
+        if tag == _INT:
+            return ~(v >> 1) if v & 1 else v >> 1
+        if tag == _CONST:
+            kind = operand(nxt())
+            return (kind, operand(nxt()))
+        if v == _FLOAT:
+            return _DOUBLE.unpack(bytes(islice(it, 8)))[0]
+        return _SCALARS[v]
+
+    try:
+        version = read()
+        if version != FORMAT_VERSION:
+            raise IRFormatError(
+                f"IR format version {version} (this compiler reads version {FORMAT_VERSION})"
+            )
+        intern = NAMES.intern
+        strings: List[str] = [
+            intern(bytes(islice(it, read())).decode("utf-8")) for _ in range(read())
+        ]
+        # What a string id means as an operand; inside a constant it is always text.
+        names: List[Any] = [
+            temp(int(s[1:])) if s[:1] == "%" and s[1:].isdigit() else s for s in strings
+        ]
+        functions = []
+        for _ in range(read()):
+            name = strings[read()]
+            return_type = strings[read()]
+            param_names, param_types = [], []
+            for _ in range(read()):
+                param_names.append(strings[read()])
+                param_types.append(strings[read()])
+            instructions = []
+            append = instructions.append
+            for _ in range(read()):
+                op = _OPCODES[nxt()]
+                args = []
+                for _ in range(read()):
+                    v = nxt()
+                    if v & 3 == _STR:  # most operands: inline the common case
+                        args.append(names[(v if v < 0x80 else varint(v)) >> 2])
+                    else:
+                        args.append(operand(v))
+                append(Instruction(op, args))
+            functions.append(IRFunction(name, return_type, param_names, param_types, instructions))
+    except (StopIteration, IndexError, UnicodeDecodeError, struct.error) as e:
+        raise IRFormatError(f"truncated or corrupt IR data ({type(e).__name__})") from None
+    trailing = len(bytes(it))
+    if trailing:
+        raise IRFormatError(f"{trailing} trailing byte(s) after the IR")
+    return IRProgram(functions)
+
+
+# ---------------------------------------------------------------------------
+# Text
+# ---------------------------------------------------------------------------
+
+def ir_to_text(program: IRProgram) -> str:
+    """`program` as text that `ir_from_text` reads back (see the module docstring)."""
+    lines = [f"{TEXT_HEADER} {FORMAT_VERSION}"]
+    for func in program.functions:
+        params = ", ".join(f"{n}: {t}" for n, t in zip(func.param_names, func.param_types))
+        lines.append("")
+        lines.append(f"FUNC {func.name}({params}) -> {func.return_type}")
+        for ins in func.instructions:
+            line = repr(ins)
+            if "\n" in line or "\r" in line:
+                raise IRFormatError(
+                    f"{func.name}: a string constant spans lines; use the binary IR format"
+                )
+            lines.append("  " + line)
+    return "\n".join(lines)
+
+
+def _scalar(text: str) -> Any:
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    if text in ("True", "False"):
+        return text == "True"
+    if text == "None":
+        return None
+    return float(text)
+
+
+def _token(text: str) -> Any:
+    if text[:1] == "(" and text[-1:] == ")" and ":" in text:
+        kind, _, value = text[1:-1].partition(":")
+        return (NAMES.intern(kind), _scalar(value))
+    if text.lstrip("-").isdigit():
+        return int(text)
+    if text[:1] == "%" and text[1:].isdigit():
+        return temp(int(text[1:]))
+    return NAMES.intern(text)
+
+
+def _parse_instruction(text: str) -> Instruction:
+    """Inverse of `Instruction.__repr__`."""
+    op, sep, rest = text.partition(" ")
+    if not sep:
+        return Instruction(op, [])
+    # A string constant is always the last operand and may contain spaces.
+    quote = 0 if rest[:1] == '"' else rest.find(' "') + 1
+    if quote or rest[:1] == '"':
+        string = rest[quote:]
+        if len(string) < 2 or string[-1] != '"':
+            raise IRFormatError(f"unterminated string constant: {text}")
+        head = rest[:quote - 1].split(" ") if quote else []
+        args = [_token(t) for t in head] + [("string", string[1:-1])]
+    else:
+        args = [_token(t) for t in rest.split(" ")]
+    return Instruction(op, args)
+
+
+def _parse_header(line: str) -> IRFunction:
+    # FUNC name(a: int, b: int) -> type
+    head, arrow, return_type = line[len("FUNC "):].rpartition(") -> ")
+    name, paren, params = head.partition("(")
+    if not arrow or not paren:
+        raise IRFormatError(f"bad function header: {line}")
+    names, types = [], []
+    for p in filter(None, params.split(", ")):
+        pname, colon, ptype = p.partition(": ")
+        if not colon:
+            raise IRFormatError(f"bad parameter {p!r} in: {line}")
+        names.append(NAMES.intern(pname))
+        types.append(NAMES.intern(ptype))
+    return IRFunction(NAMES.intern(name), NAMES.intern(return_type), names, types, [])
+
+
+def ir_from_text(text: str) -> IRProgram:
+    """Parse the output of `ir_to_text`."""
+    lines = text.splitlines()
+    header = lines[0] if lines else ""
+    if not header.startswith(TEXT_HEADER + " "):
+        raise IRFormatError(f"not IR text (expected a {TEXT_HEADER!r} header line)")
+    version = header[len(TEXT_HEADER) + 1:].strip()
+    if version != str(FORMAT_VERSION):
+        raise IRFormatError(
+            f"IR format version {version} (this compiler reads version {FORMAT_VERSION})"
+        )
+    functions: List[IRFunction] = []
+    for lineno, line in enumerate(lines[1:], start=2):
+        if not line or line.startswith(";"):
+            continue
+        try:
+            if line.startswith("FUNC "):
+                functions.append(_parse_header(line))
+            elif line.startswith("  ") and functions:
+                functions[-1].instructions.append(_parse_instruction(line[2:]))
+            else:
+                raise IRFormatError(f"unexpected line: {line}")
+        except (IRFormatError, ValueError) as e:
+            raise IRFormatError(f"line {lineno}: {e}") from None
+    return IRProgram(functions)
+
+
+def decode_ir(data: Union[bytes, str]) -> IRProgram:
+    """Load IR saved by `encode_ir` or `ir_to_text`, whichever `data` holds."""
+    if isinstance(data, bytes) and not data.startswith(MAGIC):
+        try:
+            data = data.decode("utf-8")
+        except UnicodeDecodeError:
+            raise IRFormatError("not an IR file") from None
+    # Loading allocates a few objects per instruction, none of them in a
+    # cycle; letting the collector scan them as they pile up doubles the time.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _decode_binary(data) if isinstance(data, bytes) else ir_from_text(data)
+    finally:
+        if enabled:
+            gc.enable()
@@ -0,0 +1,474 @@
+"""SSA form: scalar variables promoted to temps, and PHIs lowered back.
+
+In SSA form a promoted variable no longer lives in a slot. `STORE x %v`
+goes away and makes %v x's current value; `LOAD %t x` goes away and its
+readers read that value instead. Where paths carrying different values of
+x meet, a PHI at the top of the join block picks one by the predecessor
+control came from:
+
+    LABEL L4
+    PHI %9 x L2 %3 L3 %7        %9 is %3 coming from block L2, %7 from L3
+
+A PHI's operands are the temp it defines, the variable it stands for and
+a (label, value) pair per predecessor, so every predecessor is labelled.
+PHIs come first in their block, right after its LABEL.
+
+`to_ssa` promotes each variable that is stored to and otherwise only
+LOADed (arrays stay in memory). PHIs go on the iterated dominance frontier
+of the blocks that store the variable, where it is live, and a walk down
+the dominator tree renames. A variable read before any store starts out
+as its parameter value, LOADed once at entry, or as 0, which is what the
+C++ backend gives an unassigned local. Blocks unreachable from the entry
+have no dominator and are dropped.
+
+`out_of_ssa` turns each PHI back into a LOAD of its variable and puts the
+matching STOREs at the ends of the predecessors. All PHIs of a variable
+share its slot, so a STORE of the value the slot already holds is left
+out; in a loop most of them are. An edge is split only where its source
+would store different values into one slot for different successors.
+Entries for labels that are no longer predecessors (a pass folded the
+branch away) are ignored.
+
+The optimizer runs the two as passes "ssa" and "unssa" (`optimizer.ssa`);
+the backends lower what is left with `lower_phis`.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from lexer.names import NAMES
+from .cfg import Block
+from .ir import Instruction, IRFunction, IRProgram, Temp, temp
+from .ir_validator import IRValidationError
+from .opcodes import (
+    ALLOC_ARRAY, CONST, EXIT, FUNC_ENTRY, JMP, JMP_IF, JMP_IF_NOT, LABEL, LOAD, LOAD_ARR, PHI, RET,
+    STORE, STORE_ARR, DEFINES,
+)
+
+_BRANCHES = frozenset({JMP, JMP_IF, JMP_IF_NOT})
+_NO_FALL_THROUGH = frozenset({JMP, RET, EXIT})
+
+
+def has_phis(func: IRFunction) -> bool:
+    return any(ins.op is PHI for ins in func.instructions)
+
+
+def phi_incoming(phi: Instruction) -> List[Tuple[str, Any]]:
+    """A PHI's (predecessor label, value) pairs."""
+    a = phi.args
+    return list(zip(a[2::2], a[3::2]))
+
+
+def drop_unreachable(func: IRFunction) -> int:
+    """Erase the blocks the entry no longer reaches, with the PHI entries for
+    edges that went with them; returns the instructions erased or rewritten.
+
+    In SSA form an unreachable block may read temps defined in another
+    unreachable block, so it has to go as a whole, labels and all.
+    """
+    g = func.cfg()
+    live = set(g.rpo())
+    changed = 0
+    for b in g.rpo():
+        preds = {p.label for p in b.preds if p in live}
+        for k, ins in enumerate(b.instructions):
+            if ins.op is LABEL:
+                continue
+            if ins.op is not PHI:
+                break
+            a = ins.args
+            keep = [x for lbl, v in zip(a[2::2], a[3::2]) if lbl in preds for x in (lbl, v)]
+            if len(keep) != len(a) - 2:
+                func.replace(b.start + k, Instruction(PHI, a[:2] + keep))
+                changed += 1
+    dead = [i for b in g.blocks if b not in live for i in range(b.start, b.end)]
+    func.erase(*dead)
+    return changed + len(dead)
+
+
+def _promotable(instructions: List[Instruction]) -> Dict[str, None]:
+    """The variables `to_ssa` promotes, in order of first appearance."""
+    stored: Dict[str, None] = {}
+    other: Set[str] = set()
+    for ins in instructions:
+        op, a = ins.op, ins.args
+        if op is STORE:
+            if a[1].__class__ is Temp:
+                stored[a[0]] = None
+            else:
+                other.add(a[0])
+        elif op is ALLOC_ARRAY or op is STORE_ARR:
+            other.add(a[0])
+        elif op is LOAD_ARR:
+            other.add(a[1])
+    return {x: None for x in stored if x not in other}
+
+
+def _next_temp(instructions: List[Instruction]) -> int:
+    n = -1
+    for ins in instructions:
+        for a in ins.args:
+            if a.__class__ is Temp and a > n:
+                n = a
+    return n + 1
+
+
+def _next_label(instructions: List[Instruction]) -> int:
+    n = -1
+    for ins in instructions:
+        if ins.op is LABEL:
+            name = ins.args[0]
+            if name[:1] == "L" and name[1:].isdigit():
+                n = max(n, int(name[1:]))
+    return n + 1
+
+
+def _subst(ins: Instruction, subst: Dict[Temp, Any]) -> Instruction:
+    args = ins.args
+    first = 1 if ins.op in DEFINES else 0
+    for a in args[first:]:
+        if a.__class__ is Temp and a in subst:
+            break
+    else:
+        return ins
+    return Instruction(ins.op, args[:first] + [
+        subst.get(a, a) if a.__class__ is Temp else a for a in args[first:]
+    ])
+
+
+# ---------------------------------------------------------------------------
+# Into SSA
+# ---------------------------------------------------------------------------
+
+def to_ssa(func: IRFunction) -> Dict[str, int]:
+    """Promote `func`'s scalar variables, in place; returns the counts of both."""
+    stats = {"promoted": 0, "phis": 0}
+    variables = _promotable(func.instructions)
+    g = func.cfg()
+    entry = g.entry
+    # Lowering opens every function with FUNC_ENTRY; a hand-written entry
+    # block that is also a jump target would need a PHI with no predecessor.
+    if not variables or entry.preds:
+        return stats
+    blocks = g.rpo()
+
+    # Where each variable is stored, and where it is live on entry.
+    upward: Dict[Block, Set[str]] = {}
+    stores: Dict[Block, Set[str]] = {}
+    def_blocks: Dict[str, List[Block]] = {x: [] for x in variables}
+    for b in blocks:
+        up: Set[str] = set()
+        st: Set[str] = set()
+        for ins in b.instructions:
+            if ins.op is LOAD:
+                x = ins.args[1]
+                if x in variables and x not in st:
+                    up.add(x)
+            elif ins.op is STORE:
+                x = ins.args[0]
+                if x in variables and x not in st:
+                    st.add(x)
+                    def_blocks[x].append(b)
+        upward[b], stores[b] = up, st
+    live_in = {b: set(upward[b]) for b in blocks}
+    changed = True
+    while changed:
+        changed = False
+        for b in reversed(blocks):
+            live = set(upward[b])
+            for s in b.succs:
+                live |= live_in[s] - stores[b]
+            if len(live) != len(live_in[b]):
+                live_in[b] = live
+                changed = True
+
+    next_temp = _next_temp(func.instructions)
+
+    def fresh() -> Temp:
+        nonlocal next_temp
+        next_temp += 1
+        return temp(next_temp - 1)
+
+    # PHI placement on the iterated dominance frontiers (pruned by liveness).
+    df = g.frontiers()
+    phis: Dict[Block, List[list]] = {}  # block -> [dest, variable, incoming pairs]
+    for x, defs in def_blocks.items():
+        queued = set(defs)
+        placed: Set[Block] = set()
+        work = list(defs)
+        while work:
+            for f in df[work.pop()]:
+                if f in placed or x not in live_in[f]:
+                    continue
+                placed.add(f)
+                phis.setdefault(f, []).append([fresh(), x, []])
+                stats["phis"] += 1
+                if f not in queued:
+                    queued.add(f)
+                    work.append(f)
+
+    # Renaming, down the dominator tree.
+    params = set(func.param_names)
+    stacks: Dict[str, List[Any]] = {x: [] for x in variables}
+    initial: Dict[str, Temp] = {}
+    entry_values: List[Instruction] = []
+    subst: Dict[Temp, Any] = {}
+    promoted: Set[int] = set()  # ids of the LOADs and STOREs renaming removes
+    labels: Dict[Block, str] = {}
+    next_label = _next_label(func.instructions)
+
+    def current(x: str) -> Any:
+        st = stacks[x]
+        if st:
+            return st[-1]
+        t = initial.get(x)
+        if t is None:
+            t = initial[x] = fresh()
+            entry_values.append(
+                Instruction(LOAD, [t, x]) if x in params
+                else Instruction(CONST, [t, ("int", 0)])
+            )
+        return t
+
+    def label_of(b: Block) -> str:
+        nonlocal next_label
+        if b.label is not None:
+            return b.label
+        lbl = labels.get(b)
+        if lbl is None:
+            lbl = labels[b] = NAMES.intern(f"L{next_label}")
+            next_label += 1
+        return lbl
+
+    children = g.dom_children()
+    pushed: Dict[Block, List[str]] = {}
+    work_blocks: List[Tuple[Block, bool]] = [(entry, False)]
+    while work_blocks:
+        b, leaving = work_blocks.pop()
+        if leaving:
+            for x in pushed.pop(b):
+                stacks[x].pop()
+            continue
+        mine = pushed[b] = []
+        for dest, x, _ in phis.get(b, ()):
+            stacks[x].append(dest)
+            mine.append(x)
+        for ins in b.instructions:
+            op = ins.op
+            if op is LOAD:
+                x = ins.args[1]
+                if x in stacks:
+                    subst[ins.args[0]] = current(x)
+                    promoted.add(id(ins))
+            elif op is STORE:
+                x = ins.args[0]
+                if x in stacks:
+                    v = ins.args[1]
+                    stacks[x].append(subst.get(v, v))
+                    mine.append(x)
+                    promoted.add(id(ins))
+        for s in dict.fromkeys(b.succs):
+            for dest, x, incoming in phis.get(s, ()):
+                incoming.append((label_of(b), current(x)))
+        work_blocks.append((b, True))
+        work_blocks.extend((c, False) for c in reversed(children[b]))
+
+    # A value read through a chain of promoted LOADs and STOREs.
+    for t, v in subst.items():
+        while v.__class__ is Temp and v in subst:
+            v = subst[v]
+        subst[t] = v
+
+    out: List[Instruction] = []
+    for b in g.blocks:
+        if b not in children:
+            continue  # unreachable
+        insns = b.instructions
+        k = 0
+        if b is entry:
+            if insns[0].op is FUNC_ENTRY:
+                out.append(insns[0])
+                k = 1
+            out.extend(entry_values)
+        lbl = labels.get(b)
+        if lbl is not None:
+            out.append(Instruction(LABEL, [lbl]))
+        elif b.label is not None:
+            out.append(insns[k])
+            k += 1
+        for dest, x, incoming in phis.get(b, ()):
+            args = [dest, x]
+            for pred, v in incoming:
+                args += (pred, subst.get(v, v))
+            out.append(Instruction(PHI, args))
+        for ins in insns[k:]:
+            if id(ins) not in promoted:
+                out.append(_subst(ins, subst))
+    func.set_instructions(out)
+    stats["promoted"] = len(variables)
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Out of SSA
+# ---------------------------------------------------------------------------
+
+def out_of_ssa(func: IRFunction) -> Dict[str, int]:
+    """Lower `func`'s PHIs to LOADs and STOREs, in place; returns the counts."""
+    stats = {"phis": 0, "copies": 0, "coalesced": 0}
+    if not has_phis(func):
+        return stats
+    g = func.cfg()
+
+    # The STOREs each predecessor owes each of its successors, in PHI order.
+    copies: Dict[Block, Dict[Block, List[Tuple[str, Any]]]] = {}
+    for b in g.blocks:
+        slots: Set[str] = set()
+        block_phis = []
+        for k, ins in enumerate(b.instructions):
+            if ins.op is PHI:
+                if ins.args[1] in slots:
+                    raise IRValidationError(
+                        f"Two PHIs for '{ins.args[1]}' in one block", func.name, b.start + k
+                    )
+                slots.add(ins.args[1])
+                block_phis.append((b.start + k, ins, dict(phi_incoming(ins))))
+        if not block_phis:
+            continue
+        stats["phis"] += len(block_phis)
+        for p in dict.fromkeys(b.preds):
+            owed = copies.setdefault(p, {}).setdefault(b, [])
+            for i, phi, incoming in block_phis:
+                value = incoming.get(p.label)
+                if value is None:
+                    raise IRValidationError(
+                        f"PHI for '{phi.args[1]}' has no value for a predecessor block",
+                        func.name, i,
+                    )
+                owed.append((phi.args[1], value))
+
+    next_label = _next_label(func.instructions)
+    before: Dict[Block, List[Instruction]] = {}  # new blocks laid out just ahead of a block
+    after_all: List[Instruction] = []            # new blocks laid out at the end
+    at_end: Dict[Block, List[Instruction]] = {}  # STOREs closing a predecessor
+    retarget: Dict[Block, str] = {}              # a predecessor's new branch label
+    for p, per_succ in copies.items():
+        wanted: Dict[str, Any] = {}
+        split = False
+        for owed in per_succ.values():
+            for slot, v in owed:
+                if wanted.setdefault(slot, v) != v:
+                    split = True
+        if not split:
+            at_end[p] = [Instruction(STORE, [slot, v]) for slot, v in wanted.items()]
+            continue
+        last = p.instructions[-1]
+        for s, owed in per_succ.items():
+            lbl = NAMES.intern(f"L{next_label}")
+            next_label += 1
+            edge = [Instruction(LABEL, [lbl])] + [Instruction(STORE, [x, v]) for x, v in owed]
+            if last.op in _BRANCHES and last.args[-1] == s.label:
+                retarget[p] = lbl
+                after_all += edge + [Instruction(JMP, [s.label])]
+            else:  # the fall-through: the new block goes between the two
+                before[s] = edge
+
+    inserted: Set[int] = set()
+    out: List[Instruction] = []
+    for b in g.blocks:
+        out += before.get(b, ())
+        insns = b.instructions
+        end = len(insns)
+        last = insns[-1]
+        if last.op in _BRANCHES:
+            end -= 1
+        for ins in insns[:end]:
+            out.append(Instruction(LOAD, ins.args[:2]) if ins.op is PHI else ins)
+        stores = at_end.get(b, ())
+        out += stores
+        inserted.update(id(ins) for ins in stores)
+        if end < len(insns):
+            lbl = retarget.get(b)
+            out.append(last if lbl is None else Instruction(last.op, last.args[:-1] + [lbl]))
+    if after_all:
+        if out[-1].op not in _NO_FALL_THROUGH:
+            # Falling off the end returns: keep it that way past the new blocks.
+            lbl = NAMES.intern(f"L{next_label}")
+            after_all = [Instruction(JMP, [lbl])] + after_all + [Instruction(LABEL, [lbl])]
+        out += after_all
+    inserted.update(id(ins) for ins in after_all if ins.op is STORE)
+    for ins_list in before.values():
+        inserted.update(id(ins) for ins in ins_list if ins.op is STORE)
+    func.set_instructions(out)
+    stats["copies"] = len(inserted)
+
+    redundant = _redundant_stores(func, inserted)
+    if redundant:
+        func.erase(*redundant)
+        stats["coalesced"] = len(redundant)
+        stats["copies"] -= len(redundant)
+    return stats
+
+
+def _redundant_stores(func: IRFunction, candidates: Set[int]) -> List[int]:
+    """Positions of the `candidates` (STOREs, by id) that store what their slot holds.
+
+    A forward must-analysis of "slot x holds temp %t": a LOAD or STORE
+    makes it true, a redefinition of %t (the next trip round a loop) or
+    another STORE to x false.
+    """
+    g = func.cfg()
+    rpo = g.rpo()
+    state_in: Dict[Block, Optional[Dict[str, Any]]] = {b: None for b in rpo}
+    if rpo:
+        state_in[rpo[0]] = {}
+
+    def transfer(b: Block, held: Dict[str, Any], found: Optional[List[int]]) -> Dict[str, Any]:
+        held = dict(held)
+        for k, ins in enumerate(b.instructions):
+            op, a = ins.op, ins.args
+            if op is STORE:
+                if found is not None and id(ins) in candidates and held.get(a[0]) == a[1]:
+                    found.append(b.start + k)
+                held[a[0]] = a[1]
+                continue
+            if op in DEFINES and a[0].__class__ is Temp and a[0] in held.values():
+                held = {x: v for x, v in held.items() if v != a[0]}
+            if op is LOAD:
+                held[a[1]] = a[0]
+        return held
+
+    changed = True
+    while changed:
+        changed = False
+        for b in rpo:
+            held = state_in[b]
+            if held is None:
+                continue
+            out = transfer(b, held, None)
+            for s in b.succs:
+                cur = state_in[s]
+                new = out if cur is None else {x: v for x, v in cur.items() if out.get(x) == v}
+                if cur is None or len(new) != len(cur):
+                    state_in[s] = new
+                    changed = True
+
+    found: List[int] = []
+    for b in rpo:
+        if state_in[b] is not None:
+            transfer(b, state_in[b], found)
+    return found
+
+
+def lower_phis(program: IRProgram) -> IRProgram:
+    """`program` with every PHI lowered by `out_of_ssa` (itself when it has none)."""
+    if not any(has_phis(f) for f in program.functions):
+        return program
+    functions = []
+    for f in program.functions:
+        if has_phis(f):
+            f = f.copy()
+            out_of_ssa(f)
+        functions.append(f)
+    return IRProgram(functions)
@@ -1,18 +1,174 @@
-from .tokens import KEYWORDS, SYMBOLS_1, SYMBOLS_2, CHARS_STARTING_2, BOOL_LITERALS
+import codecs
+import os
+import re
+from bisect import bisect_right
+
+from .names import NAMES
+from .tokens import (
+    KEYWORDS, SYMBOLS_1, SYMBOLS_2, CHARS_STARTING_2, BOOL_LITERALS,
+    KEYWORD_KINDS, SYMBOL_KINDS, IDENT, NUMBER, FLOAT_LIT, BOOL_LIT, CHAR_LIT, STRING_LIT,
+    token_kind,
+)
+
+ENGINES = ("scan", "regex")
 
 
 class Token:
     def __init__(self, type, value, line=None, column=None):
         self.type, self.value, self.line, self.column = type, value, line, column
+        self.kind = token_kind(type, value)
 
     def __repr__(self):
         loc = f" (line {self.line})" if self.line is not None else ""
         return f"{self.type}: {self.value}{loc}"
 
 
-class Lexer:
+class LineIndex:
+    """Offsets of every line start in a source text, built on first use.
+
+    Maps an offset to its 1-based (line, column) by bisecting the line-start
+    table, so tokens only pay for a location when one is asked for. `text`
+    may also be a UTF-8 bytes-like object (e.g. an mmap); offsets are then
+    byte offsets and columns are still counted in characters.
+    """
+
     def __init__(self, text):
         self.text = text
+        self._starts = None
+
+    def _line_starts(self):
+        if self._starts is None:
+            nl = "\n" if isinstance(self.text, str) else b"\n"
+            self._starts = [0] + [m.end() for m in re.finditer(nl, self.text)]
+        return self._starts
+
+    def line_of(self, pos):
+        return bisect_right(self._line_starts(), pos)
+
+    def column_of(self, pos):
+        starts = self._line_starts()
+        start = starts[bisect_right(starts, pos) - 1]
+        if isinstance(self.text, str):
+            return pos - start + 1
+        return len(self.text[start:pos].decode("utf-8", "replace")) + 1
+
+
+class _OffsetToken(Token):
+    """Token produced by the regex engine: line/column are derived from `pos`."""
+
+    def __init__(self, type, value, kind, pos, index):
+        self.type, self.value, self.kind = type, value, kind
+        self.pos, self._index = pos, index
+
+    @property
+    def line(self):
+        return self._index.line_of(self.pos)
+
+    @property
+    def column(self):
+        return self._index.column_of(self.pos)
+
+
+def _build_master_pattern(for_bytes=False):
+    """One alternation covering every token class; order mirrors `tokenize_scan`.
+
+    The bytes flavour has ASCII-only classes; anything else falls to `bad`.
+    """
+    symbols = sorted(SYMBOLS_2, key=len, reverse=True) + sorted(SYMBOLS_1)
+    parts = [
+        r"(?P<ws>\s+)",
+        r"(?P<comment>//[^\n]*)",
+        r"(?P<word>[^\W\d]\w*)",
+        r"(?P<float>\d+\.\d+)",
+        r"(?P<num>\d+)",
+        r'"(?P<str>(?:[^"\\]|\\.)*)"',
+        r"'(?P<char>\\.|[^\\])'",
+        "(?P<sym>" + "|".join(re.escape(s) for s in symbols) + ")",
+        r"(?P<bad>.)",
+    ]
+    pattern = "|".join(parts)
+    return re.compile(pattern.encode("ascii") if for_bytes else pattern, re.DOTALL)
+
+
+_MASTER_RE = _build_master_pattern()
+_MASTER_RE_BYTES = _build_master_pattern(for_bytes=True)
+_SYMBOL_TEXT = {s.encode("ascii"): s for s in SYMBOLS_1 | SYMBOLS_2}
+_WORD_KIND = {w: "KEYWORD" for w in KEYWORDS}
+_WORD_KIND.update({w: "BOOL_LIT" for w in BOOL_LITERALS})
+_GROUP_KIND = {
+    "float": "FLOAT_LIT",
+    "num": "NUMBER",
+    "str": "STRING_LIT",
+    "sym": "SYMBOL",
+}
+_WORD_CODE = dict(KEYWORD_KINDS, true=BOOL_LIT, false=BOOL_LIT)
+_GROUP_CODE = {"float": FLOAT_LIT, "num": NUMBER, "str": STRING_LIT}
+
+
+def _read_chunks(source, chunk_size):
+    """Yield text chunks from anything with `read(n)`: a text/binary file or an mmap."""
+    decoder = None
+    while True:
+        data = source.read(chunk_size)
+        if not data:
+            break
+        if isinstance(data, (bytes, bytearray)):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder("utf-8")()
+            data = decoder.decode(data)
+        if data:
+            yield data
+    if decoder is not None:
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+
+def _bad_token_error(t, p, pos, line):
+    """The scan engine's diagnostic for the unmatched character `t[p]` (absolute offset `pos`)."""
+    ch = t[p]
+    if ch == '"':
+        return Exception("Unterminated string literal")
+    if ch == "'":
+        p += 1
+        if p >= len(t):
+            return Exception("Unterminated char literal")
+        if t[p] == "\\":
+            p += 1
+            if p >= len(t):
+                return Exception("Unterminated escape in char literal")
+        return Exception("Char literal must be single character")
+    return Exception(f"Unknown character: {ch!r} at position {pos} (line {line})")
+
+
+def map_source(path):
+    """Memory-map `path` read-only for lexing in place with `Lexer(buf, engine="regex")`.
+
+    The caller owns the map and must keep it open while tokens are in use
+    (their line/column are computed from it lazily). Empty files map to b"".
+    """
+    import mmap
+
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Lexer:
+    """Tokenizer over `text`.
+
+    `text` is normally a `str`. The regex engine also accepts a UTF-8
+    bytes-like object such as an `mmap`, and lexes it in place without
+    decoding the whole source (see `map_source`); the scan engine
+    defers to it for such input.
+    """
+
+    def __init__(self, text="", engine="scan"):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown lexer engine: {engine!r} (expected one of {', '.join(ENGINES)})")
+        self.text = text
+        self.engine = engine
         self.pos = 0
         self.line = 1
         self.column = 1
@@ -32,6 +188,11 @@ class Lexer:
         return self.text[i] if i < len(self.text) else None
 
     def tokenize(self):
+        if self.engine == "regex" or not isinstance(self.text, str):
+            return self.tokenize_regex()
+        return self.tokenize_scan()
+
+    def tokenize_scan(self):
         toks, t = [], self.text
         while self.pos < len(t):
             ch = t[self.pos]
@@ -50,7 +211,7 @@ class Lexer:
                 start = self.pos
                 while self.pos < len(t) and (t[self.pos].isalnum() or t[self.pos] == "_"):
                     self._adv()
-                w = t[start : self.pos]
+                w = NAMES.intern(t[start : self.pos])
                 kind = "BOOL_LIT" if w in BOOL_LITERALS else ("KEYWORD" if w in KEYWORDS else "IDENTIFIER")
                 toks.append(Token(kind, w, L, C))
                 continue
@@ -117,6 +278,144 @@ class Lexer:
 
         return toks
 
+    def tokenize_regex(self):
+        """Single pass over `_MASTER_RE`; same tokens and errors as `tokenize_scan`."""
+        if not isinstance(self.text, str):
+            return self._tokenize_bytes()
+        toks, t = [], self.text
+        index = LineIndex(t)
+        word_kind, word_code, group_kind = _WORD_KIND, _WORD_CODE, _GROUP_KIND
+        intern = NAMES.intern
+        append = toks.append
+        for m in _MASTER_RE.finditer(t, self.pos):
+            g = m.lastgroup
+            if g == "ws" or g == "comment":
+                continue
+            if g == "word":
+                w = intern(m.group(g))
+                append(_OffsetToken(word_kind.get(w, "IDENTIFIER"), w, word_code.get(w, IDENT), m.start(), index))
+            elif g == "char":
+                # The escape backslash is dropped, as in the scan engine.
+                append(_OffsetToken("CHAR_LIT", m.group(g)[-1], CHAR_LIT, m.start(), index))
+            elif g == "bad":
+                self.pos = p = m.start()
+                raise _bad_token_error(t, p, p, index.line_of(p))
+            elif g == "sym":
+                v = m.group(g)
+                append(_OffsetToken("SYMBOL", v, SYMBOL_KINDS[v], m.start(), index))
+            else:
+                append(_OffsetToken(group_kind[g], m.group(g), _GROUP_CODE[g], m.start(), index))
+        self.pos = len(t)
+        return toks
+
+    def _tokenize_bytes(self):
+        """`tokenize_regex` over a bytes-like source without decoding it up front.
+
+        Non-ASCII identifiers or whitespace and lexical errors do not match
+        the ASCII pattern; for those the source is decoded once and handed to
+        the `str` engine, which produces the usual tokens or diagnostic.
+        """
+        toks, t = [], self.text
+        index = LineIndex(t)
+        word_kind, word_code, group_kind, symbol_text = _WORD_KIND, _WORD_CODE, _GROUP_KIND, _SYMBOL_TEXT
+        intern = NAMES.intern
+        by_bytes = {}  # spelling -> name, for this lex only
+        append = toks.append
+        for m in _MASTER_RE_BYTES.finditer(t):
+            g = m.lastgroup
+            if g == "ws" or g == "comment":
+                continue
+            if g == "word":
+                raw = m.group(g)
+                w = by_bytes.get(raw)
+                if w is None:  # repeated spellings skip decoding
+                    w = by_bytes[raw] = intern(raw.decode("utf-8"))
+                append(_OffsetToken(word_kind.get(w, "IDENTIFIER"), w, word_code.get(w, IDENT), m.start(), index))
+            elif g == "sym":
+                v = symbol_text[m.group(g)]
+                append(_OffsetToken("SYMBOL", v, SYMBOL_KINDS[v], m.start(), index))
+            elif g == "char":
+                append(_OffsetToken("CHAR_LIT", m.group(g)[-1:].decode("ascii"), CHAR_LIT, m.start(), index))
+            elif g == "bad":
+                return Lexer(str(t, "utf-8"), engine="regex").tokenize_regex()
+            else:
+                append(_OffsetToken(group_kind[g], m.group(g).decode("utf-8"), _GROUP_CODE[g], m.start(), index))
+        self.pos = len(t)
+        return toks
+
+    def tokenize_buffer(self):
+        """Tokenize into a compact struct-of-arrays `TokenBuffer` (regex engine)."""
+        from .token_buffer import TokenBuffer
+
+        return TokenBuffer.from_text(self.text)
+
+    def iter_tokens(self, source=None, chunk_size=1 << 16):
+        """Yield tokens one at a time, reading `source` in `chunk_size` pieces.
+
+        `source` is any object with `read(n)` (text or binary file, mmap) and
+        defaults to this lexer's text. Matching uses the regex engine's master
+        pattern; locations are computed as tokens are produced so that nothing
+        holds on to input that has already been consumed.
+        """
+        chunks = _read_chunks(source, chunk_size) if source is not None else iter((self.text,))
+        word_kind, group_kind = _WORD_KIND, _GROUP_KIND
+        intern = NAMES.intern
+        buf, base, line, col = "", 0, 1, 1  # base/line/col describe buf[0]
+        eof = False
+        while not eof:
+            nxt = next(chunks, None)
+            if nxt is None:
+                eof = True
+            else:
+                buf += nxt
+            at = len(buf)  # where unconsumed input starts once this chunk is done
+            loc = 0        # line/col currently describe buf[loc]
+            matches = list(_MASTER_RE.finditer(buf))
+            if not eof and matches:
+                # The last match may still grow with the next chunk, and so
+                # may the one before a stray last character: `1` then `.`
+                # can be the start of `1.5`.
+                keep = len(matches) - 1
+                if keep and matches[keep].lastgroup == "bad":
+                    keep -= 1
+                at = matches[keep].start()
+                del matches[keep:]
+            for m in matches:
+                g = m.lastgroup
+                start = m.start()
+                # An unmatched quote may be closed by the next chunk.
+                if not eof and g == "bad" and buf[start] in "\"'":
+                    at = start
+                    break
+                if g == "ws" or g == "comment":
+                    continue
+                nl = buf.count("\n", loc, start)
+                if nl:
+                    line += nl
+                    col = start - buf.rindex("\n", loc, start)
+                else:
+                    col += start - loc
+                loc = start
+                if g == "word":
+                    w = intern(m.group(g))
+                    yield Token(word_kind.get(w, "IDENTIFIER"), w, line, col)
+                elif g == "char":
+                    yield Token("CHAR_LIT", m.group(g)[-1], line, col)
+                elif g == "bad":
+                    self.pos = base + start
+                    raise _bad_token_error(buf, start, base + start, line)
+                else:
+                    yield Token(group_kind[g], m.group(g), line, col)
+            nl = buf.count("\n", loc, at)
+            if nl:
+                line += nl
+                col = at - buf.rindex("\n", loc, at)
+            else:
+                col += at - loc
+            base += at
+            buf = buf[at:]
+        self.pos = base
+
 
 if __name__ == "__main__":
     lx = Lexer("int x; void main(){ print(42); }")
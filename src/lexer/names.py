@@ -0,0 +1,19 @@
+"""One interning table for identifier and keyword spellings.
+
+The lexer, the parser, `SymbolTable` and `IRBuilder` all route names
+through `NAMES`, so every occurrence of a name is the same `str` object:
+dictionary lookups keyed by names hit the identity fast path, and repeated
+identifiers in a large source cost one string instead of one per use.
+Canonical objects come from `sys.intern`, so they are also identical to
+the name literals that appear in compiler code ("main", "print", ...).
+"""
+
+import sys
+
+
+class NameTable:
+    def intern(self, name):
+        return sys.intern(name)
+
+
+NAMES = NameTable()
@@ -0,0 +1,136 @@
+"""Struct-of-arrays token storage for large inputs.
+
+A `TokenBuffer` keeps one small record per token in parallel `array`
+columns instead of one `Token` object each:
+
+    kinds      array('B')  token kind code (see `lexer.tokens`)
+    starts     array('I')  offset of the token's first character
+    ends       array('I')  offset one past its last character
+    value_ids  array('I')  index into the interned `values` table
+
+Line and column are derived on demand from the shared `LineIndex`.
+Indexing or iterating the buffer yields `TokenView`s, which expose the
+same `type` / `kind` / `value` / `line` / `column` attributes as `Token`, so
+`Parser` and the diagnostics code accept a buffer wherever they accept a
+token list.
+"""
+
+from array import array
+
+from .lexer import (
+    Token,
+    LineIndex,
+    _MASTER_RE,
+    _WORD_KIND,
+    _GROUP_KIND,
+    _bad_token_error,
+)
+from .names import NAMES
+from .tokens import KIND_TYPES, token_kind
+
+
+class TokenView:
+    """A `Token`-compatible handle onto row `index` of a `TokenBuffer`."""
+
+    __slots__ = ("_buf", "index")
+
+    def __init__(self, buf, index):
+        self._buf = buf
+        self.index = index
+
+    @property
+    def type(self):
+        return KIND_TYPES[self._buf.kinds[self.index]]
+
+    @property
+    def kind(self):
+        return self._buf.kinds[self.index]
+
+    @property
+    def value(self):
+        b = self._buf
+        return b.values[b.value_ids[self.index]]
+
+    @property
+    def pos(self):
+        return self._buf.starts[self.index]
+
+    @property
+    def line(self):
+        b = self._buf
+        return b.lines.line_of(b.starts[self.index])
+
+    @property
+    def column(self):
+        b = self._buf
+        return b.lines.column_of(b.starts[self.index])
+
+    __repr__ = Token.__repr__
+
+
+class TokenBuffer:
+    def __init__(self, text):
+        self.text = text
+        self.lines = LineIndex(text)
+        self.kinds = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.value_ids = array("I")
+        self.values = []
+        self._value_ids = {}
+
+    @classmethod
+    def from_text(cls, text):
+        """Tokenize `text` with the regex engine's master pattern."""
+        buf = cls(text)
+        add = buf.append
+        word_kind, group_kind = _WORD_KIND, _GROUP_KIND
+        for m in _MASTER_RE.finditer(text):
+            g = m.lastgroup
+            if g == "ws" or g == "comment":
+                continue
+            if g == "word":
+                w = m.group(g)
+                add(word_kind.get(w, "IDENTIFIER"), w, m.start(), m.end())
+            elif g == "char":
+                add("CHAR_LIT", m.group(g)[-1], m.start(), m.end())
+            elif g == "bad":
+                p = m.start()
+                raise _bad_token_error(text, p, p, buf.lines.line_of(p))
+            else:
+                add(group_kind[g], m.group(g), m.start(), m.end())
+        return buf
+
+    def intern(self, value):
+        """Id of `value` in the shared value table, adding it if new."""
+        vid = self._value_ids.get(value)
+        if vid is None:
+            vid = self._value_ids[value] = len(self.values)
+            self.values.append(NAMES.intern(value))
+        return vid
+
+    def append(self, type, value, start, end):
+        self.kinds.append(token_kind(type, value))
+        self.starts.append(start)
+        self.ends.append(end)
+        self.value_ids.append(self.intern(value))
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, i):
+        n = len(self.kinds)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("token index out of range")
+        return TokenView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self.kinds)):
+            yield TokenView(self, i)
+
+    def nbytes(self):
+        """Bytes held by the per-token columns (excludes the value table and source)."""
+        cols = (self.kinds, self.starts, self.ends, self.value_ids)
+        return sum(c.itemsize * len(c) for c in cols)
@@ -12,3 +12,58 @@ SYMBOLS_1 = {
 SYMBOLS_2 = {"<=", ">=", "==", "!=", "&&", "||", "++", "--"}
 CHARS_STARTING_2 = {s[0] for s in SYMBOLS_2}
 BOOL_LITERALS = {"true", "false"}
+
+# Token kind codes. Every token carries one small int that folds its type and,
+# for keywords and symbols, its spelling together, so the parser can compare
+# and dispatch on a single int instead of a (type, value) string pair.
+(
+    IDENT, NUMBER, FLOAT_LIT, BOOL_LIT, CHAR_LIT, STRING_LIT,
+    KW_UINT32, KW_INT, KW_FLOAT, KW_BOOL, KW_CHAR, KW_VOID, KW_CONST,
+    KW_IF, KW_ELSE, KW_WHILE, KW_FOR, KW_BREAK, KW_CONTINUE, KW_RETURN,
+    KW_SWITCH, KW_CASE, KW_DEFAULT,
+    SYM_PLUS, SYM_MINUS, SYM_STAR, SYM_SLASH, SYM_PERCENT, SYM_ASSIGN,
+    SYM_SEMI, SYM_COMMA, SYM_LPAREN, SYM_RPAREN, SYM_LBRACE, SYM_RBRACE,
+    SYM_LBRACKET, SYM_RBRACKET, SYM_LT, SYM_GT, SYM_BANG, SYM_COLON,
+    SYM_LE, SYM_GE, SYM_EQ, SYM_NE, SYM_AND, SYM_OR, SYM_INC, SYM_DEC,
+) = range(49)
+
+CLASS_KINDS = {
+    "IDENTIFIER": IDENT,
+    "NUMBER": NUMBER,
+    "FLOAT_LIT": FLOAT_LIT,
+    "BOOL_LIT": BOOL_LIT,
+    "CHAR_LIT": CHAR_LIT,
+    "STRING_LIT": STRING_LIT,
+}
+KEYWORD_KINDS = {
+    "uint32": KW_UINT32, "int": KW_INT, "float": KW_FLOAT, "bool": KW_BOOL,
+    "char": KW_CHAR, "void": KW_VOID, "const": KW_CONST, "if": KW_IF,
+    "else": KW_ELSE, "while": KW_WHILE, "for": KW_FOR, "break": KW_BREAK,
+    "continue": KW_CONTINUE, "return": KW_RETURN, "switch": KW_SWITCH,
+    "case": KW_CASE, "default": KW_DEFAULT,
+}
+SYMBOL_KINDS = {
+    "+": SYM_PLUS, "-": SYM_MINUS, "*": SYM_STAR, "/": SYM_SLASH,
+    "%": SYM_PERCENT, "=": SYM_ASSIGN, ";": SYM_SEMI, ",": SYM_COMMA,
+    "(": SYM_LPAREN, ")": SYM_RPAREN, "{": SYM_LBRACE, "}": SYM_RBRACE,
+    "[": SYM_LBRACKET, "]": SYM_RBRACKET, "<": SYM_LT, ">": SYM_GT,
+    "!": SYM_BANG, ":": SYM_COLON, "<=": SYM_LE, ">=": SYM_GE,
+    "==": SYM_EQ, "!=": SYM_NE, "&&": SYM_AND, "||": SYM_OR,
+    "++": SYM_INC, "--": SYM_DEC,
+}
+assert set(KEYWORD_KINDS) == KEYWORDS and set(SYMBOL_KINDS) == SYMBOLS_1 | SYMBOLS_2
+SPELLED_KINDS = {**KEYWORD_KINDS, **SYMBOL_KINDS}
+TYPE_NAME_KINDS = frozenset({KW_UINT32, KW_INT, KW_FLOAT, KW_BOOL, KW_CHAR, KW_VOID})
+
+# kind -> (token type, spelling or None), e.g. for TokenBuffer rows and diagnostics.
+KIND_INFO = {k: (t, None) for t, k in CLASS_KINDS.items()}
+KIND_INFO.update({k: ("KEYWORD", v) for v, k in KEYWORD_KINDS.items()})
+KIND_INFO.update({k: ("SYMBOL", v) for v, k in SYMBOL_KINDS.items()})
+KIND_TYPES = tuple(KIND_INFO[k][0] for k in range(len(KIND_INFO)))
+
+
+def token_kind(type, value):
+    """Kind code for a token of `type` with text `value` (None for unknown types)."""
+    if type == "KEYWORD" or type == "SYMBOL":
+        return SPELLED_KINDS.get(value)
+    return CLASS_KINDS.get(type)
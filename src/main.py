@@ -1,19 +1,58 @@
 import argparse
+import logging
+import sys
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Optional
 
-from lexer.lexer import Lexer
+from lexer.lexer import ENGINES as LEXER_ENGINES, Lexer, map_source
 from parser.parser import Parser
 from symbol_table import SemanticError
 from type_checker import TypeChecker
-from unused_warnings import unused_variable_warnings
+from unused_warnings import check_and_find_unused, unused_variable_warnings
 from ir import ast_to_ir, validate, IRValidationError
-from optimizer import (
-    constant_folding, constant_propagation, dead_code_elimination,
-    strength_reduction, cse, copy_propagation, peephole, basic_block_opt,
-)
-from viz import ast_to_dot, ir_linear_to_dot, cfg_to_dot
-from backend import RiscVBackend
+from optimizer import PASSES, PRESETS, PassManager, pipeline_for
+from phase_report import Phase, PhaseReport, ir_size
+from disk_cache import DEFAULT_MAX_BYTES, CacheEntry, DiskCache
+
+# Everything else (the DOT writers, the backends, IR files, the daemon's
+# caches, each optimizer pass) is imported where it is first needed, so a
+# plain compile starts up without it.
+
+log = logging.getLogger("compiler")
+
+_RULE = "-" * 80
+_DEFAULT_SOURCE = "./samples/break_continue_exit.prog"
+_LOG_LEVELS = [logging.WARNING, logging.INFO, logging.DEBUG]  # by -v count
+
+
+class _StdoutHandler(logging.Handler):
+    """Print records to the current `sys.stdout`, bare, like the rest of the driver."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            print(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+class _Lazy:
+    """A log argument whose text is built only if the record is emitted."""
+
+    __slots__ = ("render",)
+
+    def __init__(self, render) -> None:
+        self.render = render
+
+    def __str__(self) -> str:
+        return self.render()
+
+
+def _configure_logging(verbosity: int) -> None:
+    if not log.handlers:
+        log.addHandler(_StdoutHandler())
+        log.propagate = False
+    log.setLevel(_LOG_LEVELS[min(verbosity, len(_LOG_LEVELS) - 1)])
 
 
 def _write_output(target: Optional[str], contents: str) -> None:
@@ -27,91 +66,126 @@ def _write_output(target: Optional[str], contents: str) -> None:
         path.write_text(contents, encoding="utf-8")
 
 
-def main(argv: Optional[list[str]] = None) -> None:
-    all_optim_passes = ["cf", "cprop", "sr", "dce", "cse", "cp", "peephole", "bb", "dce2"]
+# Stands in for a `PhaseReport.phase` when no report was asked for.
+_UNTIMED = nullcontext(Phase("untimed"))
+
+
+def _phase(report: Optional[PhaseReport], name: str):
+    return _UNTIMED if report is None else report.phase(name)
+
+
+def _parse_tokens(tokens, source_path: str, report: Optional[PhaseReport]):
+    """Log `tokens` (at -vv), then parse them; returns (parser, ast)."""
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("TOKENS:")
+        for t in tokens:
+            log.debug("%s", t)
+        log.debug(_RULE)
+
+    parser = Parser(tokens, source_path=source_path)
+    with _phase(report, "parse"):
+        return parser, parser.parse()
+
+
+def _parse_args(argv: Optional[list[str]]):
+    """Parse the driver's command line; returns (args, selected --optim passes or None)."""
+    all_optim_passes = list(PASSES)
     cli = argparse.ArgumentParser(description="Tiny compiler front-end with IR + visualization")
     cli.add_argument(
-        "source",
-        nargs="?",
-        default="./samples/break_continue_exit.prog",
-        help="Source program file (default: samples/break_continue_exit.prog)",
+        "sources",
+        metavar="source",
+        nargs="*",
+        help="Source program file(s) (default: samples/break_continue_exit.prog); "
+             "with several, use --out-dir for their outputs",
     )
     cli.add_argument(
-        "--dump-ast-dot",
-        metavar="FILE",
-        nargs="?",
-        const="-",
-        help="Emit AST as Graphviz DOT (to FILE or stdout if omitted)",
+        "-j",
+        "--jobs",
+        metavar="N",
+        type=int,
+        default=1,
+        help="Compile the sources in N worker processes; with a single source, optimize "
+             "its functions in N workers instead (0: one per CPU; default: 1)",
     )
     cli.add_argument(
-        "--dump-ir-dot",
-        metavar="FILE",
-        nargs="?",
-        const="-",
-        help="Emit linear IR graph as Graphviz DOT",
+        "--out-dir",
+        metavar="DIR",
+        help="Write each source's requested outputs to DIR/<name>.s, <name>.cpp, "
+             "<name>.ir-after.dot, ... instead of the paths given to the output options",
     )
     cli.add_argument(
-        "--dump-ir-before",
-        metavar="FILE",
-        nargs="?",
-        const="-",
-        help="Emit unoptimized IR as Graphviz DOT (to FILE or stdout if omitted)",
+        "-v",
+        "--verbose",
+        action="count",
+        default=0,
+        help="Log compiler progress: -v phase results and pass summaries, "
+             "-vv also tokens, the AST and the IR after every step",
     )
     cli.add_argument(
-        "--dump-ir-after-cf",
-        metavar="FILE",
-        nargs="?",
-        const="-",
-        help="Emit IR after constant folding only (Graphviz DOT)",
+        "--lexer",
+        choices=LEXER_ENGINES,
+        default=None,
+        help="Tokenizer engine: character scanner (default) or single regex master pattern; "
+             "--compact-tokens, --stream and --mmap always use regex",
     )
-    cli.add_argument(
-        "--dump-ir-after-cprop",
-        metavar="FILE",
-        nargs="?",
-        const="-",
-        help="Emit IR after constant propagation pass (Graphviz DOT)",
+    input_mode = cli.add_mutually_exclusive_group()
+    input_mode.add_argument(
+        "--compact-tokens",
+        action="store_true",
+        help="Hold tokens in a struct-of-arrays TokenBuffer instead of Token objects",
     )
-    cli.add_argument(
-        "--dump-ir-after-sr",
-        metavar="FILE",
-        nargs="?",
-        const="-",
-        help="Emit IR after strength reduction (Graphviz DOT)",
+    input_mode.add_argument(
+        "--stream",
+        action="store_true",
+        help="Lex the source file incrementally and feed tokens to the parser lazily "
+             "(flat token memory; skips the TOKENS dump)",
+    )
+    input_mode.add_argument(
+        "--mmap",
+        action="store_true",
+        help="Memory-map the source file and lex the bytes in place (regex engine)",
     )
     cli.add_argument(
-        "--dump-ir-after-cse",
-        metavar="FILE",
-        nargs="?",
-        const="-",
-        help="Emit IR after CSE pass (Graphviz DOT)",
+        "--fused-frontend",
+        action="store_true",
+        help="Find unused variables during type checking instead of in a second AST walk "
+             "(same warnings as the separate passes)",
     )
     cli.add_argument(
-        "--dump-ir-after-cp",
+        "--dump-ast-dot",
         metavar="FILE",
         nargs="?",
         const="-",
-        help="Emit IR after copy propagation pass (Graphviz DOT)",
+        help="Emit AST as Graphviz DOT (to FILE or stdout if omitted)",
     )
     cli.add_argument(
-        "--dump-ir-after-peephole",
+        "--dump-ir-dot",
         metavar="FILE",
         nargs="?",
         const="-",
-        help="Emit IR after peephole pass (Graphviz DOT)",
+        help="Emit linear IR graph as Graphviz DOT",
     )
     cli.add_argument(
-        "--dump-ir-after-bb",
+        "--dump-ir-before",
         metavar="FILE",
         nargs="?",
         const="-",
-        help="Emit IR after basic-block optimization pass (Graphviz DOT)",
+        help="Emit unoptimized IR as Graphviz DOT (to FILE or stdout if omitted)",
     )
+    for name, opt_pass in PASSES.items():
+        cli.add_argument(
+            f"--dump-ir-after-{name}",
+            metavar="FILE",
+            nargs="?",
+            const="-",
+            help=f"Emit IR after the first step that runs {opt_pass.title} (Graphviz DOT)",
+        )
     cli.add_argument(
         "--dump-ir-after",
         metavar="FILE",
         nargs="?",
         const="-",
-        help="Emit fully optimized IR (CF + CProp + SR + DCE + CSE + CP + peephole + BB) as Graphviz DOT",
+        help="Emit the fully optimized IR as Graphviz DOT",
     )
     cli.add_argument(
         "--dump-cfg-dot",
@@ -125,14 +199,25 @@ def main(argv: Optional[list[str]] = None) -> None:
         action="store_true",
         help="Disable optimization passes (constant folding, strength reduction, dead-code elimination, etc.)",
     )
+    cli.add_argument(
+        "-O",
+        dest="opt_level",
+        metavar="LEVEL",
+        type=int,
+        choices=sorted(PRESETS),
+        default=2,
+        help="Optimization pipeline preset: -O0 none, -O1 folding/propagation/DCE, "
+             "-O2 all passes once (default), -O3 all passes to a fixed point",
+    )
     cli.add_argument(
         "--optim",
         metavar="LIST",
         default="all",
         help=(
-            "Comma-separated optimization pass list (default: all). "
-            "Use 'none' to disable. "
-            "Available: cf,cprop,sr,dce,cse,cp,peephole,bb,dce2"
+            "Comma-separated subset of the -O pipeline's passes to run (default: all). "
+            "Use 'none' to disable. ssa and unssa are in no preset; naming them runs "
+            "ssa first and unssa last. "
+            "Available: " + ",".join(all_optim_passes)
         ),
     )
     cli.add_argument(
@@ -160,13 +245,91 @@ def main(argv: Optional[list[str]] = None) -> None:
         const="-",
         help="Emit portable C++ (from IR); compile manually with g++/clang++.",
     )
+    cli.add_argument(
+        "--emit-ir",
+        metavar="FILE",
+        help="Save the IR after the optimization pipeline to FILE ('-' for stdout), "
+             "to be loaded again with --from-ir",
+    )
+    cli.add_argument(
+        "--ir-format",
+        choices=["binary", "text"],
+        help="Format for --emit-ir: compact binary (default for files) or one "
+             "instruction per line (default for stdout)",
+    )
+    cli.add_argument(
+        "--from-ir",
+        metavar="FILE",
+        help="Compile IR saved by --emit-ir instead of a source file (either format); "
+             "it still goes through the -O pipeline, so use -O0 to hand it to the "
+             "backends unchanged",
+    )
+    cli.add_argument(
+        "--serve",
+        metavar="SOCKET",
+        help="Run as a compile daemon on the Unix socket SOCKET (see compile_client.py); "
+             "the source argument is ignored",
+    )
+    cli.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        help="Reuse optimized IR and emitted asm/C++ from an on-disk cache in DIR, keyed by "
+             "the source text, the pipeline, --arch and the compiler version",
+    )
+    cli.add_argument(
+        "--cache-max-size",
+        metavar="MB",
+        type=int,
+        default=DEFAULT_MAX_BYTES // 2**20,
+        help="Evict least recently used cache entries beyond this size "
+             f"(default: {DEFAULT_MAX_BYTES // 2**20})",
+    )
+    cli.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="Print entry count, size, hits, misses and evictions of --cache-dir and exit",
+    )
+    cli.add_argument(
+        "--time-report",
+        action="store_true",
+        help="Print wall/CPU time per phase and optimizer pass, with IR instruction "
+             "counts before and after each pass",
+    )
+    cli.add_argument(
+        "--mem-report",
+        action="store_true",
+        help="Add the tracemalloc peak of every phase to the time report (slows compilation)",
+    )
+    cli.add_argument(
+        "--time-report-json",
+        metavar="FILE",
+        help="Write the time report as JSON to FILE ('-' for stdout) instead of a table",
+    )
 
     args = cli.parse_args(argv)
-    log = print
+    if args.from_ir is not None:
+        if args.sources:
+            cli.error("--from-ir replaces the source file; give one or the other")
+        if args.dump_ast_dot is not None:
+            cli.error("--dump-ast-dot needs a source file, not --from-ir")
+        args.sources = [args.from_ir]
+    elif not args.sources:
+        args.sources = [_DEFAULT_SOURCE]
+    args.source = args.sources[0]
+    if args.emit_ir == "-" and args.ir_format == "binary":
+        cli.error("binary IR cannot go to stdout; give --emit-ir a FILE")
+    if args.cache_stats and args.cache_dir is None:
+        cli.error("--cache-stats needs --cache-dir")
+    regex_only = next((f"--{m.replace('_', '-')}" for m in ("compact_tokens", "stream", "mmap")
+                       if getattr(args, m)), None)
+    if regex_only and args.lexer == "scan":
+        cli.error(f"{regex_only} lexes with the regex engine; it cannot use --lexer scan")
+    if args.lexer is None:
+        args.lexer = "regex" if regex_only else "scan"
 
     raw_optim = args.optim.strip().lower()
     if raw_optim == "all":
-        selected_optim_passes = set(all_optim_passes)
+        selected_optim_passes = None
     elif raw_optim in {"none", ""}:
         selected_optim_passes = set()
     else:
@@ -181,262 +344,404 @@ def main(argv: Optional[list[str]] = None) -> None:
                 + ". Available: "
                 + ",".join(all_optim_passes)
             )
+    return args, selected_optim_passes
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Run the driver; returns the exit status (1 if any source failed to compile)."""
+    args, selected_optim_passes = _parse_args(argv)
+    if args.serve is not None:
+        from compile_server import serve
+
+        serve(args.serve)
+        return 0
+    if args.cache_stats:
+        print(DiskCache(args.cache_dir, args.cache_max_size * 2**20).stats_report())
+        return 0
+    _configure_logging(args.verbose)
+    if len(args.sources) > 1 or args.out_dir is not None:
+        from batch import compile_batch
+
+        return compile_batch(args, selected_optim_passes)
+    return 1 if _run(args, selected_optim_passes) else 0
+
+
+def _run(args, selected_optim_passes: Optional[set], source: Optional[str] = None,
+         write=_write_output, cache=None) -> list[str]:
+    """Compile `args.source` (or the given `source` text) and write the requested
+    outputs through `write(target, contents)`; returns the errors (empty on success).
+
+    `cache` is a mapping (`get` / item assignment) that keeps front-end,
+    optimizer and backend results across calls, as the compile daemon does.
+    """
+    report = None
+    if args.time_report or args.mem_report or args.time_report_json:
+        report = PhaseReport(memory=args.mem_report)
+    errors = _compile(args, selected_optim_passes, report, source, write, cache)
+    if report is not None:
+        report.close()
+        if args.time_report_json:
+            write(args.time_report_json, report.to_json())
+        else:
+            print(report.table())
+    return errors
+
+
+class _FrontEnd:
+    """Everything up to validated, unoptimized IR: what the daemon caches per source.
+
+    When compiled through a `FunctionCache`, `ir_program` is already optimized
+    and `incremental` holds the `IncrementalResult`.
+    """
+
+    def __init__(self, ast, errors: list, warnings: list) -> None:
+        self.ast = ast
+        self.errors = errors
+        self.warnings = warnings
+        self.semantic_ok = False
+        self.ir_program = None
+        self.ir_error: Optional[str] = None
+        self.incremental = None
+
+
+def _ir_error_text(e: IRValidationError, when: str = "") -> str:
+    return (
+        f"IR validation error{when} in {e.function_name or 'program'}"
+        + (f" at instruction {e.instruction_index}" if e.instruction_index >= 0 else "")
+        + f": {e}"
+    )
 
+
+def _read_source(args, source_path: str, report: Optional[PhaseReport]):
+    if args.stream:
+        with open(args.source, encoding="utf-8") as f, _phase(report, "lex+parse"):
+            parser = Parser(Lexer().iter_tokens(f), source_path=source_path)
+            return parser, parser.parse()
+    if args.mmap:
+        buf = map_source(args.source)
+        try:
+            with _phase(report, "lex"):
+                tokens = Lexer(buf, engine="regex").tokenize()
+            return _parse_tokens(tokens, source_path, report)
+        finally:
+            if not isinstance(buf, bytes):
+                buf.close()
     with open(args.source, encoding="utf-8") as f:
-        code = f.read()
+        return _lex_and_parse(args, f.read(), source_path, report)
 
-    lexer = Lexer(code)
-    tokens = lexer.tokenize()
 
-    log("TOKENS:")
-    for t in tokens:
-        log(t)
+def _lex_and_parse(args, code: str, source_path: str, report: Optional[PhaseReport]):
+    lexer = Lexer(code, engine=args.lexer)
+    with _phase(report, "lex"):
+        tokens = lexer.tokenize_buffer() if args.compact_tokens else lexer.tokenize()
+    return _parse_tokens(tokens, source_path, report)
 
-    log("-" * 80)
 
-    errors = []
-    parser = Parser(tokens, source_path=str(Path(args.source)))
-    ast = parser.parse()
-    for msg in parser.errors:
-        errors.append(("syntax", msg))
+def _front_end(args, source: Optional[str], source_path: str, report: Optional[PhaseReport],
+               functions=None, pipeline=None) -> _FrontEnd:
+    if source is None:
+        parser, ast = _read_source(args, source_path, report)
+    else:
+        parser, ast = _lex_and_parse(args, source, source_path, report)
+    front = _FrontEnd(ast, [("syntax", msg) for msg in parser.errors], [])
+    if ast is None:
+        return front
+    if functions is not None:
+        try:
+            result = functions.compile(ast, pipeline, source_path, report)
+        except SemanticError as e:
+            front.errors.append(("semantic", str(e)))
+            return front
+        except IRValidationError as e:
+            front.ir_error = _ir_error_text(e)
+            return front
+        log.info("Incremental: rebuilt %d of %d function(s): %s", len(result.rebuilt),
+                 len(ast.functions), _Lazy(lambda: ", ".join(result.rebuilt) or "none"))
+        front.semantic_ok = True
+        front.warnings = result.warnings
+        front.ir_program = result.program
+        front.incremental = result
+        return front
+
+    try:
+        with _phase(report, "type check"):
+            if args.fused_frontend:
+                front.warnings = check_and_find_unused(ast, source_path=source_path)
+            else:
+                TypeChecker().analyze(ast)
+        front.semantic_ok = True
+    except SemanticError as e:
+        front.errors.append(("semantic", str(e)))
+    if front.semantic_ok and not args.fused_frontend:
+        with _phase(report, "unused warnings"):
+            front.warnings = unused_variable_warnings(ast, source_path=source_path)
+    if front.errors:
+        return front
+
+    with _phase(report, "IR lowering") as ph:
+        ir_program = ast_to_ir(ast)
+        ph.ir_after = ir_size(ir_program)
+    try:
+        with _phase(report, "IR validation"):
+            validate(ir_program)
+        front.ir_program = ir_program
+    except IRValidationError as e:
+        front.ir_error = _ir_error_text(e)
+    return front
+
 
+def _load_ir(args, report: Optional[PhaseReport]) -> _FrontEnd:
+    """The front end's result for --from-ir: the saved program, validated."""
+    from ir.serialize import IRFormatError, decode_ir
+
+    front = _FrontEnd(None, [], [])
+    try:
+        with _phase(report, "IR load") as ph:
+            ir_program = decode_ir(Path(args.from_ir).read_bytes())
+            ph.ir_after = ir_size(ir_program)
+    except IRFormatError as e:
+        front.errors.append(("IR", f"{args.from_ir}: {e}"))
+        return front
+    try:
+        with _phase(report, "IR validation"):
+            validate(ir_program)
+        front.ir_program = ir_program
+    except IRValidationError as e:
+        front.ir_error = _ir_error_text(e)
+    return front
+
+
+def _cached(cache, key, build):
+    """`build()`, memoized in `cache` under `key` when there is a cache."""
+    if cache is None:
+        return build()
+    value = cache.get(key)
+    if value is None:
+        value = cache[key] = build()
+    else:
+        log.info("Reusing cached %s", key[0])
+    return value
+
+
+# Outputs that need the IR before optimization, which a disk-cache hit skips.
+_UNOPTIMIZED_OUTPUTS = ["dump_ast_dot", "dump_ir_dot", "dump_ir_before"] + [
+    f"dump_ir_after_{name}" for name in PASSES
+]
+
+
+def _compile(args, selected_optim_passes: Optional[set], report: Optional[PhaseReport],
+             source: Optional[str] = None, write=_write_output, cache=None) -> list[str]:
+    source_path = str(Path(args.source))
+    pipeline = [] if args.no_optimize else pipeline_for(args.opt_level, selected_optim_passes)
+    needs_unoptimized = any(getattr(args, dest) is not None for dest in _UNOPTIMIZED_OUTPUTS)
+    if source is None:
+        cache = None
+    # With a cache (the daemon), compile function by function, reusing the
+    # unchanged ones across requests; see incremental.py.
+    functions = None
+    if cache is not None and not needs_unoptimized:
+        from incremental import FunctionCache
+
+        functions = cache.get(("function cache",))
+        if functions is None:
+            functions = cache[("function cache",)] = FunctionCache()
+    # Cache keys; only used when the caller passed the source text and a cache.
+    front_key = ("front end", source, source_path, repr(pipeline) if functions else None)
+    opt_key = ("optimized IR", front_key, repr(pipeline))
+
+    disk = disk_key = None
+    if args.cache_dir is not None and not needs_unoptimized:
+        disk = DiskCache(args.cache_dir, args.cache_max_size * 2**20)
+        text = Path(args.source).read_bytes() if source is None else source
+        disk_key = disk.key(text, source_path, repr(pipeline), args.arch)
+        entry = disk.load(disk_key)
+        if entry is not None:
+            log.info("Disk cache hit: %s", disk_key[:16])
+            for wmsg in entry.warnings:
+                print(wmsg)
+            backend_text = (entry.asm, entry.cpp)
+            _emit(args, entry, report, write, cache, opt_key)
+            if (entry.asm, entry.cpp) != backend_text:
+                disk.store(disk_key, entry)
+            return []
+
+    if args.from_ir is not None:
+        front = _load_ir(args, report)
+    else:
+        front = _cached(
+            cache, front_key,
+            lambda: _front_end(args, source, source_path, report, functions, pipeline),
+        )
+    ast = front.ast
     if ast is not None:
-        log("\nAST:")
-        log(ast)
-        log("-" * 80)
+        log.debug("\nAST:\n%s\n%s", ast, _RULE)
 
         # Optional AST DOT dump.
         if args.dump_ast_dot is not None:
+            from viz import ast_to_dot
+
             dot = ast_to_dot(ast)
-            _write_output(args.dump_ast_dot, dot)
+            write(args.dump_ast_dot, dot)
 
-        type_checker = TypeChecker()
-        semantic_ok = False
-        try:
-            type_checker.analyze(ast)
-            semantic_ok = True
-        except SemanticError as e:
-            errors.append(("semantic", str(e)))
-        if semantic_ok:
-            log("Semantic analysis OK")
-            log("-" * 80)
-            for wmsg in unused_variable_warnings(ast, source_path=str(Path(args.source))):
+        if front.semantic_ok:
+            log.info("Semantic analysis OK\n%s", _RULE)
+            for wmsg in front.warnings:
                 print(wmsg)
 
-    if errors:
+    if front.errors:
         print("\nErrors:")
-        for kind, msg in errors:
+        for kind, msg in front.errors:
             print(f"  [{kind}] {msg}")
-        return
-
-    if ast is None:
-        return
-
-    ir_program = ast_to_ir(ast)
-    try:
-        validate(ir_program)
-    except IRValidationError as e:
-        print(
-            f"IR validation error in {e.function_name or 'program'}"
-            + (f" at instruction {e.instruction_index}" if e.instruction_index >= 0 else "")
-            + f": {e}"
-        )
-        return
-    log("IR validation OK")
-    log("\nIR (before optimization):")
-    log(ir_program)
-    log("-" * 80)
+        return [f"[{kind}] {msg}" for kind, msg in front.errors]
+
+    if ast is None and args.from_ir is None:
+        return ["[syntax] no program was parsed"]
+
+    if front.ir_error is not None:
+        print(front.ir_error)
+        return [front.ir_error]
+    ir_program = front.ir_program
+    log.info("IR validation OK")
+    if front.incremental is not None:
+        entry = CacheEntry(list(front.warnings), ir_program)
+        _emit(args, entry, report, write, cache, opt_key, front.incremental, functions)
+        if disk is not None:
+            disk.store(disk_key, entry)
+        return []
+    log.debug("\nIR (before optimization):\n%s\n%s", ir_program, _RULE)
+
+    if needs_unoptimized:
+        from viz import ir_linear_to_dot
 
     # IR visualization (unoptimized snapshot).
     if args.dump_ir_dot is not None:
         ir_dot = ir_linear_to_dot(ir_program)
-        _write_output(args.dump_ir_dot, ir_dot)
+        write(args.dump_ir_dot, ir_dot)
 
     if args.dump_ir_before is not None:
         before_dot = ir_linear_to_dot(ir_program)
-        _write_output(args.dump_ir_before, before_dot)
+        write(args.dump_ir_before, before_dot)
 
     optimized_program = ir_program
-    if not args.no_optimize and selected_optim_passes:
-        current_program = ir_program
-
-        if "cf" in selected_optim_passes:
-            cf_result = constant_folding(current_program)
-            current_program = cf_result.program
-            log(cf_result.summary())
-            log("-" * 80)
-            log("\nIR (after constant folding):")
-            log(current_program)
-            log("-" * 80)
-
-        if args.dump_ir_after_cf is not None:
-            _write_output(args.dump_ir_after_cf, ir_linear_to_dot(current_program))
-
-        if "cprop" in selected_optim_passes:
-            # Iterate constant propagation (+ optional re-folding) to a fixed point.
-            cprop_total = 0
-            post_fold_total = 0
-            while True:
-                cprop_result = constant_propagation(current_program)
-                current_program = cprop_result.program
-                cprop_total += cprop_result.total_propagated
-                if cprop_result.total_propagated == 0:
-                    break
-                if "cf" in selected_optim_passes:
-                    cf_iter = constant_folding(current_program)
-                    current_program = cf_iter.program
-                    post_fold_total += cf_iter.total_folds
-                    if cf_iter.total_folds == 0:
-                        break
-                else:
-                    break
-
-            log(
-                "Constant Propagation Pass:\n"
-                f"  Total: {cprop_total} propagation(s); "
-                f"{post_fold_total} additional fold(s) from re-folding propagated CONSTs"
-            )
-            log("-" * 80)
-            log("\nIR (after constant propagation):")
-            log(current_program)
-            log("-" * 80)
-
-        if args.dump_ir_after_cprop is not None:
-            _write_output(
-                args.dump_ir_after_cprop, ir_linear_to_dot(current_program)
-            )
-
-        if "sr" in selected_optim_passes:
-            sr_result = strength_reduction(current_program)
-            current_program = sr_result.program
-            log(sr_result.summary())
-            log("-" * 80)
-            log("\nIR (after strength reduction):")
-            log(current_program)
-            log("-" * 80)
-
-        if args.dump_ir_after_sr is not None:
-            _write_output(args.dump_ir_after_sr, ir_linear_to_dot(current_program))
-
-        if "dce" in selected_optim_passes:
-            dce_result = dead_code_elimination(current_program)
-            current_program = dce_result.program
-            log(dce_result.summary())
-            log("-" * 80)
-            log("\nIR (after dead code elimination):")
-            log(current_program)
-            log("-" * 80)
-
-        if "cse" in selected_optim_passes:
-            cse_result = cse(current_program)
-            current_program = cse_result.program
-            log(cse_result.summary())
-            log("-" * 80)
-            log("\nIR (after CSE):")
-            log(current_program)
-            log("-" * 80)
-
-        if args.dump_ir_after_cse is not None:
-            _write_output(args.dump_ir_after_cse, ir_linear_to_dot(current_program))
-
-        if "cp" in selected_optim_passes:
-            cp_result = copy_propagation(current_program)
-            current_program = cp_result.program
-            log(cp_result.summary())
-            log("-" * 80)
-            log("\nIR (after copy propagation):")
-            log(current_program)
-            log("-" * 80)
-
-        if args.dump_ir_after_cp is not None:
-            _write_output(args.dump_ir_after_cp, ir_linear_to_dot(current_program))
-
-        if "peephole" in selected_optim_passes:
-            ph_result = peephole(current_program)
-            current_program = ph_result.program
-            log(ph_result.summary())
-            log("-" * 80)
-            log("\nIR (after peephole):")
-            log(current_program)
-            log("-" * 80)
-
-        if args.dump_ir_after_peephole is not None:
-            _write_output(
-                args.dump_ir_after_peephole, ir_linear_to_dot(current_program)
-            )
-
-        if "bb" in selected_optim_passes:
-            bb_result = basic_block_opt(current_program)
-            current_program = bb_result.program
-            log(bb_result.summary())
-            log("-" * 80)
-            log("\nIR (after basic-block optimization):")
-            log(current_program)
-            log("-" * 80)
-
-        if args.dump_ir_after_bb is not None:
-            _write_output(args.dump_ir_after_bb, ir_linear_to_dot(current_program))
-
-        # Optional final DCE sweep after late structural optimizations.
-        if "dce2" in selected_optim_passes:
-            dce2 = dead_code_elimination(current_program)
-            current_program = dce2.program
-            if dce2.total_removed:
-                log(f"Post-CP DCE: removed {dce2.total_removed} more instruction(s)")
-                log(current_program)
-                log("-" * 80)
-
-        optimized_program = current_program
-
-        try:
-            validate(optimized_program)
-            log("IR validation OK (after all optimizations)")
-        except IRValidationError as e:
-            print(
-                f"IR validation error after optimization in {e.function_name or 'program'}"
-                + (f" at instruction {e.instruction_index}" if e.instruction_index >= 0 else "")
-                + f": {e}"
-            )
-            return
+    if pipeline:
+        # --dump-ir-after-<pass> targets still waiting for their pass to run.
+        pending_dumps = {
+            name: getattr(args, f"dump_ir_after_{name}") for name in PASSES
+        }
+        if any(pending_dumps.values()):
+            cache = None  # the dumps need the intermediate programs
+
+        def after_step(step):
+            log.info("%s\n%s", _Lazy(step.summary), _RULE)
+            log.debug("\nIR (after %s):\n%s\n%s", step.title, step.program, _RULE)
+            for name in step.pass_names:
+                target = pending_dumps.pop(name, None)
+                if target is not None:
+                    write(target, ir_linear_to_dot(step.program))
+
+        # Logging or dumping every step needs the whole program after each one,
+        # which keeps the pipeline in this process (see PassManager).
+        watch = log.isEnabledFor(logging.INFO) or any(pending_dumps.values())
+
+        def optimize():
+            result = PassManager(pipeline, on_step=after_step if watch else None,
+                                 report=report, jobs=args.jobs).run(ir_program)
+            log.info("%s\n%s", _Lazy(result.summary), _RULE)
+            try:
+                with _phase(report, "IR validation (optimized)"):
+                    validate(result.program)
+                log.info("IR validation OK (after all optimizations)")
+                return result.program, None
+            except IRValidationError as e:
+                return None, _ir_error_text(e, " after optimization")
+
+        optimized_program, opt_error = _cached(cache, opt_key, optimize)
+        for name, target in pending_dumps.items():
+            if target is not None:
+                print(f"--dump-ir-after-{name}: pass '{name}' is not in the pipeline; nothing written")
+        if opt_error is not None:
+            print(opt_error)
+            return [opt_error]
     else:
-        log("Optimizations skipped (--no-optimize or --optim=none).")
-
+        log.info("Optimizations skipped (--no-optimize, -O0 or --optim=none).")
+
+    entry = CacheEntry(list(front.warnings), optimized_program)
+    _emit(args, entry, report, write, cache, opt_key)
+    if disk is not None:
+        disk.store(disk_key, entry)
+    return []
+
+
+def _emit(args, entry: CacheEntry, report: Optional[PhaseReport], write, cache, opt_key,
+          incremental=None, functions=None) -> None:
+    """Write the outputs made from the optimized program. Backend text comes
+    from `entry` when it is already there and is recorded in it otherwise;
+    with an `IncrementalResult`, the backend reuses per-function text from
+    `functions`."""
+    optimized_program = entry.program
     if args.dump_ir_after is not None:
+        from viz import ir_linear_to_dot
+
         after_dot = ir_linear_to_dot(optimized_program)
-        _write_output(args.dump_ir_after, after_dot)
+        write(args.dump_ir_after, after_dot)
 
     if args.dump_cfg_dot is not None:
-        _write_output(args.dump_cfg_dot, cfg_to_dot(optimized_program))
+        from viz import cfg_to_dot
+
+        write(args.dump_cfg_dot, cfg_to_dot(optimized_program))
+
+    if args.emit_ir is not None:
+        from ir.serialize import encode_ir, ir_to_text
 
-    need_asm = args.emit_asm is not None
-    asm_text: Optional[str] = None
-    if need_asm:
+        ir_format = args.ir_format or ("text" if args.emit_ir == "-" else "binary")
+        with _phase(report, "IR serialization"):
+            if ir_format == "text":
+                write(args.emit_ir, ir_to_text(optimized_program))
+            else:
+                Path(args.emit_ir).write_bytes(encode_ir(optimized_program))
+        if args.emit_ir != "-":
+            print(f"IR written to: {args.emit_ir}  (format={ir_format})")
+
+    if args.emit_asm is not None and entry.asm is None:
         if args.arch == "x86_64":
             from backend import X86_64Backend
 
-            asm_text = X86_64Backend(optimized_program).generate()
+            backend_cls = X86_64Backend
         else:
-            asm_text = RiscVBackend(optimized_program).generate()
+            from backend import RiscVBackend
 
-    need_cpp = args.emit_cpp is not None
-    cpp_text: Optional[str] = None
-    if need_cpp:
+            backend_cls = RiscVBackend
+        if incremental is not None:
+            backend = backend_cls(optimized_program, incremental.function_keys,
+                                  functions.backend_text)
+        else:
+            backend = backend_cls(optimized_program)
+
+        def generate_asm():
+            with _phase(report, f"backend: {args.arch}"):
+                return backend.generate()
+
+        entry.asm = _cached(cache, ("assembly", opt_key, args.arch), generate_asm)
+
+    if args.emit_cpp is not None and entry.cpp is None:
         from backend.cpp_transpile import CppTranspileBackend
 
-        cpp_text = CppTranspileBackend(optimized_program).generate()
+        def generate_cpp():
+            with _phase(report, "backend: C++"):
+                return CppTranspileBackend(optimized_program).generate()
+
+        entry.cpp = _cached(cache, ("C++", opt_key), generate_cpp)
 
     if args.emit_asm is not None:
-        assert asm_text is not None
-        _write_output(args.emit_asm, asm_text)
+        write(args.emit_asm, entry.asm)
         if args.emit_asm != "-":
             print(f"Assembly written to: {args.emit_asm}  (arch={args.arch})")
 
     if args.emit_cpp is not None:
-        assert cpp_text is not None
-        _write_output(args.emit_cpp, cpp_text)
+        write(args.emit_cpp, entry.cpp)
         if args.emit_cpp != "-":
             print(f"C++ written to: {args.emit_cpp}")
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
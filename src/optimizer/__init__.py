@@ -1,29 +1,67 @@
-"""Optimizer module: IR optimization passes."""
-
-from .constant_folding import constant_folding, ConstantFoldingResult
-from .dead_code_elimination import dead_code_elimination, DeadCodeEliminationResult
-from .strength_reduction import strength_reduction, StrengthReductionResult
-from .cse import cse, CSEResult
-from .copy_propagation import copy_propagation, CopyPropagationResult
-from .peephole import peephole, PeepholeResult
-from .basic_block import basic_block_opt, BasicBlockOptResult
-from .constant_propagation import constant_propagation, ConstantPropagationResult
-
-__all__ = [
-    "constant_folding",
-    "ConstantFoldingResult",
-    "constant_propagation",
-    "ConstantPropagationResult",
-    "dead_code_elimination",
-    "DeadCodeEliminationResult",
-    "strength_reduction",
-    "StrengthReductionResult",
-    "cse",
-    "CSEResult",
-    "copy_propagation",
-    "CopyPropagationResult",
-    "peephole",
-    "PeepholeResult",
-    "basic_block_opt",
-    "BasicBlockOptResult",
+"""Optimizer module: IR optimization passes.
+
+The pass manager is imported with the package; each pass module only when
+one of its names is first used (see `__getattr__`), so the driver's startup
+does not pay for passes its pipeline leaves out.
+"""
+
+import importlib
+
+from .pass_manager import (
+    PassManager, FixedPoint, Pass, PASSES, PRESETS, pipeline_for, PipelineResult, StepReport,
+)
+
+# Public name -> the pass module that defines it.
+_LAZY = {
+    "constant_folding": "constant_folding",
+    "ConstantFoldingResult": "constant_folding",
+    "constant_propagation": "constant_propagation",
+    "ConstantPropagationResult": "constant_propagation",
+    "dead_code_elimination": "dead_code_elimination",
+    "DeadCodeEliminationResult": "dead_code_elimination",
+    "strength_reduction": "strength_reduction",
+    "StrengthReductionResult": "strength_reduction",
+    "cse": "cse",
+    "CSEResult": "cse",
+    "copy_propagation": "copy_propagation",
+    "CopyPropagationResult": "copy_propagation",
+    "peephole": "peephole",
+    "PeepholeResult": "peephole",
+    "basic_block_opt": "basic_block",
+    "BasicBlockOptResult": "basic_block",
+    "to_ssa": "ssa",
+    "SSAResult": "ssa",
+    "out_of_ssa": "ssa",
+    "OutOfSSAResult": "ssa",
+}
+
+__all__ = list(_LAZY) + [
+    "PassManager",
+    "FixedPoint",
+    "Pass",
+    "PASSES",
+    "PRESETS",
+    "pipeline_for",
+    "PipelineResult",
+    "StepReport",
 ]
+
+
+def _load(module: str):
+    """Import pass module `optimizer.<module>` and bind its public names here.
+
+    The import system sets the submodule itself as a package attribute, which
+    would shadow a pass function of the same name (`cse`, `peephole`, ...).
+    """
+    mod = importlib.import_module(f".{module}", __name__)
+    for name, owner in _LAZY.items():
+        if owner == module:
+            globals()[name] = getattr(mod, name)
+    return mod
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(_load(module), name)
@@ -1,8 +1,8 @@
 """Basic-block optimization on the linear IR.
 
-The pass builds an explicit control-flow graph of basic blocks for each
-function and applies three classic block-level transformations until a
-fixed point:
+The pass works on each function's control-flow graph (`IRFunction.cfg`,
+rebuilt only after the IR changes) and applies three classic block-level
+transformations until a fixed point:
 
   1. Jump threading through empty blocks
        LABEL B ; JMP C        any branch whose target is B is redirected
@@ -16,122 +16,43 @@ fixed point:
 
   3. Linear chain merging
        If block A ends with `JMP B`, B has exactly one predecessor (A),
-       and B is not the entry block, then B is merged into A: A's `JMP`
-       and B's leading `LABEL` are dropped and B's instructions are
-       appended to A.
-
-The surviving blocks are then concatenated back into the linear IR.
+       B is not the entry block and B ends in JMP, RET or EXIT (so it
+       can move without losing its fall-through), then B is merged into
+       A: A's `JMP` and B's leading `LABEL` are dropped and B's
+       instructions are appended to A.
+
+Each transformation edits the function in place. A function in SSA form
+(`ir.ssa`) is left alone: every one of them changes which blocks are a
+join's predecessors, which its PHIs name.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Dict, List, Tuple
+from typing import Dict, List
 
+from ir.cfg import CFG, Block
 from ir.ir import Instruction, IRFunction, IRProgram
+from ir.opcodes import LABEL, JMP, JMP_IF, JMP_IF_NOT, RET, EXIT
+from ir.ssa import has_phis
 
-_BR = {"JMP", "JMP_IF", "JMP_IF_NOT"}
-_STOP = {"RET", "EXIT"}
-
-
-@dataclass
-class _Block:
-    name: str
-    insns: List[Instruction] = field(default_factory=list)
-    succs: List[str] = field(default_factory=list)
-    preds: List[str] = field(default_factory=list)
-
-
-def _split_blocks(func: IRFunction) -> List[_Block]:
-    """Split a function's instruction list into basic blocks."""
-    insns = func.instructions
-    if not insns:
-        return []
-
-    label_to_idx: Dict[str, int] = {}
-    for i, ins in enumerate(insns):
-        if ins.op == "LABEL":
-            label_to_idx[ins.args[0]] = i
-
-    leaders = {0}
-    for i, ins in enumerate(insns):
-        op = ins.op
-        if op == "LABEL":
-            leaders.add(i)
-        if op in _BR:
-            tgt = ins.args[-1]
-            if tgt in label_to_idx:
-                leaders.add(label_to_idx[tgt])
-            if i + 1 < len(insns):
-                leaders.add(i + 1)
-        elif op in _STOP and i + 1 < len(insns):
-            leaders.add(i + 1)
-
-    sorted_leaders = sorted(leaders)
-    blocks: List[_Block] = []
-    for bi, start in enumerate(sorted_leaders):
-        end = sorted_leaders[bi + 1] if bi + 1 < len(sorted_leaders) else len(insns)
-        bi_insns = [Instruction(ins.op, list(ins.args)) for ins in insns[start:end]]
-        if bi_insns and bi_insns[0].op == "LABEL":
-            name = bi_insns[0].args[0]
-        elif bi == 0:
-            name = "_entry"
-        else:
-            name = f"_b{bi}"
-        blocks.append(_Block(name=name, insns=bi_insns))
-    return blocks
-
-
-def _recompute_cfg(blocks: List[_Block]) -> None:
-    """Rebuild successor and predecessor lists from the current block bodies."""
-    n2b = {b.name: b for b in blocks}
-    for b in blocks:
-        b.succs = []
-        b.preds = []
-
-    for i, b in enumerate(blocks):
-        fall = blocks[i + 1].name if i + 1 < len(blocks) else None
-        if not b.insns:
-            if fall:
-                b.succs.append(fall)
-            continue
-        last = b.insns[-1]
-        op = last.op
-        if op == "JMP":
-            tgt = last.args[0]
-            if tgt in n2b:
-                b.succs.append(tgt)
-        elif op in ("JMP_IF", "JMP_IF_NOT"):
-            tgt = last.args[1]
-            if tgt in n2b:
-                b.succs.append(tgt)
-            if fall:
-                b.succs.append(fall)
-        elif op in _STOP:
-            pass
-        else:
-            if fall:
-                b.succs.append(fall)
-
-    for b in blocks:
-        for s in b.succs:
-            n2b[s].preds.append(b.name)
-
-
-def _empty_jmp_target(b: _Block) -> str | None:
-    """If `b` is exactly `LABEL ; JMP X`, return X; else None."""
-    if len(b.insns) == 2 and b.insns[0].op == "LABEL" and b.insns[1].op == "JMP":
-        return b.insns[1].args[0]
+_NO_FALL_THROUGH = {JMP, RET, EXIT}
+_COND_JUMPS = frozenset({JMP_IF, JMP_IF_NOT})
+
+
+def _empty_jmp_target(insns: List[Instruction]) -> str | None:
+    """If a block is exactly `LABEL ; JMP X`, return X; else None."""
+    if len(insns) == 2 and insns[0].op is LABEL and insns[1].op is JMP:
+        return insns[1].args[0]
     return None
 
 
-def _jump_thread(blocks: List[_Block]) -> int:
+def _jump_thread(func: IRFunction, g: CFG) -> int:
     """Redirect branches whose target is an empty `LABEL ; JMP X` block."""
     redirect: Dict[str, str] = {}
-    for b in blocks:
-        tgt = _empty_jmp_target(b)
-        if tgt is not None and tgt != b.name:
-            redirect[b.name] = tgt
+    for b in g.blocks:
+        tgt = _empty_jmp_target(b.instructions)
+        if tgt is not None and tgt != b.label:
+            redirect[b.label] = tgt
 
     if not redirect:
         return 0
@@ -144,105 +65,73 @@ def _jump_thread(blocks: List[_Block]) -> int:
         return name
 
     changes = 0
-    for b in blocks:
-        if not b.insns:
-            continue
-        last = b.insns[-1]
-        if last.op == "JMP":
+    for b in g.blocks:
+        last = b.instructions[-1]
+        if last.op is JMP:
             old = last.args[0]
             new = resolve(old)
             if new != old:
-                last.args[0] = new
+                func.replace(b.end - 1, Instruction(JMP, [new]))
                 changes += 1
-        elif last.op in ("JMP_IF", "JMP_IF_NOT"):
+        elif last.op in _COND_JUMPS:
             old = last.args[1]
             new = resolve(old)
             if new != old:
-                last.args[1] = new
+                func.replace(b.end - 1, Instruction(last.op, [last.args[0], new]))
                 changes += 1
     return changes
 
 
-def _drop_unreachable(blocks: List[_Block]) -> Tuple[List[_Block], int]:
-    """Remove blocks not reachable from the entry block (kept first)."""
-    if not blocks:
-        return blocks, 0
-    n2b = {b.name: b for b in blocks}
-    entry = blocks[0].name
-    seen: set[str] = set()
-    stack = [entry]
-    while stack:
-        n = stack.pop()
-        if n in seen:
-            continue
-        seen.add(n)
-        b = n2b.get(n)
-        if b is None:
-            continue
-        for s in b.succs:
-            stack.append(s)
-    new_blocks = [b for b in blocks if b.name in seen]
-    removed = len(blocks) - len(new_blocks)
-    return new_blocks, removed
+def _drop_unreachable(func: IRFunction, g: CFG) -> int:
+    """Remove blocks not reachable from the entry block."""
+    live = set(g.rpo())
+    dead = [b for b in g.blocks if b not in live]
+    func.erase(*[i for b in dead for i in range(b.start, b.end)])
+    return len(dead)
 
 
-def _merge_linear_chains(blocks: List[_Block]) -> Tuple[List[_Block], int]:
+def _merge_linear_chains(func: IRFunction, g: CFG) -> int:
     """Merge `A: ... JMP B` into A when B has only A as a predecessor."""
-    if not blocks:
-        return blocks, 0
-    n2b = {b.name: b for b in blocks}
-    entry = blocks[0].name
-    merges = 0
-    changed = True
-    while changed:
-        changed = False
-        for a in blocks:
-            if not a.insns:
-                continue
-            last = a.insns[-1]
-            if last.op != "JMP":
-                continue
-            tgt = last.args[0]
-            if tgt == entry or tgt not in n2b:
-                continue
-            b = n2b[tgt]
-            if len(b.preds) != 1 or b.preds[0] != a.name:
-                continue
-            b_body = (
-                b.insns[1:]
-                if b.insns and b.insns[0].op == "LABEL"
-                else list(b.insns)
-            )
-            a.insns = a.insns[:-1] + b_body
-            a.succs = list(b.succs)
-            for s in b.succs:
-                sb = n2b.get(s)
-                if sb is None:
-                    continue
-                sb.preds = [a.name if p == b.name else p for p in sb.preds]
-            blocks = [x for x in blocks if x.name != b.name]
-            del n2b[b.name]
-            merges += 1
-            changed = True
-            break
-    return blocks, merges
+    into: Dict[Block, Block] = {}   # A -> the block B merged into it
+    for a in g.blocks:
+        last = a.instructions[-1]
+        if last.op is not JMP:
+            continue
+        b = g.block_at(last.args[0])
+        if b is None or b is g.entry or b is a:
+            continue
+        # B moves to A's place, so it must not fall through to its old neighbour.
+        if len(b.preds) != 1 or b.instructions[-1].op not in _NO_FALL_THROUGH:
+            continue
+        into[a] = b
+    if not into:
+        return 0
 
+    merged = set(into.values())
+    out: List[Instruction] = []
+    for blk in g.blocks:
+        if blk in merged:
+            continue
+        insns = blk.instructions
+        while blk in into:
+            out.extend(insns[:-1])        # drop A's JMP ...
+            blk = into[blk]
+            insns = blk.instructions[1:]  # ... and B's LABEL
+        out.extend(insns)
+    func.set_instructions(out)
+    return len(into)
 
-def _bb_func(func: IRFunction) -> Tuple[IRFunction, Dict[str, int]]:
-    blocks = _split_blocks(func)
+
+def _bb_func(func: IRFunction) -> Dict[str, int]:
     threaded = unreachable = merged = 0
+    if has_phis(func):
+        return {"jump_threaded": 0, "blocks_removed": 0, "blocks_merged": 0}
 
+    # Each step asks for the CFG afresh: it is rebuilt only after an edit.
     while True:
-        _recompute_cfg(blocks)
-        t = _jump_thread(blocks)
-        if t:
-            _recompute_cfg(blocks)
-
-        blocks, u = _drop_unreachable(blocks)
-        if u:
-            _recompute_cfg(blocks)
-
-        blocks, m = _merge_linear_chains(blocks)
+        t = _jump_thread(func, func.cfg())
+        u = _drop_unreachable(func, func.cfg())
+        m = _merge_linear_chains(func, func.cfg())
 
         threaded += t
         unreachable += u
@@ -250,23 +139,11 @@ def _bb_func(func: IRFunction) -> Tuple[IRFunction, Dict[str, int]]:
         if t == 0 and u == 0 and m == 0:
             break
 
-    new_insns = [ins for b in blocks for ins in b.insns]
-
-    stats = {
+    return {
         "jump_threaded": threaded,
         "blocks_removed": unreachable,
         "blocks_merged": merged,
     }
-    return (
-        IRFunction(
-            func.name,
-            func.return_type,
-            func.param_names,
-            func.param_types,
-            new_insns,
-        ),
-        stats,
-    )
 
 
 class BasicBlockOptResult:
@@ -296,7 +173,7 @@ def basic_block_opt(program: IRProgram) -> BasicBlockOptResult:
     funcs: List[IRFunction] = []
     per: Dict[str, Dict[str, int]] = {}
     for fn in program.functions:
-        nf, s = _bb_func(fn)
+        nf = fn.copy()
         funcs.append(nf)
-        per[fn.name] = s
+        per[fn.name] = _bb_func(nf)
     return BasicBlockOptResult(IRProgram(funcs), per)
@@ -2,77 +2,85 @@
 
 from __future__ import annotations
 from typing import Any, Dict, List
-from ir.ir import CONST, Instruction, IRFunction, IRProgram
+from ir.ir import CONST as IR_CONST, Instruction, IRFunction, IRProgram
+from ir.opcodes import (
+    Opcode, CONST, ADD, SUB, MUL, DIV, MOD, NEG, INC, DEC,
+    LT, LE, GT, GE, EQ, NE, AND, OR, NOT, JMP, JMP_IF, JMP_IF_NOT,
+)
 
 # Binary ops we can fold directly
-_FOLD: Dict[str, Any] = {
-    "ADD": lambda a,b: a+b,   "SUB": lambda a,b: a-b,   "MUL": lambda a,b: a*b,
-    "LT":  lambda a,b: int(a<b),  "LE":  lambda a,b: int(a<=b),
-    "GT":  lambda a,b: int(a>b),  "GE":  lambda a,b: int(a>=b),
-    "EQ":  lambda a,b: int(a==b), "NE":  lambda a,b: int(a!=b),
-    "AND": lambda a,b: int(bool(a) and bool(b)),
-    "OR":  lambda a,b: int(bool(a) or  bool(b)),
+_FOLD: Dict[Opcode, Any] = {
+    ADD: lambda a,b: a+b,   SUB: lambda a,b: a-b,   MUL: lambda a,b: a*b,
+    LT:  lambda a,b: int(a<b),  LE:  lambda a,b: int(a<=b),
+    GT:  lambda a,b: int(a>b),  GE:  lambda a,b: int(a>=b),
+    EQ:  lambda a,b: int(a==b), NE:  lambda a,b: int(a!=b),
+    AND: lambda a,b: int(bool(a) and bool(b)),
+    OR:  lambda a,b: int(bool(a) or  bool(b)),
 }
-_BOOL_OPS = {"LT","LE","GT","GE","EQ","NE","AND","OR"}
+_BOOL_OPS = {LT,LE,GT,GE,EQ,NE,AND,OR}
 
 def _kind(ka, kb):
     return "float" if (ka=="float" or kb=="float") else ka
 
 
-def _fold_func(func: IRFunction):
+def _fold_func(func: IRFunction) -> int:
     cm = {}   # temp -> (kind, val)  — known constants at this point
-    out: List[Instruction] = []
+    dead: List[int] = []   # branches folded away
     folds = 0
 
-    for ins in func.instructions:
+    for i, ins in enumerate(func.instructions):
         op, a = ins.op, ins.args
         new = ins   # default: keep unchanged
 
         if op in _FOLD and a[1] in cm and a[2] in cm:
             kl, vl = cm[a[1]];  kr, vr = cm[a[2]]
             rk = "bool" if op in _BOOL_OPS else _kind(kl, kr)
-            new = CONST(a[0], rk, _FOLD[op](vl, vr));  folds += 1
+            new = IR_CONST(a[0], rk, _FOLD[op](vl, vr));  folds += 1
 
-        elif op == "DIV" and a[1] in cm and a[2] in cm:
+        elif op is DIV and a[1] in cm and a[2] in cm:
             kl, vl = cm[a[1]];  vr = cm[a[2]][1]
             if vr != 0:
                 rk = _kind(kl, cm[a[2]][0])
                 v  = vl/vr if rk=="float" else int(vl/vr)
-                new = CONST(a[0], rk, v);  folds += 1
+                new = IR_CONST(a[0], rk, v);  folds += 1
 
-        elif op == "MOD" and a[1] in cm and a[2] in cm:
+        elif op is MOD and a[1] in cm and a[2] in cm:
             vl, vr = cm[a[1]][1], cm[a[2]][1]
             if vr != 0:
-                new = CONST(a[0], cm[a[1]][0], int(vl) % int(vr));  folds += 1
+                new = IR_CONST(a[0], cm[a[1]][0], int(vl) % int(vr));  folds += 1
 
-        elif op == "NEG" and a[1] in cm:
-            k, v = cm[a[1]];  new = CONST(a[0], k, -v);  folds += 1
+        elif op is NEG and a[1] in cm:
+            k, v = cm[a[1]];  new = IR_CONST(a[0], k, -v);  folds += 1
 
-        elif op == "NOT" and a[1] in cm:
-            new = CONST(a[0], "bool", int(not bool(cm[a[1]][1])));  folds += 1
+        elif op is NOT and a[1] in cm:
+            new = IR_CONST(a[0], "bool", int(not bool(cm[a[1]][1])));  folds += 1
 
-        elif op == "INC" and a[1] in cm:
-            k, v = cm[a[1]];  new = CONST(a[0], k, v+1);  folds += 1
+        elif op is INC and a[1] in cm:
+            k, v = cm[a[1]];  new = IR_CONST(a[0], k, v+1);  folds += 1
 
-        elif op == "DEC" and a[1] in cm:
-            k, v = cm[a[1]];  new = CONST(a[0], k, v-1);  folds += 1
+        elif op is DEC and a[1] in cm:
+            k, v = cm[a[1]];  new = IR_CONST(a[0], k, v-1);  folds += 1
 
-        elif op == "JMP_IF" and a[0] in cm:
+        elif op is JMP_IF and a[0] in cm:
             _, v = cm[a[0]]
-            new = Instruction("JMP", [a[1]]) if v else None
+            new = Instruction(JMP, [a[1]]) if v else None
             folds += 1
 
-        elif op == "JMP_IF_NOT" and a[0] in cm:
+        elif op is JMP_IF_NOT and a[0] in cm:
             _, v = cm[a[0]]
-            new = Instruction("JMP", [a[1]]) if not v else None
+            new = Instruction(JMP, [a[1]]) if not v else None
             folds += 1
 
-        if new is not None:
-            out.append(new)
-            if new.op == "CONST":
-                cm[new.args[0]] = new.args[1]   # (kind, val)
+        if new is None:
+            dead.append(i)
+            continue
+        if new is not ins:
+            func.replace(i, new)
+        if new.op is CONST:
+            cm[new.args[0]] = new.args[1]   # (kind, val)
 
-    return IRFunction(func.name, func.return_type, func.param_names, func.param_types, out), folds
+    func.erase(*dead)
+    return folds
 
 
 class ConstantFoldingResult:
@@ -95,6 +103,6 @@ class ConstantFoldingResult:
 def constant_folding(program: IRProgram) -> ConstantFoldingResult:
     funcs, per = [], {}
     for fn in program.functions:
-        nf, n = _fold_func(fn)
-        funcs.append(nf);  per[fn.name] = n
+        nf = fn.copy()
+        funcs.append(nf);  per[fn.name] = _fold_func(nf)
     return ConstantFoldingResult(IRProgram(funcs), per)
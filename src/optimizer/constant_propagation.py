@@ -24,80 +24,68 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Tuple
 
-from ir.ir import CONST, Instruction, IRFunction, IRProgram
+from ir.ir import CONST as IR_CONST, IRFunction, IRProgram, Temp
+from ir.opcodes import (
+    FUNC_ENTRY, CONST, LOAD, STORE, LOAD_ARR, ADD, SUB, MUL, DIV, MOD, NEG, INC, DEC,
+    LT, LE, GT, GE, EQ, NE, AND, OR, NOT, LABEL, JMP, JMP_IF, JMP_IF_NOT, CALL, READ_INT,
+)
 
-_BARR = {"LABEL", "JMP", "JMP_IF", "JMP_IF_NOT", "FUNC_ENTRY", "CALL"}
+_BARR = {LABEL, JMP, JMP_IF, JMP_IF_NOT, FUNC_ENTRY, CALL}
 
 # Ops whose first arg is a freshly defined temp.
 _DEFS_TEMP = {
-    "CONST", "LOAD", "LOAD_ARR", "READ_INT",
-    "ADD", "SUB", "MUL", "DIV", "MOD",
-    "NEG", "INC", "DEC",
-    "LT", "LE", "GT", "GE", "EQ", "NE", "AND", "OR", "NOT",
+    CONST, LOAD, LOAD_ARR, READ_INT,
+    ADD, SUB, MUL, DIV, MOD,
+    NEG, INC, DEC,
+    LT, LE, GT, GE, EQ, NE, AND, OR, NOT,
 }
 
 
-def _cp_func(func: IRFunction) -> Tuple[IRFunction, int]:
-    cm_temp: Dict[str, Tuple[str, Any]] = {}
+def _cp_func(func: IRFunction) -> int:
+    cm_temp: Dict[Temp, Tuple[str, Any]] = {}
     cm_var: Dict[str, Tuple[str, Any]] = {}
-    out: List[Instruction] = []
     propagated = 0
 
-    for ins in func.instructions:
+    for i, ins in enumerate(func.instructions):
         op, a = ins.op, ins.args
 
         if op in _BARR:
             cm_temp.clear()
             cm_var.clear()
-            out.append(ins)
             continue
 
-        if op == "CONST":
+        if op is CONST:
             kind, val = a[1]
             cm_temp[a[0]] = (kind, val)
-            out.append(ins)
             continue
 
-        if op == "STORE" and len(a) == 2:
+        if op is STORE and len(a) == 2:
             var, src = a[0], a[1]
-            if isinstance(src, str) and src.startswith("%") and src in cm_temp:
+            if isinstance(src, Temp) and src in cm_temp:
                 cm_var[var] = cm_temp[src]
             else:
                 cm_var.pop(var, None)
-            out.append(ins)
             continue
 
-        if op == "LOAD" and len(a) == 2:
+        if op is LOAD and len(a) == 2:
             dest, var = a[0], a[1]
             if var in cm_var:
                 kind, val = cm_var[var]
-                new_ins = CONST(dest, kind, val)
+                func.replace(i, IR_CONST(dest, kind, val))
                 cm_temp[dest] = (kind, val)
-                out.append(new_ins)
                 propagated += 1
                 continue
             cm_temp.pop(dest, None)
-            out.append(ins)
             continue
 
         # Any other defining op invalidates its destination temp's known value.
-        if op in _DEFS_TEMP and a and isinstance(a[0], str) and a[0].startswith("%"):
+        if op in _DEFS_TEMP and a and isinstance(a[0], Temp):
             cm_temp.pop(a[0], None)
 
         # STORE_ARR / PARAM / PRINT / RET / EXIT / ALLOC_ARRAY do not change
         # the scalar-variable constant map.
-        out.append(ins)
 
-    return (
-        IRFunction(
-            func.name,
-            func.return_type,
-            func.param_names,
-            func.param_types,
-            out,
-        ),
-        propagated,
-    )
+    return propagated
 
 
 class ConstantPropagationResult:
@@ -121,7 +109,7 @@ def constant_propagation(program: IRProgram) -> ConstantPropagationResult:
     funcs: List[IRFunction] = []
     per: Dict[str, int] = {}
     for fn in program.functions:
-        nf, n = _cp_func(fn)
+        nf = fn.copy()
         funcs.append(nf)
-        per[fn.name] = n
+        per[fn.name] = _cp_func(nf)
     return ConstantPropagationResult(IRProgram(funcs), per)
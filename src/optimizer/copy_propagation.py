@@ -2,14 +2,15 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, List, Optional, Set
 
-from ir.ir import IRFunction, IRProgram, Instruction
+from ir.ir import IRFunction, IRProgram, Instruction, Temp
+from ir.opcodes import FUNC_ENTRY, LOAD, STORE, LABEL, JMP, JMP_IF, JMP_IF_NOT, CALL
 
-_BARR = {"LABEL", "JMP", "JMP_IF", "JMP_IF_NOT", "FUNC_ENTRY", "CALL"}
+_BARR = {LABEL, JMP, JMP_IF, JMP_IF_NOT, FUNC_ENTRY, CALL}
 
 
-def _resolve(r: Dict[str, str], k: str) -> str:
+def _resolve(r: Dict[Temp, Temp], k: Temp) -> Temp:
     s: Set[str] = set()
     while k in r and k not in s:
         s.add(k)
@@ -17,47 +18,50 @@ def _resolve(r: Dict[str, str], k: str) -> str:
     return k
 
 
-def _apply(args: List[Any], r: Dict[str, str]) -> List[Any]:
-    return [_resolve(r, a) if isinstance(a, str) and a.startswith("%") else a for a in args]
+def _apply(args: List[Any], r: Dict[Temp, Temp]) -> Optional[List[Any]]:
+    """`args` with redirected temps resolved, or None when none is redirected."""
+    out = None
+    for j, a in enumerate(args):
+        if isinstance(a, Temp) and a in r:
+            if out is None:
+                out = list(args)
+            out[j] = _resolve(r, a)
+    return out
 
 
-def _cp_func(func: IRFunction):
-    v2t: Dict[str, str] = {}
-    red: Dict[str, str] = {}
-    out: List[Instruction] = []
+def _cp_func(func: IRFunction) -> int:
+    v2t: Dict[str, Temp] = {}
+    red: Dict[Temp, Temp] = {}
+    dead: List[int] = []
     elim = 0
 
-    for ins in func.instructions:
+    for i, ins in enumerate(func.instructions):
         op = ins.op
-        args = _apply(ins.args, red)
-        ins = Instruction(op, args)
+        args = _apply(ins.args, red) if red else None
+        if args is None:
+            args = ins.args
+        else:
+            func.replace(i, Instruction(op, args))
 
         if op in _BARR:
             v2t.clear()
-            out.append(ins)
             continue
 
-        if op == "STORE" and len(args) == 2:
+        if op is STORE and len(args) == 2:
             vn, src = args[0], args[1]
-            if isinstance(src, str) and src.startswith("%"):
+            if isinstance(src, Temp):
                 v2t[vn] = _resolve(red, src)
             else:
                 v2t.pop(vn, None)
-            out.append(ins)
-        elif op == "LOAD" and len(args) == 2:
+        elif op is LOAD and len(args) == 2:
             dest, vn = args[0], args[1]
             if isinstance(vn, str) and vn in v2t:
                 red[dest] = v2t[vn]
+                dead.append(i)
                 elim += 1
-            else:
-                out.append(ins)
-        else:
-            out.append(ins)
 
-    return (
-        IRFunction(func.name, func.return_type, func.param_names, func.param_types, out),
-        elim,
-    )
+    func.erase(*dead)
+    return elim
 
 
 class CopyPropagationResult:
@@ -80,7 +84,7 @@ class CopyPropagationResult:
 def copy_propagation(program: IRProgram) -> CopyPropagationResult:
     funcs, per = [], {}
     for fn in program.functions:
-        nf, n = _cp_func(fn)
+        nf = fn.copy()
         funcs.append(nf)
-        per[fn.name] = n
+        per[fn.name] = _cp_func(nf)
     return CopyPropagationResult(IRProgram(funcs), per)
@@ -2,77 +2,57 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Set, Tuple
+from typing import Any, Dict, List, Tuple
 
-from ir.ir import IRFunction, IRProgram, Instruction
+from ir.ir import IRFunction, IRProgram, Temp
+from ir.opcodes import (
+    Opcode, FUNC_ENTRY, STORE_ARR, ADD, SUB, MUL, DIV, MOD, NEG, INC, DEC,
+    LT, LE, GT, GE, EQ, NE, AND, OR, NOT, LABEL, JMP, JMP_IF, JMP_IF_NOT, CALL,
+)
 
-_COMM = {"ADD", "MUL", "EQ", "NE", "AND", "OR"}
+_COMM = {ADD, MUL, EQ, NE, AND, OR}
 _BIN = {
-    "ADD", "SUB", "MUL", "DIV", "MOD", "LT", "LE", "GT", "GE", "EQ", "NE", "AND", "OR",
+    ADD, SUB, MUL, DIV, MOD, LT, LE, GT, GE, EQ, NE, AND, OR,
 }
-_UN = {"NEG", "NOT", "INC", "DEC"}
-_BARR = {"LABEL", "JMP", "JMP_IF", "JMP_IF_NOT", "FUNC_ENTRY", "CALL", "STORE_ARR"}
+_UN = {NEG, NOT, INC, DEC}
+_BARR = {LABEL, JMP, JMP_IF, JMP_IF_NOT, FUNC_ENTRY, CALL, STORE_ARR}
 
 
-def _resolve(r: Dict[str, str], k: str) -> str:
-    s: Set[str] = set()
-    while k in r and k not in s:
-        s.add(k)
-        k = r[k]
-    return k
-
-
-def _apply(args: List[Any], r: Dict[str, str]) -> List[Any]:
-    return [_resolve(r, a) if isinstance(a, str) and a.startswith("%") else a for a in args]
-
-
-def _key(op: str, a1: Any, a2: Any) -> Tuple:
-    if op in _COMM and isinstance(a1, str) and isinstance(a2, str) and a1 > a2:
+def _key(op: Opcode, a1: Any, a2: Any) -> Tuple:
+    if op in _COMM and isinstance(a1, Temp) and isinstance(a2, Temp) and a1 > a2:
         return (op, a2, a1)
     return (op, a1, a2)
 
 
-def _cse_func(func: IRFunction):
-    avail: Dict[Tuple, str] = {}
-    red: Dict[str, str] = {}
-    out: List[Instruction] = []
-    elim = 0
+def _cse_func(func: IRFunction) -> int:
+    avail: Dict[Tuple, Temp] = {}
+    dead: List[int] = []
+    func.def_use()  # so that replace_all_uses visits only the readers
 
-    for ins in func.instructions:
-        op = ins.op
-        args = _apply(ins.args, red)
-        ins = Instruction(op, args)
+    for i, ins in enumerate(func.instructions):
+        op, args = ins.op, ins.args
 
         if op in _BARR:
             avail.clear()
-            out.append(ins)
             continue
 
         if op in _BIN and len(args) == 3:
-            d, x, y = args[0], args[1], args[2]
-            ek = _key(op, x, y)
-            if ek in avail:
-                red[d] = avail[ek]
-                elim += 1
-            else:
-                avail[ek] = d
-                out.append(ins)
+            ek = _key(op, args[1], args[2])
         elif op in _UN and len(args) == 2:
-            d, x = args[0], args[1]
-            ek = (op, x)
-            if ek in avail:
-                red[d] = avail[ek]
-                elim += 1
-            else:
-                avail[ek] = d
-                out.append(ins)
+            ek = (op, args[1])
+        else:
+            continue
+        d = args[0]
+        if ek in avail:
+            # Every reader, including a PHI earlier in the function that
+            # takes `d` along a back edge, now reads the first result.
+            func.replace_all_uses(d, avail[ek])
+            dead.append(i)
         else:
-            out.append(ins)
+            avail[ek] = d
 
-    return (
-        IRFunction(func.name, func.return_type, func.param_names, func.param_types, out),
-        elim,
-    )
+    func.erase(*dead)
+    return len(dead)
 
 
 class CSEResult:
@@ -95,7 +75,7 @@ class CSEResult:
 def cse(program: IRProgram) -> CSEResult:
     funcs, per = [], {}
     for fn in program.functions:
-        nf, n = _cse_func(fn)
+        nf = fn.copy()
         funcs.append(nf)
-        per[fn.name] = n
+        per[fn.name] = _cse_func(nf)
     return CSEResult(IRProgram(funcs), per)
@@ -1,59 +1,52 @@
 """Dead Code Elimination (Week 8) — removes unused pure definitions.
 
-Iterates until fixed point so that chains like:
+One worklist sweep over the function's def-use chains: a pure definition
+nobody reads is dead, and so, in turn, is any pure definition that only
+dead instructions read. Chains like
     CONST %0 ... ; CONST %1 ... ; ADD %2 %0 %1   (all unused)
-are fully cleaned up in multiple passes.
+go in a single pass.
 """
 
 from __future__ import annotations
-from typing import Dict, List, Set
-from ir.ir import IRFunction, IRProgram, Instruction
+from typing import Dict, List
+from ir.ir import IRFunction, IRProgram, Instruction, Temp
+from ir.opcodes import (
+    CONST, LOAD, LOAD_ARR, ADD, SUB, MUL, DIV, MOD, NEG, INC, DEC,
+    LT, LE, GT, GE, EQ, NE, AND, OR, NOT, PHI,
+)
 
 # Ops that can be removed if their result temp is never read
 _PURE = {
-    "CONST","LOAD","LOAD_ARR",
-    "ADD","SUB","MUL","DIV","MOD",
-    "NEG","INC","DEC",
-    "LT","LE","GT","GE","EQ","NE","AND","OR","NOT",
+    CONST,LOAD,LOAD_ARR,
+    ADD,SUB,MUL,DIV,MOD,
+    NEG,INC,DEC,
+    LT,LE,GT,GE,EQ,NE,AND,OR,NOT,
+    PHI,
 }
 
 
-def _used_temps(insns: List[Instruction]) -> Set[str]:
-    """Collect every temp that appears as a *use* (not a define) in the list."""
-    used: Set[str] = set()
-    for ins in insns:
-        # For pure ops the first arg is the destination; everything else is a use.
-        # For all other ops every temp arg is a use.
-        args = ins.args[1:] if ins.op in _PURE else ins.args
-        for a in args:
-            if isinstance(a, str) and a.startswith("%"):
-                used.add(a)
-    return used
-
-
-def _dce_once(insns: List[Instruction]):
-    used = _used_temps(insns)
-    out, removed = [], 0
-    for ins in insns:
-        # Only pure ops with a temp dest can be dropped
-        if ins.op in _PURE:
-            dest = ins.args[0]
-            if isinstance(dest, str) and dest.startswith("%") and dest not in used:
-                removed += 1
+def _dce_func(func: IRFunction) -> int:
+    du = func.def_use()
+    work: List[Instruction] = [ins for ins in du.unused_definitions() if ins.op in _PURE]
+    dead: Dict[int, Instruction] = {}   # id -> instruction
+    dead_uses: Dict[Temp, int] = {}     # temp -> how many of its readers are dead
+    while work:
+        ins = work.pop()
+        if id(ins) in dead:
+            continue
+        dead[id(ins)] = ins
+        # A reader counts once however often it names the temp, as in `du`.
+        for a in dict.fromkeys(ins.args[1:]):
+            if not isinstance(a, Temp):
                 continue
-        out.append(ins)
-    return out, removed
-
-
-def _dce_func(func: IRFunction):
-    insns = list(func.instructions)
-    total = 0
-    while True:
-        insns, n = _dce_once(insns)
-        total += n
-        if n == 0:
-            break
-    return IRFunction(func.name, func.return_type, func.param_names, func.param_types, insns), total
+            n = dead_uses[a] = dead_uses.get(a, 0) + 1
+            if n == du.num_uses(a):
+                d = du.definition(a)
+                if d is not None and d.op in _PURE:
+                    work.append(d)
+    if dead:
+        func.erase(*[i for i, ins in enumerate(func.instructions) if id(ins) in dead])
+    return len(dead)
 
 
 class DeadCodeEliminationResult:
@@ -76,6 +69,6 @@ class DeadCodeEliminationResult:
 def dead_code_elimination(program: IRProgram) -> DeadCodeEliminationResult:
     funcs, per = [], {}
     for fn in program.functions:
-        nf, n = _dce_func(fn)
-        funcs.append(nf);  per[fn.name] = n
+        nf = fn.copy()
+        funcs.append(nf);  per[fn.name] = _dce_func(nf)
     return DeadCodeEliminationResult(IRProgram(funcs), per)
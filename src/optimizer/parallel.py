@@ -0,0 +1,82 @@
+"""Per-function parallel optimization: `PassManager(pipeline, jobs=N)`.
+
+Every pass transforms one function at a time, so a program can be cut into
+chunks of whole functions, each chunk run through the complete pipeline in
+a worker process, and the optimized functions put back in their original
+order. Chunks travel both ways as binary IR (`ir.encode_ir`), which is far
+smaller and quicker to load than a pickle of the same objects.
+
+The result is the program the serial pipeline produces, with the same
+per-pass statistics. Only `skipped_runs` can differ: a chunk leaves a
+fixed-point group as soon as its own functions settle, where the serial
+run keeps skipping them until the whole program has. Step callbacks need
+the whole program after every step, so `PassManager` only comes here
+without one; `PassManager` also keeps programs under
+`MIN_PARALLEL_INSTRUCTIONS` serial, where starting workers costs more
+than it saves.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Dict, List, Optional
+
+from ir.ir import IRFunction, IRProgram
+from ir.serialize import decode_ir, encode_ir
+from phase_report import PhaseReport
+
+MIN_PARALLEL_INSTRUCTIONS = 20_000
+CHUNKS_PER_WORKER = 4  # smaller chunks even out functions of very different sizes
+
+
+def _split(functions: List[IRFunction], parts: int) -> List[List[IRFunction]]:
+    """Contiguous runs of `functions` with about the same instruction count each."""
+    total = sum(len(f.instructions) for f in functions)
+    chunks: List[List[IRFunction]] = [[]]
+    done = 0
+    for f in functions:
+        if chunks[-1] and done >= total * len(chunks) / parts:
+            chunks.append([])
+        chunks[-1].append(f)
+        done += len(f.instructions)
+    return chunks
+
+
+def _optimize_chunk(pipeline: List[Any], data: bytes, memory: Optional[bool]) -> tuple:
+    """Worker: run `pipeline` over one encoded chunk (timing it if `memory` is not None)."""
+    from .pass_manager import PassManager
+
+    report = None if memory is None else PhaseReport(memory=memory)
+    result = PassManager(pipeline, report=report).run(decode_ir(data))
+    phases = None
+    if report is not None:
+        report.close()
+        phases = list(report.phases.values())
+    return encode_ir(result.program), result.stats_per_pass, result.skipped_runs, phases
+
+
+def run_parallel(pipeline: List[Any], program: IRProgram, workers: int,
+                 report: Optional[PhaseReport] = None):
+    """Optimize `program` with `pipeline` in `workers` processes; see the module docstring.
+
+    Worker phase timings are added into `report`.
+    """
+    from .pass_manager import PipelineResult, _merge
+
+    chunks = _split(program.functions, workers * CHUNKS_PER_WORKER)
+    memory = None if report is None else report.memory
+    payloads = [encode_ir(IRProgram(chunk)) for chunk in chunks]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        results = list(pool.map(_optimize_chunk, repeat(pipeline), payloads, repeat(memory)))
+
+    functions: List[IRFunction] = []
+    stats: Dict[str, dict] = {}
+    skipped = 0
+    for data, chunk_stats, chunk_skipped, phases in results:
+        functions.extend(decode_ir(data).functions)
+        _merge(stats, chunk_stats)
+        skipped += chunk_skipped
+        if phases is not None:
+            report.merge(phases)
+    return PipelineResult(IRProgram(functions), stats, skipped)
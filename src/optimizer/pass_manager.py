@@ -0,0 +1,347 @@
+"""Pass manager: optimization pipelines declared as data.
+
+A pipeline is a list of steps. A step is either the name of a registered
+pass (see `PASSES`) or a `FixedPoint` group, which reruns its own steps
+until a whole round reports no changes:
+
+    ["cf", FixedPoint("cprop", "cf"), "sr", "dce", ...]
+
+`PRESETS` holds the -O0 .. -O3 pipelines and `pipeline_for` narrows one to
+a chosen subset of passes (the driver's `--optim` list). "ssa" and "unssa"
+are in no preset and run only when that list names them: "ssa" before the
+preset's steps, "unssa" after them.
+
+Every pass edits one `IRFunction` in place, and every edit bumps the
+function's `epoch`. The manager runs the pipeline over copies of the
+program's functions and remembers, per function, the epoch at which each
+pass last left it unchanged: that pass is skipped on the function until
+some other pass edits it. A function no pass changed comes back as the
+original object. The program is only snapshotted for an `on_step` hook.
+
+Given a `PhaseReport`, every pass run is timed as phase "opt:<name>", with
+the program's instruction count before and after.
+
+A pass's module is imported the first time the pass runs or reports, so a
+pipeline pays only for the passes in it.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from ir.ir import IRFunction, IRProgram
+from phase_report import ir_size
+
+if TYPE_CHECKING:
+    from phase_report import PhaseReport
+
+
+class Pass:
+    """A registered pass: its per-function transform and how to report on it.
+
+    `run(func)` edits `func` in place and returns `stats`: a change count, or a
+    dict of counts (`zero` gives its all-zero shape). `idempotent` passes
+    iterate to their own fixed point, so rerunning one right after itself
+    is known to change nothing. `run` and `result_cls` are looked up by name
+    in `optimizer.<module>` on first use.
+    """
+
+    run: Callable[[IRFunction], Any]
+    result_cls: type
+
+    def __init__(
+        self,
+        name: str,
+        title: str,
+        module: str,
+        run: str,
+        result_cls: str,
+        zero: Any = 0,
+        idempotent: bool = False,
+    ) -> None:
+        self.name = name
+        self.title = title
+        self.module = module
+        self._attrs = (run, result_cls)
+        self.zero = zero
+        self.idempotent = idempotent
+
+    def __getattr__(self, attr: str) -> Any:
+        # Only reached while `run` / `result_cls` are not instance attributes yet.
+        if attr not in ("run", "result_cls"):
+            raise AttributeError(attr)
+        from . import _load
+
+        module = _load(self.module)
+        self.run = getattr(module, self._attrs[0])
+        self.result_cls = getattr(module, self._attrs[1])
+        return getattr(self, attr)
+
+    def changes(self, stats: Any) -> int:
+        return sum(stats.values()) if isinstance(stats, dict) else stats
+
+    def __repr__(self) -> str:
+        return f"Pass({self.name!r})"
+
+
+_BB_ZERO = {"jump_threaded": 0, "blocks_removed": 0, "blocks_merged": 0}
+_SSA_ZERO = {"promoted": 0, "phis": 0}
+_UNSSA_ZERO = {"phis": 0, "copies": 0, "coalesced": 0}
+
+PASSES: Dict[str, Pass] = {
+    p.name: p
+    for p in (
+        Pass("cf", "constant folding", "constant_folding", "_fold_func",
+             "ConstantFoldingResult"),
+        Pass("cprop", "constant propagation", "constant_propagation", "_cp_func",
+             "ConstantPropagationResult"),
+        Pass("sr", "strength reduction", "strength_reduction", "_sr_func",
+             "StrengthReductionResult"),
+        Pass("dce", "dead code elimination", "dead_code_elimination", "_dce_func",
+             "DeadCodeEliminationResult", idempotent=True),
+        Pass("cse", "CSE", "cse", "_cse_func", "CSEResult"),
+        Pass("cp", "copy propagation", "copy_propagation", "_cp_func", "CopyPropagationResult"),
+        Pass("peephole", "peephole", "peephole", "_peephole_func", "PeepholeResult",
+             idempotent=True),
+        Pass("bb", "basic-block optimization", "basic_block", "_bb_func",
+             "BasicBlockOptResult", zero=_BB_ZERO, idempotent=True),
+        # The closing sweep after the structural passes; same transform as "dce".
+        Pass("dce2", "final dead code elimination", "dead_code_elimination", "_dce_func",
+             "DeadCodeEliminationResult", idempotent=True),
+        # Not in any preset: the passes above work on STORE / LOAD form.
+        Pass("ssa", "SSA construction", "ssa", "_to_ssa_func", "SSAResult",
+             zero=_SSA_ZERO, idempotent=True),
+        Pass("unssa", "SSA destruction", "ssa", "_out_of_ssa_func", "OutOfSSAResult",
+             zero=_UNSSA_ZERO, idempotent=True),
+    )
+}
+
+
+class FixedPoint:
+    """A pipeline step that repeats `steps` until a round changes nothing."""
+
+    def __init__(self, *steps: Any, max_rounds: int = 16) -> None:
+        self.steps = list(steps)
+        self.max_rounds = max_rounds
+
+    @property
+    def name(self) -> str:
+        return "+".join(_step_name(s) for s in self.steps)
+
+    @property
+    def title(self) -> str:
+        return " + ".join(_step_title(s) for s in self.steps)
+
+    def __repr__(self) -> str:
+        inner = ", ".join(repr(s) for s in self.steps)
+        return f"FixedPoint({inner})"
+
+
+def _step_name(step: Any) -> str:
+    return f"({step.name})" if isinstance(step, FixedPoint) else step
+
+
+def _step_title(step: Any) -> str:
+    return f"({step.title})" if isinstance(step, FixedPoint) else PASSES[step].title
+
+
+_O2 = ["cf", FixedPoint("cprop", "cf"), "sr", "dce", "cse", "cp", "peephole", "bb", "dce2"]
+
+PRESETS: Dict[int, List[Any]] = {
+    0: [],
+    1: ["cf", FixedPoint("cprop", "cf"), "dce"],
+    2: _O2,
+    3: [FixedPoint(*_O2)],
+}
+
+
+# Passes that no preset runs, with where they go when named explicitly.
+_LEADING = ["ssa"]
+_TRAILING = ["unssa"]
+
+
+def pipeline_for(level: int, passes: Optional[set] = None) -> List[Any]:
+    """The -O`level` preset, keeping only `passes` (all of them when None).
+
+    Named passes from `_LEADING` / `_TRAILING` are added around the result.
+    """
+    steps = PRESETS[level]
+    if passes is None:
+        return steps
+    return (
+        [p for p in _LEADING if p in passes]
+        + _select(steps, passes)
+        + [p for p in _TRAILING if p in passes]
+    )
+
+
+def _select(steps: List[Any], keep: set) -> List[Any]:
+    out: List[Any] = []
+    for s in steps:
+        if isinstance(s, FixedPoint):
+            inner = _select(s.steps, keep)
+            if inner:
+                out.append(FixedPoint(*inner, max_rounds=s.max_rounds))
+        elif s in keep:
+            out.append(s)
+    return out
+
+
+def _add(total: Any, stats: Any) -> Any:
+    if total is None:
+        return dict(stats) if isinstance(stats, dict) else stats
+    if isinstance(stats, dict):
+        return {k: total[k] + stats[k] for k in total}
+    return total + stats
+
+
+def _merge(into: Dict[str, dict], stats: Dict[str, dict]) -> None:
+    for name, per in stats.items():
+        dst = into.setdefault(name, {})
+        for fn, s in per.items():
+            dst[fn] = _add(dst.get(fn), s)
+
+
+def _total(stats: Dict[str, dict]) -> int:
+    return sum(
+        PASSES[name].changes(s) for name, per in stats.items() for s in per.values()
+    )
+
+
+def _summaries(program: IRProgram, stats: Dict[str, dict]) -> List[str]:
+    return [PASSES[name].result_cls(program, per).summary() for name, per in stats.items()]
+
+
+class StepReport:
+    """What one pipeline step did, handed to `PassManager`'s `on_step` hook.
+
+    `program` is a snapshot taken after the step, which later steps leave alone.
+    """
+
+    def __init__(self, step: Any, stats: Dict[str, dict], program: IRProgram,
+                 rounds: Optional[int]) -> None:
+        group = isinstance(step, FixedPoint)
+        self.name = step.name if group else step
+        self.title = step.title if group else PASSES[step].title
+        self.program = program
+        self.rounds = rounds  # None for a single pass
+        self.stats_per_pass = stats
+
+    @property
+    def pass_names(self) -> List[str]:
+        return list(self.stats_per_pass)
+
+    @property
+    def total_changes(self) -> int:
+        return _total(self.stats_per_pass)
+
+    def summary(self) -> str:
+        lines = _summaries(self.program, self.stats_per_pass)
+        if self.rounds is None:
+            return "\n".join(lines)
+        header = f"Fixed-point group {self.name}: {self.rounds} round(s)"
+        return "\n".join([header] + lines)
+
+
+class PipelineResult:
+    def __init__(self, program: IRProgram, stats: Dict[str, dict], skipped: int) -> None:
+        self.program = program
+        self.stats_per_pass = stats
+        self.skipped_runs = skipped
+
+    @property
+    def total_changes(self) -> int:
+        return _total(self.stats_per_pass)
+
+    def summary(self) -> str:
+        lines = ["Optimization Pipeline:"]
+        for name, per in self.stats_per_pass.items():
+            p = PASSES[name]
+            n = sum(p.changes(s) for s in per.values())
+            lines.append(f"  {name}: {n} change(s)")
+        lines.append(
+            f"  Total: {self.total_changes} change(s); "
+            f"{self.skipped_runs} pass run(s) skipped on unchanged functions"
+        )
+        return "\n".join(lines)
+
+
+class PassManager:
+    """Runs a pipeline over a program.
+
+    With `jobs` other than 1 (0: one per CPU) and no `on_step` hook, a
+    program of at least `min_parallel_size` instructions is optimized in
+    worker processes, a chunk of functions each; see `optimizer.parallel`.
+    """
+
+    def __init__(self, pipeline: List[Any],
+                 on_step: Optional[Callable[[StepReport], None]] = None,
+                 report: Optional[PhaseReport] = None,
+                 jobs: int = 1, min_parallel_size: Optional[int] = None) -> None:
+        self.pipeline = list(pipeline)
+        self.on_step = on_step
+        self.report = report
+        self.jobs = jobs
+        self.min_parallel_size = min_parallel_size
+
+    def run(self, program: IRProgram) -> PipelineResult:
+        workers = self.jobs or os.cpu_count() or 1
+        if workers > 1 and self.on_step is None and self.pipeline and len(program.functions) > 1:
+            from . import parallel
+
+            threshold = self.min_parallel_size
+            if threshold is None:
+                threshold = parallel.MIN_PARALLEL_INSTRUCTIONS
+            if ir_size(program) >= threshold:
+                return parallel.run_parallel(self.pipeline, program, workers, self.report)
+        originals = program.functions
+        self._functions = [fn.copy() for fn in originals]
+        # Per function: transform -> the epoch at which it last changed nothing.
+        self._clean: List[Dict[Callable, int]] = [{} for _ in self._functions]
+        self._skipped = 0
+        stats: Dict[str, dict] = {}
+        for step in self.pipeline:
+            self._run_step(step, stats)
+        functions = [
+            orig if fn.epoch == 0 else fn for orig, fn in zip(originals, self._functions)
+        ]
+        return PipelineResult(IRProgram(functions), stats, self._skipped)
+
+    def _run_step(self, step: Any, totals: Dict[str, dict]) -> int:
+        stats: Dict[str, dict] = {}
+        rounds = None
+        if isinstance(step, FixedPoint):
+            rounds = 0
+            while rounds < step.max_rounds:
+                rounds += 1
+                changed = 0
+                for s in step.steps:
+                    changed += self._run_step(s, stats)
+                if changed == 0:
+                    break
+        else:
+            p = PASSES[step]
+            if self.report is None:
+                self._run_pass(p, stats)
+            else:
+                with self.report.phase(f"opt:{p.name}", ir_size(self._functions)) as ph:
+                    self._run_pass(p, stats)
+                    ph.ir_after = ir_size(self._functions)
+        _merge(totals, stats)
+        if self.on_step is not None:
+            snapshot = IRProgram([fn.copy() for fn in self._functions])
+            self.on_step(StepReport(step, stats, snapshot, rounds))
+        return _total(stats)
+
+    def _run_pass(self, p: Pass, stats: Dict[str, dict]) -> None:
+        per = stats.setdefault(p.name, {})
+        for fn, clean in zip(self._functions, self._clean):
+            epoch = fn.epoch
+            if clean.get(p.run) == epoch:
+                per[fn.name] = _add(per.get(fn.name), p.zero)
+                self._skipped += 1
+                continue
+            per[fn.name] = _add(per.get(fn.name), p.run(fn))
+            if fn.epoch == epoch or p.idempotent:
+                clean[p.run] = fn.epoch
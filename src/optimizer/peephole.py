@@ -16,6 +16,8 @@ Rules applied (iterated to a fixed point):
         JMP / RET / EXIT
         ...           ->  drop everything until the next LABEL.
         LABEL L
+     In SSA form the labelled blocks this leaves unreachable go as well,
+     with the PHI entries for their edges (`ir.ssa.drop_unreachable`).
 
   4. Self-comparison folding:
         EQ d x x   ->  CONST d bool 1
@@ -28,15 +30,17 @@ Rules applied (iterated to a fixed point):
 
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+from typing import Dict, List
 
-from ir.ir import CONST, Instruction, IRFunction, IRProgram
+from ir.ir import CONST, Instruction, IRFunction, IRProgram, Temp
+from ir.opcodes import LT, LE, GT, GE, EQ, NE, LABEL, JMP, JMP_IF, JMP_IF_NOT, RET, EXIT
+from ir.ssa import drop_unreachable, has_phis
 
-_TRUE_SELF = {"EQ", "LE", "GE"}
-_FALSE_SELF = {"NE", "LT", "GT"}
+_TRUE_SELF = {EQ, LE, GE}
+_FALSE_SELF = {NE, LT, GT}
 _SELF_OPS = _TRUE_SELF | _FALSE_SELF
-_TERMINATORS = {"JMP", "RET", "EXIT"}
-_FLIP = {"JMP_IF": "JMP_IF_NOT", "JMP_IF_NOT": "JMP_IF"}
+_TERMINATORS = {JMP, RET, EXIT}
+_FLIP = {JMP_IF: JMP_IF_NOT, JMP_IF_NOT: JMP_IF}
 
 
 def _self_compare_fold(ins: Instruction) -> Instruction | None:
@@ -44,7 +48,7 @@ def _self_compare_fold(ins: Instruction) -> Instruction | None:
     if len(ins.args) != 3:
         return None
     _, l, r = ins.args
-    if not (isinstance(l, str) and isinstance(r, str) and l == r):
+    if not (isinstance(l, (Temp, str)) and l.__class__ is r.__class__ and l == r):
         return None
     if ins.op in _TRUE_SELF:
         return CONST(ins.args[0], "bool", 1)
@@ -53,9 +57,10 @@ def _self_compare_fold(ins: Instruction) -> Instruction | None:
     return None
 
 
-def _peephole_once(insns: List[Instruction]) -> Tuple[List[Instruction], int]:
-    """Run one peephole sweep; return (new_instructions, changes_made)."""
-    out: List[Instruction] = []
+def _peephole_once(func: IRFunction) -> int:
+    """Run one peephole sweep over `func`; return the changes made."""
+    insns = func.instructions
+    dead: List[int] = []
     changes = 0
     i = 0
     n = len(insns)
@@ -67,7 +72,7 @@ def _peephole_once(insns: List[Instruction]) -> Tuple[List[Instruction], int]:
         if ins.op in _SELF_OPS:
             folded = _self_compare_fold(ins)
             if folded is not None:
-                out.append(folded)
+                func.replace(i, folded)
                 changes += 1
                 i += 1
                 continue
@@ -79,66 +84,61 @@ def _peephole_once(insns: List[Instruction]) -> Tuple[List[Instruction], int]:
         if (
             ins.op in _FLIP
             and i + 2 < n
-            and insns[i + 1].op == "JMP"
-            and insns[i + 2].op == "LABEL"
+            and insns[i + 1].op is JMP
+            and insns[i + 2].op is LABEL
             and len(ins.args) == 2
             and ins.args[1] == insns[i + 2].args[0]
         ):
             flip_op = _FLIP[ins.op]
             cond = ins.args[0]
             target = insns[i + 1].args[0]
-            out.append(Instruction(flip_op, [cond, target]))
-            out.append(insns[i + 2])
+            func.replace(i, Instruction(flip_op, [cond, target]))
+            dead.append(i + 1)
             changes += 1
             i += 3
             continue
 
         # Redundant JMP to the very next label.
         if (
-            ins.op == "JMP"
+            ins.op is JMP
             and i + 1 < n
-            and insns[i + 1].op == "LABEL"
+            and insns[i + 1].op is LABEL
             and len(ins.args) == 1
             and ins.args[0] == insns[i + 1].args[0]
         ):
+            dead.append(i)
             changes += 1
             i += 1
             continue
 
-        # Unreachable code after a terminator: skip until the next LABEL.
+        # Unreachable code after a terminator: drop until the next LABEL.
         if ins.op in _TERMINATORS:
-            out.append(ins)
             j = i + 1
-            while j < n and insns[j].op != "LABEL":
+            while j < n and insns[j].op is not LABEL:
+                dead.append(j)
                 j += 1
                 changes += 1
             i = j
             continue
 
-        out.append(ins)
         i += 1
 
-    return out, changes
+    func.erase(*dead)
+    return changes
 
 
-def _peephole_func(func: IRFunction) -> Tuple[IRFunction, int]:
-    insns = list(func.instructions)
+def _peephole_func(func: IRFunction) -> int:
     total = 0
     while True:
-        insns, n = _peephole_once(insns)
+        n = _peephole_once(func)
         total += n
         if n == 0:
             break
-    return (
-        IRFunction(
-            func.name,
-            func.return_type,
-            func.param_names,
-            func.param_types,
-            insns,
-        ),
-        total,
-    )
+    if total and has_phis(func):
+        # Rule 3 only sees up to the next LABEL; in SSA form the labelled
+        # blocks it cut off, and the PHI entries for their edges, go too.
+        total += drop_unreachable(func)
+    return total
 
 
 class PeepholeResult:
@@ -162,7 +162,7 @@ def peephole(program: IRProgram) -> PeepholeResult:
     funcs: List[IRFunction] = []
     per: Dict[str, int] = {}
     for fn in program.functions:
-        nf, n = _peephole_func(fn)
+        nf = fn.copy()
         funcs.append(nf)
-        per[fn.name] = n
+        per[fn.name] = _peephole_func(nf)
     return PeepholeResult(IRProgram(funcs), per)
@@ -0,0 +1,71 @@
+"""SSA construction and destruction as passes ("ssa" and "unssa").
+
+The transforms live in `ir.ssa`, since the backends need `out_of_ssa` too.
+Between the two, each promoted variable's uses read the temp of its one
+reaching definition (or a PHI of several), so a pass that follows temps
+sees facts across LABEL and JMP that it loses at a STORE / LOAD pair.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List
+
+from ir.ir import IRFunction, IRProgram
+from ir.ssa import out_of_ssa as _out_of_ssa_func, to_ssa as _to_ssa_func
+
+
+class SSAResult:
+    def __init__(self, program: IRProgram, per: Dict[str, Dict[str, int]]) -> None:
+        self.program = program
+        self.stats_per_function = per
+
+    @property
+    def total_promoted(self) -> int:
+        return sum(s["promoted"] for s in self.stats_per_function.values())
+
+    def summary(self) -> str:
+        lines = ["SSA Construction:"]
+        for fn, s in self.stats_per_function.items():
+            lines.append(f"  {fn}: {s['promoted']} variable(s) promoted, {s['phis']} PHI(s)")
+        lines.append(f"  Total: {self.total_promoted} variable(s) promoted")
+        return "\n".join(lines)
+
+
+class OutOfSSAResult:
+    def __init__(self, program: IRProgram, per: Dict[str, Dict[str, int]]) -> None:
+        self.program = program
+        self.stats_per_function = per
+
+    @property
+    def total_phis(self) -> int:
+        return sum(s["phis"] for s in self.stats_per_function.values())
+
+    def summary(self) -> str:
+        lines = ["SSA Destruction:"]
+        for fn, s in self.stats_per_function.items():
+            lines.append(
+                f"  {fn}: {s['phis']} PHI(s) lowered, {s['copies']} copy(ies), "
+                f"{s['coalesced']} coalesced"
+            )
+        lines.append(f"  Total: {self.total_phis} PHI(s) lowered")
+        return "\n".join(lines)
+
+
+def to_ssa(program: IRProgram) -> SSAResult:
+    funcs: List[IRFunction] = []
+    per: Dict[str, Dict[str, int]] = {}
+    for fn in program.functions:
+        nf = fn.copy()
+        funcs.append(nf)
+        per[fn.name] = _to_ssa_func(nf)
+    return SSAResult(IRProgram(funcs), per)
+
+
+def out_of_ssa(program: IRProgram) -> OutOfSSAResult:
+    funcs: List[IRFunction] = []
+    per: Dict[str, Dict[str, int]] = {}
+    for fn in program.functions:
+        nf = fn.copy()
+        funcs.append(nf)
+        per[fn.name] = _out_of_ssa_func(nf)
+    return OutOfSSAResult(IRProgram(funcs), per)
@@ -12,10 +12,20 @@ Run dead-code elimination afterwards to clean up the spare CONST(0) temps.
 
 from __future__ import annotations
 from typing import Any, Dict, List, Tuple
-from ir.ir import ADD, CONST, Instruction, IRFunction, IRProgram, is_temp
+from ir.ir import ADD as IR_ADD, CONST as IR_CONST, Instruction, IRFunction, IRProgram, Temp, temp
+from ir.opcodes import (
+    CONST, LOAD, LOAD_ARR, READ_INT, ADD, SUB, MUL, DIV, MOD, NEG, INC, DEC,
+    LT, LE, GT, GE, EQ, NE, AND, OR, NOT, CALL,
+)
 
+_VALUE_OPS = frozenset({
+    LOAD, LOAD_ARR, READ_INT, ADD, SUB, MUL, DIV, MOD,
+    NEG, INC, DEC, LT, LE, GT, GE, EQ, NE, AND, OR, NOT,
+})
+_REDUCIBLE = frozenset({MUL, DIV, MOD})
 
-def _int_val(cm: Dict, name: str):
+
+def _int_val(cm: Dict, name: Temp):
     """Return the integer value of name if it's a known int constant, else None."""
     if name not in cm:
         return None
@@ -28,15 +38,15 @@ def _int_val(cm: Dict, name: str):
         return None
 
 
-def _pow2_add_chain(dest: str, x: str, k: int, tid: int) -> Tuple[List[Instruction], int]:
+def _pow2_add_chain(dest: Temp, x: Temp, k: int, tid: int) -> Tuple[List[Instruction], int]:
     """Emit k doublings: dest = x * 2^k using only ADDs."""
     if k == 1:
-        return [ADD(dest, x, x)], tid
-    tmps = [f"%{tid+i}" for i in range(k-1)];  tid += k-1
-    chain = [ADD(tmps[0], x, x)]
+        return [IR_ADD(dest, x, x)], tid
+    tmps = [temp(tid+i) for i in range(k-1)];  tid += k-1
+    chain = [IR_ADD(tmps[0], x, x)]
     for i in range(1, k-1):
-        chain.append(ADD(tmps[i], tmps[i-1], tmps[i-1]))
-    chain.append(ADD(dest, tmps[-1], tmps[-1]))
+        chain.append(IR_ADD(tmps[i], tmps[i-1], tmps[i-1]))
+    chain.append(IR_ADD(dest, tmps[-1], tmps[-1]))
     return chain, tid
 
 
@@ -44,78 +54,80 @@ def _next_tid(func: IRFunction) -> int:
     m = 0
     for ins in func.instructions:
         for a in ins.args:
-            if isinstance(a,str) and is_temp(a) and a[1:].isdigit():
-                m = max(m, int(a[1:]))
+            if isinstance(a, Temp) and a > m:
+                m = a
     return m + 1
 
 
-def _sr_func(func: IRFunction):
-    cm: Dict[str, Any] = {}   # temp -> (kind, val) for known CONST temps
-    out: List[Instruction] = []
+def _sr_func(func: IRFunction) -> int:
+    cm: Dict[Temp, Any] = {}   # temp -> (kind, val) for known CONST temps
+    insns = func.instructions
     tid = _next_tid(func)
     reps = 0
 
     def invalidate(ins: Instruction):
         """Remove any temp that this instruction redefines from cm."""
         a = ins.args
-        if ins.op == "CONST":
+        if ins.op is CONST:
             cm.pop(a[0], None)
-        elif ins.op in ("LOAD","LOAD_ARR","READ_INT","ADD","SUB","MUL","DIV","MOD",
-                        "NEG","INC","DEC","LT","LE","GT","GE","EQ","NE","AND","OR","NOT"):
-            if a and isinstance(a[0], str) and is_temp(a[0]):
+        elif ins.op in _VALUE_OPS:
+            if a and isinstance(a[0], Temp):
                 cm.pop(a[0], None)
-        elif ins.op == "CALL" and a[0]:
+        elif ins.op is CALL and a[0]:
             cm.pop(a[0], None)
 
-    for ins in func.instructions:
+    i = 0
+    while i < len(insns):
+        ins = insns[i]
         op, a = ins.op, ins.args
 
-        if op == "CONST":
+        if op is CONST:
             cm.pop(a[0], None)
             cm[a[0]] = (a[1][0], a[1][1])
-            out.append(ins);  continue
+            i += 1;  continue
 
-        if op in ("MUL","DIV","MOD"):
+        if op in _REDUCIBLE:
             dest, l, r = a[0], a[1], a[2]
             li, ri = _int_val(cm, l), _int_val(cm, r)
             replaced = []
 
-            if op == "MUL":
+            if op is MUL:
                 if li == 0 or ri == 0:
-                    replaced = [CONST(dest, "int", 0)]
+                    replaced = [IR_CONST(dest, "int", 0)]
                 elif li == 1:
-                    z = f"%{tid}";  tid += 1
-                    replaced = [CONST(z,"int",0), ADD(dest, r, z)]
+                    z = temp(tid);  tid += 1
+                    replaced = [IR_CONST(z,"int",0), IR_ADD(dest, r, z)]
                 elif ri == 1:
-                    z = f"%{tid}";  tid += 1
-                    replaced = [CONST(z,"int",0), ADD(dest, l, z)]
+                    z = temp(tid);  tid += 1
+                    replaced = [IR_CONST(z,"int",0), IR_ADD(dest, l, z)]
                 elif ri is not None and ri > 0 and (ri & (ri-1)) == 0:
                     replaced, tid = _pow2_add_chain(dest, l, ri.bit_length()-1, tid)
                 elif li is not None and li > 0 and (li & (li-1)) == 0:
                     replaced, tid = _pow2_add_chain(dest, r, li.bit_length()-1, tid)
 
-            elif op == "DIV" and ri == 1:
-                z = f"%{tid}";  tid += 1
-                replaced = [CONST(z,"int",0), ADD(dest, l, z)]
+            elif op is DIV and ri == 1:
+                z = temp(tid);  tid += 1
+                replaced = [IR_CONST(z,"int",0), IR_ADD(dest, l, z)]
 
-            elif op == "MOD" and ri == 1:
-                replaced = [CONST(dest, "int", 0)]
+            elif op is MOD and ri == 1:
+                replaced = [IR_CONST(dest, "int", 0)]
 
             if replaced:
                 reps += 1
                 for new in replaced:
-                    if new.op == "CONST":
+                    if new.op is CONST:
                         cm.pop(new.args[0], None)
                         cm[new.args[0]] = (new.args[1][0], new.args[1][1])
                     else:
                         invalidate(new)
-                    out.append(new)
+                func.replace(i, *replaced)
+                i += len(replaced)
                 continue
 
         invalidate(ins)
-        out.append(ins)
+        i += 1
 
-    return IRFunction(func.name, func.return_type, func.param_names, func.param_types, out), reps
+    return reps
 
 
 class StrengthReductionResult:
@@ -138,6 +150,6 @@ class StrengthReductionResult:
 def strength_reduction(program: IRProgram) -> StrengthReductionResult:
     funcs, per = [], {}
     for fn in program.functions:
-        nf, n = _sr_func(fn)
-        funcs.append(nf);  per[fn.name] = n
+        nf = fn.copy()
+        funcs.append(nf);  per[fn.name] = _sr_func(nf)
     return StrengthReductionResult(IRProgram(funcs), per)
@@ -0,0 +1,231 @@
+"""Flat, array-backed storage for ASTs.
+
+An `ASTArena` holds any number of trees as rows of parallel columns instead
+of one Python object per node:
+
+    types    array('B')  index into NODE_TYPES
+    lines    array('i')  source line (0 = not set, -1 = None)
+    columns  array('i')  source column (same encoding)
+    first    array('I')  offset of the node's first field in the field columns
+
+    tags     array('B')  per field: _SCALAR, _NODE or _LIST
+    data     array('I')  per field: scalar id, child node id, or offset into `lists`
+    lists    array('I')  child-id lists, each stored as its length then the ids
+    scalars  list        distinct scalar field values (names, operators, literals)
+
+Nodes are numbered in preorder, so a child's id is always larger than its
+parent's. `arena.node(id)` returns an `ArenaNode`, a read-only view that
+answers attribute access, `fields`, `_pretty` and `viz.ast_to_dot`
+like the original node; `arena.build(id)` turns a tree back into ordinary
+`ASTNode` objects for the later compiler phases.
+"""
+
+from array import array
+
+from .ast import (
+    ASTNode,
+    _Resolved,
+    Program,
+    FunctionDecl,
+    Param,
+    Block,
+    VarDecl,
+    IfStmt,
+    WhileStmt,
+    ForStmt,
+    BreakStmt,
+    ContinueStmt,
+    ReturnStmt,
+    ExprStmt,
+    Assign,
+    BinaryOp,
+    UnaryOp,
+    Literal,
+    Variable,
+    ArrayAccess,
+    Call,
+    CaseClause,
+    SwitchStmt,
+)
+
+NODE_TYPES = (
+    Program, FunctionDecl, Param, Block, VarDecl, IfStmt, WhileStmt, ForStmt,
+    BreakStmt, ContinueStmt, ReturnStmt, ExprStmt, Assign, BinaryOp, UnaryOp,
+    Literal, Variable, ArrayAccess, Call, CaseClause, SwitchStmt,
+)
+_TYPE_CODES = {cls: code for code, cls in enumerate(NODE_TYPES)}
+_RESOLVED_TYPES = tuple(cls for cls in NODE_TYPES if issubclass(cls, _Resolved))
+
+_SCALAR, _NODE, _LIST = range(3)
+_LOC_UNSET, _LOC_NONE = 0, -1
+
+
+def _encode_loc(node, key):
+    value = getattr(node, key, _LOC_UNSET)
+    return _LOC_NONE if value is None else value
+
+
+class ArenaNode(ASTNode):
+    """A read-only `ASTNode` view of row `node_id` of an `ASTArena`."""
+
+    __slots__ = ("_arena", "_id")
+
+    def __init__(self, arena, node_id):
+        self._arena = arena
+        self._id = node_id
+
+    @property
+    def node_id(self):
+        return self._id
+
+    @property
+    def node_type(self) -> str:
+        return NODE_TYPES[self._arena.types[self._id]].__name__
+
+    @property
+    def line(self):
+        return self._loc(self._arena.lines)
+
+    @property
+    def column(self):
+        return self._loc(self._arena.columns)
+
+    def _loc(self, col):
+        value = col[self._id]
+        if value == _LOC_UNSET:
+            raise AttributeError("location not set")
+        return None if value == _LOC_NONE else value
+
+    def __getattr__(self, name):
+        a = self._arena
+        names = NODE_TYPES[a.types[self._id]].__slots__
+        if name not in names:
+            raise AttributeError(name)
+        return a._field(a.first[self._id] + names.index(name))
+
+    def fields(self):
+        a = self._arena
+        at = a.first[self._id]
+        names = NODE_TYPES[a.types[self._id]].__slots__
+        return [(key, a._field(at + i)) for i, key in enumerate(names)]
+
+
+class ASTArena:
+    def __init__(self):
+        self.types = array("B")
+        self.lines = array("i")
+        self.columns = array("i")
+        self.first = array("I")
+        self.tags = array("B")
+        self.data = array("I")
+        self.lists = array("I")
+        self.scalars = []
+        self._scalar_ids = {}
+
+    @classmethod
+    def from_tree(cls, root):
+        """An arena holding just the tree under `root` (its id is 0)."""
+        arena = cls()
+        arena.add(root)
+        return arena
+
+    def _scalar_id(self, value):
+        key = (type(value), value)  # keep 1, 1.0 and True apart
+        sid = self._scalar_ids.get(key)
+        if sid is None:
+            sid = self._scalar_ids[key] = len(self.scalars)
+            self.scalars.append(value)
+        return sid
+
+    def add(self, root):
+        """Copy the tree under `root` into the arena; returns the root's id."""
+        root_id = len(self.types)
+        tags, data, lists = self.tags, self.data, self.lists
+        # (node, column holding the reference to patch, index in that column)
+        stack = [(root, None, 0)]
+        while stack:
+            node, ref_col, ref_at = stack.pop()
+            nid = len(self.types)
+            if ref_col is not None:
+                ref_col[ref_at] = nid
+            self.types.append(_TYPE_CODES[type(node)])
+            self.lines.append(_encode_loc(node, "line"))
+            self.columns.append(_encode_loc(node, "column"))
+            self.first.append(len(tags))
+            children = []
+            for key in node.__slots__:
+                value = getattr(node, key)
+                if isinstance(value, ASTNode):
+                    tags.append(_NODE)
+                    data.append(0)
+                    children.append((value, data, len(data) - 1))
+                elif isinstance(value, list):
+                    tags.append(_LIST)
+                    data.append(len(lists))
+                    lists.append(len(value))
+                    for item in value:
+                        lists.append(0)
+                        children.append((item, lists, len(lists) - 1))
+                else:
+                    tags.append(_SCALAR)
+                    data.append(self._scalar_id(value))
+            stack.extend(reversed(children))
+        return root_id
+
+    def _field(self, at):
+        tag, d = self.tags[at], self.data[at]
+        if tag == _SCALAR:
+            return self.scalars[d]
+        if tag == _NODE:
+            return ArenaNode(self, d)
+        n = self.lists[d]
+        return [ArenaNode(self, i) for i in self.lists[d + 1:d + 1 + n]]
+
+    def _child_ids(self, nid):
+        at = self.first[nid]
+        for i in range(len(NODE_TYPES[self.types[nid]].__slots__)):
+            tag, d = self.tags[at + i], self.data[at + i]
+            if tag == _NODE:
+                yield d
+            elif tag == _LIST:
+                yield from self.lists[d + 1:d + 1 + self.lists[d]]
+
+    def node(self, nid):
+        return ArenaNode(self, nid)
+
+    def build(self, nid=0):
+        """Ordinary `ASTNode` objects for the tree rooted at `nid`."""
+        order, stack = [], [nid]
+        while stack:
+            i = stack.pop()
+            order.append(i)
+            stack.extend(self._child_ids(i))
+        built = {}
+        for i in reversed(order):  # children before their parents
+            cls = NODE_TYPES[self.types[i]]
+            node = cls.__new__(cls)
+            at = self.first[i]
+            for k, key in enumerate(cls.__slots__):
+                tag, d = self.tags[at + k], self.data[at + k]
+                if tag == _SCALAR:
+                    value = self.scalars[d]
+                elif tag == _NODE:
+                    value = built.pop(d)
+                else:
+                    value = [built.pop(c) for c in self.lists[d + 1:d + 1 + self.lists[d]]]
+                setattr(node, key, value)
+            if cls in _RESOLVED_TYPES:
+                node.symbol = None  # bindings are not stored; resolve again
+            for key, col in (("line", self.lines), ("column", self.columns)):
+                if col[i] != _LOC_UNSET:
+                    setattr(node, key, None if col[i] == _LOC_NONE else col[i])
+            built[i] = node
+        return built[nid]
+
+    def __len__(self):
+        return len(self.types)
+
+    def nbytes(self):
+        """Bytes held by the columns (excludes the shared scalar values)."""
+        cols = (self.types, self.lines, self.columns, self.first, self.tags, self.data, self.lists)
+        return sum(c.itemsize * len(c) for c in cols)
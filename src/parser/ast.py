@@ -4,21 +4,42 @@ from typing import Any
 
 
 class ASTNode:
+    # Every node class lists its constructor fields in `__slots__`; the parser
+    # fills in the source location afterwards (unset slots mean "unknown").
+    __slots__ = ("line", "column")
+
     def __str__(self) -> str:
         return self.__repr__()
 
     def __repr__(self) -> str:
         return self._pretty()
 
+    @property
+    def node_type(self) -> str:
+        return self.__class__.__name__
+
+    def fields(self) -> list:
+        """(name, value) of each constructor field, in declaration order."""
+        return [(key, getattr(self, key)) for key in self.__slots__]
+
+    def iter_fields(self):
+        """`fields()`, then whichever location fields are set."""
+        yield from self.fields()
+        for key in _LOC_FIELDS:
+            try:
+                yield key, getattr(self, key)
+            except AttributeError:
+                pass
+
     def _pretty(self, level: int = 0) -> str:
         indent = _INDENT_UNIT * level
-        fields = getattr(self, "__dict__", {})
+        fields = list(self.iter_fields())
 
         if not fields:
-            return f"{self.__class__.__name__}()"
+            return f"{self.node_type}()"
 
-        lines: list[str] = [f"{self.__class__.__name__}("]
-        for key, value in fields.items():
+        lines: list[str] = [f"{self.node_type}("]
+        for key, value in fields:
             rendered = _pretty_value(value, level + 1)
             if "\n" in rendered:
                 rendered = "\n" + _indent_multiline(
@@ -30,6 +51,7 @@ class ASTNode:
 
 
 _INDENT_UNIT = " "
+_LOC_FIELDS = ASTNode.__slots__
 
 
 def _indent_multiline(s: str, prefix: str) -> str:
@@ -63,40 +85,60 @@ def _pretty_value(value: Any, level: int) -> str:
     return repr(value)
 
 
+class _Resolved(ASTNode):
+    # The `Symbol` this node declares or refers to, set once by name
+    # resolution (the type checker); None until then. Not a constructor field.
+    __slots__ = ("symbol",)
+
+
 class Program(ASTNode):
+    __slots__ = ("functions",)
+
     def __init__(self, functions):
         self.functions = functions
 
 
 class FunctionDecl(ASTNode):
+    __slots__ = ("return_type", "name", "params", "body")
+
     def __init__(self, return_type, name, params, body):
         self.return_type = return_type
         self.name = name
         self.params = params
         self.body = body
 
-class Param(ASTNode):
+class Param(_Resolved):
+    __slots__ = ("param_type", "name")
+
     def __init__(self, param_type, name):
         self.param_type = param_type
         self.name = name
+        self.symbol = None
 
 
 class Block(ASTNode):
+    __slots__ = ("declarations", "statements")
+
     def __init__(self, declarations, statements):
         self.declarations = declarations
         self.statements = statements
 
 
-class VarDecl(ASTNode):
+class VarDecl(_Resolved):
+    __slots__ = ("var_type", "name", "is_const", "size", "initializer")
+
     def __init__(self, var_type, name, is_const=False, size=None, initializer=None):
         self.var_type = var_type
         self.name = name
         self.is_const = is_const
         self.size = size
         self.initializer = initializer
+        self.symbol = None
 
 
 class IfStmt(ASTNode):
+    __slots__ = ("condition", "then_branch", "else_branch")
+
     def __init__(self, condition, then_branch, else_branch=None):
         self.condition = condition
         self.then_branch = then_branch
@@ -104,12 +146,16 @@ class IfStmt(ASTNode):
 
 
 class WhileStmt(ASTNode):
+    __slots__ = ("condition", "body")
+
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
 
 
 class ForStmt(ASTNode):
+    __slots__ = ("init", "condition", "increment", "body")
+
     def __init__(self, init, condition, increment, body):
         self.init = init
         self.condition = condition
@@ -118,34 +164,46 @@ class ForStmt(ASTNode):
 
 
 class BreakStmt(ASTNode):
+    __slots__ = ()
+
     def __init__(self):
         # intentionally empty
         return
 
 
 class ContinueStmt(ASTNode):
+    __slots__ = ()
+
     def __init__(self):
         # intentionally empty
         return
 
 
 class ReturnStmt(ASTNode):
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
 
 class ExprStmt(ASTNode):
+    __slots__ = ("expr",)
+
     def __init__(self, expr):
         self.expr = expr
 
 
 class Assign(ASTNode):
+    __slots__ = ("target", "value")
+
     def __init__(self, target, value):
         self.target = target
         self.value = value
 
 
 class BinaryOp(ASTNode):
+    __slots__ = ("op", "left", "right")
+
     def __init__(self, op, left, right):
         self.op = op
         self.left = left
@@ -153,6 +211,8 @@ class BinaryOp(ASTNode):
 
 
 class UnaryOp(ASTNode):
+    __slots__ = ("op", "operand", "postfix")
+
     def __init__(self, op, operand, postfix=False):
         self.op = op
         self.operand = operand
@@ -160,23 +220,33 @@ class UnaryOp(ASTNode):
 
 
 class Literal(ASTNode):
+    __slots__ = ("kind", "value")
+
     def __init__(self, kind, value):
         self.kind = kind
         self.value = value
 
 
-class Variable(ASTNode):
+class Variable(_Resolved):
+    __slots__ = ("name",)
+
     def __init__(self, name):
         self.name = name
+        self.symbol = None
+
 
+class ArrayAccess(_Resolved):
+    __slots__ = ("array", "index")
 
-class ArrayAccess(ASTNode):
     def __init__(self, array, index):
         self.array = array
         self.index = index
+        self.symbol = None
 
 
 class Call(ASTNode):
+    __slots__ = ("callee", "args")
+
     def __init__(self, callee, args):
         self.callee = callee
         self.args = args
@@ -184,12 +254,16 @@ class Call(ASTNode):
 
 class CaseClause(ASTNode):
     """One arm of a switch: `case <value>: <stmts>` or `default: <stmts>`."""
+    __slots__ = ("value", "body")
+
     def __init__(self, value, body):
         self.value = value   # Literal (int), or None for the default clause
         self.body = body     # list[ASTNode] – statements in this arm
 
 
 class SwitchStmt(ASTNode):
+    __slots__ = ("expr", "cases")
+
     def __init__(self, expr, cases):
         self.expr = expr     # the switch expression
         self.cases = cases   # list[CaseClause]
@@ -1,3 +1,54 @@
+from collections import deque
+
+from lexer.names import NAMES
+from lexer.tokens import (
+    KIND_INFO,
+    TYPE_NAME_KINDS,
+    IDENT,
+    NUMBER,
+    FLOAT_LIT,
+    BOOL_LIT,
+    CHAR_LIT,
+    STRING_LIT,
+    KW_CONST,
+    KW_IF,
+    KW_ELSE,
+    KW_WHILE,
+    KW_FOR,
+    KW_BREAK,
+    KW_CONTINUE,
+    KW_RETURN,
+    KW_SWITCH,
+    KW_CASE,
+    KW_DEFAULT,
+    SYM_PLUS,
+    SYM_MINUS,
+    SYM_STAR,
+    SYM_SLASH,
+    SYM_PERCENT,
+    SYM_ASSIGN,
+    SYM_SEMI,
+    SYM_COMMA,
+    SYM_LPAREN,
+    SYM_RPAREN,
+    SYM_LBRACE,
+    SYM_RBRACE,
+    SYM_LBRACKET,
+    SYM_RBRACKET,
+    SYM_LT,
+    SYM_GT,
+    SYM_BANG,
+    SYM_COLON,
+    SYM_LE,
+    SYM_GE,
+    SYM_EQ,
+    SYM_NE,
+    SYM_AND,
+    SYM_OR,
+    SYM_INC,
+    SYM_DEC,
+)
+
 from .ast import (
     Program,
     FunctionDecl,
@@ -23,6 +74,26 @@ from .ast import (
 )
 
 
+# Infix binding powers by token kind: higher binds tighter. Assignment is
+# right-associative.
+_ASSIGN_BP = 1
+_INFIX_BP = {
+    SYM_ASSIGN: _ASSIGN_BP,
+    SYM_OR: 2,
+    SYM_AND: 3,
+    SYM_EQ: 4, SYM_NE: 4,
+    SYM_LT: 5, SYM_GT: 5, SYM_LE: 5, SYM_GE: 5,
+    SYM_PLUS: 6, SYM_MINUS: 6,
+    SYM_STAR: 7, SYM_SLASH: 7, SYM_PERCENT: 7,
+}
+_PREFIX_KINDS = frozenset({SYM_BANG, SYM_MINUS, SYM_INC, SYM_DEC})
+_DECL_KINDS = TYPE_NAME_KINDS | {KW_CONST}
+# Where statement-level error recovery resumes (in addition to ';' and '}').
+_STATEMENT_START_KINDS = frozenset(
+    {KW_IF, KW_WHILE, KW_FOR, KW_RETURN, KW_BREAK, KW_CONTINUE, KW_SWITCH}
+)
+
+
 class ParseError(Exception):
     pass
 
@@ -69,22 +140,47 @@ def _describe_expected(ttype, value=None):
     return ttype.lower().replace("_", " ")
 
 
+def _describe_kind(kind):
+    """`_describe_expected` for a token kind code."""
+    return _describe_expected(*KIND_INFO[kind])
+
+
 class Parser:
+    """Recursive-descent parser over a token list or any token iterator.
+
+    Tokens are pulled lazily (e.g. from `Lexer.iter_tokens()`); the parser
+    only holds the current token, the one before it, and whatever `peek`
+    has buffered ahead.
+    """
+
     def __init__(self, tokens, source_path=None):
-        self.tokens = tokens
+        self._stream = iter(tokens)
+        self._ahead = deque()
+        self._prev = None
+        self._cur = next(self._stream, None)
         self.index = 0
         self.errors = []
         self.source_path = source_path
 
-        self.type_keywords = ["uint32", "int", "float", "bool", "char", "void"]
+        # Statement parsers keyed by the kind of their leading token; anything
+        # else is an expression statement.
+        self._statement_parsers = {
+            SYM_LBRACE: self.parse_block,
+            SYM_SEMI: self._parse_empty_statement,
+            KW_IF: self.parse_if,
+            KW_WHILE: self.parse_while,
+            KW_FOR: self.parse_for,
+            KW_SWITCH: self.parse_switch,
+            KW_BREAK: self._parse_break,
+            KW_CONTINUE: self._parse_continue,
+            KW_RETURN: self._parse_return,
+        }
 
     def _location_token(self, tok):
         """Use last token for end-of-file situations."""
         if tok is not None:
             return tok
-        if self.tokens:
-            return self.tokens[-1]
-        return None
+        return self._prev
 
     def _format_syntax_error(self, tok, message: str) -> str:
         """
@@ -112,59 +208,68 @@ class Parser:
 
     def _sync_to_next_statement(self):
         while self.current() is not None:
-            tok = self.current()
-            if tok.type == "SYMBOL" and tok.value == "}":
+            kind = self.current().kind
+            if kind == SYM_RBRACE:
                 return
-            if tok.type == "SYMBOL" and tok.value == ";":
+            if kind == SYM_SEMI:
                 self.advance()
                 return
-            if tok.type == "KEYWORD" and tok.value in ("if", "while", "for", "return", "break", "continue", "switch"):
+            if kind in _STATEMENT_START_KINDS:
                 return
             self.advance()
 
     def _sync_to_next_function(self):
         while self.current() is not None:
-            tok = self.current()
-            if tok.type == "KEYWORD" and tok.value in self.type_keywords:
+            if self.current().kind in TYPE_NAME_KINDS:
                 return
             self.advance()
 
     def current(self):
-        if self.index >= len(self.tokens):
-            return None
-        return self.tokens[self.index]
+        return self._cur
+
+    def previous(self):
+        """The most recently consumed token."""
+        return self._prev
+
+    def peek(self, offset=1):
+        """Token `offset` positions past the current one (None past the end)."""
+        if offset == 0:
+            return self._cur
+        while len(self._ahead) < offset:
+            tok = next(self._stream, None)
+            if tok is None:
+                return None
+            self._ahead.append(tok)
+        return self._ahead[offset - 1]
 
     def advance(self):
+        if self._cur is None:
+            return
+        self._prev = self._cur
+        self._cur = self._ahead.popleft() if self._ahead else next(self._stream, None)
         self.index += 1
 
-    def match(self, ttype, value=None):
-        tok = self.current()
-        if tok is None:
-            return False
-
-        if tok.type != ttype:
-            return False
-
-        if value is not None and tok.value != value:
+    def match(self, kind):
+        """Consume the current token if it has token kind `kind`."""
+        tok = self._cur
+        if tok is None or tok.kind != kind:
             return False
-
         self.advance()
         return True
 
-    def expect(self, ttype, value=None):
-        tok = self.current()
-        expected = _describe_expected(ttype, value)
+    def expect(self, kind):
+        """Consume and return the current token, which must have kind `kind`."""
+        tok = self._cur
         if tok is None:
             self._raise_syntax_error(
                 None,
-                f"unexpected end of input while expecting {expected}",
+                f"unexpected end of input while expecting {_describe_kind(kind)}",
             )
 
-        if tok.type != ttype or (value is not None and tok.value != value):
-            found = _describe_token(tok)
+        if tok.kind != kind:
             self._raise_syntax_error(
                 tok,
-                f"expected {expected}, found {found}",
+                f"expected {_describe_kind(kind)}, found {_describe_token(tok)}",
             )
 
         self.advance()
@@ -182,87 +287,77 @@ class Parser:
 
     def parse_function(self):
         return_type = self.parse_type()
-        name_tok = self.expect("IDENTIFIER")
-        name = name_tok.value
+        name_tok = self.expect(IDENT)
+        name = NAMES.intern(name_tok.value)
 
-        self.expect("SYMBOL", "(")
+        self.expect(SYM_LPAREN)
         params = []
 
-        if not self.match("SYMBOL", ")"):
+        if not self.match(SYM_RPAREN):
             while True:
                 ptype = self.parse_type()
-                pname_tok = self.expect("IDENTIFIER")
-                params.append(self._attach_loc(Param(ptype, pname_tok.value), pname_tok))
+                pname_tok = self.expect(IDENT)
+                params.append(self._attach_loc(Param(ptype, NAMES.intern(pname_tok.value)), pname_tok))
 
-                if self.match("SYMBOL", ")"):
+                if self.match(SYM_RPAREN):
                     break
-                self.expect("SYMBOL", ",")
+                self.expect(SYM_COMMA)
 
         body = self.parse_block()
         return FunctionDecl(return_type, name, params, body)
 
     def parse_type(self):
         tok = self.current()
-        if tok and tok.type == "KEYWORD" and tok.value in self.type_keywords:
+        if tok and tok.kind in TYPE_NAME_KINDS:
             self.advance()
             return tok.value
         found = _describe_token(tok)
         self._raise_syntax_error(tok, f"expected a type name (int, void, ...), found {found}")
 
     def parse_block(self):
-        self.expect("SYMBOL", "{")
+        self.expect(SYM_LBRACE)
         decls = []
         stmts = []
 
         while True:
-            if self.match("SYMBOL", "}"):
+            if self.match(SYM_RBRACE):
                 break
 
             tok = self.current()
             if tok is None:
                 break
 
-            if tok.type == "KEYWORD" and tok.value == "const":
-                try:
-                    decls.append(self.parse_var_decl())
-                except ParseError as e:
-                    self.errors.append(str(e))
-                    self._sync_to_next_statement()
-            elif tok.type == "KEYWORD" and tok.value in self.type_keywords:
-                try:
+            try:
+                if tok.kind in _DECL_KINDS:
                     decls.append(self.parse_var_decl())
-                except ParseError as e:
-                    self.errors.append(str(e))
-                    self._sync_to_next_statement()
-            else:
-                try:
+                else:
                     stmts.append(self.parse_statement())
-                except ParseError as e:
-                    self.errors.append(str(e))
-                    self._sync_to_next_statement()
+            except ParseError as e:
+                self.errors.append(str(e))
+                self._sync_to_next_statement()
 
         return Block(decls, stmts)
 
     def parse_var_decl(self):
         is_const = False
-        if self.match("KEYWORD", "const"):
+        if self.match(KW_CONST):
             is_const = True
 
         vtype = self.parse_type()
-        name_tok = self.expect("IDENTIFIER")
-        name = name_tok.value
+        name_tok = self.expect(IDENT)
+        name = NAMES.intern(name_tok.value)
 
         size = None
-        if self.match("SYMBOL", "["):
-            size_tok = self.expect("NUMBER")
+        if self.match(SYM_LBRACKET):
+            size_tok = self.expect(NUMBER)
             size = int(size_tok.value)
-            self.expect("SYMBOL", "]")
+            self.expect(SYM_RBRACKET)
 
         init = None
-        if self.match("SYMBOL", "="):
+        if self.match(SYM_ASSIGN):
             init = self.parse_expression()
 
-        self.expect("SYMBOL", ";")
+        self.expect(SYM_SEMI)
         node = VarDecl(vtype, name, is_const, size, init)
         return self._attach_loc(node, name_tok)
 
@@ -271,117 +366,111 @@ class Parser:
         if tok is None:
             self._raise_syntax_error(None, "unexpected end of input while parsing a statement")
 
-        # block
-        if tok.type == "SYMBOL" and tok.value == "{":
-            return self.parse_block()
-
-        # empty statement
-        if self.match("SYMBOL", ";"):
-            return ExprStmt(None)
-
-        if tok.type == "KEYWORD":
-            if tok.value == "if":
-                return self.parse_if()
-            if tok.value == "while":
-                return self.parse_while()
-            if tok.value == "for":
-                return self.parse_for()
-            if tok.value == "switch":
-                return self.parse_switch()
-            if tok.value == "break":
-                break_tok = tok
-                self.advance()
-                self.expect("SYMBOL", ";")
-                return self._attach_loc(BreakStmt(), break_tok)
-            if tok.value == "continue":
-                cont_tok = tok
-                self.advance()
-                self.expect("SYMBOL", ";")
-                return self._attach_loc(ContinueStmt(), cont_tok)
-            if tok.value == "return":
-                ret_tok = tok
-                self.advance()
-                expr = None
-                if not self.match("SYMBOL", ";"):
-                    expr = self.parse_expression()
-                    self.expect("SYMBOL", ";")
-                return self._attach_loc(ReturnStmt(expr), ret_tok)
+        handler = self._statement_parsers.get(tok.kind)
+        if handler is not None:
+            return handler()
 
         expr = self.parse_expression()
-        self.expect("SYMBOL", ";")
+        self.expect(SYM_SEMI)
         return self._attach_loc(ExprStmt(expr), tok)
 
+    def _parse_empty_statement(self):
+        self.advance()
+        return ExprStmt(None)
+
+    def _parse_break(self):
+        break_tok = self.current()
+        self.advance()
+        self.expect(SYM_SEMI)
+        return self._attach_loc(BreakStmt(), break_tok)
+
+    def _parse_continue(self):
+        cont_tok = self.current()
+        self.advance()
+        self.expect(SYM_SEMI)
+        return self._attach_loc(ContinueStmt(), cont_tok)
+
+    def _parse_return(self):
+        ret_tok = self.current()
+        self.advance()
+        expr = None
+        if not self.match(SYM_SEMI):
+            expr = self.parse_expression()
+            self.expect(SYM_SEMI)
+        return self._attach_loc(ReturnStmt(expr), ret_tok)
+
     def parse_if(self):
-        if_tok = self.expect("KEYWORD", "if")
-        self.expect("SYMBOL", "(")
+        if_tok = self.expect(KW_IF)
+        self.expect(SYM_LPAREN)
         cond = self.parse_expression()
-        self.expect("SYMBOL", ")")
+        self.expect(SYM_RPAREN)
         then_branch = self.parse_statement()
 
         else_branch = None
-        if self.match("KEYWORD", "else"):
+        if self.match(KW_ELSE):
             else_branch = self.parse_statement()
 
         return self._attach_loc(IfStmt(cond, then_branch, else_branch), if_tok)
 
     def parse_while(self):
-        wh_tok = self.expect("KEYWORD", "while")
-        self.expect("SYMBOL", "(")
+        wh_tok = self.expect(KW_WHILE)
+        self.expect(SYM_LPAREN)
         cond = self.parse_expression()
-        self.expect("SYMBOL", ")")
+        self.expect(SYM_RPAREN)
         body = self.parse_statement()
         return self._attach_loc(WhileStmt(cond, body), wh_tok)
 
     def parse_for(self):
-        for_tok = self.expect("KEYWORD", "for")
-        self.expect("SYMBOL", "(")
+        for_tok = self.expect(KW_FOR)
+        self.expect(SYM_LPAREN)
 
         init = None
-        if not (self.current() and self.current().type == "SYMBOL" and self.current().value == ";"):
+        if not (self.current() and self.current().kind == SYM_SEMI):
             init = self.parse_expression()
-        self.expect("SYMBOL", ";")
+        self.expect(SYM_SEMI)
 
         cond = None
-        if not (self.current() and self.current().type == "SYMBOL" and self.current().value == ";"):
+        if not (self.current() and self.current().kind == SYM_SEMI):
             cond = self.parse_expression()
-        self.expect("SYMBOL", ";")
+        self.expect(SYM_SEMI)
 
         step = None
-        if not (self.current() and self.current().type == "SYMBOL" and self.current().value == ")"):
+        if not (self.current() and self.current().kind == SYM_RPAREN):
             step = self.parse_expression()
-        self.expect("SYMBOL", ")")
+        self.expect(SYM_RPAREN)
 
         body = self.parse_statement()
         return self._attach_loc(ForStmt(init, cond, step, body), for_tok)
 
     def parse_switch(self):
-        sw_tok = self.expect("KEYWORD", "switch")
-        self.expect("SYMBOL", "(")
+        sw_tok = self.expect(KW_SWITCH)
+        self.expect(SYM_LPAREN)
         expr = self.parse_expression()
-        self.expect("SYMBOL", ")")
-        self.expect("SYMBOL", "{")
+        self.expect(SYM_RPAREN)
+        self.expect(SYM_LBRACE)
 
         cases = []
         while True:
             tok = self.current()
             if tok is None:
                 self._raise_syntax_error(None, "unexpected end of input in switch body")
-            if tok.type == "SYMBOL" and tok.value == "}":
+            kind = tok.kind
+            if kind == SYM_RBRACE:
                 self.advance()
                 break
-            if tok.type == "KEYWORD" and tok.value == "case":
+            if kind == KW_CASE:
                 case_tok = tok
                 self.advance()
-                val_tok = self.expect("NUMBER")
+                val_tok = self.expect(NUMBER)
                 val = self._attach_loc(Literal("int", int(val_tok.value)), val_tok)
-                self.expect("SYMBOL", ":")
+                self.expect(SYM_COLON)
                 body = self._parse_case_body()
                 node = CaseClause(val, body)
                 cases.append(self._attach_loc(node, case_tok))
-            elif tok.type == "KEYWORD" and tok.value == "default":
+            elif kind == KW_DEFAULT:
                 def_tok = tok
                 self.advance()
-                self.expect("SYMBOL", ":")
+                self.expect(SYM_COLON)
                 body = self._parse_case_body()
                 node = CaseClause(None, body)
                 cases.append(self._attach_loc(node, def_tok))
@@ -397,9 +486,7 @@ class Parser:
             tok = self.current()
             if tok is None:
                 break
-            if tok.type == "SYMBOL" and tok.value == "}":
-                break
-            if tok.type == "KEYWORD" and tok.value in ("case", "default"):
+            if tok.kind in (SYM_RBRACE, KW_CASE, KW_DEFAULT):
                 break
             try:
                 stmts.append(self.parse_statement())
@@ -408,178 +495,119 @@ class Parser:
                 self._sync_to_next_statement()
         return stmts
 
-    def parse_expression(self):
-        return self.parse_assignment()
-
-    def parse_assignment(self):
-        left = self.parse_or()
-
-        if self.match("SYMBOL", "="):
-            eq_tok = self.tokens[self.index - 1]
-            right = self.parse_assignment()
-            if not isinstance(left, Variable) and not isinstance(left, ArrayAccess):
-                self._raise_syntax_error(
-                    eq_tok,
-                    "invalid left-hand side of assignment (expected variable or array element)",
-                )
-            node = Assign(left, right)
-            return self._attach_loc(node, eq_tok)
-
-        return left
-
-    def parse_or(self):
-        left = self.parse_and()
-        while self.match("SYMBOL", "||"):
-            op_tok = self.tokens[self.index - 1]
-            right = self.parse_and()
-            node = BinaryOp("||", left, right)
-            left = self._attach_loc(node, op_tok)
-        return left
-
-    def parse_and(self):
-        left = self.parse_equality()
-        while self.match("SYMBOL", "&&"):
-            op_tok = self.tokens[self.index - 1]
-            right = self.parse_equality()
-            node = BinaryOp("&&", left, right)
-            left = self._attach_loc(node, op_tok)
-        return left
-
-    def parse_equality(self):
-        left = self.parse_comparison()
-
-        while True:
-            if self.match("SYMBOL", "==") or self.match("SYMBOL", "!="):
-                op_tok = self.tokens[self.index - 1]
-                op = op_tok.value
-                right = self.parse_comparison()
-                node = BinaryOp(op, left, right)
-                left = self._attach_loc(node, op_tok)
-            else:
-                break
+    # Expressions are parsed by precedence climbing (Pratt): one loop driven by
+    # the binding powers in _INFIX_BP instead of one recursive method per
+    # precedence level. The tree shapes and attached locations are those of
+    # the classic grammar (assignment < || < && < equality < comparison <
+    # additive < multiplicative < unary < postfix).
 
-        return left
-
-    def parse_comparison(self):
-        left = self.parse_additive()
+    def parse_expression(self):
+        return self.parse_binary(0)
 
+    def parse_binary(self, min_bp):
+        """Parse operands joined by infix operators that bind tighter than `min_bp`."""
+        left = self.parse_unary()
         while True:
-            if (
-                self.match("SYMBOL", "<")
-                or self.match("SYMBOL", ">")
-                or self.match("SYMBOL", "<=")
-                or self.match("SYMBOL", ">=")
-            ):
-                op_tok = self.tokens[self.index - 1]
-                op = op_tok.value
-                right = self.parse_additive()
-                node = BinaryOp(op, left, right)
-                left = self._attach_loc(node, op_tok)
+            op_tok = self._cur
+            if op_tok is None:
+                return left
+            bp = _INFIX_BP.get(op_tok.kind)
+            if bp is None or bp <= min_bp:
+                return left
+            # advance(), inlined on the hottest path.
+            self._prev = op_tok
+            self._cur = self._ahead.popleft() if self._ahead else next(self._stream, None)
+            self.index += 1
+            if bp == _ASSIGN_BP:
+                # Right-associative; the target is checked once the value parsed.
+                right = self.parse_binary(bp - 1)
+                if not isinstance(left, (Variable, ArrayAccess)):
+                    self._raise_syntax_error(
+                        op_tok,
+                        "invalid left-hand side of assignment (expected variable or array element)",
+                    )
+                left = Assign(left, right)
             else:
-                break
-
-        return left
-
-    def parse_additive(self):
-        left = self.parse_term()
-
-        while self.match("SYMBOL", "+") or self.match("SYMBOL", "-"):
-            op_tok = self.tokens[self.index - 1]
-            op = op_tok.value
-            right = self.parse_term()
-            node = BinaryOp(op, left, right)
-            left = self._attach_loc(node, op_tok)
-
-        return left
-
-    def parse_term(self):
-        left = self.parse_unary()
-
-        while self.match("SYMBOL", "*") or self.match("SYMBOL", "/") or self.match("SYMBOL", "%"):
-            op_tok = self.tokens[self.index - 1]
-            op = op_tok.value
-            right = self.parse_unary()
-            node = BinaryOp(op, left, right)
-            left = self._attach_loc(node, op_tok)
-
-        return left
+                left = BinaryOp(op_tok.value, left, self.parse_binary(bp))
+            # _attach_loc, inlined on the hottest path.
+            left.line = op_tok.line
+            left.column = op_tok.column
 
     def parse_unary(self):
-        if (
-            self.match("SYMBOL", "!")
-            or self.match("SYMBOL", "-")
-            or self.match("SYMBOL", "++")
-            or self.match("SYMBOL", "--")
-        ):
-            op_tok = self.tokens[self.index - 1]
-            op = op_tok.value
+        """Prefix operators, then a primary expression and its postfix operators."""
+        tok = self._cur
+        if tok is not None and tok.kind in _PREFIX_KINDS:
+            self.advance()
             right = self.parse_unary()
-            return self._attach_loc(UnaryOp(op, right, postfix=False), op_tok)
+            return self._attach_loc(UnaryOp(tok.value, right, postfix=False), tok)
 
-        return self.parse_postfix()
-
-    def parse_postfix(self):
         expr = self.parse_primary()
-
         while True:
-            if self.match("SYMBOL", "("):
-                call_tok = self.tokens[self.index - 1]
+            tok = self._cur
+            if tok is None:
+                return expr
+            kind = tok.kind
+            if kind == SYM_LPAREN:
+                self.advance()
                 args = []
-                if not self.match("SYMBOL", ")"):
+                if not self.match(SYM_RPAREN):
                     while True:
                         args.append(self.parse_expression())
-                        if self.match("SYMBOL", ")"):
+                        if self.match(SYM_RPAREN):
                             break
-                        self.expect("SYMBOL", ",")
-                expr = self._attach_loc(Call(expr, args), call_tok)
-            elif self.match("SYMBOL", "["):
-                lbr_tok = self.tokens[self.index - 1]
+                        self.expect(SYM_COMMA)
+                expr = self._attach_loc(Call(expr, args), tok)
+            elif kind == SYM_LBRACKET:
+                self.advance()
                 idx = self.parse_expression()
-                self.expect("SYMBOL", "]")
-                expr = self._attach_loc(ArrayAccess(expr, idx), lbr_tok)
-            elif self.match("SYMBOL", "++") or self.match("SYMBOL", "--"):
-                op_tok = self.tokens[self.index - 1]
-                op = op_tok.value
-                expr = self._attach_loc(UnaryOp(op, expr, postfix=True), op_tok)
+                self.expect(SYM_RBRACKET)
+                expr = self._attach_loc(ArrayAccess(expr, idx), tok)
+            elif kind == SYM_INC or kind == SYM_DEC:
+                self.advance()
+                expr = self._attach_loc(UnaryOp(tok.value, expr, postfix=True), tok)
             else:
-                break
-
-        return expr
+                return expr
 
     def parse_primary(self):
-        tok = self.current()
+        tok = self._cur
         if tok is None:
             self._raise_syntax_error(None, "unexpected end of input in expression")
 
-        if tok.type == "NUMBER":
+        kind = tok.kind
+        if kind == IDENT or kind == NUMBER:
+            self._prev = tok
+            self._cur = self._ahead.popleft() if self._ahead else next(self._stream, None)
+            self.index += 1
+            if kind == IDENT:
+                node = Variable(NAMES.intern(tok.value))
+            else:
+                node = Literal("int", int(tok.value))
+            node.line = tok.line
+            node.column = tok.column
+            return node
+
+        if kind == SYM_LPAREN:
             self.advance()
-            return self._attach_loc(Literal("int", int(tok.value)), tok)
+            expr = self.parse_expression()
+            self.expect(SYM_RPAREN)
+            return expr
 
-        if tok.type == "FLOAT_LIT":
+        if kind == FLOAT_LIT:
             self.advance()
             return self._attach_loc(Literal("float", float(tok.value)), tok)
 
-        if tok.type == "BOOL_LIT":
+        if kind == BOOL_LIT:
             self.advance()
             return self._attach_loc(Literal("bool", tok.value == "true"), tok)
 
-        if tok.type == "CHAR_LIT":
+        if kind == CHAR_LIT:
             self.advance()
             return self._attach_loc(Literal("char", tok.value), tok)
 
-        if tok.type == "STRING_LIT":
+        if kind == STRING_LIT:
             self.advance()
             return self._attach_loc(Literal("string", tok.value), tok)
 
-        if tok.type == "IDENTIFIER":
-            self.advance()
-            return self._attach_loc(Variable(tok.value), tok)
-
-        if self.match("SYMBOL", "("):
-            expr = self.parse_expression()
-            self.expect("SYMBOL", ")")
-            return expr
-
         self._raise_syntax_error(
             tok,
             f"expected primary expression (literal, identifier, or '(' ... ')'), found {_describe_token(tok)}",
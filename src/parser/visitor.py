@@ -0,0 +1,99 @@
+"""Recursion-free walkers over `parser.ast` trees.
+
+`ASTVisitor` runs `visit_<NodeType>` methods on an explicit stack instead of
+the Python call stack. A method may return its result directly (leaves) or
+be a generator: `value = yield child` visits `child` through the same
+dispatch and resumes with its result, and the generator's `return` value is
+the node's result. Children are therefore evaluated exactly when the
+recursive version would have evaluated them, so side effects (emitted code,
+diagnostics) keep their order, but a 100k-deep chain costs 100k small stack
+entries rather than 100k interpreter frames.
+
+`walk` is the structural counterpart for consumers that only need every
+node once, in preorder.
+"""
+
+from types import GeneratorType
+
+from .ast import ASTNode
+
+
+class ASTVisitor:
+    _visit_methods = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._visit_methods = {}
+
+    def _method_for(self, node_cls):
+        fn = getattr(type(self), "visit_" + node_cls.__name__, None)
+        if fn is None:
+            fn = type(self).generic_visit
+        self._visit_methods[node_cls] = fn
+        return fn
+
+    def generic_visit(self, node):
+        raise TypeError(f"{type(self).__name__}: no visit method for {type(node).__name__}")
+
+    def visit(self, node):
+        """Visit `node` and return its result, without recursing in Python."""
+        methods = self._visit_methods
+        fn = methods.get(type(node)) or self._method_for(type(node))
+        result = fn(self, node)
+        if type(result) is not GeneratorType:
+            return result
+
+        stack = [result]
+        value, error = None, None
+        while stack:
+            gen = stack[-1]
+            try:
+                if error is None:
+                    child = gen.send(value)
+                else:
+                    # Re-raise inside the parent, as a recursive call would.
+                    exc, error = error, None
+                    child = gen.throw(exc)
+            except StopIteration as stop:
+                stack.pop()
+                value = stop.value
+                continue
+            except BaseException as exc:
+                stack.pop()
+                if not stack:
+                    raise
+                error = exc
+                continue
+            try:
+                fn = methods.get(type(child)) or self._method_for(type(child))
+                value = fn(self, child)
+            except BaseException as exc:
+                error = exc
+                continue
+            if type(value) is GeneratorType:
+                stack.append(value)
+                value = None
+        return value
+
+
+def walk(root):
+    """Yield `(node, parent_index, field)` for every node under `root`, in preorder.
+
+    `parent_index` is the preorder position of the node's parent (None for
+    `root`) and `field` the parent field holding it, e.g. `"args[1]"`.
+    """
+    stack = [(root, None, None)]
+    index = 0
+    while stack:
+        node, parent, field = stack.pop()
+        yield node, parent, field
+        children = []
+        for key, value in node.fields():
+            if isinstance(value, ASTNode):
+                children.append((value, index, key))
+            elif isinstance(value, list):
+                for i, elem in enumerate(value):
+                    if isinstance(elem, ASTNode):
+                        children.append((elem, index, f"{key}[{i}]"))
+        stack.extend(reversed(children))
+        index += 1
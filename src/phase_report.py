@@ -0,0 +1,171 @@
+"""Per-phase compile-time and memory accounting (the driver's --time-report).
+
+A `PhaseReport` collects one row per named phase: how often it ran, wall and
+CPU time, the IR instruction count before and after (for phases that work
+on IR) and, with `memory=True`, the tracemalloc peak above the phase's
+starting allocation. Rows for a phase that runs more than once (a pass
+inside a fixed-point group) are accumulated: times add up, the peak is the
+largest seen, `ir_before` is from the first run and `ir_after` from the last.
+
+    report = PhaseReport()
+    with report.phase("lower") as ph:
+        program = ast_to_ir(ast)
+        ph.ir_after = ir_size(program)
+    print(report.table())
+
+Phases must not nest when memory is tracked, since each one resets the
+tracemalloc peak. Code that may run without a report takes `report=None`
+and checks for it, so a disabled report costs one `is None` test. The
+driver imports this module on every run, so `json` and `tracemalloc` are
+imported only by the methods that need them.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+def ir_size(program) -> int:
+    """Instruction count of an `IRProgram` (or a list of `IRFunction`s)."""
+    functions = getattr(program, "functions", program)
+    return sum(len(f.instructions) for f in functions)
+
+
+def _cell(value: Optional[int], unit: int = 1) -> str:
+    return "" if value is None else str(value // unit)
+
+
+class Phase:
+    """Accumulated measurements of one named phase."""
+
+    __slots__ = ("name", "calls", "wall", "cpu", "peak", "ir_before", "ir_after")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak: Optional[int] = None
+        self.ir_before: Optional[int] = None
+        self.ir_after: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "wall_s": self.wall,
+            "cpu_s": self.cpu,
+            "peak_bytes": self.peak,
+            "ir_before": self.ir_before,
+            "ir_after": self.ir_after,
+        }
+
+
+class PhaseReport:
+    def __init__(self, memory: bool = False) -> None:
+        self.memory = memory
+        self.phases: Dict[str, Phase] = {}
+        self._started_tracing = False
+
+    def close(self) -> None:
+        """Stop tracemalloc if this report started it."""
+        if self._started_tracing:
+            import tracemalloc
+
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def phase(self, name: str, ir_before: Optional[int] = None) -> Iterator[Phase]:
+        """Time the body as phase `name`; the body may set `ir_after` on the yielded row."""
+        ph = self.phases.get(name)
+        if ph is None:
+            ph = self.phases[name] = Phase(name)
+        if ph.ir_before is None:
+            ph.ir_before = ir_before
+        if self.memory:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        cpu0 = time.process_time()
+        wall0 = time.perf_counter()
+        try:
+            yield ph
+        finally:
+            ph.wall += time.perf_counter() - wall0
+            ph.cpu += time.process_time() - cpu0
+            ph.calls += 1
+            if self.memory:
+                peak = tracemalloc.get_traced_memory()[1] - base
+                ph.peak = peak if ph.peak is None else max(ph.peak, peak)
+
+    def merge(self, phases: List[Phase]) -> None:
+        """Add rows measured elsewhere (another process) into this report.
+
+        Times and call counts add up, as do IR sizes, since the other rows
+        are taken to cover a different part of the program.
+        """
+        for other in phases:
+            ph = self.phases.get(other.name)
+            if ph is None:
+                ph = self.phases[other.name] = Phase(other.name)
+            ph.calls += other.calls
+            ph.wall += other.wall
+            ph.cpu += other.cpu
+            if other.peak is not None:
+                ph.peak = other.peak if ph.peak is None else max(ph.peak, other.peak)
+            for attr in ("ir_before", "ir_after"):
+                value = getattr(other, attr)
+                if value is not None:
+                    setattr(ph, attr, value + (getattr(ph, attr) or 0))
+
+    @property
+    def total_wall(self) -> float:
+        return sum(ph.wall for ph in self.phases.values())
+
+    @property
+    def total_cpu(self) -> float:
+        return sum(ph.cpu for ph in self.phases.values())
+
+    def to_json(self) -> str:
+        import json
+
+        return json.dumps(
+            {
+                "phases": [ph.to_dict() for ph in self.phases.values()],
+                "total_wall_s": self.total_wall,
+                "total_cpu_s": self.total_cpu,
+            },
+            indent=2,
+        )
+
+    def table(self) -> str:
+        wall = self.total_wall or 1.0
+        header = (
+            f"{'Phase':<26} {'Calls':>5} {'Wall ms':>10} {'%':>5} {'CPU ms':>10}"
+            f" {'IR before':>9} {'IR after':>9}"
+        )
+        if self.memory:
+            header += f" {'Peak KiB':>9}"
+        lines: List[str] = ["Time report:", header, "-" * len(header)]
+        for ph in self.phases.values():
+            row = (
+                f"{ph.name:<26} {ph.calls:>5} {ph.wall * 1e3:>10.2f}"
+                f" {ph.wall / wall * 100:>5.1f} {ph.cpu * 1e3:>10.2f}"
+                f" {_cell(ph.ir_before):>9} {_cell(ph.ir_after):>9}"
+            )
+            if self.memory:
+                row += f" {_cell(ph.peak, 1024):>9}"
+            lines.append(row)
+        lines.append("-" * len(header))
+        lines.append(
+            f"{'Total':<26} {'':>5} {self.total_wall * 1e3:>10.2f} {'':>5}"
+            f" {self.total_cpu * 1e3:>10.2f}"
+        )
+        return "\n".join(lines)
@@ -1,3 +1,6 @@
+from lexer.names import NAMES
+
+
 class SemanticError(Exception):
     """
     Raised for semantic/type-checking errors.
@@ -20,7 +23,7 @@ class SemanticError(Exception):
 
 class Symbol:
     def __init__(self, name, type_name):
-        self.name = name
+        self.name = NAMES.intern(name)
         self.type_name = type_name
 
 
@@ -56,3 +59,47 @@ class SymbolTable:
 
         return None
 
+
+class ScopeStack:
+    """
+    Nested block scopes kept flat: each name maps to the stack of symbols
+    currently bound to it (innermost last), so `lookup` costs the same at
+    any nesting depth. Names no open scope defines fall through to `parent`
+    (the global table).
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self._shadows = {}  # name -> [symbol, ...], innermost last
+        self._scopes = []   # open scopes, innermost last: {name: symbol}
+
+    def push(self):
+        self._scopes.append({})
+
+    def pop(self):
+        """Close the innermost scope; returns its {name: symbol} in definition order."""
+        scope = self._scopes.pop()
+        shadows = self._shadows
+        for name in scope:
+            stack = shadows[name]
+            stack.pop()
+            if not stack:
+                del shadows[name]
+        return scope
+
+    def define(self, symbol):
+        scope = self._scopes[-1]
+        if symbol.name in scope:
+            raise SemanticError("Redefinition of " + symbol.name)
+        scope[symbol.name] = symbol
+        self._shadows.setdefault(symbol.name, []).append(symbol)
+
+    def lookup(self, name):
+        stack = self._shadows.get(name)
+        if stack:
+            return stack[-1]
+
+        if self.parent is not None:
+            return self.parent.lookup(name)
+
+        return None
@@ -1,13 +1,15 @@
 from parser.ast import *
+from parser.visitor import ASTVisitor
 from symbol_table import *
 
 
-class TypeChecker:
+class TypeChecker(ASTVisitor):
 
     def __init__(self):
         self.supported_types = ["int", "uint32", "float", "bool", "char", "void"]
         self.global_symbols = SymbolTable()
         self.current_function_def = None
+        self._scope = None      # scope of the expression being checked
         self._loop_depth = 0    # for continue: must be inside a loop
         self._switch_depth = 0  # for break: also valid inside switch
 
@@ -22,7 +24,13 @@ class TypeChecker:
         raise SemanticError(msg, line=line, column=col)
 
     def analyze(self, program):
+        self.declare_functions(program)
 
+        for function in program.functions:
+            self.check_function(function)
+
+    def declare_functions(self, program):
+        """Check every signature and define it in the global scope."""
         for function in program.functions:
             if function.return_type not in self.supported_types:
                 self._err("Invalid return type", function)
@@ -40,44 +48,45 @@ class TypeChecker:
         if self.global_symbols.lookup("main") is None:
             self._err("main function missing", program)
 
-        for function in program.functions:
-            self.check_function(function)
-
     def check_function(self, function_def):
         self.current_function_def = function_def
-        function_scope = SymbolTable(self.global_symbols)
+        scopes = ScopeStack(self.global_symbols)
+        scopes.push()
 
         for param in function_def.params:
-            function_scope.define(VarSymbol(param.name, param.param_type))
+            param.symbol = VarSymbol(param.name, param.param_type)
+            scopes.define(param.symbol)
 
-        self.check_block(function_def.body, function_scope)
+        self.check_block(function_def.body, scopes)
+        scopes.pop()
         self.current_function_def = None
 
-    def check_block(self, block, parent_scope):
-        local_scope = SymbolTable(parent_scope)
+    def check_block(self, block, scopes):
+        scopes.push()
 
         for declaration in block.declarations:
             if declaration.var_type not in self.supported_types:
                 self._err("Invalid variable type", declaration)
 
-            local_scope.define(
-                VarSymbol(
-                    declaration.name,
-                    declaration.var_type,
-                    declaration.is_const,
-                    declaration.size is not None,
-                )
+            declaration.symbol = VarSymbol(
+                declaration.name,
+                declaration.var_type,
+                declaration.is_const,
+                declaration.size is not None,
             )
+            scopes.define(declaration.symbol)
 
             if declaration.initializer:
                 initializer_type = self.check_expression(
-                    declaration.initializer, local_scope
+                    declaration.initializer, scopes
                 )
                 if initializer_type != declaration.var_type:
                     self._err("Type mismatch in initialization", declaration)
 
         for statement in block.statements:
-            self.check_statement(statement, local_scope)
+            self.check_statement(statement, scopes)
+
+        scopes.pop()
 
     def check_statement(self, statement, scope):
 
@@ -167,115 +176,133 @@ class TypeChecker:
             self.check_block(statement, scope)
 
     def check_expression(self, expression, scope):
-
-        if isinstance(expression, Literal):
-            return expression.kind
-
-        if isinstance(expression, Variable):
-            symbol = scope.lookup(expression.name)
+        self._scope = scope
+        return self.visit(expression)
+
+    # Expression visitors (see parser.visitor): `yield child` type-checks a
+    # subexpression in the current scope and evaluates to its type. Every
+    # name is resolved here, once: the symbol is stored on the node
+    # (`node.symbol`) for the passes that run after checking.
+
+    def visit_Literal(self, expression):
+        return expression.kind
+
+    def visit_Variable(self, expression):
+        symbol = self._scope.lookup(expression.name)
+        if symbol is None:
+            self._err("Variable not declared", expression)
+        if isinstance(symbol, FunctionSymbol):
+            self._err("Function used as variable", expression)
+        expression.symbol = symbol
+        return symbol.type_name
+
+    def visit_Assign(self, expression):
+        scope = self._scope
+        # Assignment targets may be either:
+        #   - a variable:    x = expr;
+        #   - an array elem: arr[i] = expr;
+        if isinstance(expression.target, Variable):
+            symbol = scope.lookup(expression.target.name)
             if symbol is None:
-                self._err("Variable not declared", expression)
-            if isinstance(symbol, FunctionSymbol):
-                self._err("Function used as variable", expression)
+                self._err("Variable not declared", expression.target)
+            expression.target.symbol = symbol
+            value_type = yield expression.value
+            if value_type != symbol.type_name:
+                self._err("Assignment type mismatch", expression)
             return symbol.type_name
 
-        if isinstance(expression, Assign):
-            # Assignment targets may be either:
-            #   - a variable:    x = expr;
-            #   - an array elem: arr[i] = expr;
-            if isinstance(expression.target, Variable):
-                symbol = scope.lookup(expression.target.name)
-                if symbol is None:
-                    self._err("Variable not declared", expression.target)
-                value_type = self.check_expression(expression.value, scope)
-                if value_type != symbol.type_name:
-                    self._err("Assignment type mismatch", expression)
-                return symbol.type_name
-
-            if isinstance(expression.target, ArrayAccess):
-                symbol = scope.lookup(expression.target.array.name)
-                if symbol is None:
-                    self._err("Array not declared", expression.target.array)
-                if not getattr(symbol, "is_array", False):
-                    self._err("Array not declared", expression.target.array)
-
-                index_type = self.check_expression(expression.target.index, scope)
-                if index_type not in ["int", "uint32"]:
-                    self._err("Invalid index type", expression.target.index)
-
-                value_type = self.check_expression(expression.value, scope)
-                if value_type != symbol.type_name:
-                    self._err("Assignment type mismatch", expression)
-                return symbol.type_name
-
-            self._err("Invalid assignment", expression)
-
-        if isinstance(expression, BinaryOp):
-            left_type = self.check_expression(expression.left, scope)
-            right_type = self.check_expression(expression.right, scope)
-
-            if left_type != right_type:
-                self._err("Type mismatch in binary op", expression)
-
-            if expression.op in ["+", "-", "*", "/", "%"]:
-                return left_type
-
-            if expression.op in ["<", ">", "<=", ">=", "==", "!="]:
-                return "bool"
-
-            if expression.op in ["&&", "||"]:
-                if left_type != "bool":
-                    self._err("Logical op needs bool", expression)
-                return "bool"
-
-        if isinstance(expression, UnaryOp):
-            operand_type = self.check_expression(expression.operand, scope)
-
-            if expression.op == "!":
-                if operand_type != "bool":
-                    self._err("! needs bool", expression)
-                return "bool"
-
-            if expression.op in ["-", "++", "--"]:
-                return operand_type
-
-        if isinstance(expression, Call):
-            symbol = self.global_symbols.lookup(expression.callee.name)
+        if isinstance(expression.target, ArrayAccess):
+            symbol = scope.lookup(expression.target.array.name)
             if symbol is None:
-                self._err("Function not declared", expression)
+                self._err("Array not declared", expression.target.array)
+            if not getattr(symbol, "is_array", False):
+                self._err("Array not declared", expression.target.array)
+            expression.target.symbol = expression.target.array.symbol = symbol
 
-            if expression.callee.name == "print":
-                for arg in expression.args:
-                    self.check_expression(arg, scope)
-                return "void"
+            index_type = yield expression.target.index
+            if index_type not in ["int", "uint32"]:
+                self._err("Invalid index type", expression.target.index)
 
-            if expression.callee.name == "exit":
-                if len(expression.args) != 1:
-                    self._err("exit requires exactly one argument (exit code)", expression)
-                code_type = self.check_expression(expression.args[0], scope)
-                if code_type not in ["int", "uint32"]:
-                    self._err("exit code must be int or uint32", expression.args[0])
-                return "void"
+            value_type = yield expression.value
+            if value_type != symbol.type_name:
+                self._err("Assignment type mismatch", expression)
+            return symbol.type_name
 
-            if len(expression.args) != len(symbol.param_types):
-                self._err("Wrong number of arguments", expression)
+        self._err("Invalid assignment", expression)
 
-            for index in range(len(expression.args)):
-                argument_type = self.check_expression(expression.args[index], scope)
-                if argument_type != symbol.param_types[index]:
-                    self._err("Argument type mismatch", expression.args[index])
+    def visit_BinaryOp(self, expression):
+        left_type = yield expression.left
+        right_type = yield expression.right
 
-            return symbol.type_name
+        if left_type != right_type:
+            self._err("Type mismatch in binary op", expression)
 
-        if isinstance(expression, ArrayAccess):
-            symbol = scope.lookup(expression.array.name)
-            if symbol is None:
-                self._err("Array not declared", expression.array)
+        if expression.op in ["+", "-", "*", "/", "%"]:
+            return left_type
 
-            index_type = self.check_expression(expression.index, scope)
-            if index_type not in ["int", "uint32"]:
-                self._err("Invalid index type", expression.index)
+        if expression.op in ["<", ">", "<=", ">=", "==", "!="]:
+            return "bool"
 
-            return symbol.type_name
+        if expression.op in ["&&", "||"]:
+            if left_type != "bool":
+                self._err("Logical op needs bool", expression)
+            return "bool"
+
+        self._err("Invalid expression", expression)
+
+    def visit_UnaryOp(self, expression):
+        operand_type = yield expression.operand
+
+        if expression.op == "!":
+            if operand_type != "bool":
+                self._err("! needs bool", expression)
+            return "bool"
+
+        if expression.op in ["-", "++", "--"]:
+            return operand_type
+
+        self._err("Invalid expression", expression)
+
+    def visit_Call(self, expression):
+        symbol = self.global_symbols.lookup(expression.callee.name)
+        if symbol is None:
+            self._err("Function not declared", expression)
+        expression.callee.symbol = symbol
+
+        if expression.callee.name == "print":
+            for arg in expression.args:
+                yield arg
+            return "void"
+
+        if expression.callee.name == "exit":
+            if len(expression.args) != 1:
+                self._err("exit requires exactly one argument (exit code)", expression)
+            code_type = yield expression.args[0]
+            if code_type not in ["int", "uint32"]:
+                self._err("exit code must be int or uint32", expression.args[0])
+            return "void"
+
+        if len(expression.args) != len(symbol.param_types):
+            self._err("Wrong number of arguments", expression)
+
+        for index in range(len(expression.args)):
+            argument_type = yield expression.args[index]
+            if argument_type != symbol.param_types[index]:
+                self._err("Argument type mismatch", expression.args[index])
+
+        return symbol.type_name
+
+    def visit_ArrayAccess(self, expression):
+        symbol = self._scope.lookup(expression.array.name)
+        if symbol is None:
+            self._err("Array not declared", expression.array)
+        expression.symbol = expression.array.symbol = symbol
+
+        index_type = yield expression.index
+        if index_type not in ["int", "uint32"]:
+            self._err("Invalid index type", expression.index)
+
+        return symbol.type_name
 
-        self._err("Invalid expression", expression)
\ No newline at end of file
+    def generic_visit(self, expression):
+        self._err("Invalid expression", expression)
@@ -1,9 +1,8 @@
-"""Warn on locals and parameters that are never read (after type checking)."""
+"""Warn on locals and parameters that are never read (after or during type checking)."""
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Set
 
 from parser.ast import (
     Program,
@@ -19,74 +18,54 @@ from parser.ast import (
     Assign,
     BinaryOp,
     UnaryOp,
-    Literal,
     Variable,
     ArrayAccess,
     Call,
     SwitchStmt,
 )
+from parser.visitor import ASTVisitor
+from symbol_table import Symbol
+from type_checker import TypeChecker
 
 
-@dataclass
-class _Binding:
-    name: str
-    line: Optional[int]
-    is_param: bool
-    used: bool = False
+def _warning_text(
+    source_path: Optional[str], func_name: str, name: str, line: Optional[int], kind: str
+) -> str:
+    prefix = f"{source_path}: " if source_path else ""
+    loc = f" (line {line})" if line is not None else ""
+    return f"{prefix}warning: unused {kind} '{name}' in function '{func_name}'{loc}"
 
 
-class _UnusedInFunction:
+class _UnusedInFunction(ASTVisitor):
+    # Reads are tracked by the symbols the type checker bound to each
+    # reference (`node.symbol`), so shadowing needs no scope bookkeeping here.
+
     def __init__(self, func_name: str, source_path: Optional[str]) -> None:
         self.func_name = func_name
         self.source_path = source_path
-        self.scopes: List[dict[str, _Binding]] = []
+        self.read: Set[Symbol] = set()
         self.warnings: List[str] = []
 
-    def _prefix(self) -> str:
-        if self.source_path:
-            return f"{self.source_path}: "
-        return ""
-
-    def _warn(self, b: _Binding, kind: str) -> None:
-        loc = f" (line {b.line})" if b.line is not None else ""
-        self.warnings.append(
-            f"{self._prefix()}warning: unused {kind} '{b.name}' in function "
-            f"'{self.func_name}'{loc}"
-        )
-
-    def _declare(self, name: str, line: Optional[int], is_param: bool) -> None:
-        self.scopes[-1][name] = _Binding(name, line, is_param, False)
-
-    def _mark_read(self, name: str) -> None:
-        for scope in reversed(self.scopes):
-            if name in scope:
-                scope[name].used = True
-                return
-
-    def _pop_scope(self) -> None:
-        scope = self.scopes.pop()
-        for b in scope.values():
-            if not b.used:
-                self._warn(b, "parameter" if b.is_param else "variable")
+    def _report(self, decls, kind: str) -> None:
+        for d in decls:
+            if d.symbol not in self.read:
+                line = getattr(d, "line", None)
+                self.warnings.append(
+                    _warning_text(self.source_path, self.func_name, d.name, line, kind)
+                )
 
     def run(self, func: FunctionDecl) -> None:
-        self.scopes.append({})
-        for p in func.params:
-            line = getattr(p, "line", None)
-            self._declare(p.name, line, is_param=True)
         self._visit_block(func.body)
-        self._pop_scope()
+        self._report(func.params, "parameter")
 
     def _visit_block(self, block: Block) -> None:
-        self.scopes.append({})
         for d in block.declarations:
-            line = getattr(d, "line", None)
-            self._declare(d.name, line, is_param=False)
             if d.initializer is not None:
                 self._visit_expr_reads(d.initializer)
         for st in block.statements:
             self._visit_statement(st)
-        self._pop_scope()
+        # A block's locals are out of scope past its end: report them now.
+        self._report(block.declarations, "variable")
 
     def _visit_statement(self, st) -> None:
         if isinstance(st, Block):
@@ -126,36 +105,41 @@ class _UnusedInFunction:
             pass
 
     def _visit_expr_reads(self, expr) -> None:
-        if isinstance(expr, Literal):
-            return
-        if isinstance(expr, Variable):
-            self._mark_read(expr.name)
-            return
-        if isinstance(expr, ArrayAccess):
-            self._mark_read(expr.array.name)
-            self._visit_expr_reads(expr.index)
-            return
-        if isinstance(expr, BinaryOp):
-            self._visit_expr_reads(expr.left)
-            self._visit_expr_reads(expr.right)
-            return
-        if isinstance(expr, UnaryOp):
-            self._visit_expr_reads(expr.operand)
-            return
-        if isinstance(expr, Assign):
-            if isinstance(expr.target, Variable):
-                self._visit_expr_reads(expr.value)
-            elif isinstance(expr.target, ArrayAccess):
-                self._mark_read(expr.target.array.name)
-                self._visit_expr_reads(expr.target.index)
-                self._visit_expr_reads(expr.value)
-            return
-        if isinstance(expr, Call):
-            if isinstance(expr.callee, Variable):
-                self._mark_read(expr.callee.name)
-            for a in expr.args:
-                self._visit_expr_reads(a)
-            return
+        self.visit(expr)
+
+    # Expression visitors (see parser.visitor): mark every name an expression
+    # reads; `yield child` visits a subexpression.
+
+    def visit_Variable(self, expr: Variable) -> None:
+        self.read.add(expr.symbol)
+
+    def visit_ArrayAccess(self, expr: ArrayAccess):
+        self.read.add(expr.symbol)
+        yield expr.index
+
+    def visit_BinaryOp(self, expr: BinaryOp):
+        yield expr.left
+        yield expr.right
+
+    def visit_UnaryOp(self, expr: UnaryOp):
+        yield expr.operand
+
+    def visit_Assign(self, expr: Assign):
+        if isinstance(expr.target, Variable):
+            yield expr.value
+        elif isinstance(expr.target, ArrayAccess):
+            self.read.add(expr.target.symbol)
+            yield expr.target.index
+            yield expr.value
+
+    def visit_Call(self, expr: Call):
+        # The callee is a function symbol, never a local.
+        for a in expr.args:
+            yield a
+
+    def generic_visit(self, expr) -> None:
+        # Literals (and anything unexpected) read nothing.
+        return None
 
 
 def unused_variable_warnings(program: Program, source_path: Optional[str] = None) -> List[str]:
@@ -169,3 +153,58 @@ def unused_variable_warnings(program: Program, source_path: Optional[str] = None
         w.run(fn)
         out.extend(w.warnings)
     return out
+
+
+class _CheckerRecordingReads(TypeChecker):
+    # The type checker already resolves every reference; recording the
+    # symbols it resolves for reads gives the same answer as _UnusedInFunction
+    # without walking the function a second time.
+
+    def __init__(self, source_path: Optional[str]) -> None:
+        super().__init__()
+        self.source_path = source_path
+        self.read: Set[Symbol] = set()
+        self.warnings: List[str] = []
+
+    def _report(self, func_name: str, decls, kind: str) -> None:
+        for d in decls:
+            if d.symbol not in self.read:
+                line = getattr(d, "line", None)
+                self.warnings.append(
+                    _warning_text(self.source_path, func_name, d.name, line, kind)
+                )
+
+    def check_function(self, function_def):
+        self.read = set()
+        super().check_function(function_def)
+        self._report(function_def.name, function_def.params, "parameter")
+
+    def check_block(self, block, scopes):
+        super().check_block(block, scopes)
+        self._report(self.current_function_def.name, block.declarations, "variable")
+
+    def visit_Variable(self, expression):
+        type_name = super().visit_Variable(expression)
+        self.read.add(expression.symbol)
+        return type_name
+
+    def visit_ArrayAccess(self, expression):
+        type_name = yield from super().visit_ArrayAccess(expression)
+        self.read.add(expression.symbol)
+        return type_name
+
+    def visit_Assign(self, expression):
+        type_name = yield from super().visit_Assign(expression)
+        if isinstance(expression.target, ArrayAccess):
+            self.read.add(expression.target.symbol)
+        return type_name
+
+
+def check_and_find_unused(program: Program, source_path: Optional[str] = None) -> List[str]:
+    """
+    Type-check `program` (raising SemanticError like TypeChecker.analyze) and
+    return the same warnings as unused_variable_warnings, from the one walk.
+    """
+    checker = _CheckerRecordingReads(source_path)
+    checker.analyze(program)
+    return checker.warnings
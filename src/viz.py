@@ -1,10 +1,14 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Tuple, Optional, Set
+from typing import Dict, List
 
 from parser.ast import ASTNode, Program
-from ir.ir import IRProgram, IRFunction, Instruction
+from parser.visitor import walk
+from ir.ir import IRProgram
+from ir.opcodes import LABEL, JMP, JMP_IF, JMP_IF_NOT, PHI, RET, EXIT
+
+_NO_FALL_THROUGH = {JMP, RET, EXIT}
+_COND_JUMPS = {JMP_IF, JMP_IF_NOT}
 
 
 def _escape_label(s: str) -> str:
@@ -26,47 +30,32 @@ def ast_to_dot(program: Program) -> str:
         "  rankdir=TB;",
     ]
 
-    next_id = 0
-
-    def new_id() -> str:
-        nonlocal next_id
-        nid = f"n{next_id}"
-        next_id += 1
-        return nid
-
     def node_label(node: ASTNode) -> str:
-        cls = node.__class__.__name__
-        # try to show some main fields in the node label if present
+        cls = node.node_type
+        # try to show some main fields in the node label if present; a
+        # subtree (Assign.value, ReturnStmt.value) is drawn as a child instead
         important_fields = []
         for key in ("name", "op", "value", "kind"):
             if hasattr(node, key):
-                important_fields.append(f"{key}={getattr(node, key)!r}")
+                v = getattr(node, key)
+                if not isinstance(v, ASTNode):
+                    important_fields.append(f"{key}={v!r}")
         if important_fields:
             return _escape_label(cls + "\\n" + ", ".join(important_fields))
         return _escape_label(cls)
 
-    def visit(node: ASTNode, parent_id: Optional[str], field_name: Optional[str]) -> str:
-        nid = new_id()
-        lines.append(f"  {nid} [label=\"{node_label(node)}\"];")
-        if parent_id is not None:
-            if field_name:
-                lines.append(
-                    f"  {parent_id} -> {nid} [label=\"{_escape_label(field_name)}\"];"
-                )
-            else:
-                lines.append(f"  {parent_id} -> {nid};")
-
-        for key, value in getattr(node, "__dict__", {}).items():
-            if isinstance(value, ASTNode):
-                visit(value, nid, key)
-            elif isinstance(value, list):
-                for idx, elem in enumerate(value):
-                    if isinstance(elem, ASTNode):
-                        visit(elem, nid, f"{key}[{idx}]")
-        return nid
-
-    if isinstance(program, Program):
-        visit(program, None, None)
+    if isinstance(program, ASTNode) and program.node_type == "Program":
+        # Preorder, so node n<i> is the i-th node visited.
+        for index, (node, parent, field_name) in enumerate(walk(program)):
+            nid = f"n{index}"
+            lines.append(f"  {nid} [label=\"{node_label(node)}\"];")
+            if parent is not None:
+                if field_name:
+                    lines.append(
+                        f"  n{parent} -> {nid} [label=\"{_escape_label(field_name)}\"];"
+                    )
+                else:
+                    lines.append(f"  n{parent} -> {nid};")
 
     lines.append("}")
     return "\n".join(lines)
@@ -74,101 +63,12 @@ def ast_to_dot(program: Program) -> str:
 
 # CFG to DOT
 
-@dataclass
-class BasicBlock:
-    name: str
-    start_idx: int
-    end_idx: int
-    instructions: List[Instruction]
-    successors: List[str]
-
-
-def _build_basic_blocks(func: IRFunction) -> Dict[str, BasicBlock]:
-    insns = func.instructions
-    if not insns:
-        return {}
-
-    label_to_idx: Dict[str, int] = {}
-    for i, insn in enumerate(insns):
-        if insn.op == "LABEL":
-            label_to_idx[insn.args[0]] = i
-
-    leaders: Set[int] = {0}
-
-    for i, insn in enumerate(insns):
-        op = insn.op
-        if op == "LABEL":
-            leaders.add(i)
-        if op in ("JMP", "JMP_IF", "JMP_IF_NOT"):
-            target_label = insn.args[-1]
-            if target_label in label_to_idx:
-                leaders.add(label_to_idx[target_label])
-            if i + 1 < len(insns):
-                leaders.add(i + 1)
-
-    sorted_leaders = sorted(leaders)
-    idx_to_block_name: Dict[int, str] = {}
-    blocks: Dict[str, BasicBlock] = {}
-
-    for bi, start in enumerate(sorted_leaders):
-        end = (
-            sorted_leaders[bi + 1]
-            if bi + 1 < len(sorted_leaders)
-            else len(insns)
-        )
-        name = f"{func.name}_B{bi}"
-        idx_to_block_name[start] = name
-        block_insns = insns[start:end]
-        blocks[name] = BasicBlock(
-            name=name,
-            start_idx=start,
-            end_idx=end,
-            instructions=block_insns,
-            successors=[],
-        )
-
-    starts = sorted(idx_to_block_name.keys())
-    start_to_next_block_name: Dict[int, Optional[str]] = {}
-    for i, s in enumerate(starts):
-        nxt = starts[i + 1] if i + 1 < len(starts) else None
-        start_to_next_block_name[s] = idx_to_block_name.get(nxt) if nxt is not None else None
-
-    for start, block_name in idx_to_block_name.items():
-        block = blocks[block_name]
-        if not block.instructions:
-            continue
-        last = block.instructions[-1]
-        op, args = last.op, last.args
-
-        if op == "JMP":
-            target = args[0]
-            if target in label_to_idx:
-                succ_block = idx_to_block_name.get(label_to_idx[target])
-                if succ_block:
-                    block.successors.append(succ_block)
-        elif op in ("JMP_IF", "JMP_IF_NOT"):
-            cond, target = args[0], args[1]
-            if target in label_to_idx:
-                succ_block = idx_to_block_name.get(label_to_idx[target])
-                if succ_block:
-                    block.successors.append(succ_block)
-            fall_through = start_to_next_block_name.get(start)
-            if fall_through:
-                block.successors.append(fall_through)
-        elif op in ("RET", "EXIT"):
-            pass
-        else:
-            fall_through = start_to_next_block_name.get(start)
-            if fall_through:
-                block.successors.append(fall_through)
-
-    return blocks
-
-
 def cfg_to_dot(program: IRProgram) -> str:
     """
     Emit a control-flow graph (one node per basic block, edges = successors)
-    as Graphviz DOT. Uses _build_basic_blocks per IR function.
+    as Graphviz DOT, from each IR function's `cfg()`. In SSA form an edge
+    into a block with PHIs is labelled with the values it carries
+    (`x=%3`), one per PHI.
     """
     lines: List[str] = [
         "digraph CFG {",
@@ -177,14 +77,15 @@ def cfg_to_dot(program: IRProgram) -> str:
     ]
 
     for func in program.functions:
-        blocks = _build_basic_blocks(func)
+        blocks = func.cfg().blocks
         if not blocks:
             continue
 
         lines.append(f"  subgraph \"cluster_{func.name}\" {{")
         lines.append(f"    label=\"{_escape_label(func.name)}\";")
 
-        for bname, block in blocks.items():
+        names = [f"{func.name}_B{block.index}" for block in blocks]
+        for bname, block in zip(names, blocks):
             ins_bits: List[str] = []
             for insn in block.instructions:
                 ins_bits.append(_escape_label(repr(insn)))
@@ -192,9 +93,15 @@ def cfg_to_dot(program: IRProgram) -> str:
             label = _escape_label(bname) + "\\n" + inner
             lines.append(f"    \"{bname}\" [label=\"{label}\"];")
 
-        for bname, block in blocks.items():
-            for succ in block.successors:
-                lines.append(f"    \"{bname}\" -> \"{succ}\";")
+        for bname, block in zip(names, blocks):
+            for succ in block.succs:
+                carried = [
+                    f"{insn.args[1]}={v!r}"
+                    for insn in succ.instructions if insn.op is PHI
+                    for lbl, v in zip(insn.args[2::2], insn.args[3::2]) if lbl == block.label
+                ]
+                attrs = f" [label=\"{_escape_label(' '.join(carried))}\"]" if carried else ""
+                lines.append(f"    \"{bname}\" -> \"{names[succ.index]}\"{attrs};")
 
         lines.append("  }")
 
@@ -220,7 +127,7 @@ def ir_linear_to_dot(program: IRProgram) -> str:
         insns = func.instructions
         label_to_idx: Dict[str, int] = {}
         for i, insn in enumerate(insns):
-            if insn.op == "LABEL":
+            if insn.op is LABEL:
                 label_to_idx[insn.args[0]] = i
 
         # Nodes
@@ -233,16 +140,16 @@ def ir_linear_to_dot(program: IRProgram) -> str:
             node_name = f"{func.name}_{i}"
             op, args = insn.op, insn.args
 
-            if op not in ("JMP", "RET", "EXIT") and i + 1 < len(insns):
+            if op not in _NO_FALL_THROUGH and i + 1 < len(insns):
                 next_name = f"{func.name}_{i + 1}"
                 lines.append(f"    \"{node_name}\" -> \"{next_name}\";")
 
-            if op == "JMP":
+            if op is JMP:
                 target = args[0]
                 if target in label_to_idx:
                     target_name = f"{func.name}_{label_to_idx[target]}"
                     lines.append(f"    \"{node_name}\" -> \"{target_name}\" [color=\"blue\"];")
-            elif op in ("JMP_IF", "JMP_IF_NOT"):
+            elif op in _COND_JUMPS:
                 target = args[1]
                 if target in label_to_idx:
                     target_name = f"{func.name}_{label_to_idx[target]}"
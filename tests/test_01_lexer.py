@@ -4,6 +4,8 @@ Each test feeds a small source snippet to the Lexer and checks the resulting
 token stream — type, value, and (where relevant) line numbers.
 """
 
+from pathlib import Path
+
 import pytest
 from lexer.lexer import Lexer, Token
 
@@ -193,3 +195,196 @@ class TestExpression:
         assert types_list == [
             "IDENTIFIER", "SYMBOL", "IDENTIFIER", "SYMBOL", "IDENTIFIER", "SYMBOL"
         ]
+
+
+# ---------------------------------------------------------------------------
+# 8. Regex engine parity
+# ---------------------------------------------------------------------------
+
+SAMPLES = sorted((Path(__file__).parent.parent / "src" / "samples").glob("*.prog"))
+
+
+def _full(src: str, engine: str):
+    return [(t.type, t.value, t.line, t.column) for t in Lexer(src, engine=engine).tokenize()]
+
+
+class TestRegexEngine:
+    @pytest.mark.parametrize("path", SAMPLES, ids=lambda p: p.name)
+    def test_samples_match_scan_engine(self, path):
+        src = path.read_text(encoding="utf-8")
+        assert _full(src, "regex") == _full(src, "scan")
+
+    @pytest.mark.parametrize("src", [
+        "'a' '\\n' '\\''",
+        '"esc \\" quote" x',
+        "a<=b&&c||!d",
+        "1.5 42 0.25",
+        "// only a comment",
+        "int\n\n  bool\n\tvoid",
+    ])
+    def test_edge_cases_match_scan_engine(self, src):
+        assert _full(src, "regex") == _full(src, "scan")
+
+    @pytest.mark.parametrize("src", ['"open', "'ab'", "'", "'\\", "x = a & b;", "x = 1.5.3;", "\n\n  #"])
+    def test_errors_match_scan_engine(self, src):
+        with pytest.raises(Exception) as scan_err:
+            Lexer(src, engine="scan").tokenize()
+        with pytest.raises(Exception) as regex_err:
+            Lexer(src, engine="regex").tokenize()
+        assert str(regex_err.value) == str(scan_err.value)
+
+    def test_unknown_engine_rejected(self):
+        with pytest.raises(ValueError):
+            Lexer("int", engine="lalr")
+
+
+# ---------------------------------------------------------------------------
+# 9. Streaming (iter_tokens)
+# ---------------------------------------------------------------------------
+
+class TestIterTokens:
+    @pytest.mark.parametrize("chunk_size", [1, 3, 64, 1 << 16])
+    def test_chunked_file_matches_tokenize(self, chunk_size):
+        import io
+
+        src = (SAMPLES[0].read_text(encoding="utf-8") + "\n'\\'' \"two\nlines\" a<=b // end")
+        expected = _full(src, "scan")
+        got = Lexer().iter_tokens(io.StringIO(src), chunk_size=chunk_size)
+        assert [(t.type, t.value, t.line, t.column) for t in got] == expected
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 12, 64])
+    def test_chunk_boundaries_inside_literals(self, chunk_size):
+        import io
+
+        srcs = [
+            "float x = 1.5;",
+            "float y = 12.25 + 3.0; print(\"a b\", 0.125);",
+            "s = \"one.two\" ; c = '.'; 7.75 // 1.5",
+        ]
+        for src in srcs:
+            expected = [(t.type, t.value, t.line, t.column) for t in Lexer(src).tokenize()]
+            got = Lexer().iter_tokens(io.StringIO(src), chunk_size=chunk_size)
+            assert [(t.type, t.value, t.line, t.column) for t in got] == expected
+
+    def test_binary_source_is_decoded(self):
+        import io
+
+        toks = list(Lexer().iter_tokens(io.BytesIO("x = 'é';".encode("utf-8")), chunk_size=1))
+        assert [t.value for t in toks] == ["x", "=", "é", ";"]
+
+    def test_is_lazy(self):
+        stream = Lexer("int x; @").iter_tokens()
+        assert next(stream).value == "int"
+        with pytest.raises(Exception, match="Unknown character"):
+            list(stream)
+
+
+# ---------------------------------------------------------------------------
+# 10. Compact TokenBuffer
+# ---------------------------------------------------------------------------
+
+class TestTokenBuffer:
+    def test_views_match_tokens(self):
+        src = SAMPLES[0].read_text(encoding="utf-8") + "\n'\\n' \"s\" 2.5 true"
+        buf = Lexer(src).tokenize_buffer()
+        assert len(buf) == len(tokenize(src))
+        assert [(t.type, t.value, t.line, t.column) for t in buf] == _full(src, "scan")
+        assert repr(buf[-1]) == repr(tokenize(src)[-1])
+
+    def test_values_are_interned(self):
+        buf = Lexer("x = x + x;").tokenize_buffer()
+        assert buf.values.count("x") == 1
+        assert buf.value_ids[0] == buf.value_ids[2] == buf.value_ids[4]
+        assert buf.nbytes() == 13 * len(buf)
+
+    def test_offsets(self):
+        buf = Lexer("int  abc;").tokenize_buffer()
+        assert (buf.starts[1], buf.ends[1]) == (5, 8)
+
+    def test_errors_match_scan_engine(self):
+        with pytest.raises(Exception, match=r"Unknown character: '#' at position 4 \(line 2\)"):
+            Lexer("int\n#").tokenize_buffer()
+
+
+# ---------------------------------------------------------------------------
+# 11. Bytes / mmap sources and interned names
+# ---------------------------------------------------------------------------
+
+def tokenize_with(src: str, engine: str):
+    return Lexer(src, engine=engine).tokenize()
+
+
+class TestBytesSource:
+    def test_mmap_matches_str_engine(self, tmp_path):
+        from lexer.lexer import map_source
+
+        src = SAMPLES[0].read_text(encoding="utf-8") + '\nprint("héllo"); // ünïcode comment\n'
+        path = tmp_path / "src.prog"
+        path.write_text(src, encoding="utf-8")
+        buf = map_source(path)
+        try:
+            got = [(t.type, t.value, t.line, t.column) for t in Lexer(buf, engine="regex").tokenize()]
+        finally:
+            buf.close()
+        assert got == _full(src, "scan")
+
+    def test_non_ascii_identifier_falls_back(self):
+        src = "int é = 'ü';"
+        assert _full(src.encode("utf-8"), "regex") == _full(src, "scan")
+
+    def test_errors_match_str_engine(self):
+        with pytest.raises(Exception, match=r"Unknown character: '#' at position 4 \(line 2\)"):
+            Lexer(b"int\n#").tokenize()
+
+    def test_empty_file(self, tmp_path):
+        from lexer.lexer import map_source
+
+        path = tmp_path / "empty.prog"
+        path.write_bytes(b"")
+        assert Lexer(map_source(path), engine="regex").tokenize() == []
+
+    @pytest.mark.parametrize("engine", ["scan", "regex", "bytes"])
+    def test_identifiers_are_interned(self, engine):
+        src = "count = count + count;"
+        toks = Lexer(src.encode(), "regex").tokenize() if engine == "bytes" else tokenize_with(src, engine)
+        names = [t.value for t in toks if t.type == "IDENTIFIER"]
+        assert names[0] is names[1] is names[2]
+
+    def test_bytes_lexing_keeps_no_global_state(self):
+        import copy
+        from lexer.names import NAMES
+
+        before = copy.deepcopy(vars(NAMES))
+        src = " ".join(f"v{i} = {i};" for i in range(500))
+        toks = Lexer(src.encode(), "regex").tokenize()
+        assert toks[0].value is tokenize("v0")[0].value
+        assert vars(NAMES) == before
+
+
+# ---------------------------------------------------------------------------
+# 12. Token kind codes
+# ---------------------------------------------------------------------------
+
+class TestTokenKinds:
+    SRC = "while (x <= 10) { a[i] = 'c' + 2.5; } // done\nreturn true;"
+
+    @pytest.mark.parametrize("make", [
+        lambda s: Lexer(s).tokenize(),
+        lambda s: Lexer(s, engine="regex").tokenize(),
+        lambda s: Lexer(s.encode("utf-8")).tokenize(),
+        lambda s: list(Lexer(s).iter_tokens()),
+        lambda s: list(Lexer(s).tokenize_buffer()),
+    ], ids=["scan", "regex", "bytes", "stream", "buffer"])
+    def test_every_engine_sets_kind(self, make):
+        from lexer.tokens import token_kind
+
+        toks = make(self.SRC)
+        assert [t.kind for t in toks] == [token_kind(t.type, t.value) for t in toks]
+
+    def test_kinds_fold_type_and_value(self):
+        from lexer import tokens as tk
+
+        toks = tokenize("while { x 1 true")
+        assert [t.kind for t in toks] == [tk.KW_WHILE, tk.SYM_LBRACE, tk.IDENT, tk.NUMBER, tk.BOOL_LIT]
+        assert tk.KIND_INFO[tk.SYM_LBRACE] == ("SYMBOL", "{")
+        assert len(set(tk.SPELLED_KINDS.values()) | set(tk.CLASS_KINDS.values())) == len(tk.KIND_TYPES)
@@ -201,3 +201,422 @@ class TestParseErrors:
 
     def test_missing_open_paren_in_if(self):
         assert_parse_error("int main() { if 1 == 1 { return 0; } }")
+
+
+# ---------------------------------------------------------------------------
+# 7. Lazy token streams
+# ---------------------------------------------------------------------------
+
+class TestTokenStream:
+    SRC = "int f(int a) { int x; x = a * 2 + 1; return x; } int main() { return f(3); }"
+
+    def test_iterator_input_builds_same_ast(self):
+        eager = Parser(Lexer(self.SRC).tokenize()).parse()
+        lazy = Parser(Lexer(self.SRC).iter_tokens()).parse()
+        assert repr(lazy) == repr(eager)
+
+    def test_error_recovery_on_stream(self):
+        src = "int main() { int x = 5 return 0; x = 1; } int g() { return 2; }"
+        eager = Parser(Lexer(src).tokenize())
+        eager.parse()
+        lazy = Parser(Lexer(src).iter_tokens())
+        prog = lazy.parse()
+        assert lazy.errors == eager.errors
+        assert [f.name for f in prog.functions] == ["main", "g"]
+
+    def test_eof_error_points_at_last_token(self):
+        p = Parser(Lexer("int main() {\n return 0;\n").iter_tokens())
+        p.parse()
+        assert p.errors == []  # unterminated block is tolerated at EOF
+        p = Parser(iter(Lexer("int main(\n").tokenize()))
+        p.parse()
+        assert p.errors and "(line 1)" in p.errors[0]
+
+    def test_peek_does_not_consume(self):
+        p = Parser(Lexer("a b c").iter_tokens())
+        assert p.peek(2).value == "c"
+        assert p.current().value == "a"
+        p.advance()
+        assert p.previous().value == "a"
+        assert p.current().value == "b"
+        assert p.peek(5) is None
+
+    def test_token_buffer_input_builds_same_ast(self):
+        eager = Parser(Lexer(self.SRC).tokenize()).parse()
+        compact = Parser(Lexer(self.SRC).tokenize_buffer()).parse()
+        assert repr(compact) == repr(eager)
+        assert compact.functions[0].body.declarations[0].line == 1
+
+
+# ---------------------------------------------------------------------------
+# 8. Shared name table
+# ---------------------------------------------------------------------------
+
+def test_names_shared_across_parser_symbols_and_ir():
+    from ir import ast_to_ir
+    from symbol_table import VarSymbol
+    from type_checker import TypeChecker
+
+    src = "int main() { int total; total = 1; return total; }"
+    prog = parse_ok(src)
+    TypeChecker().analyze(prog)
+    decl = prog.functions[0].body.declarations[0]
+    ret = prog.functions[0].body.statements[1]
+    assert decl.name is ret.value.name
+    assert VarSymbol("".join(["to", "tal"]), "int").name is decl.name
+    ir = ast_to_ir(prog)
+    store = next(i for i in ir.functions[0].instructions if i.op.name == "STORE")
+    assert store.args[0] is decl.name
+
+
+# ---------------------------------------------------------------------------
+# 9. Expression precedence (Pratt parser)
+# ---------------------------------------------------------------------------
+
+def _expr(src: str):
+    """Parse `src` as the right-hand side of `x = <src>;` and return it."""
+    prog = parse_ok("int main() { x = %s; return 0; }" % src)
+    return prog.functions[0].body.statements[0].expr.value
+
+
+def _shape(node) -> str:
+    from parser.ast import UnaryOp
+    if isinstance(node, BinaryOp):
+        return f"({_shape(node.left)} {node.op} {_shape(node.right)})"
+    if isinstance(node, UnaryOp):
+        return f"({node.op}{_shape(node.operand)})" if not node.postfix else f"({_shape(node.operand)}{node.op})"
+    if isinstance(node, Assign):
+        return f"({_shape(node.target)} = {_shape(node.value)})"
+    if isinstance(node, Variable):
+        return node.name
+    if isinstance(node, Literal):
+        return str(node.value)
+    if isinstance(node, ArrayAccess):
+        return f"{_shape(node.array)}[{_shape(node.index)}]"
+    if isinstance(node, Call):
+        return f"{_shape(node.callee)}({', '.join(_shape(a) for a in node.args)})"
+    return type(node).__name__
+
+
+class TestPrecedence:
+    @pytest.mark.parametrize("src, shape", [
+        ("a + b * c", "(a + (b * c))"),
+        ("a - b - c", "((a - b) - c)"),
+        ("a || b && c == d < e + f * g", "(a || (b && (c == (d < (e + (f * g))))))"),
+        ("a < b == c > d", "((a < b) == (c > d))"),
+        ("-a * b", "((-a) * b)"),
+        ("!a[i]++", "(!(a[i]++))"),
+        ("a = b = c + 1", "(a = (b = (c + 1)))"),
+        ("(a + b) * f(c, d)[0]", "((a + b) * f(c, d)[0])"),
+        ("- - a", "(-(-a))"),
+    ])
+    def test_tree_shape(self, src, shape):
+        assert _shape(_expr(src)) == shape
+
+    def test_operator_location_attached(self):
+        node = _expr("a\n + b")
+        assert (node.line, node.column) == (2, 2)
+        assert (node.left.line, node.right.line) == (1, 2)
+
+    @pytest.mark.parametrize("src", ["a + b = c", "-a = 1", "a || b = c", "1 = a"])
+    def test_invalid_assignment_target(self, src):
+        with pytest.raises(ParseError, match="invalid left-hand side of assignment"):
+            _expr(src)
+
+    def test_missing_operand(self):
+        with pytest.raises(ParseError, match="expected primary expression"):
+            _expr("a + ")
+
+
+# ---------------------------------------------------------------------------
+# 10. Kind-code dispatch and diagnostics
+# ---------------------------------------------------------------------------
+
+class TestKindDispatch:
+    def test_statement_kinds(self):
+        body = parse_ok(
+            "void f() { { } ; if (1) ; while (0) ; for (;;) break; "
+            "switch (1) { default: continue; } return; g(); }"
+        ).functions[0].body
+        assert [type(s).__name__ for s in body.statements] == [
+            "Block", "ExprStmt", "IfStmt", "WhileStmt", "ForStmt",
+            "SwitchStmt", "ReturnStmt", "ExprStmt",
+        ]
+
+    def test_hand_built_tokens(self):
+        from lexer.lexer import Token
+
+        toks = [Token("KEYWORD", "void", 1, 1), Token("IDENTIFIER", "f", 1, 6),
+                Token("SYMBOL", "(", 1, 7), Token("SYMBOL", ")", 1, 8),
+                Token("SYMBOL", "{", 1, 9), Token("SYMBOL", "}", 1, 10)]
+        assert Parser(toks).parse().functions[0].name == "f"
+
+    @pytest.mark.parametrize("src, message", [
+        ("int main() { return 0 }", "syntax error: expected ';', found '}' (line 1)"),
+        ("int 5() {}", "syntax error: expected an identifier, found integer literal '5' (line 1)"),
+        ("int f(", "syntax error: expected a type name (int, void, ...), found end of input (line 1)"),
+        ("int main() { int a[x]; }", "syntax error: expected an integer literal, found identifier 'x' (line 1)"),
+        ("int main() { if 1", "syntax error: expected '(', found integer literal '1' (line 1)"),
+        ("int main() { while (1", "syntax error: unexpected end of input while expecting ')' (line 1)"),
+    ])
+    def test_error_messages(self, src, message):
+        p = Parser(Lexer(src).tokenize())
+        p.parse()
+        assert p.errors[0] == message
+
+
+# ---------------------------------------------------------------------------
+# 11. Slotted nodes and the flat AST arena
+# ---------------------------------------------------------------------------
+
+_ARENA_SRC = """
+int g(int n) { return n * 2; }
+int main() {
+    const int k = 3;
+    int a[4];
+    a[0] = -g(k) + 1;
+    if (a[0] > 0 && true) { a[1] = 2; } else ;
+    switch (k) { case 3: break; default: a[2] = 'c'; }
+    for (;;) { continue; }
+    return 0;
+}
+"""
+
+
+class TestArena:
+    def test_nodes_have_no_dict(self):
+        ast = parse_ok(_ARENA_SRC)
+        assert not hasattr(ast, "__dict__")
+        assert not hasattr(ast.functions[0].body.statements[0], "__dict__")
+        with pytest.raises(AttributeError):
+            ast.functions[0].typo = 1
+
+    def test_view_matches_tree(self):
+        from parser.arena import ASTArena
+        from viz import ast_to_dot
+
+        ast = parse_ok(_ARENA_SRC)
+        arena = ASTArena.from_tree(ast)
+        view = arena.node(0)
+        assert repr(view) == repr(ast)
+        assert ast_to_dot(view) == ast_to_dot(ast)
+        ret = view.functions[0].body.statements[0]
+        assert (ret.node_type, ret.value.op, ret.line) == ("ReturnStmt", "*", 2)
+
+    def test_build_round_trip(self):
+        from parser.arena import ASTArena
+
+        ast = parse_ok(_ARENA_SRC)
+        arena = ASTArena()
+        arena.add(parse_ok("void f() {}"))
+        root = arena.add(ast)
+        assert repr(arena.build(root)) == repr(ast)
+        lit = arena.build(root).functions[1].body.statements[-1].value
+        assert type(lit) is Literal and lit.value == 0 and lit.value is not False
+
+    def test_deep_tree(self):
+        from parser.arena import ASTArena
+
+        expr = Literal("int", 0)
+        for _ in range(50_000):
+            expr = BinaryOp("+", expr, Literal("int", 1))
+        arena = ASTArena.from_tree(expr)
+        assert len(arena) == 100_001
+        assert arena.build(0).right.value == 1
+
+
+# ---------------------------------------------------------------------------
+# 12. Recursion-free AST walkers
+# ---------------------------------------------------------------------------
+
+class TestDeepTrees:
+    N = 100_000
+
+    def _deep_program(self):
+        # The chain as an assignment's and a return's value: DOT labels must
+        # not embed those subtrees.
+        chain = " + ".join(["a"] * self.N)
+        return parse_ok(f"int main() {{ int a = 1; a = {chain}; print(a < 0); return {chain}; }}")
+
+    def test_consumers_handle_deep_chains(self):
+        from type_checker import TypeChecker
+        from unused_warnings import unused_variable_warnings
+        from ir.ast_to_ir import ast_to_ir
+        from viz import ast_to_dot
+
+        ast = self._deep_program()
+        TypeChecker().analyze(ast)
+        assert unused_variable_warnings(ast) == []
+        ir = ast_to_ir(ast).functions[0]
+        assert sum(i.op.name == "ADD" for i in ir.instructions) == 2 * (self.N - 1)
+        dot = ast_to_dot(ast)
+        assert dot.count("op='+'") == 2 * (self.N - 1)
+
+    def test_deep_type_error_is_reported(self):
+        from type_checker import TypeChecker
+        from symbol_table import SemanticError
+
+        chain = " + ".join(["a"] * self.N)
+        ast = parse_ok(f"int main() {{ int a = 1; bool t = true; a = {chain} + t; return 0; }}")
+        with pytest.raises(SemanticError, match="Type mismatch in binary op"):
+            TypeChecker().analyze(ast)
+
+    def test_visitor_keeps_evaluation_order(self):
+        from parser.visitor import ASTVisitor
+
+        class Order(ASTVisitor):
+            def __init__(self):
+                self.seen = []
+
+            def visit_Variable(self, node):
+                self.seen.append(node.name)
+                return node.name
+
+            def visit_BinaryOp(self, node):
+                left = yield node.left
+                right = yield node.right
+                self.seen.append(node.op)
+                return f"({left}{node.op}{right})"
+
+        v = Order()
+        assert v.visit(_expr("a - b * c")) == "(a-(b*c))"
+        assert v.seen == ["a", "b", "c", "*", "-"]
+
+
+# ---------------------------------------------------------------------------
+# 13. Resolve-once name binding
+# ---------------------------------------------------------------------------
+
+class TestNameBinding:
+    def _checked(self, src):
+        from type_checker import TypeChecker
+
+        prog = parse_ok(src)
+        TypeChecker().analyze(prog)
+        return prog
+
+    def test_references_bind_to_their_declaration(self):
+        prog = self._checked(
+            "int main(int p) { int v = p; { int v = 2; v = v + 1; } return v; }"
+        )
+        fn = prog.functions[0]
+        outer = fn.body.declarations[0]
+        inner_block = fn.body.statements[0]
+        inner = inner_block.declarations[0]
+        assign = inner_block.statements[0].expr
+        assert outer.initializer.symbol is fn.params[0].symbol
+        assert assign.target.symbol is inner.symbol
+        assert assign.value.left.symbol is inner.symbol
+        assert fn.body.statements[1].value.symbol is outer.symbol
+
+    def test_array_and_call_bindings(self):
+        prog = self._checked(
+            "int f(int a) { return a; } int main() { int a[3]; a[0] = f(a[1]); return 0; }"
+        )
+        main = prog.functions[1]
+        assign = main.body.statements[0].expr
+        arr = main.body.declarations[0].symbol
+        assert assign.target.symbol is arr and assign.value.args[0].symbol is arr
+        assert arr.is_array
+        assert assign.value.callee.symbol.param_types == ["int"]
+
+    def test_binding_is_not_a_field(self):
+        from parser.arena import ASTArena
+
+        prog = self._checked("int main() { int x = 1; return x; }")
+        ret = prog.functions[0].body.statements[0]
+        assert [k for k, _ in ret.value.fields()] == ["name"]
+        assert "symbol" not in repr(prog)
+        rebuilt = ASTArena.from_tree(prog).build()
+        assert rebuilt.functions[0].body.statements[0].value.symbol is None
+
+    def test_scope_stack_shadowing(self):
+        from symbol_table import ScopeStack, SymbolTable, VarSymbol, FunctionSymbol, SemanticError
+
+        globals_ = SymbolTable()
+        globals_.define(FunctionSymbol("f", "int", []))
+        scopes = ScopeStack(globals_)
+        scopes.push()
+        outer = VarSymbol("x", "int")
+        scopes.define(outer)
+        scopes.push()
+        inner = VarSymbol("x", "bool")
+        scopes.define(inner)
+        assert scopes.lookup("x") is inner
+        with pytest.raises(SemanticError, match="Redefinition of x"):
+            scopes.define(VarSymbol("x", "int"))
+        assert list(scopes.pop()) == ["x"]
+        assert scopes.lookup("x") is outer
+        assert scopes.lookup("f").type_name == "int"
+        assert scopes.lookup("y") is None
+
+    def test_lowering_uses_the_binding(self):
+        from ir import ast_to_ir
+
+        prog = self._checked("int main() { int total = 1; return total; }")
+        ref = prog.functions[0].body.statements[0].value
+        ref.name = "renamed"  # IRBuilder must not go back to the name
+        load = next(i for i in ast_to_ir(prog).functions[0].instructions if i.op.name == "LOAD")
+        assert load.args[1] == "total"
+
+    def test_call_does_not_read_same_named_local(self):
+        from unused_warnings import unused_variable_warnings
+
+        prog = self._checked(
+            "int f() { return 1; } int main() { int f = 2; return f(); }"
+        )
+        assert unused_variable_warnings(prog) == [
+            "warning: unused variable 'f' in function 'main' (line 1)"
+        ]
+
+
+# ---------------------------------------------------------------------------
+# 14. Unused variables found during type checking
+# ---------------------------------------------------------------------------
+
+class TestCheckAndFindUnused:
+    SOURCES = [
+        "int main() { int a[4]; int i = 0; a[i + 1] = a[i] + 2; i++; return a[1]; }",
+        "int main() { int i; int s = 0; int u; for (i = 0; i < 3; i = i + 1) { s = s + i; } return s; }",
+        "int main() { int c = readInt(); switch (c) { case 1: print(1); break; default: exit(2); } return 0; }",
+        "int f(int a, int b) { return a; } int main() { int f = 1; return f(2, 3); }",
+        "int main() { int x = 1; while (x < 10 && true) { x = x + 1; if (x == 5) break; else continue; } return x; }",
+        "int main(int p) { int a[2]; int w; w = 1; a[0] = 1; { int v = 2; } return 0; }",
+    ]
+
+    @pytest.mark.parametrize("src", SOURCES)
+    def test_matches_the_separate_walk(self, src):
+        from type_checker import TypeChecker
+        from unused_warnings import check_and_find_unused, unused_variable_warnings
+
+        fused = parse_ok(src)
+        separate = parse_ok(src)
+        TypeChecker().analyze(separate)
+        assert check_and_find_unused(fused, "p.prog") == unused_variable_warnings(separate, "p.prog")
+
+    def test_warnings_are_reported_in_scope_order(self):
+        from unused_warnings import check_and_find_unused
+
+        ast = parse_ok("int main(int p) { int u; int v = 1; { int v = 2; } return v; }")
+        assert check_and_find_unused(ast) == [
+            "warning: unused variable 'v' in function 'main' (line 1)",
+            "warning: unused variable 'u' in function 'main' (line 1)",
+            "warning: unused parameter 'p' in function 'main' (line 1)",
+        ]
+
+    @pytest.mark.parametrize("src, message", [
+        ("int main() { int a[4]; bool b = true; a[b] = 1; return 0; }", "Invalid index type"),
+        ("int main() { int i; for (i = 0; i < 3; i = i + true) { } return 0; }", "Type mismatch in binary op"),
+        ("int main() { char c = 'x'; switch (c) { case 1: break; } return 0; }", "case value type"),
+        ("int f() { return 1; }", "main function missing"),
+    ])
+    def test_semantic_errors_match(self, src, message):
+        from symbol_table import SemanticError
+        from type_checker import TypeChecker
+        from unused_warnings import check_and_find_unused
+
+        with pytest.raises(SemanticError, match=message) as fused:
+            check_and_find_unused(parse_ok(src))
+        with pytest.raises(SemanticError) as separate:
+            TypeChecker().analyze(parse_ok(src))
+        assert (str(fused.value), fused.value.line) == (str(separate.value), separate.value.line)
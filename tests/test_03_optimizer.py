@@ -0,0 +1,540 @@
+"""Optimizer unit tests.
+
+Lower small source programs to IR, run optimization pipelines over them and
+check the pipeline machinery (presets, fixed-point groups, change tracking,
+per-pass timing) as well as the resulting IR.
+"""
+
+import json
+import pickle
+
+import pytest
+from lexer.lexer import Lexer
+from parser.parser import Parser
+from type_checker import TypeChecker
+from ir import (
+    ast_to_ir, validate, encode_ir, decode_ir, ir_to_text, ir_from_text, IRFormatError,
+    IRValidationError,
+)
+from ir.ir import ADD, CONST, I, Instruction, IRFunction, IRProgram, Temp, temp
+from ir.def_use import DefUse
+from ir.opcodes import Opcode
+from phase_report import PhaseReport, ir_size
+from optimizer import (
+    PassManager, FixedPoint, PASSES, PRESETS, pipeline_for,
+    constant_folding, constant_propagation, parallel,
+)
+
+
+def lower(src: str) -> IRProgram:
+    ast = Parser(Lexer(src).tokenize()).parse()
+    TypeChecker().analyze(ast)
+    program = ast_to_ir(ast)
+    validate(program)
+    return program
+
+
+FOLDABLE = """
+int twice(int a) { return a * 2; }
+int main() {
+    int x = 2 + 3;
+    int y = x * 4;
+    print(y + 1);
+    return twice(y);
+}
+"""
+
+
+def ops(program: IRProgram, fn: str = "main"):
+    func = next(f for f in program.functions if f.name == fn)
+    return [i.op.name for i in func.instructions]
+
+
+# ---------------------------------------------------------------------------
+# 1. Pass manager and pipelines
+# ---------------------------------------------------------------------------
+
+class TestPassManager:
+    def test_o2_matches_hand_sequenced_passes(self):
+        program = lower(FOLDABLE)
+        p = constant_folding(program).program
+        while True:
+            r = constant_propagation(p)
+            p = r.program
+            if r.total_propagated == 0:
+                break
+            c = constant_folding(p)
+            p = c.program
+            if c.total_folds == 0:
+                break
+        expected = repr(PassManager(["sr", "dce", "cse", "cp", "peephole", "bb", "dce2"]).run(p).program)
+        assert repr(PassManager(pipeline_for(2)).run(program).program) == expected
+
+    def test_presets_produce_valid_ir(self):
+        program = lower(FOLDABLE)
+        sizes = []
+        for level in sorted(PRESETS):
+            result = PassManager(pipeline_for(level)).run(program)
+            validate(result.program)
+            sizes.append(sum(len(f.instructions) for f in result.program.functions))
+        assert sizes[0] == sum(len(f.instructions) for f in program.functions)
+        assert sizes[0] >= sizes[1] >= sizes[2] >= sizes[3]
+
+    def test_fixed_point_propagates_through_chains(self):
+        program = lower(FOLDABLE)
+        result = PassManager(["cf", FixedPoint("cprop", "cf"), "dce"]).run(program)
+        assert "MUL" not in ops(result.program)
+        assert "CONST" in ops(result.program)
+        assert result.stats_per_pass["cprop"]["main"] > 0
+
+    def test_fixed_point_stops_when_a_round_changes_nothing(self):
+        reports = []
+        PassManager([FixedPoint("cprop", "cf")], on_step=reports.append).run(lower(FOLDABLE))
+        group = reports[-1]
+        assert group.name == "cprop+cf"
+        assert group.rounds >= 2
+        # The last round's inner steps report no changes.
+        assert [r.total_changes for r in reports[-3:-1]] == [0, 0]
+
+    def test_unchanged_functions_are_skipped(self):
+        program = lower(FOLDABLE)
+        result = PassManager(["cf", "cf", "cf"]).run(program)
+        # `twice` has nothing to fold: runs 2 and 3 skip it. `main` changes in
+        # run 1, is found unchanged by run 2 and is skipped by run 3.
+        assert result.skipped_runs == 3
+        twice = next(f for f in result.program.functions if f.name == "twice")
+        assert twice is program.functions[0]  # untouched functions are not copied
+
+    def test_pipeline_for_filters_passes(self):
+        steps = pipeline_for(2, {"cprop", "dce"})
+        assert len(steps) == 2 and isinstance(steps[0], FixedPoint)
+        assert steps[0].steps == ["cprop"] and steps[1] == "dce"
+        assert pipeline_for(3, set()) == []
+
+    def test_step_reports_and_summary(self):
+        reports = []
+        result = PassManager(pipeline_for(1), on_step=reports.append).run(lower(FOLDABLE))
+        assert reports[0].name == "cf" and reports[-1].name == "dce"
+        assert reports[-2].name == "cprop+cf"
+        assert reports[0].summary().startswith("Constant Folding Pass:")
+        assert reports[-2].summary().startswith("Fixed-point group cprop+cf:")
+        assert result.summary().splitlines()[0] == "Optimization Pipeline:"
+        assert set(result.stats_per_pass) == {"cf", "cprop", "dce"}
+
+    def test_every_pass_is_registered(self):
+        assert list(PASSES) == [
+            "cf", "cprop", "sr", "dce", "cse", "cp", "peephole", "bb", "dce2", "ssa", "unssa",
+        ]
+        assert PRESETS[0] == []
+        assert all("ssa" not in pipeline_for(level) for level in PRESETS)
+
+
+# ---------------------------------------------------------------------------
+# 2. Phase report
+# ---------------------------------------------------------------------------
+
+class TestPhaseReport:
+    def test_passes_are_timed_with_ir_counts(self):
+        program = lower(FOLDABLE)
+        report = PhaseReport()
+        result = PassManager(pipeline_for(1), report=report).run(program)
+        assert list(report.phases) == ["opt:cf", "opt:cprop", "opt:dce"]
+        cf = report.phases["opt:cf"]
+        assert cf.calls >= 2  # once on its own, then inside the fixed-point group
+        assert cf.ir_before == ir_size(program)
+        assert report.phases["opt:dce"].ir_after == ir_size(result.program)
+        assert all(ph.wall >= 0 and ph.peak is None for ph in report.phases.values())
+
+    def test_report_does_not_change_the_result(self):
+        program = lower(FOLDABLE)
+        plain = PassManager(pipeline_for(3)).run(program)
+        timed = PassManager(pipeline_for(3), report=PhaseReport()).run(program)
+        assert repr(plain.program) == repr(timed.program)
+
+    def test_memory_peak_and_json(self):
+        report = PhaseReport(memory=True)
+        with report.phase("alloc"):
+            blob = [0] * 100_000
+        report.close()
+        assert report.phases["alloc"].peak >= 800_000
+        data = json.loads(report.to_json())
+        assert data["phases"][0]["name"] == "alloc" and data["phases"][0]["calls"] == 1
+        assert "Peak KiB" in report.table()
+        del blob
+
+
+# ---------------------------------------------------------------------------
+# 3. IR serialization
+# ---------------------------------------------------------------------------
+
+class TestIRSerialization:
+    def test_binary_and_text_round_trip(self):
+        for program in (lower(FOLDABLE), PassManager(pipeline_for(3)).run(lower(FOLDABLE)).program):
+            data = encode_ir(program)
+            assert len(data) < len(ir_to_text(program)) / 2
+            for loaded in (decode_ir(data), ir_from_text(ir_to_text(program))):
+                assert loaded == program and repr(loaded) == repr(program)
+
+    def test_unusual_operands(self):
+        program = IRProgram([IRFunction("f", "void", ["x"], ["float"], [
+            CONST("%0", "float", 1e20), CONST("%1", "bool", True), CONST("%2", "int", -7),
+            CONST("%3", "string", 'say "hi" to me'), I("CALL", "", "g", 0), I("RET", ""),
+        ])])
+        for loaded in (decode_ir(encode_ir(program)), decode_ir(ir_to_text(program))):
+            assert loaded == program and repr(loaded) == repr(program)
+        assert type(loaded.functions[0].instructions[1].args[1][1]) is bool
+
+    def test_bad_input_is_rejected(self):
+        data = encode_ir(lower(FOLDABLE))
+        with pytest.raises(IRFormatError, match="truncated"):
+            decode_ir(data[:-3])
+        with pytest.raises(IRFormatError, match="version 9"):
+            decode_ir(data[:4] + bytes([9]) + data[5:])
+        with pytest.raises(IRFormatError, match="version 9"):
+            decode_ir(ir_to_text(lower(FOLDABLE)).replace("text 1", "text 9", 1))
+        with pytest.raises(IRFormatError, match="line 2"):
+            ir_from_text("; IR text 1\nLOAD %0 x\n")
+
+
+# ---------------------------------------------------------------------------
+# 4. Parallel pipeline
+# ---------------------------------------------------------------------------
+
+MANY_FUNCTIONS = "".join(
+    f"int f{i}(int a) {{ int x = {i} * 2; int y = a + 0; return y * x + {i} % 3; }}\n"
+    for i in range(12)
+) + FOLDABLE
+
+
+class TestParallelPipeline:
+    @pytest.mark.parametrize("level", [1, 2, 3])
+    def test_matches_the_serial_pipeline(self, level):
+        program = lower(MANY_FUNCTIONS)
+        serial_report, parallel_report = PhaseReport(), PhaseReport()
+        serial = PassManager(pipeline_for(level), report=serial_report).run(program)
+        result = PassManager(pipeline_for(level), report=parallel_report, jobs=3,
+                             min_parallel_size=0).run(program)
+        assert repr(result.program) == repr(serial.program)
+        assert result.stats_per_pass == serial.stats_per_pass
+        assert list(parallel_report.phases) == list(serial_report.phases)
+        for name, ph in parallel_report.phases.items():
+            assert ph.ir_after == serial_report.phases[name].ir_after
+
+    def test_small_programs_and_step_hooks_stay_serial(self, monkeypatch):
+        def fail(*args):
+            raise AssertionError("ran in parallel")
+
+        monkeypatch.setattr(parallel, "run_parallel", fail)
+        program = lower(MANY_FUNCTIONS)
+        PassManager(pipeline_for(2), jobs=4).run(program)
+        PassManager(pipeline_for(2), jobs=4, min_parallel_size=0, on_step=lambda step: None).run(program)
+
+    def test_chunks_keep_function_order(self):
+        functions = lower(MANY_FUNCTIONS).functions
+        chunks = parallel._split(functions, 4)
+        assert len(chunks) == 4 and [f for c in chunks for f in c] == functions
+
+
+# ---------------------------------------------------------------------------
+# 5. IR core
+# ---------------------------------------------------------------------------
+
+class TestIRCore:
+    def test_constructors_take_names_and_temp_text(self):
+        ins = ADD("%2", "%0", "%1")
+        assert ins.op is Opcode.ADD and ins == I("ADD", temp(2), temp(0), temp(1))
+        assert all(a is temp(n) for a, n in zip(ins.args, (2, 0, 1)))
+        assert repr(ins) == "ADD %2 %0 %1" and repr(I("CALL", "", "g", 0)) == "CALL  g 0"
+        assert temp(0) and not hasattr(ins, "__dict__")
+        with pytest.raises(ValueError, match="unknown IR op"):
+            Instruction("FROB")
+
+    def test_comparing_an_opcode_with_its_name_fails_loudly(self):
+        ins = I("STORE", "x", temp(0))
+        for compare in (lambda: ins.op == "STORE", lambda: "STORE" != ins.op,
+                        lambda: ins.op in ("LOAD", "STORE")):
+            with pytest.raises(TypeError, match="Opcode compared with the string"):
+                compare()
+        assert ins.op == Opcode.STORE == 3 and ins.op != Opcode.LOAD
+        assert {Opcode.STORE: 1}[3] == 1 and Opcode[str(ins.op)] is ins.op
+
+    def test_lowered_temps_are_shared_ints(self):
+        temps = {a for f in lower(FOLDABLE).functions for i in f.instructions
+                 for a in i.args if isinstance(a, Temp)}
+        assert temps and all(t is temp(int(t)) for t in temps)
+        assert all(pickle.loads(pickle.dumps(t)) is t for t in temps)
+
+    def test_temp_text_inside_constants_stays_text(self):
+        program = IRProgram([IRFunction("f", "void", [], [], [CONST("%0", "string", "%1")])])
+        for loaded in (decode_ir(encode_ir(program)), decode_ir(ir_to_text(program))):
+            assert loaded.functions[0].instructions[0].args == [temp(0), ("string", "%1")]
+
+
+# ---------------------------------------------------------------------------
+# 6. In-place editing
+# ---------------------------------------------------------------------------
+
+class TestInPlaceEditing:
+    def test_edits_bump_the_epoch_and_leave_copies_alone(self):
+        func = IRFunction("f", "int", [], [], [CONST("%0", "int", 1), I("RET", "%0")])
+        snap = func.copy()
+        func.insert(1, CONST("%1", "int", 2))
+        func.replace(1, ADD("%1", "%0", "%0"), I("PRINT", "%1"))
+        func.erase(2)
+        func.erase()
+        assert func.epoch == 3 and snap.epoch == 0
+        assert [repr(i) for i in func.instructions] == ["CONST %0 (int:1)", "ADD %1 %0 %0", "RET %0"]
+        assert [repr(i) for i in snap.instructions] == ["CONST %0 (int:1)", "RET %0"]
+        func.set_instructions([I("RET", "")])
+        assert func.epoch == 4 and len(snap.instructions) == 2
+
+    def test_replace_all_uses_rewrites_reads_only(self):
+        func = IRFunction("f", "int", [], [], [
+            CONST("%3", "int", 1), ADD("%4", "%3", "%3"), I("CALL", "%3", "g", 3), I("RET", "%3"),
+        ])
+        before = func.instructions[0]
+        assert func.replace_all_uses(temp(3), temp(9)) == 2
+        assert func.instructions[0] is before and func.epoch == 1
+        assert [repr(i) for i in func.instructions[1:]] == ["ADD %4 %9 %9", "CALL %3 g 3", "RET %9"]
+        assert func.replace_all_uses(temp(7), temp(9)) == 0 and func.epoch == 1
+
+    def test_pipeline_leaves_its_input_and_step_snapshots_alone(self):
+        program = lower(FOLDABLE)
+        text = repr(program)
+        seen = []
+        PassManager(pipeline_for(2), on_step=lambda s: seen.append((s.program, repr(s.program)))).run(program)
+        assert repr(program) == text
+        assert all(repr(snapshot) == at_step for snapshot, at_step in seen)
+        assert constant_folding(program).total_folds > 0 and repr(program) == text
+
+    def test_def_use_chains_follow_the_edits(self):
+        func = IRFunction("f", "int", [], [], [
+            CONST("%0", "int", 1), ADD("%1", "%0", "%0"), I("PRINT", "%0", "%1"), I("RET", "%1"),
+        ])
+        du = func.def_use()
+        assert func.def_use() is du and du.num_uses(temp(0)) == 2
+        assert du.definition(temp(1)) is func.instructions[1]
+        func.insert(3, CONST("%2", "int", 5))
+        assert func.replace_all_uses(temp(1), temp(2)) == 2
+        func.erase(1)
+        fresh = DefUse(func.instructions)
+        for t in map(temp, range(3)):
+            assert du.definition(t) is fresh.definition(t)
+            assert {id(u) for u in du.users(t)} == {id(u) for u in fresh.users(t)}
+        assert du.num_uses(temp(0)) == 1 and du.num_uses(temp(2)) == 2
+        assert pickle.loads(pickle.dumps(func))._def_use is None
+
+    def test_dce_removes_a_dead_chain_in_one_sweep(self):
+        body = [CONST("%0", "int", 1)] + [ADD(f"%{i}", f"%{i - 1}", f"%{i - 1}") for i in range(1, 50)]
+        func = IRFunction("f", "void", [], [], body + [I("PRINT", "%3"), I("RET", "")])
+        result = PassManager(["dce"]).run(IRProgram([func]))
+        assert result.stats_per_pass["dce"]["f"] == 46
+        assert ops(result.program, "f") == ["CONST", "ADD", "ADD", "ADD", "PRINT", "RET"]
+
+    @pytest.mark.parametrize("live", [[], [I("PRINT", "%0")]])
+    def test_dce_counts_the_dead_readers_of_a_shared_temp(self, live):
+        readers = [ADD(f"%{i}", "%0", "%0") for i in range(1, 200)]
+        func = IRFunction("f", "void", [], [], [CONST("%0", "int", 1)] + readers + live + [I("RET", "")])
+        result = PassManager(["dce"]).run(IRProgram([func]))
+        assert result.stats_per_pass["dce"]["f"] == (199 if live else 200)
+        out = result.program.functions[0]
+        assert out.def_use().num_uses(temp(0)) == DefUse(out.instructions).num_uses(temp(0)) == len(live)
+
+
+# ---------------------------------------------------------------------------
+# 7. Control-flow graph
+# ---------------------------------------------------------------------------
+
+LOOP = """
+int main() {
+    int i = 0;
+    while (i < 3) {
+        if (i == 1) { print(i); }
+        i = i + 1;
+    }
+    return i;
+}
+"""
+
+
+class TestCFG:
+    def test_blocks_edges_and_reverse_postorder(self):
+        func = lower(LOOP).functions[0]
+        g = func.cfg()
+        assert [i for b in g.blocks for i in b.instructions] == func.instructions
+        assert all(b.instructions == func.instructions[b.start:b.end] for b in g.blocks)
+        for b in g.blocks:
+            assert all(b in s.preds for s in b.succs) and all(b in p.succs for p in b.preds)
+            last = b.instructions[-1].op.name
+            assert len(b.succs) == {"JMP": 1, "JMP_IF": 2, "JMP_IF_NOT": 2, "RET": 0}.get(last, 1)
+        rpo = g.rpo()
+        assert rpo[0] is g.entry and set(rpo) == set(g.blocks)
+        position = {b: k for k, b in enumerate(rpo)}
+        # Every block after the entry is reached from one placed before it.
+        assert all(min(position[p] for p in b.preds) < position[b] for b in rpo[1:])
+
+    def test_cached_until_the_function_changes(self):
+        func = lower(LOOP).functions[0]
+        g = func.cfg()
+        assert func.cfg() is g
+        func.erase(len(func.instructions) - 1)
+        assert func.cfg() is not g and func.cfg().epoch == func.epoch
+
+    def test_unreachable_blocks_are_not_in_rpo(self):
+        func = IRFunction("f", "int", [], [], [
+            I("FUNC_ENTRY", "f", "int"), CONST("%0", "int", 1), I("RET", "%0"),
+            I("LABEL", "L1"), I("JMP", "L1"),
+        ])
+        g = func.cfg()
+        assert len(g.blocks) == 2 and g.rpo() == [g.entry]
+        assert g.block_at("L1").succs == [g.block_at("L1")]
+
+    def test_merging_keeps_a_block_that_falls_through_in_place(self):
+        # L2 is reached only by the JMP but falls through to L3: moving it up
+        # behind the JMP_IF would make it fall into L1 instead.
+        func = IRFunction("f", "int", ["n"], ["int"], [
+            I("FUNC_ENTRY", "f", "int", "n"), I("LOAD", "%0", "n"), I("JMP_IF", "%0", "L1"),
+            I("JMP", "L2"), I("LABEL", "L1"), CONST("%1", "int", 1), I("RET", "%1"),
+            I("LABEL", "L2"), CONST("%2", "int", 2), I("LABEL", "L3"), I("RET", "%2"),
+        ])
+        result = PassManager(["bb"]).run(IRProgram([func]))
+        assert result.total_changes == 0 and result.program.functions[0] is func
+
+
+# ---------------------------------------------------------------------------
+# 8. SSA
+# ---------------------------------------------------------------------------
+
+SUM_SOME = """
+int main() {
+    int i = 0;
+    int s = 0;
+    while (i < 4) {
+        if (i == 2) { s = s + i; }
+        i = i + 1;
+    }
+    return s;
+}
+"""
+
+
+# A loop whose body has a redundant expression and a branch cf folds away;
+# the code that branch skipped computes a value a later block reads.
+LOOP_WITH_DEAD_BRANCH = """
+int g(int x) { return x * 2; }
+int main() {
+    int i = 5;
+    int a = 3;
+    int p = 0;
+    while (i > 0) {
+        i = i - 1;
+        p = (-a) % 4;
+        a = -a;
+        if (1 > 2) {
+            p = i + 5;
+            if (a > i) { print(g(p)); } else { print(a); }
+        }
+    }
+    print(p);
+    return a;
+}
+"""
+
+
+def phis(func: IRFunction):
+    return [i for i in func.instructions if i.op == Opcode.PHI]
+
+
+class TestSSA:
+    def test_dominators_and_frontiers(self):
+        g = lower(LOOP).functions[0].cfg()
+        idom = g.idoms()
+        assert set(idom) == set(g.rpo()) and idom[g.entry] is g.entry
+        assert all(g.dominates(g.entry, b) for b in g.rpo())
+        # The loop header heads a cycle: it is in the frontier of its own body.
+        header = next(b for b in g.rpo() if len(b.preds) == 2 and b.label is not None
+                      and any(g.dominates(b, p) for p in b.preds))
+        assert header in g.frontiers()[header]
+        for b in g.rpo()[1:]:
+            assert g.dominates(idom[b], b) and not g.dominates(b, idom[b])
+
+    def test_to_ssa_promotes_variables_and_places_phis(self):
+        result = PassManager(["ssa"]).run(lower(LOOP))
+        func = result.program.functions[0]
+        validate(result.program)
+        assert result.stats_per_pass["ssa"]["main"] == {"promoted": 1, "phis": 1}
+        assert not [i for i in func.instructions if i.op in (Opcode.LOAD, Opcode.STORE)]
+        g = func.cfg()
+        for phi in phis(func):
+            block = next(b for b in g.blocks if phi in b.instructions)
+            assert {lbl for lbl in phi.args[2::2]} == {p.label for p in block.preds}
+        # Running it again finds nothing left to promote.
+        again = PassManager(["ssa"]).run(result.program)
+        assert again.total_changes == 0 and again.program.functions[0] is func
+
+    @pytest.mark.parametrize("name", sorted(n for n in PASSES if n not in ("ssa", "unssa")))
+    def test_every_pass_keeps_ssa_form_valid(self, name):
+        program = lower(LOOP_WITH_DEAD_BRANCH)
+        for pipeline in (["ssa", name], ["ssa", "cf", "cprop", name]):
+            result = PassManager(pipeline).run(program)
+            validate(result.program)
+            validate(PassManager(["unssa"]).run(result.program).program)
+
+    def test_out_of_ssa_coalesces_copies(self):
+        result = PassManager(["ssa", "unssa"]).run(lower(SUM_SOME))
+        func = result.program.functions[0]
+        validate(result.program)
+        assert not phis(func)
+        # PHIs for i and s at the loop head, for s after the `if`. The copies
+        # of s on the path that skips the `if` and round the loop store what
+        # the slot already holds.
+        assert result.stats_per_pass["unssa"]["main"] == {"phis": 3, "copies": 4, "coalesced": 2}
+        stores = [repr(i) for i in func.instructions if i.op == Opcode.STORE]
+        assert stores == ["STORE i %0", "STORE s %1", "STORE s %10", "STORE i %13"]
+
+    def test_out_of_ssa_splits_an_edge_only_on_conflict(self):
+        func = IRFunction("f", "int", ["n"], ["int"], [
+            I("FUNC_ENTRY", "f", "int", "n"), I("LABEL", "L9"), I("LOAD", "%0", "n"),
+            CONST("%1", "int", 1), CONST("%2", "int", 2), I("JMP_IF", "%0", "L1"),
+            I("LABEL", "L0"), I("PHI", "%3", "x", "L9", "%1"), I("RET", "%3"),
+            I("LABEL", "L1"), I("PHI", "%4", "x", "L9", "%2"), I("RET", "%4"),
+        ])
+        validate(IRProgram([func]))
+        result = PassManager(["unssa"]).run(IRProgram([func]))
+        assert [repr(i) for i in result.program.functions[0].instructions[5:]] == [
+            "JMP_IF %0 L11", "LABEL L10", "STORE x %1",
+            "LABEL L0", "LOAD %3 x", "RET %3", "LABEL L1", "LOAD %4 x", "RET %4",
+            "LABEL L11", "STORE x %2", "JMP L1",
+        ]
+
+    def test_validator_checks_ssa_form(self):
+        head = [I("FUNC_ENTRY", "f", "int", "n"), I("LABEL", "L9"), I("LOAD", "%0", "n"),
+                I("JMP_IF", "%0", "L1"), I("LABEL", "L0"), CONST("%1", "int", 1)]
+        ok = head + [I("LABEL", "L1"), I("PHI", "%2", "x", "L9", "%0", "L0", "%1"), I("RET", "%2")]
+        validate(IRProgram([IRFunction("f", "int", ["n"], ["int"], ok)]))
+        bad = {
+            "no value for predecessor L0":
+                head + [I("LABEL", "L1"), I("PHI", "%2", "x", "L9", "%0"), I("RET", "%2")],
+            "does not reach the end of L9":
+                head + [I("LABEL", "L1"), I("PHI", "%2", "x", "L9", "%1", "L0", "%1"),
+                        I("RET", "%2")],
+            "does not dominate":
+                head + [I("LABEL", "L1"), I("PHI", "%2", "x", "L9", "%0", "L0", "%0"),
+                        I("RET", "%1")],
+            "must open its block":
+                head + [I("LABEL", "L1"), CONST("%3", "int", 3),
+                        I("PHI", "%2", "x", "L9", "%0", "L0", "%1"), I("RET", "%2")],
+        }
+        for message, body in bad.items():
+            with pytest.raises(IRValidationError, match=message):
+                validate(IRProgram([IRFunction("f", "int", ["n"], ["int"], body)]))
+
+    def test_backends_and_cfg_dot_read_ssa(self):
+        from backend.cpp_transpile import CppTranspileBackend
+        from viz import cfg_to_dot
+
+        ssa = PassManager(["ssa"]).run(lower(LOOP)).program
+        lowered = PassManager(["unssa"]).run(ssa).program
+        assert CppTranspileBackend(ssa).generate() == CppTranspileBackend(lowered).generate()
+        dot = cfg_to_dot(ssa)
+        assert "PHI" in dot and '[label="i=' in dot
@@ -0,0 +1,427 @@
+"""Compiler driver tests.
+
+Run `main.py` in-process on small programs and check what it prints and
+writes, and that the compile daemon (`--serve`) gives the same results.
+"""
+
+import contextlib
+import io
+import os
+import pickle
+import subprocess
+import sys
+import threading
+
+import pytest
+import compile_client
+import compile_server
+import main as driver
+from disk_cache import CacheEntry, DiskCache
+from ir import decode_ir
+
+
+PROGRAM = """
+int twice(int a) { return a * 2; }
+int main() {
+    int unused;
+    int x = 2 + 3;
+    print(twice(x));
+    return 0;
+}
+"""
+
+BAD_PROGRAM = "int main() { return y; }\n"
+
+
+class BadPickle:
+    def __reduce__(self):
+        return int, ("not a number",)
+
+
+def run_main(*argv) -> str:
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        driver.main(list(argv))
+    return out.getvalue()
+
+
+@pytest.fixture
+def prog(tmp_path):
+    path = tmp_path / "prog.prog"
+    path.write_text(PROGRAM, encoding="utf-8")
+    return path
+
+
+# ---------------------------------------------------------------------------
+# 1. Compile daemon
+# ---------------------------------------------------------------------------
+
+class TestCompileServer:
+    def test_matches_the_driver(self, prog, tmp_path):
+        expected_out = run_main(str(prog), "--emit-cpp", "-", "--emit-asm", str(tmp_path / "a.s"))
+        response = compile_server.handle_request(
+            {"argv": [str(prog), "--emit-cpp", "-", "--emit-asm", "out.s"]}
+        )
+        assert response["exit"] == 0
+        assert response["stdout"] == expected_out.replace(str(tmp_path / "a.s"), "out.s")
+        assert response["files"]["out.s"] == (tmp_path / "a.s").read_text(encoding="utf-8")
+
+    def test_source_text_and_cwd(self, prog):
+        by_text = compile_server.handle_request(
+            {"argv": ["prog.prog", "--emit-asm", "-"], "source": PROGRAM}
+        )
+        by_cwd = compile_server.handle_request(
+            {"argv": ["prog.prog", "--emit-asm", "-"], "cwd": str(prog.parent)}
+        )
+        assert by_text == by_cwd and by_text["exit"] == 0
+
+    def test_cache_reuses_results(self, prog):
+        cache = compile_server.LRUCache(16)
+        request = {"argv": [str(prog), "--emit-asm", "-", "--emit-cpp", "-"]}
+        first = compile_server.handle_request(request, cache)
+        assert len(cache) == 4  # function cache, front end, assembly, C++
+        assert compile_server.handle_request(request, cache) == first
+        verbose = compile_server.handle_request({"argv": [str(prog), "-v"]}, cache)
+        assert "Reusing cached front end" in verbose["stdout"]
+        assert "Incremental" not in verbose["stdout"]
+
+    def test_only_changed_functions_are_rebuilt(self, prog):
+        cache = compile_server.LRUCache(16)
+        argv = ["prog.prog", "-v", "--emit-asm", "-"]
+        edited = "int pad() { return 1; }\n\n" + PROGRAM.replace("2 + 3", "2 + 4")
+        first = compile_server.handle_request({"argv": argv, "source": PROGRAM}, cache)
+        second = compile_server.handle_request({"argv": argv, "source": edited}, cache)
+        assert "rebuilt 2 of 2 function(s): twice, main" in first["stdout"]
+        assert "rebuilt 2 of 3 function(s): pad, main" in second["stdout"]
+        quiet = ["prog.prog", "--emit-asm", "-", "--arch", "x86_64"]
+        cached = compile_server.handle_request({"argv": quiet, "source": edited}, cache)
+        assert cached == compile_server.handle_request({"argv": quiet, "source": edited})
+        # The warning moved with `main` and is reported at its new line.
+        assert "unused variable 'unused' in function 'main' (line 6)" in second["stdout"]
+
+    def test_errors_and_bad_arguments(self, tmp_path):
+        response = compile_server.handle_request({"argv": ["x.prog"], "source": BAD_PROGRAM})
+        assert response["exit"] == 1 and "[semantic]" in response["stdout"]
+        response = compile_server.handle_request({"argv": ["--optim", "bogus", "x.prog"]})
+        assert response["exit"] == 2 and "Unknown pass name" in response["stderr"]
+        response = compile_server.handle_request({"argv": [str(tmp_path / "missing.prog")]})
+        assert response["exit"] == 2 and "missing.prog" in response["stderr"]
+        for extra in (["--cache-dir", "c"], ["--cache-dir", "c", "--cache-stats"], ["--serve", "s"]):
+            response = compile_server.handle_request(
+                {"argv": ["x.prog", *extra], "source": PROGRAM, "cwd": str(tmp_path)}
+            )
+            assert response["exit"] == 2 and "no --cache-dir" in response["stderr"]
+        assert list(tmp_path.iterdir()) == [] and not os.path.exists("c")
+
+    def test_lru_cache_is_bounded(self):
+        cache = compile_server.LRUCache(max_entries=2)
+        cache["a"], cache["b"] = 1, 2
+        cache.get("a")
+        cache["c"] = 3
+        assert len(cache) == 2 and cache.get("b") is None and cache.get("a") == 1
+
+    def test_client_round_trip(self, prog, tmp_path, monkeypatch, capsys):
+        sock = str(tmp_path / "cc.sock")
+        server = compile_server.CompileServer(sock)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            monkeypatch.chdir(tmp_path)
+            status = compile_client.main(["--socket", sock, "prog.prog", "--emit-asm", "out.s"])
+            assert status == 0
+            assert "Assembly written to: out.s" in capsys.readouterr().out
+            expected = tmp_path / "expected.s"
+            run_main(str(prog), "--emit-asm", str(expected))
+            assert (tmp_path / "out.s").read_text() == expected.read_text()
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        assert not os.path.exists(sock)
+
+
+# ---------------------------------------------------------------------------
+# 2. Batch compilation
+# ---------------------------------------------------------------------------
+
+class TestBatch:
+    @pytest.fixture
+    def sources(self, tmp_path):
+        paths = []
+        for name, text in (("one", PROGRAM), ("two", PROGRAM.replace("2 + 3", "7")),
+                           ("bad", BAD_PROGRAM)):
+            path = tmp_path / f"{name}.prog"
+            path.write_text(text, encoding="utf-8")
+            paths.append(str(path))
+        return paths
+
+    def test_outputs_go_to_per_file_paths(self, sources, tmp_path):
+        out = tmp_path / "out"
+        run_main(*sources[:2], "--out-dir", str(out), "--emit-asm", "--dump-cfg-dot")
+        assert sorted(p.name for p in out.iterdir()) == ["one.cfg.dot", "one.s", "two.cfg.dot", "two.s"]
+        run_main(sources[0], "--emit-asm", str(tmp_path / "single.s"))
+        assert (out / "one.s").read_text() == (tmp_path / "single.s").read_text()
+
+    def test_errors_are_summarized_with_nonzero_status(self, sources, tmp_path):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            status = driver.main([*sources, "--out-dir", str(tmp_path / "out"), "--emit-asm"])
+        assert status == 1
+        summary = out.getvalue().split("3 source(s) compiled, 1 failed\n")[1]
+        assert summary.splitlines() == [f"  {sources[2]}:", "    [semantic] Variable not declared (line 1)"]
+        assert not (tmp_path / "out" / "bad.s").exists()
+
+    def test_worker_processes_match_serial(self, sources, tmp_path):
+        outputs = []
+        for jobs in ("1", "2"):
+            out = tmp_path / f"out{jobs}"
+            printed = run_main(*sources, "-j", jobs, "--out-dir", str(out), "--emit-cpp")
+            outputs.append((printed.replace(str(out), "OUT"),
+                            {p.name: p.read_text() for p in out.iterdir()}))
+        assert outputs[0] == outputs[1]
+
+    def test_output_paths_need_out_dir(self, sources, capsys):
+        assert driver.main([*sources[:2], "--emit-asm", "x.s"]) == 2
+        assert "need --out-dir" in capsys.readouterr().err
+        assert driver.main(["--out-dir", "unused", sources[0], sources[0]]) == 2
+        assert "share output names" in capsys.readouterr().err
+        assert driver.main(["--out-dir", "unused", "--emit-asm", *sources]) == 2
+        assert "--emit-asm takes no FILE" in capsys.readouterr().err
+
+
+# ---------------------------------------------------------------------------
+# 3. On-disk compilation cache
+# ---------------------------------------------------------------------------
+
+class TestDiskCache:
+    def test_hit_replays_the_same_output(self, prog, tmp_path):
+        argv = [str(prog), "--cache-dir", str(tmp_path / "cache"), "--emit-asm", "-", "--emit-cpp", "-"]
+        first = run_main(*argv)
+        assert "warning: unused variable 'unused'" in first
+        assert run_main(*argv) == first
+        assert "Disk cache hit" in run_main(*argv, "-v")
+        stats = DiskCache(tmp_path / "cache").stats()
+        assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 2, 1)
+
+    def test_key_covers_source_pipeline_and_arch(self, prog, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+        run_main(str(prog), "--cache-dir", cache_dir)
+        run_main(str(prog), "--cache-dir", cache_dir, "--arch", "x86_64")
+        run_main(str(prog), "--cache-dir", cache_dir, "--optim", "cf")
+        prog.write_text(PROGRAM.replace("2 + 3", "4"), encoding="utf-8")
+        run_main(str(prog), "--cache-dir", cache_dir)
+        assert DiskCache(cache_dir).stats()["entries"] == 4
+
+    def test_backend_text_is_added_to_an_entry(self, prog, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+        run_main(str(prog), "--cache-dir", cache_dir)
+        asm = run_main(str(prog), "--cache-dir", cache_dir, "--emit-asm", "-")
+        cache = DiskCache(cache_dir)
+        (entry_path,) = [p for p in (tmp_path / "cache").rglob("*") if p.is_file() and p.name != "stats"]
+        entry = cache.load(entry_path.parent.name + entry_path.name)
+        assert entry.asm is not None and entry.asm in asm and entry.cpp is None
+
+    def test_errors_and_unoptimized_dumps_are_not_cached(self, prog, tmp_path):
+        bad = tmp_path / "bad.prog"
+        bad.write_text(BAD_PROGRAM, encoding="utf-8")
+        cache_dir = str(tmp_path / "cache")
+        run_main(str(bad), "--cache-dir", cache_dir)
+        run_main(str(prog), "--cache-dir", cache_dir, "--dump-ir-before", "-")
+        assert DiskCache(cache_dir).stats()["entries"] == 0
+
+    def test_store_is_atomic_and_corrupt_entries_miss(self, tmp_path):
+        cache = DiskCache(tmp_path)
+        key = cache.key("source", "path")
+        cache.store(key, CacheEntry(["w"], None, asm="asm"))
+        assert [p.name for p in (tmp_path / key[:2]).iterdir()] == [key[2:]]
+        assert cache.load(key).asm == "asm"
+        (tmp_path / key[:2] / key[2:]).write_bytes(b"not a pickle")
+        assert cache.load(key) is None
+        assert not (tmp_path / key[:2] / key[2:]).exists()
+
+    @pytest.mark.parametrize("payload", [
+        pickle.dumps(BadPickle()),          # ValueError while unpickling
+        pickle.dumps(["not", "an entry"]),  # unpickles, but is no CacheEntry
+        pickle.dumps(CacheEntry([], None))[:-5],  # truncated
+    ], ids=["raises", "wrong-type", "truncated"])
+    def test_any_unpickling_failure_is_a_miss(self, tmp_path, payload):
+        cache = DiskCache(tmp_path)
+        key = cache.key("source")
+        cache.store(key, CacheEntry([], None))
+        (tmp_path / key[:2] / key[2:]).write_bytes(payload)
+        assert cache.load(key) is None
+        assert not (tmp_path / key[:2] / key[2:]).exists()
+        assert cache.stats()["misses"] == 1
+
+    def test_stats_file_has_a_fixed_size(self, tmp_path, monkeypatch):
+        cache = DiskCache(tmp_path)
+        keys = [cache.key(str(i)) for i in range(3)]
+        for key in keys:
+            cache.store(key, CacheEntry([], None, asm="x" * 100))
+            for _ in range(20):
+                cache.load(key)
+        size = (tmp_path / "stats").stat().st_size
+        cache.load(cache.key("missing"))
+        assert (tmp_path / "stats").stat().st_size == size
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (60, 1)
+        # Stores under the bound keep a running total instead of rescanning.
+        monkeypatch.setattr(cache, "_entries", lambda: pytest.fail("rescanned"))
+        cache.store(cache.key("3"), CacheEntry([], None))
+        assert cache._counters()[3] == sum(p.stat().st_size for p in tmp_path.rglob("*")
+                                           if p.is_file() and p.name != "stats")
+
+    def test_lru_eviction_keeps_the_size_bound(self, tmp_path):
+        cache = DiskCache(tmp_path)
+        keys = [cache.key(str(i)) for i in range(4)]
+        for i, key in enumerate(keys[:3]):
+            cache.store(key, CacheEntry([], None, asm="x" * 900))
+            os.utime(tmp_path / key[:2] / key[2:], (1000 + i, 1000 + i))
+        size = (tmp_path / keys[0][:2] / keys[0][2:]).stat().st_size
+        cache.max_bytes = 3 * size + size // 2  # room for three entries, not four
+        cache.load(keys[0])  # now the most recently used
+        cache.store(keys[3], CacheEntry([], None, asm="x" * 900))
+        assert cache.load(keys[1]) is None
+        assert all(cache.load(k) is not None for k in (keys[0], keys[2], keys[3]))
+        stats = cache.stats()
+        assert stats["bytes"] <= cache.max_bytes and stats["evictions"] == 1
+
+
+# ---------------------------------------------------------------------------
+# 4. IR files
+# ---------------------------------------------------------------------------
+
+class TestIRFiles:
+    @pytest.mark.parametrize("ir_format", ["binary", "text"])
+    def test_from_ir_reproduces_the_backend_output(self, prog, tmp_path, ir_format):
+        saved = tmp_path / "prog.ir"
+        run_main(str(prog), "--emit-ir", str(saved), "--ir-format", ir_format,
+                 "--emit-asm", str(tmp_path / "a.s"))
+        assert saved.read_bytes().startswith(b"\x7fIRB" if ir_format == "binary" else b"; IR")
+        out = run_main("--from-ir", str(saved), "-O0", "--emit-asm", str(tmp_path / "b.s"))
+        assert "unused" not in out  # warnings belong to the source, not the IR
+        assert (tmp_path / "a.s").read_text() == (tmp_path / "b.s").read_text()
+
+    def test_emit_ir_to_stdout_is_text(self, prog):
+        out = run_main(str(prog), "--emit-ir", "-")
+        assert "; IR text 1" in out and "FUNC twice(a: int) -> int" in out
+
+    def test_bad_ir_file_is_a_compile_error(self, prog, tmp_path):
+        assert driver.main(["--from-ir", str(prog)]) == 1
+        with pytest.raises(SystemExit):
+            driver.main([str(prog), "--from-ir", str(prog)])
+
+    def test_batch_and_daemon(self, prog, tmp_path):
+        other = tmp_path / "other.prog"
+        other.write_text(PROGRAM, encoding="utf-8")
+        out_dir = tmp_path / "out"
+        assert driver.main([str(prog), str(other), "--out-dir", str(out_dir), "--emit-ir", "-"]) == 0
+        assert decode_ir((out_dir / "prog.ir").read_bytes()) == decode_ir((out_dir / "other.ir").read_bytes())
+        response = compile_server.handle_request({"argv": ["--from-ir", str(out_dir / "prog.ir")]})
+        assert response["exit"] == 2 and "binary IR" in response["stderr"]
+
+
+# ---------------------------------------------------------------------------
+# 5. Startup
+# ---------------------------------------------------------------------------
+
+# Loaded on demand only; see the import comment at the top of main.py.
+LAZY_MODULES = [
+    "viz", "incremental", "batch", "compile_server", "ir.serialize",
+    "backend.x86_64", "backend.cpp_transpile", "optimizer.cse", "optimizer.basic_block",
+    "optimizer.ssa",
+    "dataclasses", "json", "tracemalloc", "pickle", "tempfile", "hashlib",
+]
+
+
+class TestStartup:
+    def run_and_list_modules(self, *argv):
+        src = os.path.dirname(driver.__file__)
+        code = (
+            "import sys, main\n"
+            f"main.main({list(argv)!r})\n"
+            "print(' '.join(sorted(sys.modules)))"
+        )
+        proc = subprocess.run([sys.executable, "-c", code], cwd=src, capture_output=True,
+                              text=True, check=True)
+        return set(proc.stdout.splitlines()[-1].split())
+
+    def test_compile_only_run_imports_no_optional_modules(self, prog, tmp_path):
+        loaded = self.run_and_list_modules(str(prog), "--optim", "none",
+                                           "--emit-asm", str(tmp_path / "out.s"))
+        assert "backend.riscv" in loaded
+        assert sorted(m for m in LAZY_MODULES if m in loaded) == []
+
+    def test_pipeline_imports_only_its_passes(self, prog, tmp_path):
+        loaded = self.run_and_list_modules(str(prog), "-O1", "--emit-asm", str(tmp_path / "out.s"))
+        passes = sorted(m for m in loaded if m.startswith("optimizer."))
+        assert passes == [
+            "optimizer.constant_folding", "optimizer.constant_propagation",
+            "optimizer.dead_code_elimination", "optimizer.pass_manager",
+        ]
+
+
+# ---------------------------------------------------------------------------
+# 6. --optim
+# ---------------------------------------------------------------------------
+
+LOOP_PROGRAM = """
+int main() {
+    int i = 0;
+    int s = 0;
+    while (i < 4) { s = s + i; i = i + 1; }
+    print(s);
+    return 0;
+}
+"""
+
+
+class TestOptimList:
+    def test_passes_outside_the_presets_run_when_named(self, tmp_path):
+        src = tmp_path / "loop.prog"
+        src.write_text(LOOP_PROGRAM, encoding="utf-8")
+        after = {name: tmp_path / f"{name}.dot" for name in ("ssa", "cf", "unssa")}
+        out = run_main(str(src), "--optim", "unssa,cf,ssa",
+                       *(arg for name, path in after.items()
+                         for arg in (f"--dump-ir-after-{name}", str(path))))
+        assert "not in the pipeline" not in out
+        assert "PHI %14 i L2 %0 L3 %10" in after["ssa"].read_text()
+        assert "PHI" in after["cf"].read_text()
+        assert "PHI" not in after["unssa"].read_text()
+
+    def test_the_default_list_leaves_them_out(self, tmp_path):
+        src = tmp_path / "loop.prog"
+        src.write_text(LOOP_PROGRAM, encoding="utf-8")
+        out = run_main(str(src), "--dump-ir-after-ssa", str(tmp_path / "ssa.dot"))
+        assert "--dump-ir-after-ssa: pass 'ssa' is not in the pipeline" in out
+
+
+# ---------------------------------------------------------------------------
+# 7. Lexer selection
+# ---------------------------------------------------------------------------
+
+class TestLexerOption:
+    @pytest.mark.parametrize("mode", ["--compact-tokens", "--stream", "--mmap"])
+    def test_regex_only_modes_reject_the_scan_engine(self, prog, capsys, mode):
+        with pytest.raises(SystemExit):
+            driver.main([str(prog), mode, "--lexer", "scan"])
+        assert f"{mode} lexes with the regex engine" in capsys.readouterr().err
+        expected = run_main(str(prog), "--emit-asm", "-")
+        assert run_main(str(prog), mode, "--lexer", "regex", "--emit-asm", "-") == expected
+        assert run_main(str(prog), mode, "--emit-asm", "-") == expected
+
+
+# ---------------------------------------------------------------------------
+# 8. Fused front end
+# ---------------------------------------------------------------------------
+
+class TestFusedFrontend:
+    def test_same_output_as_the_separate_passes(self, prog, tmp_path):
+        bad = tmp_path / "bad.prog"
+        bad.write_text(BAD_PROGRAM, encoding="utf-8")
+        expected = run_main(str(prog), "--emit-ir", "-")
+        assert "unused variable 'unused'" in expected
+        assert run_main(str(prog), "--fused-frontend", "--emit-ir", "-") == expected
+        expected = run_main(str(bad))
+        assert "Variable not declared" in expected
+        assert run_main(str(bad), "--fused-frontend") == expected